@@ -0,0 +1 @@
+"""Performance benchmarks on synthetic videos (``python -m benchmarks.run``)"""
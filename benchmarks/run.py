@@ -0,0 +1,340 @@
+"""Benchmark frame extraction and the Google API stages on synthetic videos.
+
+Generates slide videos with known change points (cached between runs), runs
+every extraction mode with every decode strategy on each of them and times
+the Drive upload and Slides stages against the local API fakes of the test
+suite. Every extraction case runs in a fresh process, so its peak RSS is its
+own. The report is written as JSON for comparison across versions:
+
+    python -m benchmarks.run --sizes 640x360,1280x720 --durations 30,120 --output bench.json
+"""
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import click
+import cv2
+import numpy as np
+from loguru import logger
+from colorama import Fore, init
+
+from benchmarks.synthetic import SyntheticVideo, cached_slides_video, draw_slide, parse_size
+from config.settings import settings
+from src.core.decoder import DecoderSettings
+from src.core.frame_extractor import FrameExtractorFactory
+from src.utils.logger import setup_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+init(autoreset=True)
+
+MODES = ('diff', 'scene', 'interval')
+STRATEGIES = ('seek', 'grab', 'ffmpeg')
+
+REPORT_VERSION = 1
+
+
+@dataclass
+class Accuracy:
+    """How well detected frames match the true change points.
+
+    A detection matches a change point when it lies at most ``tolerance``
+    frames after it; each change point matches one detection. ``latency`` is
+    the mean delay of the matched detections in frames.
+    """
+    expected: int
+    detected: int
+    matched: int
+    precision: float
+    recall: float
+    f1: float
+    latency: Optional[float]
+
+
+def score_detections(change_points: Sequence[int], detections: Sequence[int], tolerance: int) -> Accuracy:
+    detections = sorted(detections)
+    used = set()
+    delays = []
+    for change in change_points:
+        for position, frame_index in enumerate(detections):
+            if position in used or frame_index < change:
+                continue
+            if frame_index - change <= tolerance:
+                used.add(position)
+                delays.append(frame_index - change)
+            break
+    matched = len(delays)
+    precision = matched / len(detections) if detections else 0.0
+    recall = matched / len(change_points) if change_points else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return Accuracy(len(change_points), len(detections), matched, round(precision, 4), round(recall, 4),
+                    round(f1, 4), round(sum(delays) / matched, 2) if matched else None)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process and its finished children, in MiB"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+@dataclass
+class ExtractionCase:
+    video: SyntheticVideo
+    mode: str
+    strategy: str
+    interval: int
+    options: Dict
+
+    @property
+    def name(self) -> str:
+        return f"{self.video.name}/{self.mode}/{self.strategy}"
+
+
+def run_extraction_case(case: ExtractionCase, tolerance: int) -> Dict:
+    """Extract the frames of one case into a temporary directory and measure it"""
+    baseline_rss = peak_rss_mb()
+    output_dir = Path(tempfile.mkdtemp(prefix="bench-frames-"))
+    if case.strategy == 'ffmpeg':
+        decoder, decode_strategy = DecoderSettings('ffmpeg', ffmpeg_binary=settings.FFMPEG_BINARY), 'auto'
+    else:
+        decoder, decode_strategy = DecoderSettings(), case.strategy
+    try:
+        extractor = FrameExtractorFactory.create(case.mode, output_dir=output_dir, show_progress=False,
+                                                 decoder=decoder)
+        start = time.perf_counter()
+        records = list(extractor.iter_frames(str(case.video.path), interval=case.interval,
+                                             decode_strategy=decode_strategy, **case.options))
+        wall_time = time.perf_counter() - start
+        frame_bytes = sum(os.path.getsize(record.path) for record in records)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    stats = extractor.last_stats
+    timings = stats.timings
+    accuracy = score_detections(case.video.change_points, [record.frame_index for record in records],
+                                tolerance)
+    return {
+        'name': case.name,
+        'video': case.video.name,
+        'resolution': f"{case.video.width}x{case.video.height}",
+        'duration': case.video.duration,
+        'mode': case.mode,
+        'strategy': case.strategy,
+        'interval': case.interval,
+        'options': case.options,
+        'wall_time': round(wall_time, 3),
+        'video_fps': round(case.video.frames / wall_time, 1) if wall_time > 0 else None,
+        'sample_fps': round(stats.frames_sampled / wall_time, 1) if wall_time > 0 else None,
+        'realtime_factor': round(case.video.duration / wall_time, 1) if wall_time > 0 else None,
+        'frames_sampled': stats.frames_sampled,
+        'frames_saved': len(records),
+        'saved_mb': round(frame_bytes / (1024 * 1024), 2),
+        'stages': {'decode': round(timings.decode_time, 3), 'analyze': round(timings.analyze_time, 3),
+                   'write': round(timings.write_time, 3), 'max_queue_depth': timings.max_queue_depth},
+        'baseline_rss_mb': baseline_rss,
+        'peak_rss_mb': peak_rss_mb(),
+        'accuracy': asdict(accuracy),
+    }
+
+
+def _quiet_worker() -> None:
+    logger.disable('src')
+
+
+def run_isolated(function: Callable, *args):
+    """Run ``function(*args)`` in a fresh process and return its result"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn'),
+                             initializer=_quiet_worker) as executor:
+        return executor.submit(function, *args).result()
+
+
+def write_sample_frames(directory: Path, count: int, width: int, height: int, seed: int = 0) -> List[str]:
+    """Save ``count`` distinct slide images as PNG files for the upload stages"""
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for number in range(1, count + 1):
+        path = directory / f"frame_{number}.png"
+        cv2.imwrite(str(path), draw_slide(width, height, rng))
+        paths.append(str(path))
+    return paths
+
+
+def run_api_stages(frame_paths: List[str], latency: float, concurrency: int, chunk_size: int,
+                   requests_per_second: float) -> List[Dict]:
+    """Time Drive uploads (from files and streamed from memory) and Slides creation against local fakes"""
+    from src.services.google_drive import GoogleDriveService
+    from src.services.google_slides import GoogleSlidesService
+    from src.services.rate_limiter import RateLimiter
+    from tests.google_fakes import FakeDriveBackend, FakeSlidesBackend
+
+    def limiter(name: str) -> RateLimiter:
+        return RateLimiter(name, requests_per_second, backoff_max=0.01)
+
+    def result(stage: str, backend, wall_time: float, items: int) -> Dict:
+        return {'stage': stage, 'items': items, 'latency': latency, 'concurrency': concurrency,
+                'wall_time': round(wall_time, 3), 'items_per_second': round(items / wall_time, 1),
+                'requests': len(backend.requests), 'max_in_flight': backend.max_in_flight}
+
+    results = []
+    backend = FakeDriveBackend(latency=latency)
+    drive = GoogleDriveService(http_factory=backend.http, rate_limiter=limiter('drive'))
+    start = time.perf_counter()
+    urls = drive.upload_images(frame_paths, "folder", concurrency=concurrency)
+    results.append(result('drive_upload', backend, time.perf_counter() - start, len(frame_paths)))
+
+    backend = FakeDriveBackend(latency=latency)
+    drive = GoogleDriveService(http_factory=backend.http, rate_limiter=limiter('drive'))
+    payloads = [(Path(path).name, Path(path).read_bytes()) for path in frame_paths]
+    start = time.perf_counter()
+    stream = drive.open_upload_stream("folder", concurrency=concurrency)
+    for name, data in payloads:
+        stream.submit(name, data)
+    stream.close()
+    results.append(result('drive_stream', backend, time.perf_counter() - start, len(frame_paths)))
+
+    backend = FakeSlidesBackend(latency=latency)
+    backend.add_presentation("deck")
+    slides = GoogleSlidesService(http_factory=backend.http, rate_limiter=limiter('slides'))
+    start = time.perf_counter()
+    slides.batch_add_slides("deck", urls, chunk_size=chunk_size)
+    results.append(result('slides_batch', backend, time.perf_counter() - start, len(urls)))
+    return results
+
+
+def environment() -> Dict:
+    """Versions and machine the report was produced with"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'ffmpeg': shutil.which(settings.FFMPEG_BINARY) is not None,
+    }
+
+
+def plan_cases(videos: Sequence[SyntheticVideo], modes: Sequence[str], strategies: Sequence[str],
+               interval: int, threshold: float) -> List[ExtractionCase]:
+    options = {'diff': {'threshold': threshold}, 'scene': {}, 'interval': {}}
+    return [ExtractionCase(video, mode, strategy, interval, options[mode])
+            for video in videos for mode in modes for strategy in strategies]
+
+
+def run_suite(videos: Sequence[SyntheticVideo], modes: Sequence[str] = MODES,
+              strategies: Sequence[str] = ('seek', 'grab'), interval: int = 15, threshold: float = 10.0,
+              tolerance: Optional[int] = None, upload_frames: int = 0, api_latency: float = 0.02,
+              upload_concurrency: int = 8, slides_chunk_size: int = 50,
+              api_requests_per_second: float = 0.0, isolate: bool = True) -> Dict:
+    """Run all cases and return the report.
+
+    ``tolerance`` (frames a detection may lag a change point) defaults to
+    two sampling intervals, which covers the settling sample of scene mode.
+    An ``api_requests_per_second`` of 0 leaves the API stages unthrottled,
+    so they measure client overhead and concurrency rather than quota pacing.
+    """
+    tolerance = 2 * interval if tolerance is None else tolerance
+    report = {'version': REPORT_VERSION, 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'environment': environment(),
+              'settings': {'interval': interval, 'threshold': threshold, 'tolerance': tolerance},
+              'extraction': [], 'api': []}
+
+    for case in plan_cases(videos, modes, strategies, interval, threshold):
+        if case.strategy == 'ffmpeg' and not report['environment']['ffmpeg']:
+            logger.warning(f"{Fore.YELLOW}Skipping {case.name}: ffmpeg is not installed")
+            continue
+        if isolate:
+            result = run_isolated(run_extraction_case, case, tolerance)
+        else:
+            result = run_extraction_case(case, tolerance)
+        accuracy = result['accuracy']
+        logger.info(f"{Fore.CYAN}{case.name}: {result['video_fps']:,.0f} frames/s "
+                    f"({result['realtime_factor']}x real time), recall {accuracy['recall']:.2f}, "
+                    f"precision {accuracy['precision']:.2f}, peak RSS {result['peak_rss_mb']} MiB")
+        report['extraction'].append(result)
+
+    if upload_frames:
+        video = videos[0]
+        with tempfile.TemporaryDirectory(prefix="bench-upload-") as directory:
+            frame_paths = write_sample_frames(Path(directory), upload_frames, video.width, video.height)
+            for result in run_api_stages(frame_paths, api_latency, upload_concurrency, slides_chunk_size,
+                                         api_requests_per_second or 1e6):
+                logger.info(f"{Fore.CYAN}{result['stage']}: {result['items_per_second']:,.1f} items/s "
+                            f"({result['requests']} requests, {result['max_in_flight']} in flight)")
+                report['api'].append(result)
+    return report
+
+
+@click.command()
+@click.option('--sizes', default='640x360,1280x720', help='Comma-separated video resolutions')
+@click.option('--durations', default='30,120', help='Comma-separated video lengths in seconds')
+@click.option('--fps', type=float, default=30.0)
+@click.option('--modes', default=','.join(MODES), help='Comma-separated extraction modes')
+@click.option('--strategies', default='seek,grab,ffmpeg',
+              help='Comma-separated decode strategies (ffmpeg = FFmpeg decoder, skipped if not installed)')
+@click.option('--interval', type=int, default=15)
+@click.option('--threshold', type=float, default=10.0, help='Diff mode threshold')
+@click.option('--tolerance', type=int, help='Frames a detection may lag a change point (default two intervals)')
+@click.option('--upload-frames', type=int, default=100, help='Frames uploaded in the API stages (0 = skip)')
+@click.option('--api-latency', type=float, default=0.02, help='Simulated round trip of every API call in seconds')
+@click.option('--upload-concurrency', type=int, default=settings.DRIVE_UPLOAD_CONCURRENCY)
+@click.option('--api-rps', type=float, default=0.0, help='Requests per second of the API stages (0 = unthrottled)')
+@click.option('--video-dir', type=click.Path(file_okay=False, path_type=Path),
+              default=settings.DATA_DIR / 'benchmarks', help='Where generated videos are cached')
+@click.option('--output', type=click.Path(dir_okay=False, path_type=Path),
+              help='JSON report file (default: benchmark-<timestamp>.json in the video directory)')
+def main(sizes, durations, fps, modes, strategies, interval, threshold, tolerance, upload_frames,
+         api_latency, upload_concurrency, api_rps, video_dir, output):
+    """Benchmark extraction throughput, memory and accuracy on synthetic slide videos"""
+    setup_logger()
+    # The extractors log every run; the benchmark prints its own summary
+    logger.disable('src')
+
+    modes = [mode for mode in modes.split(',') if mode]
+    strategies = [strategy for strategy in strategies.split(',') if strategy]
+    unknown = set(modes) - set(MODES) | set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise click.BadParameter(f"unknown mode or strategy: {', '.join(sorted(unknown))}")
+
+    videos = []
+    for size in sizes.split(','):
+        width, height = parse_size(size)
+        for seconds in durations.split(','):
+            logger.info(f"{Fore.BLUE}Preparing {width}x{height}, {seconds}s video")
+            videos.append(cached_slides_video(video_dir, width, height, float(seconds), fps))
+
+    report = run_suite(videos, modes, strategies, interval, threshold, tolerance, upload_frames,
+                       api_latency, upload_concurrency, api_requests_per_second=api_rps)
+    output = output or video_dir / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    logger.success(f"{Fore.GREEN}Report written to {output}")
+
+
+if __name__ == '__main__':
+    main()
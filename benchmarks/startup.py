@@ -0,0 +1,178 @@
+"""Benchmark the start-up time of the command line entry points.
+
+Every measurement runs in a fresh interpreter: importing each entry point
+module, running it with ``--help`` and, once, ``python -X importtime`` to
+list the slowest imports. The report also names the heavy dependencies an
+import pulled in, which should be none: OpenCV, the Google API clients and
+pytube are imported by the steps that use them. Runs that skip a step
+(e.g. upload-only) are executed in a scratch directory to check they do not
+load that step's dependencies either.
+
+    python -m benchmarks.startup --repeat 20 --output startup.json
+"""
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import click
+
+ENTRY_POINTS = ('src.main', 'src.batch')
+
+# Dependencies the entry points must not import before a step needs them
+HEAVY_MODULES = ('cv2', 'numpy', 'googleapiclient', 'google.oauth2', 'httplib2', 'pytube', 'tqdm')
+
+# Runs of an entry point that skip frame extraction, by name. They stop before any
+# network call: the scratch directory has no frames to upload.
+RUN_PROBES = {
+    'src.main': {
+        'upload-only': ['--file', 'video.mp4', '--prefix', 'probe', '--upload-frames'],
+        'slides-only': ['--file', 'video.mp4', '--prefix', 'probe', '--add-slides'],
+    },
+}
+
+# Modules a run without frame extraction must not load
+EXTRACTION_MODULES = ('cv2', 'numpy')
+
+REPORT_VERSION = 2
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'import_time': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_RUN_PROBE = """
+import json, os, shutil, sys, tempfile
+from pathlib import Path
+sys.path.insert(0, {root!r})
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+try:
+    from config.settings import settings
+    settings.FRAMES_DIR = settings.RUNS_DIR = workdir
+    (workdir / 'video.mp4').write_bytes(b'')
+    import {module}
+    try:
+        {module}.main({args!r}, standalone_mode=False)
+    except Exception:
+        pass
+    print(json.dumps({{'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+finally:
+    os.chdir({root!r})
+    shutil.rmtree(workdir, ignore_errors=True)
+"""
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=ROOT, check=True)
+
+
+def _summary(samples: Sequence[float]) -> Dict[str, float]:
+    return {'min_ms': round(min(samples) * 1000, 1), 'median_ms': round(statistics.median(samples) * 1000, 1),
+            'max_ms': round(max(samples) * 1000, 1)}
+
+
+def measure_import(module: str, repeat: int = 10) -> Dict:
+    """Time ``import module`` in ``repeat`` fresh interpreters"""
+    import_times, process_times = [], []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = json.loads(_python('-c', _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)).stdout)
+        process_times.append(time.perf_counter() - start)
+        import_times.append(result['import_time'])
+        loaded = result['loaded']
+    return {'module': module, 'import': _summary(import_times), 'process': _summary(process_times),
+            'heavy_modules_loaded': loaded}
+
+
+def measure_help(module: str, repeat: int = 10) -> Dict:
+    """Wall time of ``python -m module --help``"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _python('-m', module, '--help')
+        times.append(time.perf_counter() - start)
+    return {'module': module, 'help': _summary(times)}
+
+
+def measure_run(module: str, name: str, args: Sequence[str]) -> Dict:
+    """Heavy modules loaded by running ``module`` with ``args`` in a scratch directory"""
+    stdout = _python('-c', _RUN_PROBE.format(root=str(ROOT), module=module, args=list(args),
+                                             heavy=HEAVY_MODULES)).stdout
+    return {'run': name, 'args': list(args), 'heavy_modules_loaded': json.loads(stdout.splitlines()[-1])['loaded']}
+
+
+def slowest_imports(module: str, count: int = 10) -> List[Dict]:
+    """Packages taking the longest to import with ``module`` (``-X importtime``).
+
+    Times are cumulative: a package imported by another counts towards both.
+    """
+    stderr = _python('-X', 'importtime', '-c', f'import {module}').stderr
+    packages: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.rstrip().endswith('imported package'):
+            continue
+        _, cumulative, name = line.split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+    return [{'package': name, 'cumulative_ms': round(micros / 1000, 1)} for name, micros in ranked]
+
+
+def run_startup(modules: Sequence[str] = ENTRY_POINTS, repeat: int = 10, top: int = 10) -> Dict:
+    report = {'version': REPORT_VERSION, 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'python': sys.version.split()[0], 'repeat': repeat, 'entry_points': []}
+    for module in modules:
+        entry = measure_import(module, repeat)
+        entry.update(measure_help(module, repeat))
+        entry['slowest_imports'] = slowest_imports(module, top)
+        entry['runs'] = [measure_run(module, name, args) for name, args in RUN_PROBES.get(module, {}).items()]
+        report['entry_points'].append(entry)
+    return report
+
+
+@click.command()
+@click.option('--modules', default=','.join(ENTRY_POINTS), help='Comma-separated entry point modules')
+@click.option('--repeat', type=click.IntRange(min=1), default=10, help='Fresh interpreters per measurement')
+@click.option('--budget-ms', type=float, help='Fail if a median import takes longer than this')
+@click.option('--output', type=click.Path(dir_okay=False, path_type=Path), help='JSON report file')
+def main(modules, repeat, budget_ms, output):
+    """Benchmark import and --help time of the command line entry points"""
+    report = run_startup([module for module in modules.split(',') if module], repeat)
+    failed = False
+    for entry in report['entry_points']:
+        median = entry['import']['median_ms']
+        heavy = ', '.join(entry['heavy_modules_loaded']) or 'none'
+        click.echo(f"{entry['module']}: import {median:.1f} ms, --help {entry['help']['median_ms']:.1f} ms "
+                   f"(median of {repeat}), heavy modules loaded: {heavy}")
+        if budget_ms is not None and median > budget_ms:
+            click.echo(f"{entry['module']}: import exceeds the {budget_ms:g} ms budget", err=True)
+            failed = True
+        for run in entry['runs']:
+            loaded = run['heavy_modules_loaded']
+            click.echo(f"{entry['module']} {run['run']}: heavy modules loaded: {', '.join(loaded) or 'none'}")
+            extraction = [name for name in EXTRACTION_MODULES if name in loaded]
+            if extraction:
+                click.echo(f"{entry['module']} {run['run']}: loads {', '.join(extraction)} without extracting",
+                           err=True)
+                failed = True
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        click.echo(f"Report written to {output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Synthetic slide videos with known change points.
+
+Every slide is a light page with a title bar, a few lines of text and a
+colored figure, drawn at the target resolution so text stays sharp. Slides
+change with a hard cut at the recorded frame indices; mild per-frame noise
+stands in for camera and compression noise, so a frame is never bit-exact
+to the previous one.
+"""
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+_WORDS = ("frame", "video", "slide", "decode", "sample", "upload", "latency", "cache", "thread",
+          "buffer", "stream", "keyframe", "metric", "pixel", "histogram", "budget", "queue")
+
+
+@dataclass
+class SyntheticVideo:
+    """A generated video and the frame indices where a new slide starts (first slide at 0)"""
+    path: Path
+    width: int
+    height: int
+    fps: float
+    frames: int
+    change_points: List[int] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.fps
+
+    @property
+    def name(self) -> str:
+        return self.path.stem
+
+
+def draw_slide(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """One slide-like BGR image"""
+    background = int(rng.integers(225, 250))
+    frame = np.full((height, width, 3), background, np.uint8)
+    scale = width / 640
+
+    accent = tuple(int(c) for c in rng.integers(40, 200, 3))
+    cv2.rectangle(frame, (0, 0), (width, int(56 * scale)), accent, -1)
+    title = " ".join(rng.choice(_WORDS, 3)).title()
+    cv2.putText(frame, title, (int(20 * scale), int(38 * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                0.9 * scale, (255, 255, 255), max(1, int(2 * scale)), cv2.LINE_AA)
+
+    for line in range(int(rng.integers(3, 7))):
+        text = "- " + " ".join(rng.choice(_WORDS, int(rng.integers(2, 5))))
+        cv2.putText(frame, text, (int(30 * scale), int((95 + 34 * line) * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6 * scale, (30, 30, 30), max(1, int(1.5 * scale)), cv2.LINE_AA)
+
+    x = int(rng.integers(int(380 * scale), int(460 * scale)))
+    y = int(rng.integers(int(90 * scale), int(150 * scale)))
+    size = int(rng.integers(int(90 * scale), int(150 * scale)))
+    figure = tuple(int(c) for c in rng.integers(0, 255, 3))
+    if rng.random() < 0.5:
+        cv2.rectangle(frame, (x, y), (min(x + size, width - 1), min(y + size, height - 1)), figure, -1)
+    else:
+        cv2.circle(frame, (x + size // 2, y + size // 2), size // 2, figure, -1)
+    return frame
+
+
+def make_slides_video(path: Path, width: int = 1280, height: int = 720, seconds: float = 60.0,
+                      fps: float = 30.0, min_slide_seconds: float = 3.0, max_slide_seconds: float = 12.0,
+                      noise: float = 1.0, seed: int = 0) -> SyntheticVideo:
+    """Write a slide video to ``path`` (mp4v) and return its description"""
+    rng = np.random.default_rng(seed)
+    frames = int(round(seconds * fps))
+    change_points = [0]
+    while True:
+        next_change = change_points[-1] + int(rng.uniform(min_slide_seconds, max_slide_seconds) * fps)
+        if next_change >= frames:
+            break
+        change_points.append(next_change)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not out.isOpened():
+        raise RuntimeError(f"Cannot write video: {path}")
+    # A few noisy versions of every slide used in turn: adding noise per frame would dominate the run time
+    noise_fields = [rng.normal(0, noise, (height, width, 1)) for _ in range(4)] if noise else [0]
+    try:
+        boundaries = change_points + [frames]
+        for start, stop in zip(boundaries, boundaries[1:]):
+            slide = draw_slide(width, height, rng)
+            versions = [np.clip(slide + noise_field, 0, 255).astype(np.uint8) for noise_field in noise_fields]
+            for index in range(start, stop):
+                out.write(versions[index % len(versions)])
+    finally:
+        out.release()
+    return SyntheticVideo(path, width, height, fps, frames, change_points)
+
+
+def cached_slides_video(directory: Path, width: int, height: int, seconds: float, fps: float = 30.0,
+                        seed: int = 0) -> SyntheticVideo:
+    """Generate a slide video once per parameter set and reuse it from ``directory``"""
+    name = f"slides_{width}x{height}_{seconds:g}s_{fps:g}fps_seed{seed}"
+    path = directory / f"{name}.mp4"
+    meta = directory / f"{name}.json"
+    if path.exists() and meta.exists():
+        data = json.loads(meta.read_text(encoding="utf-8"))
+        return SyntheticVideo(path, data['width'], data['height'], data['fps'], data['frames'],
+                              data['change_points'])
+    video = make_slides_video(path, width, height, seconds, fps, seed=seed)
+    data = asdict(video)
+    data['path'] = str(video.path)
+    meta.write_text(json.dumps(data), encoding="utf-8")
+    return video
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    """'1280x720' -> (1280, 720)"""
+    width, _, height = value.lower().partition('x')
+    return int(width), int(height)
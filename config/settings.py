@@ -10,6 +10,14 @@ class Settings:
     DATA_DIR = BASE_DIR / "data"
     VIDEO_DIR = DATA_DIR / "videos"
     FRAMES_DIR = DATA_DIR / "frames"
+    RUNS_DIR = DATA_DIR / "runs"
+    TIMELINE_CACHE_DIR = Path(os.getenv("TIMELINE_CACHE_DIR", str(DATA_DIR / "timelines")))
+    
+    # YouTube downloads (parallel range requests of DOWNLOAD_CHUNK_SIZE bytes; progressive
+    # ingest analyzes the video while it downloads)
+    DOWNLOAD_CONNECTIONS = int(os.getenv("DOWNLOAD_CONNECTIONS", "4"))
+    DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(2 * 1024 * 1024)))
+    PROGRESSIVE_DOWNLOAD = os.getenv("PROGRESSIVE_DOWNLOAD", "false").lower() in ("1", "true", "yes")
     
     # Google API
     SERVICE_ACCOUNT_FILE = os.getenv(
@@ -25,9 +33,88 @@ class Settings:
         "1rcxXPQZZ9RzRVenkREMxZRG8Q9zbOC2R"
     )
     
+    # API rate limiting (requests per second, retries with exponential backoff)
+    DRIVE_REQUESTS_PER_SECOND = float(os.getenv("DRIVE_REQUESTS_PER_SECOND", "40"))
+    SLIDES_REQUESTS_PER_SECOND = float(os.getenv("SLIDES_REQUESTS_PER_SECOND", "1"))
+    API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "5"))
+    API_BACKOFF_BASE = float(os.getenv("API_BACKOFF_BASE", "1.0"))
+    API_BACKOFF_MAX = float(os.getenv("API_BACKOFF_MAX", "64.0"))
+    
+    # Google Drive uploads
+    DRIVE_UPLOAD_CONCURRENCY = int(os.getenv("DRIVE_UPLOAD_CONCURRENCY", "8"))
+    STREAM_MAX_IN_FLIGHT = int(os.getenv("STREAM_MAX_IN_FLIGHT", "16"))
+    UPLOAD_CACHE_ENABLED = os.getenv("UPLOAD_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    UPLOAD_CACHE_FILE = Path(os.getenv("UPLOAD_CACHE_FILE", str(DATA_DIR / "upload_cache.sqlite3")))
+    
+    # Google Slides (slides per batchUpdate call, two requests each)
+    SLIDES_BATCH_SIZE = int(os.getenv("SLIDES_BATCH_SIZE", "50"))
+    # Sync the presentation to the frames (create, replace, move, delete) instead of appending slides
+    SLIDES_SYNC = os.getenv("SLIDES_SYNC", "false").lower() in ("1", "true", "yes")
+    
     # Video Processing
     DEFAULT_THRESHOLD = float(os.getenv("DEFAULT_THRESHOLD", "30.0"))
     DEFAULT_INTERVAL = int(os.getenv("DEFAULT_INTERVAL", "30"))
+    DEFAULT_DECODE_STRATEGY = os.getenv("DEFAULT_DECODE_STRATEGY", "auto")
+    DEFAULT_COMPARE_WIDTH = int(os.getenv("DEFAULT_COMPARE_WIDTH", "0"))
+    # Diff mode: frames skipped per coarse step before searching back for changes (0 disables)
+    DEFAULT_ADAPTIVE_STRIDE = int(os.getenv("DEFAULT_ADAPTIVE_STRIDE", "0"))
+    # Diff mode: cache per-video scores and comparison thumbnails so threshold changes skip decoding
+    # (thumbnails wider than the maximum are not stored; such timelines serve only their interval)
+    TIMELINE_CACHE_ENABLED = os.getenv("TIMELINE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    TIMELINE_THUMBNAIL_MAX_WIDTH = int(os.getenv("TIMELINE_THUMBNAIL_MAX_WIDTH", "320"))
+    
+    # Scene-change mode (metric thresholds, 0 disables block SSIM; samples a new slide must stay still)
+    SCENE_HISTOGRAM_THRESHOLD = float(os.getenv("SCENE_HISTOGRAM_THRESHOLD", "0.1"))
+    SCENE_EDGE_THRESHOLD = float(os.getenv("SCENE_EDGE_THRESHOLD", "0.05"))
+    SCENE_SSIM_THRESHOLD = float(os.getenv("SCENE_SSIM_THRESHOLD", "0"))
+    SCENE_STABLE_SAMPLES = int(os.getenv("SCENE_STABLE_SAMPLES", "1"))
+    
+    # Saved frames: png, jpeg or webp (quality 1-100 for jpeg/webp, PNG compression 0-9 or -1 for
+    # OpenCV's fast default, max width 0 keeps the video resolution)
+    FRAME_FORMAT = os.getenv("FRAME_FORMAT", "png")
+    FRAME_QUALITY = int(os.getenv("FRAME_QUALITY", "90"))
+    PNG_COMPRESSION = int(os.getenv("PNG_COMPRESSION", "-1"))
+    FRAME_MAX_WIDTH = int(os.getenv("FRAME_MAX_WIDTH", "0"))
+    
+    # Near-duplicate suppression (max Hamming distance of 64-bit hashes, 0 disables)
+    DEDUP_DISTANCE = int(os.getenv("DEDUP_DISTANCE", "0"))
+    DEDUP_HASH = os.getenv("DEDUP_HASH", "dhash")
+    
+    # Decoder backend: opencv or ffmpeg (the ffmpeg command line tool; keyframe-only decoding,
+    # decoder threads with 0 letting FFmpeg choose and a decode width with 0 keeping the video
+    # resolution need it)
+    DECODER_BACKEND = os.getenv("DECODER_BACKEND", "opencv")
+    DECODE_KEYFRAMES_ONLY = os.getenv("DECODE_KEYFRAMES_ONLY", "false").lower() in ("1", "true", "yes")
+    DECODER_THREADS = int(os.getenv("DECODER_THREADS", "0"))
+    DECODE_WIDTH = int(os.getenv("DECODE_WIDTH", "0"))
+    FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+    
+    # Extraction pipeline (0 disables the decoder thread / writer pool)
+    DECODE_QUEUE_SIZE = int(os.getenv("DECODE_QUEUE_SIZE", "8"))
+    WRITER_THREADS = int(os.getenv("WRITER_THREADS", "2"))
+    EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "1"))
+    # Decode into a bounded set of recycled frame buffers instead of a new array per sample
+    FRAME_BUFFER_REUSE = os.getenv("FRAME_BUFFER_REUSE", "true").lower() in ("1", "true", "yes")
+    # Diff mode: samples scored together in one vectorized pass (1 scores each on arrival)
+    SCORE_BATCH_SIZE = int(os.getenv("SCORE_BATCH_SIZE", "1"))
+    
+    # Batch processing (a CPU budget of 0 uses all cores)
+    BATCH_JOBS = int(os.getenv("BATCH_JOBS", "2"))
+    BATCH_CPU_BUDGET = int(os.getenv("BATCH_CPU_BUDGET", "0"))
+    
+    # Service mode (jobs from an inbox directory and a local HTTP endpoint, port -1 disables it;
+    # finished jobs kept for status queries)
+    SERVICE_INBOX_DIR = Path(os.getenv("SERVICE_INBOX_DIR", str(DATA_DIR / "inbox")))
+    SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8765"))
+    SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "2"))
+    SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "16"))
+    SERVICE_POLL_INTERVAL = float(os.getenv("SERVICE_POLL_INTERVAL", "1.0"))
+    SERVICE_JOB_HISTORY = int(os.getenv("SERVICE_JOB_HISTORY", "200"))
+    
+    # Metrics file written at the end of a run (empty disables metrics) and its format: json or prometheus
+    METRICS_FILE = os.getenv("METRICS_FILE", "")
+    METRICS_FORMAT = os.getenv("METRICS_FORMAT", "json")
     
     # API Scopes
     GOOGLE_SCOPES = [
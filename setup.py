@@ -32,6 +32,7 @@ setup(
     entry_points={
         'console_scripts': [
             'video-to-slides=src.main:main',
+            'video-to-slides-batch=src.batch:main',
         ],
     },
 )
@@ -0,0 +1,266 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+import click
+from loguru import logger
+from colorama import Fore, init
+from config.settings import settings
+from src.utils.file_handler import VIDEO_EXTENSIONS, clean_filename, find_videos_in_directory
+from src.utils.logger import setup_logger
+
+# The extractors (and OpenCV) are imported by the worker processes and once the options are
+# valid, so --help and argument errors return without loading them
+if TYPE_CHECKING:
+    from src.core.decoder import DecoderSettings
+    from src.core.pipeline import FrameEncoding
+
+# Initialize colorama for cross-platform colored output
+init(autoreset=True)
+
+MANIFEST_SUFFIXES = ('.txt', '.lst', '.manifest')
+
+
+@dataclass
+class BatchJob:
+    """One video of a batch and the output namespace reserved for it"""
+    video_path: Path
+    output_dir: Path
+    prefix: str
+
+
+@dataclass
+class BatchResult:
+    video_path: Path
+    output_dir: Path
+    frames_saved: int = 0
+    frames_analyzed: int = 0
+    wall_time: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def analyzed_fps(self) -> float:
+        return self.frames_analyzed / self.wall_time if self.wall_time > 0 else 0.0
+
+
+def collect_videos(sources: Sequence[str]) -> List[Path]:
+    """Resolve directories, glob patterns and manifest files to video paths.
+
+    A manifest lists one video per line; blank lines and lines starting with
+    '#' are skipped and relative paths are resolved against the manifest.
+    Duplicates are dropped, keeping the first occurrence.
+    """
+    videos: List[Path] = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            videos.extend(find_videos_in_directory(path))
+        elif path.is_file() and path.suffix.lower() in MANIFEST_SUFFIXES:
+            for line in path.read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                entry = Path(line).expanduser()
+                videos.append(entry if entry.is_absolute() else path.parent / entry)
+        elif path.is_file():
+            videos.append(path)
+        else:
+            matches = sorted(Path(p) for p in glob.glob(source, recursive=True))
+            if not matches:
+                logger.warning(f"No videos match '{source}'")
+            videos.extend(p for p in matches if p.suffix.lower() in VIDEO_EXTENSIONS)
+
+    unique = []
+    seen = set()
+    for video in videos:
+        key = video.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(video)
+    return unique
+
+
+def plan_jobs(videos: Sequence[Path], output_root: Path) -> List[BatchJob]:
+    """Give every video its own output directory and frame prefix"""
+    jobs = []
+    used = set()
+    for video in videos:
+        name = clean_filename(video.stem) or "video"
+        unique_name = name
+        counter = 2
+        while unique_name in used:
+            unique_name = f"{name}_{counter}"
+            counter += 1
+        used.add(unique_name)
+        jobs.append(BatchJob(video_path=video, output_dir=output_root / unique_name, prefix=unique_name))
+    return jobs
+
+
+def split_budget(cpu_budget: int, jobs: int) -> int:
+    """Worker processes each concurrent video may use within the CPU budget"""
+    return max(1, cpu_budget // max(jobs, 1))
+
+
+def _run_job(job: BatchJob, mode: str, extract_kwargs: dict, workers: int,
+             writer_threads: int, encoding: Optional['FrameEncoding'] = None,
+             decoder: Optional['DecoderSettings'] = None) -> BatchResult:
+    """Worker process entry point: extract the frames of one video"""
+    from src.core.frame_extractor import FrameExtractorFactory
+    result = BatchResult(video_path=job.video_path, output_dir=job.output_dir)
+    start = time.perf_counter()
+    try:
+        options = {'output_dir': job.output_dir, 'writer_threads': writer_threads, 'show_progress': False,
+                   'encoding': encoding, 'decoder': decoder}
+        if mode == 'diff':
+            options['workers'] = workers
+        extractor = FrameExtractorFactory.create(mode, **options)
+        frame_paths = extractor.extract(str(job.video_path), prefix=job.prefix, **extract_kwargs)
+        result.frames_saved = len(frame_paths)
+        result.frames_analyzed = extractor.last_stats.frames_sampled
+    except Exception as e:
+        result.error = str(e)
+    result.wall_time = time.perf_counter() - start
+    return result
+
+
+def run_batch(jobs: Sequence[BatchJob], mode: str, extract_kwargs: dict, max_jobs: int,
+              cpu_budget: int, writer_threads: int = 1,
+              encoding: Optional['FrameEncoding'] = None,
+              decoder: Optional['DecoderSettings'] = None) -> List[BatchResult]:
+    """Extract frames for many videos concurrently within a shared CPU budget.
+
+    At most ``max_jobs`` videos run at once in a shared process pool; in diff
+    mode each one may split its video across its share of the budget.
+    Results are returned in job order.
+    """
+    concurrent_jobs = max(1, min(max_jobs, len(jobs), cpu_budget))
+    workers = split_budget(cpu_budget, concurrent_jobs)
+    logger.info(f"{Fore.CYAN}📦 Batch: {len(jobs)} videos, {concurrent_jobs} at a time, "
+                f"{workers} worker process(es) per video (budget {cpu_budget})")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=concurrent_jobs) as executor:
+        futures = {
+            executor.submit(_run_job, job, mode, extract_kwargs, workers, writer_threads, encoding,
+                            decoder): index
+            for index, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if result.error:
+                logger.error(f"{Fore.RED}❌ {result.video_path.name}: {result.error}")
+            else:
+                logger.success(f"{Fore.GREEN}✅ {result.video_path.name}: {result.frames_saved} frames "
+                               f"in {result.wall_time:.1f}s")
+    return [results[index] for index in range(len(jobs))]
+
+
+def format_summary(results: Sequence[BatchResult]) -> str:
+    """Render per-video results as a plain-text table"""
+    headers = ("Video", "Wall time", "Analyzed/s", "Saved", "Status")
+    rows = [
+        (result.video_path.name,
+         f"{result.wall_time:.1f}s",
+         f"{result.analyzed_fps:,.1f}",
+         str(result.frames_saved),
+         "failed" if result.error else "ok")
+        for result in results
+    ]
+    widths = [max(len(str(row[i])) for row in [headers, *rows]) for i in range(len(headers))]
+
+    def line(cells):
+        return "  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                         for i, (cell, width) in enumerate(zip(cells, widths)))
+
+    return "\n".join([line(headers), line(["-" * width for width in widths]), *[line(row) for row in rows]])
+
+
+@click.command()
+@click.argument('sources', nargs=-1, required=True)
+@click.option('--mode', type=click.Choice(['diff', 'interval', 'scene']), default='diff')
+@click.option('--threshold', type=float, default=settings.DEFAULT_THRESHOLD)
+@click.option('--interval', type=int, default=settings.DEFAULT_INTERVAL)
+@click.option('--decode-strategy', type=click.Choice(['auto', 'seek', 'grab']),
+              default=settings.DEFAULT_DECODE_STRATEGY)
+@click.option('--decoder', type=click.Choice(['opencv', 'ffmpeg']), default=settings.DECODER_BACKEND,
+              help='Decode with OpenCV or an ffmpeg subprocess')
+@click.option('--keyframes-only/--all-frames', default=settings.DECODE_KEYFRAMES_ONLY,
+              help='Sample keyframes only, at most one per interval (ffmpeg decoder)')
+@click.option('--decode-threads', type=click.IntRange(min=0), default=settings.DECODER_THREADS,
+              help='Decoder threads (ffmpeg decoder, 0 = FFmpeg chooses)')
+@click.option('--decode-width', type=click.IntRange(min=0), default=settings.DECODE_WIDTH,
+              help='Decode frames scaled to this width (ffmpeg decoder, 0 = video resolution)')
+@click.option('--compare-width', type=int, default=settings.DEFAULT_COMPARE_WIDTH,
+              help='Width of the thumbnail used for difference scoring (0 = full resolution)')
+@click.option('--adaptive-stride', type=click.IntRange(min=0), default=settings.DEFAULT_ADAPTIVE_STRIDE,
+              help='Skip ahead this many frames and search back for changes (diff mode, 0 = off)')
+@click.option('--scene-histogram', type=float, default=settings.SCENE_HISTOGRAM_THRESHOLD,
+              help='Histogram distance counting as a slide change (scene mode)')
+@click.option('--scene-edges', type=float, default=settings.SCENE_EDGE_THRESHOLD,
+              help='Share of changed edges counting as a slide change (scene mode)')
+@click.option('--scene-ssim', type=float, default=settings.SCENE_SSIM_THRESHOLD,
+              help='Block SSIM drop counting as a slide change (scene mode, 0 = off)')
+@click.option('--stable-samples', type=click.IntRange(min=0), default=settings.SCENE_STABLE_SAMPLES,
+              help='Samples a new slide must stay still before it is saved (scene mode)')
+@click.option('--dedup-distance', type=int, default=settings.DEDUP_DISTANCE,
+              help='Drop frames within this Hamming distance of an earlier frame (0 = off)')
+@click.option('--dedup-hash', type=click.Choice(['dhash', 'phash']), default=settings.DEDUP_HASH)
+@click.option('--frame-format', type=click.Choice(['png', 'jpeg', 'webp']), default=settings.FRAME_FORMAT)
+@click.option('--quality', type=click.IntRange(1, 100), default=settings.FRAME_QUALITY, help='JPEG/WebP quality')
+@click.option('--png-compression', type=click.IntRange(-1, 9), default=settings.PNG_COMPRESSION,
+              help="PNG compression level (-1 = OpenCV's fast default)")
+@click.option('--max-width', type=click.IntRange(min=0), default=settings.FRAME_MAX_WIDTH,
+              help='Downscale saved frames wider than this (0 = video resolution)')
+@click.option('--jobs', type=int, default=settings.BATCH_JOBS, help='Videos processed concurrently')
+@click.option('--cpu-budget', type=int, default=settings.BATCH_CPU_BUDGET or os.cpu_count() or 1,
+              help='Total worker processes shared by all videos')
+@click.option('--output-dir', type=click.Path(file_okay=False, path_type=Path), default=settings.FRAMES_DIR,
+              help='Root directory; each video gets its own subdirectory')
+def main(sources, mode, threshold, interval, decode_strategy, decoder, keyframes_only, decode_threads,
+         decode_width, compare_width, adaptive_stride, scene_histogram,
+         scene_edges, scene_ssim, stable_samples, dedup_distance, dedup_hash,
+         frame_format, quality, png_compression, max_width, jobs, cpu_budget, output_dir):
+    """Extract frames from many videos (directories, globs or manifest files)"""
+    setup_logger()
+
+    videos = collect_videos(sources)
+    if not videos:
+        logger.error(f"{Fore.RED}Error: No videos found")
+        return
+
+    extract_kwargs = {'interval': interval, 'decode_strategy': decode_strategy,
+                      'dedup_distance': dedup_distance, 'dedup_hash': dedup_hash}
+    if mode == 'diff':
+        extract_kwargs['threshold'] = threshold
+        extract_kwargs['adaptive_stride'] = adaptive_stride
+    if mode == 'scene':
+        extract_kwargs.update(histogram_threshold=scene_histogram, edge_threshold=scene_edges,
+                              ssim_threshold=scene_ssim, stable_samples=stable_samples)
+    if mode in ('diff', 'scene'):
+        extract_kwargs['compare_width'] = compare_width or None
+
+    from src.core.decoder import DecoderSettings
+    from src.core.pipeline import FrameEncoding
+    encoding = FrameEncoding.create(frame_format, quality, png_compression, max_width)
+    try:
+        decoding = DecoderSettings.create(decoder, keyframes_only, decode_threads, decode_width)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    results = run_batch(plan_jobs(videos, output_dir), mode, extract_kwargs, jobs, cpu_budget,
+                        encoding=encoding, decoder=decoding)
+
+    click.echo()
+    click.echo(format_summary(results))
+    failed = sum(1 for result in results if result.error)
+    if failed:
+        logger.error(f"{Fore.RED}{failed} of {len(results)} videos failed")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
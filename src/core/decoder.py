@@ -0,0 +1,364 @@
+"""Decoder backends producing the sampled frames of a video.
+
+``OpenCVDecoder`` reads through ``cv2.VideoCapture``, either seeking to every
+sample or grabbing the frames in between. ``FFmpegDecoder`` runs the
+``ffmpeg`` command line tool (CPU only) in a subprocess and reads raw BGR
+frames from its output pipe straight into NumPy arrays. FFmpeg selects the
+samples itself, so skipped frames never leave the decoder process, can
+decode keyframes only (``-skip_frame nokey``), scales frames with its own
+scaler before piping them and decodes on several threads.
+"""
+import functools
+import math
+import re
+import shutil
+import subprocess
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from config.settings import settings
+from src.core.exceptions import FrameExtractionError
+
+if TYPE_CHECKING:
+    from src.core.frame_extractor import ExtractionStats
+    from src.core.pipeline import FrameBufferPool
+
+DECODER_BACKENDS = ('opencv', 'ffmpeg')
+
+
+@dataclass(frozen=True)
+class DecoderSettings:
+    """Decoder backend and its options.
+
+    ``keyframes_only``, ``threads`` (0 lets FFmpeg choose) and ``width``
+    (decode at this width, keeping the aspect ratio) need the FFmpeg backend.
+    """
+    backend: str = 'opencv'
+    keyframes_only: bool = False
+    threads: int = 0
+    width: Optional[int] = None
+    ffmpeg_binary: str = 'ffmpeg'
+
+    def __post_init__(self):
+        if self.backend not in DECODER_BACKENDS:
+            raise ValueError(f"Unknown decoder backend: {self.backend}")
+        if self.threads < 0:
+            raise ValueError(f"Decoder threads must not be negative, got {self.threads}")
+        if self.width is not None and self.width < 1:
+            raise ValueError(f"Decode width must be positive, got {self.width}")
+        if self.backend != 'ffmpeg' and (self.keyframes_only or self.threads or self.width):
+            raise ValueError("Keyframe-only, threaded and scaled decoding need the ffmpeg backend")
+
+    @classmethod
+    def create(cls, backend: str, keyframes_only: bool = False, threads: int = 0,
+               width: int = 0) -> 'DecoderSettings':
+        """Build from option values where a zero width means the video resolution"""
+        return cls(backend, keyframes_only, threads, width or None, settings.FFMPEG_BINARY)
+
+    @classmethod
+    def from_settings(cls) -> 'DecoderSettings':
+        return cls.create(settings.DECODER_BACKEND, settings.DECODE_KEYFRAMES_ONLY,
+                          settings.DECODER_THREADS, settings.DECODE_WIDTH)
+
+
+class FrameDecoder(ABC):
+    """Source of the sampled frames of one video.
+
+    Counts the samples it yields and the video frames it advances over in
+    ``stats``. With a ``pool`` set, ``samples`` decodes into the pool's
+    buffers and whoever consumes a sample hands its frame back (see
+    ``FrameBufferPool``). ``close`` releases the decoder; iterating again
+    afterwards is not supported.
+    """
+    name = ''
+
+    def __init__(self, stats: 'ExtractionStats'):
+        self.stats = stats
+        self.pool: Optional['FrameBufferPool'] = None
+
+    @abstractmethod
+    def samples(self, interval: int, start: int = 0,
+                stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (frame_index, frame) for every ``interval``-th frame in ``[start, stop)``"""
+
+    def frames_at(self, frame_indices: Sequence[int]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (frame_index, frame) for the given ascending frame indices.
+
+        Decodes the samples on the widest grid through all of them and keeps
+        the requested ones.
+        """
+        if not frame_indices:
+            return
+        wanted = set(frame_indices)
+        step = math.gcd(*(b - a for a, b in zip(frame_indices, frame_indices[1:]))) or 1
+        for frame_index, frame in self.samples(step, frame_indices[0], frame_indices[-1] + 1):
+            if frame_index in wanted:
+                yield frame_index, frame
+            elif self.pool is not None:
+                self.pool.release(frame)
+
+    def scale_roi(self, roi: Optional[Tuple[int, int, int, int]]) -> Optional[Tuple[int, int, int, int]]:
+        """Map an (x, y, width, height) region of the video onto the decoded frames"""
+        return roi
+
+    def close(self) -> None:
+        pass
+
+
+class OpenCVDecoder(FrameDecoder):
+    """Samples frames from an open ``cv2.VideoCapture``.
+
+    'grab' reads sequentially and only grabs the skipped frames, 'seek'
+    repositions the capture before every sample. The capture must already
+    be positioned at ``start`` and is released by the caller.
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, strategy: str, total_frames: int, stats: 'ExtractionStats'):
+        super().__init__(stats)
+        self.cap = cap
+        self.strategy = self.name = strategy
+        self.total_frames = total_frames
+
+    def samples(self, interval: int, start: int = 0,
+                stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        cap, stats = self.cap, self.stats
+        frame_index = start
+        position = start
+        while cap.isOpened():
+            if stop is not None and frame_index >= stop:
+                break
+            if self.strategy == 'seek' and frame_index != position:
+                if self.total_frames > 0 and frame_index >= self.total_frames:
+                    break
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+            buffer = self.pool.acquire() if self.pool is not None else None
+            ret, frame = cap.read(image=buffer)
+            if not ret:
+                if self.pool is not None:
+                    self.pool.release(buffer)
+                break
+            position = frame_index + 1
+            stats.frames_sampled += 1
+            stats.frames_covered = frame_index - start + 1
+            yield frame_index, frame
+
+            if self.strategy == 'grab':
+                if stop is not None and frame_index + interval >= stop:
+                    break
+                for _ in range(interval - 1):
+                    if not cap.grab():
+                        return
+                    stats.frames_covered += 1
+                position = frame_index + interval
+            frame_index += interval
+
+    def frames_at(self, frame_indices: Sequence[int]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Seek to every requested frame that does not directly follow the previous one"""
+        cap, stats = self.cap, self.stats
+        position = None
+        for frame_index in frame_indices:
+            if frame_index != position:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            ret, frame = cap.read()
+            if not ret:
+                return
+            position = frame_index + 1
+            stats.frames_sampled += 1
+            yield frame_index, frame
+
+
+def scaled_size(width: int, height: int, target_width: Optional[int]) -> Tuple[int, int]:
+    """Frame size after downscaling to ``target_width``, as ``FrameEncoding.resize`` computes it"""
+    if not target_width or width <= target_width:
+        return width, height
+    return target_width, max(1, round(height * target_width / width))
+
+
+@functools.lru_cache(maxsize=None)
+def ffmpeg_version(binary: str = 'ffmpeg') -> Optional[Tuple[int, int]]:
+    """(major, minor) version reported by ``binary -version``.
+
+    None when the binary cannot be run or reports no release number, as
+    builds from FFmpeg's git master do.
+    """
+    try:
+        output = subprocess.run([binary, '-version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'version n?(\d+)\.(\d+)', output)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def ffmpeg_command(video_path: str, size: Tuple[int, int], interval: int = 1, start: int = 0,
+                   stop: Optional[int] = None, keyframes_only: bool = False, threads: int = 0,
+                   binary: str = 'ffmpeg', scale: bool = False,
+                   version: Optional[Tuple[int, int]] = None) -> List[str]:
+    """Command line piping the samples of a video as raw BGR frames of ``size``.
+
+    Frames are chosen with FFmpeg's ``select`` filter on the decoded frame
+    number, so only samples are scaled, converted and piped. With
+    ``keyframes_only`` the decoder skips every other frame and all keyframes
+    are piped; ``interval``, ``start`` and ``stop`` are then applied by the
+    reader. ``version`` is the FFmpeg release (see ``ffmpeg_version``);
+    releases before 5.1 lack ``-fps_mode`` and get ``-vsync`` instead.
+    """
+    command = [binary, '-nostdin', '-hide_banner', '-loglevel', 'error']
+    if threads:
+        command += ['-threads', str(threads)]
+    if keyframes_only:
+        command += ['-skip_frame', 'nokey']
+    command += ['-i', video_path, '-an', '-sn', '-dn']
+
+    filters = []
+    if not keyframes_only:
+        conditions = []
+        if start:
+            conditions.append(f"gte(n,{start})")
+        if stop is not None:
+            conditions.append(f"lt(n,{stop})")
+        if interval > 1:
+            conditions.append(f"not(mod(n-{start},{interval}))" if start else f"not(mod(n,{interval}))")
+        if conditions:
+            filters.append(f"select='{'*'.join(conditions)}'")
+    if scale:
+        filters.append(f"scale={size[0]}:{size[1]}:flags=area")
+    if filters:
+        command += ['-vf', ','.join(filters)]
+
+    # One output frame per selected input frame, no duplicates or drops to match a frame rate
+    frame_rate_mode = '-vsync' if version is not None and version < (5, 1) else '-fps_mode'
+    command += [frame_rate_mode, 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+    return command
+
+
+class FFmpegDecoder(FrameDecoder):
+    """Samples frames by piping raw video out of an ``ffmpeg`` subprocess.
+
+    ``size`` is the (width, height) of the video; frames are delivered at
+    ``width`` when given. With ``keyframes_only`` the samples are the
+    keyframes, at most one per ``interval`` frames, whose positions come
+    from ``keyframes`` (packet indices, see ``probe_keyframes``).
+    """
+
+    def __init__(self, video_path: str, size: Tuple[int, int], stats: 'ExtractionStats',
+                 decoder: DecoderSettings, keyframes: Optional[Sequence[int]] = None):
+        super().__init__(stats)
+        if shutil.which(decoder.ffmpeg_binary) is None:
+            raise FrameExtractionError(f"FFmpeg not found: '{decoder.ffmpeg_binary}' "
+                                       f"(install FFmpeg or set FFMPEG_BINARY)")
+        if decoder.keyframes_only and not keyframes:
+            raise FrameExtractionError(f"Cannot determine the keyframes of {video_path}")
+        self.video_path = video_path
+        self.decoder = decoder
+        self.keyframes = keyframes
+        self.native_size = size
+        self.size = scaled_size(*size, decoder.width)
+        self.name = 'ffmpeg keyframes' if decoder.keyframes_only else 'ffmpeg'
+        self._process: Optional[subprocess.Popen] = None
+
+    def samples(self, interval: int, start: int = 0,
+                stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        decoder = self.decoder
+        command = ffmpeg_command(self.video_path, self.size, interval, start, stop,
+                                 decoder.keyframes_only, decoder.threads, decoder.ffmpeg_binary,
+                                 scale=self.size != self.native_size,
+                                 version=ffmpeg_version(decoder.ffmpeg_binary))
+        if decoder.keyframes_only:
+            positions = self._keyframe_samples(interval, start, stop)
+        else:
+            positions = None
+
+        width, height = self.size
+        with tempfile.TemporaryFile() as errors:
+            self._process = process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+            try:
+                sample = 0
+                while positions is None or sample < len(positions):
+                    # Without a pool, a fresh array per sample: frames are held by the analysis and
+                    # writer stages. A pooled buffer is only handed out once those are done with it.
+                    frame = self.pool.acquire() if self.pool is not None else None
+                    if frame is None or frame.shape != (height, width, 3):
+                        frame = np.empty((height, width, 3), np.uint8)
+                    if not self._read_into(process.stdout, frame):
+                        if self.pool is not None:
+                            self.pool.release(frame)
+                        self._check_exit(process, errors)
+                        return
+                    if positions is None:
+                        frame_index, keep = start + sample * interval, True
+                    else:
+                        frame_index, keep = positions[sample]
+                    sample += 1
+                    if keep:
+                        self.stats.frames_sampled += 1
+                        self.stats.frames_covered = frame_index - start + 1
+                        yield frame_index, frame
+                    elif self.pool is not None:
+                        self.pool.release(frame)
+            finally:
+                self.close()
+
+    def scale_roi(self, roi: Optional[Tuple[int, int, int, int]]) -> Optional[Tuple[int, int, int, int]]:
+        if roi is None or self.size == self.native_size:
+            return roi
+        scale = self.size[0] / self.native_size[0]
+        x, y, width, height = roi
+        return (round(x * scale), round(y * scale), max(1, round(width * scale)), max(1, round(height * scale)))
+
+    def frames_at(self, frame_indices: Sequence[int]) -> Iterator[Tuple[int, np.ndarray]]:
+        if not self.decoder.keyframes_only or not frame_indices:
+            yield from super().frames_at(frame_indices)
+            return
+        # At interval 1 every keyframe is a sample, and the requested frames are keyframes
+        wanted = set(frame_indices)
+        for frame_index, frame in self.samples(1, frame_indices[0], frame_indices[-1] + 1):
+            if frame_index in wanted:
+                yield frame_index, frame
+            elif self.pool is not None:
+                self.pool.release(frame)
+
+    def _keyframe_samples(self, interval: int, start: int, stop: Optional[int]) -> List[Tuple[int, bool]]:
+        """(frame_index, sampled) for every keyframe FFmpeg will pipe, up to the last one needed"""
+        positions = []
+        due = start
+        for frame_index in self.keyframes:
+            if stop is not None and frame_index >= stop:
+                break
+            keep = frame_index >= due
+            if keep:
+                due = frame_index + interval
+            positions.append((frame_index, keep))
+        return positions
+
+    def _check_exit(self, process: subprocess.Popen, errors) -> None:
+        if process.wait() == 0:
+            return
+        errors.seek(0)
+        lines = errors.read().decode(errors='replace').strip().splitlines()
+        raise FrameExtractionError(f"FFmpeg failed to decode {self.video_path}: "
+                                   f"{lines[-1] if lines else f'exit code {process.returncode}'}")
+
+    @staticmethod
+    def _read_into(pipe, frame: np.ndarray) -> bool:
+        """Fill ``frame`` from ``pipe``; False at the end of the stream"""
+        view = memoryview(frame).cast('B')
+        filled = 0
+        while filled < len(view):
+            count = pipe.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+
+    def close(self) -> None:
+        process, self._process = self._process, None
+        if process is not None:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            process.stdout.close()
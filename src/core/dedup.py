@@ -0,0 +1,168 @@
+"""Perceptual-hash near-duplicate suppression for extracted frames.
+
+Every frame is reduced to a 64-bit perceptual hash (dHash or pHash) packed
+into a ``uint64``. Frames whose hash lies within a small Hamming distance of
+an earlier kept frame are near-duplicates, e.g. a slide the presenter flips
+back to or a webcam flicker that crossed the difference threshold. Distances
+are found with multi-index hashing and a vectorized XOR/popcount over the
+candidates, so tens of thousands of frames are compared in seconds.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+
+HASH_BITS = 64
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+_BIT_WEIGHTS = np.uint64(1) << np.arange(HASH_BITS, dtype=np.uint64)
+
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def _pack_bits(bits: np.ndarray) -> np.uint64:
+    return np.bitwise_or.reduce(_BIT_WEIGHTS[bits.ravel()])
+
+
+def dhash(image: np.ndarray) -> np.uint64:
+    """Difference hash: sign of the horizontal gradient on a 9x8 thumbnail"""
+    small = cv2.resize(_to_gray(image), (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _pack_bits(small[:, 1:] > small[:, :-1])
+
+
+def phash(image: np.ndarray) -> np.uint64:
+    """DCT hash: lowest 8x8 frequencies of a 32x32 thumbnail against their median"""
+    small = cv2.resize(_to_gray(image), (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    return _pack_bits(low > np.median(low.ravel()[1:]))
+
+
+HASH_FUNCTIONS: Dict[str, Callable[[np.ndarray], np.uint64]] = {
+    'dhash': dhash,
+    'phash': phash,
+}
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Number of set bits of every ``uint64`` element"""
+    x = values - ((values >> np.uint64(1)) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return ((x * _H01) >> np.uint64(56)).astype(np.uint8)
+
+
+def hamming_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between two arrays of hashes, shape (len(a), len(b))"""
+    a = np.asarray(a, dtype=np.uint64)
+    b = np.asarray(b, dtype=np.uint64)
+    return popcount64(a[:, None] ^ b[None, :])
+
+
+def _flip_masks(width: int, radius: int) -> List[int]:
+    """All masks of up to ``radius`` set bits within ``width`` bits"""
+    masks = [0]
+    for count in range(1, radius + 1):
+        masks.extend(sum(1 << bit for bit in bits) for bits in combinations(range(width), count))
+    return masks
+
+
+class HammingIndex:
+    """Hashes searchable by Hamming distance using multi-index hashing.
+
+    The 64 bits are split into ``max_distance // (radius + 1) + 1`` bands.
+    Two hashes within ``max_distance`` bits of each other differ in at most
+    ``radius`` bits of some band, so only hashes found by probing every band
+    value within ``radius`` are candidates, and their exact distances are
+    computed in one vectorized step.
+    """
+
+    def __init__(self, max_distance: int, radius: Optional[int] = None):
+        self.max_distance = max_distance
+        if radius is None:
+            radius = 0 if max_distance <= 3 else 1
+        bands = min(max_distance // (radius + 1) + 1, HASH_BITS)
+        edges = np.linspace(0, HASH_BITS, bands + 1).astype(int)
+        self._bands = [(int(lo), (1 << int(hi - lo)) - 1, _flip_masks(int(hi - lo), radius))
+                       for lo, hi in zip(edges[:-1], edges[1:])]
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._bands]
+        self._hashes = np.empty(256, dtype=np.uint64)
+        self._ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, value: int, item_id: int) -> None:
+        position = len(self._ids)
+        if position == len(self._hashes):
+            self._hashes = np.concatenate([self._hashes, np.empty_like(self._hashes)])
+        self._hashes[position] = value
+        self._ids.append(item_id)
+        for table, (shift, mask, _) in zip(self._tables, self._bands):
+            table.setdefault((value >> shift) & mask, []).append(position)
+
+    def nearest(self, value: int) -> Tuple[int, int]:
+        """``(item_id, distance)`` of the closest hash within ``max_distance``, or ``(-1, -1)``"""
+        candidates = set()
+        for table, (shift, mask, flips) in zip(self._tables, self._bands):
+            key = (value >> shift) & mask
+            for flip in flips:
+                bucket = table.get(key ^ flip)
+                if bucket:
+                    candidates.update(bucket)
+        if not candidates:
+            return -1, -1
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        distances = popcount64(self._hashes[positions] ^ np.uint64(value))
+        best = int(distances.argmin())
+        if distances[best] > self.max_distance:
+            return -1, -1
+        return self._ids[positions[best]], int(distances[best])
+
+
+def find_near_duplicates(hashes: Sequence[int], max_distance: int) -> np.ndarray:
+    """For every hash, the index of the earlier kept hash it duplicates, or -1 if it is kept.
+
+    Hashes are processed in order and compared against all kept hashes, so
+    the first occurrence of a picture always survives.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    duplicate_of = np.full(len(hashes), -1, dtype=np.int64)
+    index = HammingIndex(max_distance)
+    for i, value in enumerate(hashes.tolist()):
+        original, _ = index.nearest(value)
+        if original >= 0:
+            duplicate_of[i] = original
+        else:
+            index.add(value, i)
+    return duplicate_of
+
+
+def hash_frame_files(paths: Sequence[str], method: str = 'dhash', threads: int = 4) -> np.ndarray:
+    """Perceptual hashes of saved frames, read with ``threads`` threads"""
+    if method not in HASH_FUNCTIONS:
+        raise ValueError(f"Unknown perceptual hash: {method}")
+    hash_function = HASH_FUNCTIONS[method]
+
+    def hash_file(path: str) -> np.uint64:
+        image = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_2)
+        if image is None:
+            raise ValueError(f"Cannot read frame: {path}")
+        return hash_function(image)
+
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        return np.fromiter(executor.map(hash_file, paths), dtype=np.uint64, count=len(paths))
+
+
+def deduplicate_frames(paths: Sequence[str], max_distance: int,
+                       method: str = 'dhash') -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Split frames into kept paths and (duplicate, original) pairs, in order"""
+    duplicate_of = find_near_duplicates(hash_frame_files(paths, method), max_distance)
+    kept = [path for path, original in zip(paths, duplicate_of) if original < 0]
+    removed = [(path, paths[original]) for path, original in zip(paths, duplicate_of) if original >= 0]
+    return kept, removed
@@ -19,3 +19,7 @@ class GoogleAPIError(VideoToSlidesException):
 class AuthenticationError(GoogleAPIError):
     """Raised when authentication fails"""
     pass
+
+class ServiceBusyError(VideoToSlidesException):
+    """Raised when the job queue of the service is full"""
+    pass
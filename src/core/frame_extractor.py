@@ -1,33 +1,694 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import bisect
+import os
+import shutil
+import statistics
+import tempfile
+import time
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterator, List, Optional, Tuple
 from loguru import logger
 from tqdm import tqdm
 from colorama import Fore, Style
 from config.settings import settings
+from src.core.decoder import DecoderSettings, FFmpegDecoder, FrameDecoder, OpenCVDecoder
+from src.core.dedup import HASH_FUNCTIONS, deduplicate_frames
+from src.core.exceptions import FrameExtractionError
+from src.core.resume import ResumePoint
+from src.core.scene import SCENE_COMPARE_WIDTH, SceneChangeDetector, SceneChangeSettings
+from src.core.timeline import SignatureTimeline, TimelineCache
+from src.core.pipeline import (
+    FrameBufferPool, FrameEncoderPool, FrameEncoding, FrameWriterPool, StageTimings, prefetch, timed_decode
+)
+from src.utils.metrics import metrics
+
+DECODE_STRATEGIES = ('auto', 'seek', 'grab')
+
+
+def probe_keyframes(video_path: str, max_packets: Optional[int] = None) -> List[int]:
+    """List the packet indices of the keyframes in a video.
+
+    Opens the video in raw packet mode so packets are only demuxed, not
+    decoded. Scans the whole file unless ``max_packets`` is given and returns
+    an empty list if keyframes cannot be determined.
+    """
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+    keyframes = []
+    try:
+        if not cap.isOpened():
+            return []
+        packet_index = 0
+        while max_packets is None or packet_index < max_packets:
+            if not cap.grab():
+                break
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(packet_index)
+            packet_index += 1
+    except cv2.error:
+        return []
+    finally:
+        cap.release()
+    return keyframes
+
+
+def probe_keyframe_interval(video_path: str, max_packets: int = 3000) -> Optional[int]:
+    """Estimate the keyframe (GOP) spacing of a video.
+
+    Returns the median distance between the keyframes seen in the first
+    ``max_packets`` packets, or None if it cannot be determined.
+    """
+    keyframes = probe_keyframes(video_path, max_packets)
+    if len(keyframes) < 2:
+        return None
+    spacings = [b - a for a, b in zip(keyframes, keyframes[1:])]
+    return int(statistics.median(spacings))
+
+
+def choose_decode_strategy(interval: int, gop_size: Optional[int]) -> str:
+    """Pick 'seek' or 'grab' for a sampling interval.
+
+    A seek has to decode forward from the previous keyframe, which costs on
+    average half a GOP plus the seek itself, while grabbing decodes the
+    ``interval - 1`` skipped frames without converting them to BGR. Seeking
+    only pays off once the interval is longer than the keyframe spacing.
+    """
+    if gop_size and interval > gop_size:
+        return 'seek'
+    return 'grab'
+
+
+def prepare_comparison_frame(frame: np.ndarray, compare_width: Optional[int] = None,
+                             roi: Optional[Tuple[int, int, int, int]] = None,
+                             dst: Optional[np.ndarray] = None,
+                             scratch: Optional[np.ndarray] = None) -> np.ndarray:
+    """Reduce a BGR frame to the grayscale image used for difference scoring.
+    
+    ``roi`` is an ``(x, y, width, height)`` crop in full-frame pixels, applied
+    before scaling so a webcam inset or ticker never reaches the metric.
+    ``compare_width`` downscales the crop to that width, keeping the aspect
+    ratio. Frames are first decimated with a strided view to about twice the
+    target size, so the area interpolation never touches every source pixel.
+    
+    The result is written into ``dst`` and the downscaled color frame into
+    ``scratch`` when they have the right shape, so nothing is allocated.
+    """
+    if roi is not None:
+        x, y, width, height = roi
+        frame = frame[max(y, 0):y + height, max(x, 0):x + width]
+        if frame.size == 0:
+            raise ValueError(f"Region of interest {roi} lies outside the frame")
+    
+    height, width = frame.shape[:2]
+    if compare_width and compare_width < width:
+        compare_height = max(1, round(height * compare_width / width))
+        step = width // (compare_width * 2)
+        if step > 1:
+            frame = frame[::step, ::step]
+        frame = cv2.resize(frame, (compare_width, compare_height), dst=scratch, interpolation=cv2.INTER_AREA)
+    
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+def frame_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute difference of two comparison frames, the difference mode score"""
+    return float(cv2.absdiff(a, b).mean())
+
+
+class DifferenceScorer:
+    """Difference-mode analysis stage: save a sample when it differs from the previous one.
+    
+    Comparison frames are prepared into a preallocated stack, so once the
+    first sample has set its shape scoring allocates nothing per sample.
+    ``select_batch`` scores up to ``batch_size`` samples in one vectorized
+    pass: the batch is prepared into slots 1..n behind the previous sample in
+    slot 0, and one ``absdiff`` over the stack compares every slot with the one
+    before it. Scores equal those of ``frame_difference`` exactly, as the
+    mean of 8-bit differences is computed without rounding.
+    
+    ``record`` is called with every sample's comparison frame and score.
+    """
+    
+    def __init__(self, threshold: float, compare_width: Optional[int] = None,
+                 roi: Optional[Tuple[int, int, int, int]] = None,
+                 record: Optional[Callable[[int, np.ndarray, Optional[float]], None]] = None,
+                 batch_size: int = 1):
+        self.threshold = threshold
+        self.compare_width = compare_width
+        self.roi = roi
+        self.record = record
+        self.batch_size = max(batch_size, 1)
+        self._stack: Optional[np.ndarray] = None
+        self._scratch: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+        # Slot of the previous sample; with single samples it alternates between 0 and 1
+        self._previous: Optional[int] = None
+    
+    def __call__(self, frame_index: int, frame: np.ndarray) -> Tuple[bool, Optional[float]]:
+        return self.select_batch([(frame_index, frame)])[0]
+    
+    def select_batch(self, samples: List[Tuple[int, np.ndarray]]) -> List[Tuple[bool, Optional[float]]]:
+        count = len(samples)
+        if count > self.batch_size:
+            raise ValueError(f"Batch of {count} samples exceeds the batch size {self.batch_size}")
+        if count == 1:
+            first = 1 if self._previous != 1 else 0
+        else:
+            if self._previous == 1:
+                self._stack[0] = self._stack[1]
+                self._previous = 0
+            first = 1
+        grays = [self._prepare(frame, first + i) for i, (_, frame) in enumerate(samples)]
+        
+        height, width = grays[0].shape
+        scores: List[Optional[float]]
+        if count == 1:
+            scores = [None if self._previous is None else
+                      float(cv2.absdiff(self._stack[self._previous], grays[0], dst=self._diff[:height]).mean())]
+        else:
+            # Each slot minus the one before it, as one image of ``count`` stacked frames
+            diff = cv2.absdiff(self._stack[:count].reshape(count * height, width),
+                               self._stack[1:count + 1].reshape(count * height, width),
+                               dst=self._diff[:count * height])
+            scores = diff.reshape(count, height * width).mean(axis=1).tolist()
+            if self._previous is None:
+                scores[0] = None
+        
+        decisions = []
+        for (frame_index, _), gray, score in zip(samples, grays, scores):
+            if self.record is not None:
+                self.record(frame_index, gray, score)
+            decisions.append((score is None or score > self.threshold, score))
+        
+        last = first + count - 1
+        if count > 1:
+            # The next batch compares against the last sample from slot 0
+            self._stack[0] = self._stack[last]
+            last = 0
+        self._previous = last
+        return decisions
+    
+    def _prepare(self, frame: np.ndarray, slot: int) -> np.ndarray:
+        """Comparison frame of ``frame``, written into ``slot`` of the stack"""
+        if self._stack is None:
+            gray = prepare_comparison_frame(frame, self.compare_width, self.roi)
+            self._stack = np.empty((self.batch_size + 1, *gray.shape), np.uint8)
+            self._diff = np.empty((self.batch_size * gray.shape[0], gray.shape[1]), np.uint8)
+            if gray.shape[1] < frame.shape[1]:
+                self._scratch = np.empty((*gray.shape, 3), np.uint8)
+            self._stack[slot] = gray
+            return self._stack[slot]
+        
+        gray = prepare_comparison_frame(frame, self.compare_width, self.roi, dst=self._stack[slot],
+                                        scratch=self._scratch)
+        if gray.shape != self._stack.shape[1:]:
+            raise FrameExtractionError(f"Frame size changed mid-video: comparison frame {gray.shape[::-1]}, "
+                                       f"expected {self._stack.shape[:0:-1]}")
+        return self._stack[slot]
+
+
+@dataclass
+class VideoChunk:
+    """A range of sample positions analyzed by one worker.
+    
+    The chunk owns the samples in ``[start, stop)``. ``reference`` is the
+    sample just before ``start``: it is decoded only to compare the first
+    owned sample against and is never saved, so a change straddling the seam
+    is detected exactly once. Decoding starts at the keyframe ``seek_from``.
+    """
+    index: int
+    start: int
+    stop: Optional[int]
+    reference: Optional[int]
+    seek_from: int
+
+
+def plan_chunks(total_frames: int, interval: int, workers: int,
+                keyframes: List[int]) -> List[VideoChunk]:
+    """Split a video into up to ``workers`` chunks starting at keyframes.
+    
+    Boundaries are snapped to the nearest keyframe and then rounded up to the
+    sampling grid, so every sample position belongs to exactly one chunk.
+    """
+    starts = [0]
+    for k in range(1, workers):
+        target = total_frames * k // workers
+        if keyframes:
+            target = min(keyframes, key=lambda keyframe: abs(keyframe - target))
+        start = -(-target // interval) * interval
+        if starts[-1] < start < total_frames:
+            starts.append(start)
+    
+    chunks = []
+    for i, start in enumerate(starts):
+        stop = starts[i + 1] if i + 1 < len(starts) else None
+        reference = start - interval if start > 0 else None
+        seek_from = 0
+        if reference is not None:
+            position = bisect.bisect_right(keyframes, reference)
+            seek_from = keyframes[position - 1] if position else reference
+        chunks.append(VideoChunk(index=i, start=start, stop=stop, reference=reference,
+                                 seek_from=seek_from))
+    return chunks
+
+
+# Called with (number, frame_index, path) once a frame is on disk
+FrameSavedCallback = Callable[[int, int, str], None]
+
+# Analysis stage: (frame_index, frame) -> (save it, difference score or None)
+FrameSelector = Callable[[int, np.ndarray], Tuple[bool, Optional[float]]]
+
+# Batched analysis stage: [(frame_index, frame), ...] -> [(save it, score), ...]
+BatchFrameSelector = Callable[[List[Tuple[int, np.ndarray]]], List[Tuple[bool, Optional[float]]]]
+
+
+@dataclass
+class ExtractedFrame:
+    """A frame found by ``iter_frames``.
+    
+    ``score`` is the difference to the previous sample in diff mode (None for
+    the first sample and in interval mode). ``path`` is the saved file (its
+    name with a frame consumer, None when frames are not saved) and ``image``
+    the decoded BGR frame (None when the run was asked not to keep images).
+    """
+    number: int
+    frame_index: int
+    timestamp: Optional[float]
+    score: Optional[float]
+    path: Optional[str]
+    image: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+@dataclass
+class ExtractionStats:
+    """Throughput figures of the last extraction run"""
+    strategy: str = 'grab'
+    frames_covered: int = 0
+    frames_sampled: int = 0
+    frames_saved: int = 0
+    frames_deduplicated: int = 0
+    frames_allocated: int = 0
+    elapsed: float = 0.0
+    timings: StageTimings = field(default_factory=StageTimings)
+    
+    @property
+    def video_fps(self) -> float:
+        """Video frames advanced per second of wall time"""
+        return self.frames_covered / self.elapsed if self.elapsed > 0 else 0.0
+    
+    @property
+    def sample_fps(self) -> float:
+        """Sampled (fully decoded) frames per second of wall time"""
+        return self.frames_sampled / self.elapsed if self.elapsed > 0 else 0.0
+
 
 class FrameExtractor(ABC):
-    def __init__(self, output_dir=None):
+    def __init__(self, output_dir=None, writer_threads: Optional[int] = None,
+                 queue_size: Optional[int] = None, show_progress: bool = True,
+                 frame_consumer: Optional[Callable[[str, bytes], None]] = None,
+                 encoding: Optional[FrameEncoding] = None, decoder: Optional[DecoderSettings] = None,
+                 reuse_buffers: Optional[bool] = None):
+        """
+        With a ``frame_consumer`` no files are written: every selected frame
+        is encoded in memory and passed to it as ``(name, bytes)``, and
+        ``extract`` returns the frame names instead of paths. ``encoding``
+        sets the image format, quality and size of the frames (see
+        ``FRAME_FORMAT`` and related settings for the default). ``decoder``
+        picks the decoder backend (see ``DECODER_BACKEND``). With
+        ``reuse_buffers`` (see ``FRAME_BUFFER_REUSE``) frames are decoded into
+        a bounded set of recycled buffers instead of a new array each.
+        """
+        self.frame_consumer = frame_consumer
+        self.encoding = encoding or FrameEncoding.from_settings()
+        self.decoder = decoder or DecoderSettings.from_settings()
         self.output_dir = Path(output_dir or settings.FRAMES_DIR)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if frame_consumer is None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.writer_threads = settings.WRITER_THREADS if writer_threads is None else writer_threads
+        self.queue_size = settings.DECODE_QUEUE_SIZE if queue_size is None else queue_size
+        self.reuse_buffers = settings.FRAME_BUFFER_REUSE if reuse_buffers is None else reuse_buffers
+        self.show_progress = show_progress
+        self.last_stats: Optional[ExtractionStats] = None
     
     @abstractmethod
     def extract(self, video_path: str, **kwargs) -> List[str]:
         """Extract frames from video and return list of saved frame paths"""
         pass
+    
+    @abstractmethod
+    def iter_frames(self, video_path: str, **kwargs) -> Iterator[ExtractedFrame]:
+        """Yield the selected frames of a video as soon as they are found"""
+        pass
+    
+    @staticmethod
+    def _open_capture(video_path: str) -> cv2.VideoCapture:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise FrameExtractionError(f"Cannot open video: {video_path}")
+        return cap
+    
+    def _resolve_strategy(self, video_path: str, interval: int, strategy: str) -> str:
+        """Turn the requested decode strategy into 'seek' or 'grab' ('ffmpeg' with that backend)"""
+        if strategy not in DECODE_STRATEGIES:
+            raise ValueError(f"Unknown decode strategy: {strategy}")
+        if self.decoder.backend == 'ffmpeg':
+            return 'ffmpeg keyframes' if self.decoder.keyframes_only else 'ffmpeg'
+        if strategy != 'auto':
+            return strategy
+        if interval <= 1:
+            return 'grab'
+        
+        gop_size = probe_keyframe_interval(video_path)
+        resolved = choose_decode_strategy(interval, gop_size)
+        logger.debug(f"Keyframe spacing: {gop_size or 'unknown'}, interval: {interval} -> '{resolved}' decoding")
+        return resolved
+    
+    def _stage_frames(self, sampler: Iterator[Tuple[int, np.ndarray]], fps: float, stats: ExtractionStats,
+                      prefix: str, select: FrameSelector, progress: Callable[[int, int], None],
+                      first_number: int = 1, on_saved: Optional[FrameSavedCallback] = None,
+                      save: bool = True, pool: Optional[FrameBufferPool] = None, keep_images: bool = True,
+                      select_batch: Optional[BatchFrameSelector] = None,
+                      batch_size: int = 1) -> Iterator[ExtractedFrame]:
+        """Decode, analyze and save frames, overlapping the stages where configured.
+        
+        ``sampler`` yields the (frame_index, frame) samples, usually from
+        ``FrameDecoder.samples``. Samples are decoded on a separate thread when ``queue_size`` > 0 and
+        selected frames are written by ``writer_threads`` threads, so neither
+        analysis nor image encoding stalls the decoder. Numbering is assigned in
+        analysis order starting at ``first_number``, so the result is the same
+        in every mode. Frames are yielded in order once they are written; with
+        ``save`` False nothing is written and they are yielded right away.
+        
+        With ``select_batch`` the samples are analyzed ``batch_size`` at a time
+        instead of one by one with ``select``. Frames of a sampler feeding
+        ``pool`` go back to it once analyzed or written; with ``keep_images``
+        the yielded frames keep theirs and leave the pool.
+        """
+        timings = stats.timings
+        count = 0
+        writer = None
+        if save:
+            max_pending = max(self.queue_size, self.writer_threads)
+            if self.frame_consumer is not None:
+                writer = FrameEncoderPool(self.writer_threads, max_pending, timings, self.frame_consumer,
+                                          self.encoding)
+            else:
+                writer = FrameWriterPool(self.writer_threads, max_pending, timings, self.encoding)
+        pending: deque = deque()
+        analyze_seconds = metrics.histogram('frame_analyze_seconds')
+        samples = prefetch(
+            timed_decode(sampler, timings),
+            self.queue_size, timings
+        )
+        
+        batches = (_batched(samples, batch_size) if select_batch is not None
+                   else ([sample] for sample in samples))
+        
+        try:
+            for batch in batches:
+                analyze_start = time.perf_counter()
+                decisions = select_batch(batch) if select_batch is not None else [select(*batch[0])]
+                elapsed = time.perf_counter() - analyze_start
+                timings.analyze_time += elapsed
+                analyze_seconds.observe(elapsed)
+                
+                for (frame_index, frame), (should_save, score) in zip(batch, decisions):
+                    if not should_save:
+                        if pool is not None:
+                            pool.release(frame)
+                    else:
+                        number = first_number + count
+                        count += 1
+                        filename = None
+                        write: Optional[Future] = None
+                        if writer is not None:
+                            filename = f"{prefix}_{number}{self.encoding.extension}"
+                            if self.frame_consumer is None:
+                                filename = str(self.output_dir / filename)
+                            on_written = None
+                            if on_saved is not None:
+                                on_written = (lambda number=number, frame_index=frame_index, filename=filename:
+                                              on_saved(number, frame_index, filename))
+                            write = writer.submit(filename, frame, on_written)
+                        if pool is not None:
+                            if keep_images:
+                                pool.detach()
+                            elif write is None:
+                                pool.release(frame)
+                            else:
+                                write.add_done_callback(lambda _, frame=frame: pool.release(frame))
+                        timestamp = frame_index / fps if fps > 0 else None
+                        pending.append((ExtractedFrame(number, frame_index, timestamp, score, filename,
+                                                       frame if keep_images else None), write))
+                    
+                    progress(frame_index, first_number - 1 + count)
+                    while pending and (pending[0][1] is None or pending[0][1].done()):
+                        extracted, write = pending.popleft()
+                        if write is not None:
+                            write.result()
+                        yield extracted
+            
+            if writer is not None:
+                writer.close()
+            while pending:
+                yield pending.popleft()[0]
+        finally:
+            samples.close()
+            if writer is not None:
+                writer.close()
+            if pool is not None:
+                stats.frames_allocated = pool.allocations
+    
+    def _buffer_pool(self, decoder: FrameDecoder, batch_size: int = 1) -> Optional[FrameBufferPool]:
+        """Let ``decoder`` recycle its frames when ``reuse_buffers`` is set.
+        
+        The pool has room for every frame that can be in flight at once: the
+        decode queue, a frame being decoded, the analyzed batch and the
+        pending writes.
+        """
+        if not self.reuse_buffers:
+            return None
+        decoder.pool = FrameBufferPool(self.queue_size + 1 + batch_size + max(self.queue_size, self.writer_threads))
+        return decoder.pool
+    
+    def _open_decoder(self, video_path: str, cap: cv2.VideoCapture, strategy: str,
+                      stats: ExtractionStats) -> FrameDecoder:
+        """Decoder for ``video_path`` with the configured backend; ``cap`` supplies the video size"""
+        if self.decoder.backend == 'ffmpeg':
+            size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            keyframes = probe_keyframes(video_path) if self.decoder.keyframes_only else None
+            return FFmpegDecoder(video_path, size, stats, self.decoder, keyframes)
+        return OpenCVDecoder(cap, strategy, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), stats)
+    
+    def _resumed_samples(self, decoder: FrameDecoder, interval: int, resume: ResumePoint, start: int,
+                         prime: FrameSelector) -> Iterator[Tuple[int, np.ndarray]]:
+        """Samples from ``start`` after decoding the last analyzed sample of ``resume`` into ``prime``"""
+        if isinstance(decoder, OpenCVDecoder):
+            if not self._prime_reference(decoder.cap, resume.frame_index, resume.frame_index, start, prime):
+                return iter(())
+            return decoder.samples(interval, start)
+        samples = decoder.samples(interval, resume.frame_index)
+        for frame_index, frame in samples:
+            prime(frame_index, frame)
+            if decoder.pool is not None:
+                decoder.pool.release(frame)
+            break
+        return samples
+    
+    def _resume_position(self, resume: Optional[ResumePoint], interval: int) -> Tuple[int, int]:
+        """First sample and first frame number for ``resume``"""
+        if resume is None:
+            return 0, 1
+        logger.info(f"{Fore.YELLOW}⏩ Resuming after frame {resume.frame_index:,} "
+                    f"({resume.frames_saved} frames already saved)")
+        return resume.frame_index + interval, resume.frames_saved + 1
+    
+    def _saved_before(self, resume: Optional[ResumePoint], prefix: str) -> List[str]:
+        """Paths of the frames saved by the run ``resume`` continues"""
+        if resume is None:
+            return []
+        return [str(self.output_dir / f"{prefix}_{number}{self.encoding.extension}")
+                for number in range(1, resume.frames_saved + 1)]
+    
+    @staticmethod
+    def _prime_reference(cap: cv2.VideoCapture, reference: int, seek_from: int, start: int,
+                         select: FrameSelector) -> bool:
+        """Decode the sample at ``reference`` into ``select`` without saving it.
+        
+        Decoding starts at ``seek_from`` (a keyframe at or before the
+        reference) and the capture is left positioned at ``start``. Returns
+        False if the video ends first.
+        """
+        if seek_from > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, seek_from)
+        for _ in range(reference - seek_from):
+            cap.grab()
+        ret, frame = cap.read()
+        if not ret:
+            return False
+        select(reference, frame)
+        for _ in range(start - reference - 1):
+            cap.grab()
+        return True
+    
+    def _check_dedup_options(self, max_distance: int, method: str) -> None:
+        if not max_distance:
+            return
+        if self.frame_consumer is not None:
+            raise ValueError("Near-duplicate suppression needs saved frames, not a frame consumer")
+        if method not in HASH_FUNCTIONS:
+            raise ValueError(f"Unknown perceptual hash: {method}")
+    
+    def _suppress_duplicates(self, saved_paths: List[str], max_distance: int, method: str,
+                             stats: ExtractionStats) -> List[str]:
+        """Delete saved frames that nearly duplicate an earlier saved frame.
+        
+        Runs over the whole extracted set, so slides the presenter returns to
+        are dropped as well as consecutive repeats. Kept frames keep their
+        file names.
+        """
+        if not max_distance or not saved_paths:
+            return saved_paths
+        self._check_dedup_options(max_distance, method)
+        
+        start = time.perf_counter()
+        kept, removed = deduplicate_frames(saved_paths, max_distance, method)
+        for path, original in removed:
+            logger.debug(f"{Path(path).name} duplicates {Path(original).name}")
+            os.remove(path)
+        stats.frames_deduplicated = len(removed)
+        metrics.counter('frames_deduplicated_total').inc(len(removed))
+        logger.info(f"{Fore.YELLOW}🧹 Removed {len(removed)} near-duplicate frames "
+                    f"({method}, distance <= {max_distance}, {time.perf_counter() - start:.2f}s)")
+        return kept
+    
+    def _collect(self, frames: Iterator[ExtractedFrame], prefix: str, resume: Optional[ResumePoint],
+                 dedup_distance: int, dedup_hash: str) -> List[str]:
+        """Run ``frames`` to the end and return the saved paths, as ``extract`` does"""
+        self._check_dedup_options(dedup_distance, dedup_hash)
+        saved_paths = self._saved_before(resume, prefix) + [frame.path for frame in frames]
+        stats = self.last_stats
+        saved_paths = self._suppress_duplicates(saved_paths, dedup_distance, dedup_hash, stats)
+        stats.frames_saved = len(saved_paths)
+        logger.success(f"{Fore.GREEN}✅ Frame extraction complete: {len(saved_paths)} frames saved")
+        self._log_throughput(stats)
+        return saved_paths
+    
+    @staticmethod
+    def _record_metrics(stats: ExtractionStats) -> None:
+        """Add the totals of a finished run, including those of worker processes, to the metrics"""
+        if not metrics.enabled:
+            return
+        metrics.counter('frames_covered_total').inc(stats.frames_covered)
+        metrics.counter('frames_sampled_total').inc(stats.frames_sampled)
+        metrics.counter('frames_saved_total').inc(stats.frames_saved)
+        timings = stats.timings
+        for stage, seconds in (('decode', timings.decode_time), ('analyze', timings.analyze_time),
+                               ('write', timings.write_time)):
+            metrics.counter('extraction_stage_seconds_total', stage=stage).inc(seconds)
+    
+    def _log_throughput(self, stats: ExtractionStats) -> None:
+        timings = stats.timings
+        logger.info(f"{Fore.BLUE}⏱️  Throughput: {stats.video_fps:,.1f} video frames/s, "
+                    f"{stats.sample_fps:,.1f} samples/s ('{stats.strategy}' decoding, {stats.elapsed:.1f}s)")
+        logger.info(f"{Fore.BLUE}⏱️  Stages: decode {timings.decode_time:.2f}s, analyze {timings.analyze_time:.2f}s, "
+                    f"write {timings.write_time:.2f}s (queue depth max {timings.max_queue_depth}, "
+                    f"mean {timings.mean_queue_depth:.1f}; pending writes max {timings.max_pending_writes})")
+        if stats.frames_allocated:
+            logger.debug(f"{stats.frames_allocated} frame buffers allocated for {stats.frames_sampled:,} samples")
 
 class DifferenceFrameExtractor(FrameExtractor):
     """Extract frames based on visual differences"""
     
+    def __init__(self, output_dir=None, writer_threads: Optional[int] = None,
+                 queue_size: Optional[int] = None, show_progress: bool = True,
+                 workers: Optional[int] = None,
+                 frame_consumer: Optional[Callable[[str, bytes], None]] = None,
+                 encoding: Optional[FrameEncoding] = None, decoder: Optional[DecoderSettings] = None,
+                 timeline_cache: Optional[TimelineCache] = None, reuse_buffers: Optional[bool] = None,
+                 score_batch: Optional[int] = None):
+        """
+        With a ``timeline_cache`` a run over a local file stores the
+        signature timeline of the video, and later runs with the same
+        comparison settings select their frames from it (see
+        ``src.core.timeline``). ``score_batch`` samples (see
+        ``SCORE_BATCH_SIZE``) are scored together in one vectorized pass.
+        """
+        super().__init__(output_dir, writer_threads, queue_size, show_progress, frame_consumer, encoding,
+                         decoder, reuse_buffers)
+        self.workers = settings.EXTRACTION_WORKERS if workers is None else workers
+        self.timeline_cache = timeline_cache
+        self.score_batch = settings.SCORE_BATCH_SIZE if score_batch is None else score_batch
+        if self.score_batch < 1:
+            raise ValueError(f"Score batch must be at least 1, got {self.score_batch}")
+    
     def extract(self, video_path: str, threshold: float = 30.0, 
-                interval: int = 30, prefix: str = "frame") -> List[str]:
-        cap = cv2.VideoCapture(video_path)
-        last_frame = None
-        frame_index = 0
-        saved_frame_count = 0
-        saved_paths = []
+                interval: int = 30, prefix: str = "frame",
+                decode_strategy: str = 'auto', compare_width: Optional[int] = None,
+                roi: Optional[Tuple[int, int, int, int]] = None,
+                adaptive_stride: int = 0, dedup_distance: int = 0, dedup_hash: str = 'dhash',
+                resume: Optional[ResumePoint] = None, on_saved: Optional[FrameSavedCallback] = None,
+                checkpoint: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """Save every sample that differs from the previous one by more than ``threshold``.
+        
+        With ``adaptive_stride`` the video is sampled every ``adaptive_stride``
+        frames instead, and a change between two such samples is located by
+        binary search on the ``interval`` grid (see ``_iter_adaptive``).
+        
+        ``resume`` continues an interrupted run after its last analyzed sample
+        (comparing against that sample, as an uninterrupted run would) and
+        returns the frames of both runs. ``on_saved`` is called for every frame
+        once it is on disk and ``checkpoint`` with ``(frame_index, frames
+        saved)`` after every analyzed sample.
+        """
+        frames = self.iter_frames(video_path, threshold=threshold, interval=interval, prefix=prefix,
+                                  decode_strategy=decode_strategy, compare_width=compare_width, roi=roi,
+                                  adaptive_stride=adaptive_stride, resume=resume, on_saved=on_saved,
+                                  checkpoint=checkpoint, keep_images=False)
+        return self._collect(frames, prefix, resume, dedup_distance, dedup_hash)
+    
+    def iter_frames(self, video_path: str, threshold: float = 30.0,
+                    interval: int = 30, prefix: str = "frame",
+                    decode_strategy: str = 'auto', compare_width: Optional[int] = None,
+                    roi: Optional[Tuple[int, int, int, int]] = None, adaptive_stride: int = 0,
+                    save: bool = True, resume: Optional[ResumePoint] = None,
+                    on_saved: Optional[FrameSavedCallback] = None,
+                    checkpoint: Optional[Callable[[int, int], None]] = None,
+                    keep_images: bool = True) -> Iterator[ExtractedFrame]:
+        """Yield every sample that differs from the previous one as soon as it is found.
+        
+        Frames are yielded once saved, or straight after analysis with
+        ``save`` False. Closing the generator stops decoding the rest of the
+        video. With ``workers`` > 1 the chunks are analyzed in parallel and
+        the frames, without image or score, are yielded once all are merged.
+        Without ``keep_images`` the frames carry no image, so a saved frame's
+        buffer is decoded into again once it is written. Other arguments work
+        as for ``extract``.
+        """
+        if adaptive_stride < 0:
+            raise ValueError(f"Adaptive stride must not be negative, got {adaptive_stride}")
+        if adaptive_stride and self.decoder.backend != 'opencv':
+            raise ValueError("Adaptive sampling seeks to every sample and needs the opencv decoder")
+        cacheable = self._timeline_cacheable(video_path, adaptive_stride, resume)
+        if cacheable:
+            timeline = self.timeline_cache.load(video_path, self._timeline_params(compare_width, roi), interval)
+            if timeline is not None:
+                yield from self._iter_timeline(video_path, timeline, threshold, prefix, save, on_saved,
+                                               checkpoint, keep_images)
+                return
+        if adaptive_stride:
+            # Whole steps of the fine grid; random access needs seeking
+            adaptive_stride = max(1, -(-adaptive_stride // interval)) * interval
+            strategy = 'seek'
+        else:
+            strategy = self._resolve_strategy(video_path, interval, decode_strategy)
+        cap = self._open_capture(video_path)
+        stats = ExtractionStats(strategy=strategy)
+        self.last_stats = stats
         
         # Get video info for progress tracking
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -37,65 +698,480 @@ class DifferenceFrameExtractor(FrameExtractor):
         video_name = Path(video_path).stem
         logger.info(f"{Fore.CYAN}🎬 Starting frame extraction from '{video_name}'")
         logger.info(f"{Fore.BLUE}📊 Video info: {total_frames:,} frames, {duration:.1f}s duration, {fps:.1f} FPS")
-        logger.info(f"{Fore.YELLOW}⚙️  Mode: Difference detection (threshold: {threshold}, interval: {interval} frames)")
+        if adaptive_stride:
+            logger.info(f"{Fore.YELLOW}⚙️  Mode: Adaptive difference detection (threshold: {threshold}, "
+                        f"stride: {adaptive_stride} frames refined to {interval})")
+        else:
+            logger.info(f"{Fore.YELLOW}⚙️  Mode: Difference detection (threshold: {threshold}, interval: {interval} frames, decoding: {strategy})")
+        if compare_width or roi:
+            logger.info(f"{Fore.YELLOW}⚙️  Comparison: {f'{compare_width}px wide' if compare_width else 'full width'}"
+                        f"{f', region {roi}' if roi else ''}")
         
         # Calculate expected iterations for progress bar
         expected_iterations = total_frames // interval
         pbar = tqdm(total=expected_iterations, 
                    desc=f"{Fore.MAGENTA}🔍 Analyzing frames", 
                    unit="frames",
+                   disable=not self.show_progress,
                    bar_format='{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}] {postfix}')
         
+        def progress(frame_index: int, saved_frame_count: int) -> None:
+            # Adaptive sampling reports only the located changes
+            pbar.update(max(frame_index // interval + 1 - pbar.n, 0))
+            pbar.set_postfix({
+                'saved': saved_frame_count,
+                'current_time': f"{(frame_index + interval)/fps:.1f}s" if fps > 0 else "N/A"
+            })
+            if checkpoint is not None:
+                checkpoint(frame_index, saved_frame_count)
+        
+        params = dict(threshold=threshold, interval=interval, prefix=prefix, strategy=strategy,
+                      compare_width=compare_width, roi=roi)
+        start, first_number = self._resume_position(resume, interval)
+        parallel = (self.workers > 1 and total_frames > interval and save and resume is None
+                    and self.frame_consumer is None and not adaptive_stride
+                    and self.decoder.backend == 'opencv')
+        decoder = None
+        recorder = None
+        start_time = time.perf_counter()
         try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                should_save = False
-                
-                if last_frame is not None:
-                    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    frame_diff = cv2.absdiff(last_frame, gray_frame)
-                    mean_diff = frame_diff.mean()
-                    should_save = mean_diff > threshold
-                    last_frame = gray_frame
+            if parallel:
+                if cacheable:
+                    logger.debug("Parallel runs do not record a timeline")
+                cap.release()
+                saved = self._extract_parallel(video_path, total_frames, stats, pbar, params)
+                for number, (frame_index, path) in enumerate(saved, 1):
+                    if on_saved is not None:
+                        on_saved(number, frame_index, path)
+                    stats.frames_saved += 1
+                    yield ExtractedFrame(number, frame_index, frame_index / fps if fps > 0 else None,
+                                         None, path)
+            else:
+                decoder = self._open_decoder(video_path, cap, strategy, stats)
+                if cacheable:
+                    recorder = self.timeline_cache.recorder(video_path, self._timeline_params(compare_width, roi),
+                                                            interval, fps, total_frames)
+                roi = decoder.scale_roi(roi)
+                select = self._difference_selector(threshold, compare_width, roi,
+                                                   recorder.add if recorder is not None else None)
+                pool = None
+                batched = self.score_batch > 1 and not adaptive_stride
+                if resume is not None:
+                    pbar.update(start // interval)
+                if adaptive_stride:
+                    if resume is not None and not self._prime_reference(
+                            cap, resume.frame_index, resume.frame_index, start, select):
+                        return
+                    sampler = self._iter_adaptive(
+                        cap, adaptive_stride, interval, total_frames, stats,
+                        lambda a, b: frame_difference(a, b) > threshold,
+                        lambda frame: prepare_comparison_frame(frame, compare_width, roi),
+                        start=resume.frame_index if resume is not None else 0,
+                        include_start=resume is None)
                 else:
-                    last_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    should_save = True
-                
-                if should_save:
-                    saved_frame_count += 1
-                    filename = self.output_dir / f"{prefix}_{saved_frame_count}.png"
-                    cv2.imwrite(str(filename), frame)
-                    saved_paths.append(str(filename))
-                
-                frame_index += interval
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
-                
-                # Update progress
-                pbar.update(1)
-                pbar.set_postfix({
-                    'saved': saved_frame_count,
-                    'current_time': f"{frame_index/fps:.1f}s" if fps > 0 else "N/A"
-                })
-                
+                    pool = self._buffer_pool(decoder, self.score_batch)
+                    if resume is not None:
+                        sampler = self._resumed_samples(decoder, interval, resume, start, select)
+                    else:
+                        sampler = decoder.samples(interval)
+                for frame in self._stage_frames(sampler, fps, stats, prefix, select, progress,
+                                                first_number=first_number, on_saved=on_saved, save=save,
+                                                pool=pool, keep_images=keep_images,
+                                                select_batch=select.select_batch if batched else None,
+                                                batch_size=self.score_batch):
+                    stats.frames_saved += 1
+                    yield frame
+                if recorder is not None:
+                    recorder.finish()
         finally:
             pbar.close()
+            if decoder is not None:
+                decoder.close()
+            if recorder is not None:
+                recorder.discard()
             cap.release()
+            stats.elapsed = time.perf_counter() - start_time
+            self._record_metrics(stats)
+    
+    def timeline(self, video_path: str, interval: int = 30, decode_strategy: str = 'auto',
+                 compare_width: Optional[int] = None,
+                 roi: Optional[Tuple[int, int, int, int]] = None) -> SignatureTimeline:
+        """Signature timeline of a local video, analyzing it once if the cache has none"""
+        if self.timeline_cache is None:
+            raise ValueError("Building a timeline needs a timeline cache")
+        params = self._timeline_params(compare_width, roi)
+        timeline = self.timeline_cache.load(video_path, params, interval)
+        if timeline is None:
+            # Nothing exceeds an infinite threshold, so only the first sample is yielded
+            for _ in self.iter_frames(video_path, threshold=float('inf'), interval=interval,
+                                      decode_strategy=decode_strategy, compare_width=compare_width, roi=roi,
+                                      save=False):
+                pass
+            timeline = self.timeline_cache.load(video_path, params, interval)
+        if timeline is None:
+            raise FrameExtractionError(f"Cannot build a timeline of {video_path}")
+        return timeline
+    
+    def _timeline_cacheable(self, video_path: str, adaptive_stride: int, resume: Optional[ResumePoint]) -> bool:
+        """Whether a run can use and record a timeline: a whole local file sampled on the interval grid"""
+        return (self.timeline_cache is not None and not adaptive_stride and resume is None
+                and os.path.isfile(video_path))
+    
+    def _timeline_params(self, compare_width: Optional[int], roi: Optional[Tuple[int, int, int, int]]) -> dict:
+        """Settings that shape the thumbnails of a timeline"""
+        return {'compare_width': compare_width or None, 'roi': list(roi) if roi else None,
+                'decoder': self.decoder.backend, 'keyframes_only': self.decoder.keyframes_only,
+                'decode_width': self.decoder.width}
+    
+    def _iter_timeline(self, video_path: str, timeline: SignatureTimeline, threshold: float, prefix: str,
+                       save: bool, on_saved: Optional[FrameSavedCallback],
+                       checkpoint: Optional[Callable[[int, int], None]],
+                       keep_images: bool = True) -> Iterator[ExtractedFrame]:
+        """Select the frames from a cached timeline and decode only those"""
+        stats = ExtractionStats(strategy='timeline')
+        self.last_stats = stats
+        positions = timeline.select(threshold)
+        frame_indices = [int(index) for index in timeline.frame_indices[positions]]
+        scores = {index: (None if np.isnan(score) else float(score))
+                  for index, score in zip(frame_indices, timeline.scores[positions])}
+        
+        logger.info(f"{Fore.CYAN}🎬 Starting frame extraction from '{Path(video_path).stem}'")
+        logger.info(f"{Fore.YELLOW}⚙️  Mode: Difference detection from the cached timeline (threshold: {threshold}, "
+                    f"interval: {timeline.interval} frames): {len(frame_indices)} of {len(timeline):,} samples")
+        
+        def progress(frame_index: int, saved_frame_count: int) -> None:
+            if checkpoint is not None:
+                checkpoint(frame_index, saved_frame_count)
+        
+        cap = self._open_capture(video_path)
+        decoder = None
+        start_time = time.perf_counter()
+        try:
+            decoder = self._open_decoder(video_path, cap, 'seek', stats)
+            for frame in self._stage_frames(decoder.frames_at(frame_indices), timeline.fps, stats, prefix,
+                                            lambda frame_index, frame: (True, scores[frame_index]), progress,
+                                            on_saved=on_saved, save=save, keep_images=keep_images):
+                stats.frames_saved += 1
+                yield frame
+            if len(timeline):
+                stats.frames_covered = int(timeline.frame_indices[-1]) + 1
+        finally:
+            if decoder is not None:
+                decoder.close()
+            cap.release()
+            stats.elapsed = time.perf_counter() - start_time
+            self._record_metrics(stats)
+    
+    @staticmethod
+    def _iter_adaptive(cap: cv2.VideoCapture, stride: int, interval: int, total_frames: int,
+                       stats: ExtractionStats, changed: Callable[[np.ndarray, np.ndarray], bool],
+                       prepare: Callable[[np.ndarray], np.ndarray], start: int = 0,
+                       include_start: bool = True) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield ``start`` and the first sample of every change, found by coarse stepping and bisection.
+        
+        Samples every ``stride`` frames; when a sample has ``changed`` from
+        the previous one, the first changed frame on the ``interval`` grid in
+        between is found by binary search against the last change. Searching
+        again from there up to the coarse sample finds further changes in the
+        same stride. A picture that changes and changes back within one
+        stride is missed.
+        """
+        position = -1
+        last_step = (total_frames - 1) // interval if total_frames > 0 else None
+        
+        def read(step: int) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+            nonlocal position
+            frame_index = step * interval
+            if frame_index != position:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            ret, frame = cap.read()
+            if not ret:
+                return None
+            position = frame_index + 1
+            stats.frames_sampled += 1
+            stats.frames_covered = max(stats.frames_covered, frame_index - start + 1)
+            return frame_index, frame, prepare(frame)
+        
+        step = start // interval
+        stride_steps = stride // interval
+        reference = read(step)
+        if reference is None:
+            return
+        if include_start:
+            yield reference[0], reference[1]
+        
+        while last_step is None or step < last_step:
+            coarse_step = step + stride_steps if last_step is None else min(step + stride_steps, last_step)
+            coarse = read(coarse_step)
+            if coarse is None:
+                return
+            low = step
+            # Every iteration locates the first frame after ``low`` that differs from ``reference``
+            while changed(reference[2], coarse[2]):
+                high, found = coarse_step, coarse
+                while high - low > 1:
+                    middle = read((low + high) // 2)
+                    if middle is None:
+                        return
+                    if changed(reference[2], middle[2]):
+                        high, found = (low + high) // 2, middle
+                    else:
+                        low = (low + high) // 2
+                yield found[0], found[1]
+                reference, low = found, high
+            reference, step = coarse, coarse_step
+    
+    def _difference_selector(self, threshold: float, compare_width: Optional[int],
+                             roi: Optional[Tuple[int, int, int, int]],
+                             record: Optional[Callable[[int, np.ndarray, Optional[float]], None]] = None
+                             ) -> DifferenceScorer:
+        """Build the analysis stage: save a sample when it differs from the previous one.
+        
+        ``record`` is called with every sample's comparison frame and score.
+        """
+        return DifferenceScorer(threshold, compare_width, roi, record, self.score_batch)
+    
+    def _extract_parallel(self, video_path: str, total_frames: int, stats: ExtractionStats,
+                          pbar: tqdm, params: dict) -> List[Tuple[int, str]]:
+        """Analyze keyframe-aligned chunks in worker processes and merge the results"""
+        if os.path.isfile(video_path):
+            keyframes = probe_keyframes(video_path)
+        else:
+            # Probing reads every packet, which waits for a progressive download to finish
+            logger.info(f"{Fore.YELLOW}⚙️  Source is still downloading: chunks are planned without keyframes")
+            keyframes = []
+        chunks = plan_chunks(total_frames, params['interval'], self.workers, keyframes)
+        logger.info(f"{Fore.YELLOW}⚙️  Parallel: {len(chunks)} chunks on {self.workers} worker processes")
+        
+        chunk_dir = Path(tempfile.mkdtemp(prefix=f".{params['prefix']}-chunks-", dir=self.output_dir))
+        results = []
+        try:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+                futures = [
+                    executor.submit(_extract_chunk, video_path, str(chunk_dir / f"chunk_{chunk.index}"),
+                                    chunk, self.writer_threads, self.queue_size, self.encoding,
+                                    self.reuse_buffers, self.score_batch, params)
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    saved, chunk_stats = future.result()
+                    results.extend(saved)
+                    stats.frames_sampled += chunk_stats.frames_sampled
+                    stats.frames_allocated += chunk_stats.frames_allocated
+                    stats.frames_covered += chunk_stats.frames_covered
+                    _add_timings(stats.timings, chunk_stats.timings)
+                    pbar.update(chunk_stats.frames_sampled)
+                    pbar.set_postfix({'saved': len(results)})
             
-        logger.success(f"{Fore.GREEN}✅ Frame extraction complete: {len(saved_paths)} frames saved")
-        return saved_paths
+            return self._merge_chunks(results, params['prefix'])
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+    
+    def _merge_chunks(self, saved: List[Tuple[int, str]], prefix: str) -> List[Tuple[int, str]]:
+        """Renumber chunk results globally in timestamp order.
+        
+        Chunks own disjoint sample ranges and never save their seam reference,
+        so sorting by frame index yields exactly the sequential result.
+        """
+        merged = []
+        for number, (frame_index, chunk_path) in enumerate(sorted(saved), 1):
+            filename = self.output_dir / f"{prefix}_{number}{self.encoding.extension}"
+            os.replace(chunk_path, filename)
+            merged.append((frame_index, str(filename)))
+        return merged
+    
+    def _extract_range(self, video_path: str, chunk: VideoChunk, threshold: float, interval: int,
+                       prefix: str, strategy: str, compare_width: Optional[int],
+                       roi: Optional[Tuple[int, int, int, int]]) -> Tuple[List[Tuple[int, str]], ExtractionStats]:
+        """Analyze the samples owned by one chunk"""
+        cap = self._open_capture(video_path)
+        stats = ExtractionStats(strategy=strategy)
+        select = self._difference_selector(threshold, compare_width, roi)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        
+        try:
+            # Prime the comparison with the seam reference without saving it
+            if chunk.reference is not None and not self._prime_reference(
+                    cap, chunk.reference, chunk.seek_from, chunk.start, select):
+                return [], stats
+            
+            decoder = OpenCVDecoder(cap, strategy, total_frames, stats)
+            pool = self._buffer_pool(decoder, self.score_batch)
+            saved = [(frame.frame_index, frame.path) for frame in self._stage_frames(
+                decoder.samples(interval, chunk.start, chunk.stop), cap.get(cv2.CAP_PROP_FPS), stats, prefix,
+                select, lambda frame_index, count: None, pool=pool, keep_images=False,
+                select_batch=select.select_batch if self.score_batch > 1 else None,
+                batch_size=self.score_batch)]
+        finally:
+            cap.release()
+        return saved, stats
+
+
+def _extract_chunk(video_path: str, output_dir: str, chunk: VideoChunk, writer_threads: int,
+                   queue_size: int, encoding: FrameEncoding, reuse_buffers: bool, score_batch: int,
+                   params: dict) -> Tuple[List[Tuple[int, str]], ExtractionStats]:
+    """Worker process entry point for parallel difference extraction"""
+    extractor = DifferenceFrameExtractor(output_dir=output_dir, writer_threads=writer_threads,
+                                         queue_size=queue_size, show_progress=False, workers=1,
+                                         encoding=encoding, reuse_buffers=reuse_buffers,
+                                         score_batch=score_batch)
+    return extractor._extract_range(video_path, chunk, **params)
+
+
+def _batched(samples: Iterator[Tuple[int, np.ndarray]], size: int) -> Iterator[List[Tuple[int, np.ndarray]]]:
+    """Group samples into lists of ``size``; the last one may be shorter"""
+    batch = []
+    for sample in samples:
+        batch.append(sample)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _add_timings(total: StageTimings, part: StageTimings) -> None:
+    total.decode_time += part.decode_time
+    total.analyze_time += part.analyze_time
+    total.write_time += part.write_time
+    total.max_queue_depth = max(total.max_queue_depth, part.max_queue_depth)
+    total.queue_depth_total += part.queue_depth_total
+    total.queue_samples += part.queue_samples
+    total.max_pending_writes = max(total.max_pending_writes, part.max_pending_writes)
+
+class SceneChangeFrameExtractor(FrameExtractor):
+    """Extract one frame per slide once it has settled, using scene-change metrics"""
+    
+    def extract(self, video_path: str, interval: int = 15, prefix: str = "frame",
+                decode_strategy: str = 'auto', compare_width: Optional[int] = None,
+                roi: Optional[Tuple[int, int, int, int]] = None,
+                histogram_threshold: float = 0.1, edge_threshold: float = 0.05,
+                ssim_threshold: float = 0.0, stable_samples: int = 1,
+                dedup_distance: int = 0, dedup_hash: str = 'dhash',
+                resume: Optional[ResumePoint] = None, on_saved: Optional[FrameSavedCallback] = None,
+                checkpoint: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """Save a sample once the picture has changed and then stayed still.
+        
+        A change is a histogram distance, edge change or (with
+        ``ssim_threshold`` > 0) block-wise SSIM drop against the last saved
+        frame above its threshold; the frame is saved after the picture has
+        been still for ``stable_samples`` samples, so transitions and
+        animations are skipped. Comparison runs at ``compare_width`` (320 px
+        by default). ``resume``, ``on_saved`` and ``checkpoint`` work as for
+        difference extraction.
+        """
+        frames = self.iter_frames(video_path, interval=interval, prefix=prefix,
+                                  decode_strategy=decode_strategy, compare_width=compare_width, roi=roi,
+                                  histogram_threshold=histogram_threshold, edge_threshold=edge_threshold,
+                                  ssim_threshold=ssim_threshold, stable_samples=stable_samples,
+                                  resume=resume, on_saved=on_saved, checkpoint=checkpoint, keep_images=False)
+        return self._collect(frames, prefix, resume, dedup_distance, dedup_hash)
+    
+    def iter_frames(self, video_path: str, interval: int = 15, prefix: str = "frame",
+                    decode_strategy: str = 'auto', compare_width: Optional[int] = None,
+                    roi: Optional[Tuple[int, int, int, int]] = None,
+                    histogram_threshold: float = 0.1, edge_threshold: float = 0.05,
+                    ssim_threshold: float = 0.0, stable_samples: int = 1, save: bool = True,
+                    resume: Optional[ResumePoint] = None, on_saved: Optional[FrameSavedCallback] = None,
+                    checkpoint: Optional[Callable[[int, int], None]] = None,
+                    keep_images: bool = True) -> Iterator[ExtractedFrame]:
+        """Yield every settled new picture as soon as it is saved; ``score``
+        is its change against the previous saved frame (above 1)."""
+        scene = SceneChangeSettings(histogram_threshold=histogram_threshold, edge_threshold=edge_threshold,
+                                    ssim_threshold=ssim_threshold, stable_samples=stable_samples)
+        compare_width = compare_width or SCENE_COMPARE_WIDTH
+        strategy = self._resolve_strategy(video_path, interval, decode_strategy)
+        cap = self._open_capture(video_path)
+        stats = ExtractionStats(strategy=strategy)
+        self.last_stats = stats
+        
+        # Get video info for progress tracking
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        duration = total_frames / fps if fps > 0 else 0
+        
+        video_name = Path(video_path).stem
+        logger.info(f"{Fore.CYAN}🎬 Starting frame extraction from '{video_name}'")
+        logger.info(f"{Fore.BLUE}📊 Video info: {total_frames:,} frames, {duration:.1f}s duration, {fps:.1f} FPS")
+        logger.info(f"{Fore.YELLOW}⚙️  Mode: Scene change (histogram {histogram_threshold}, edges {edge_threshold}, "
+                    f"SSIM {ssim_threshold or 'off'}, stable for {stable_samples} samples, "
+                    f"interval: {interval} frames, decoding: {strategy})")
+        
+        expected_iterations = total_frames // interval
+        pbar = tqdm(total=expected_iterations,
+                   desc=f"{Fore.MAGENTA}🔍 Analyzing frames",
+                   unit="frames",
+                   disable=not self.show_progress,
+                   bar_format='{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}] {postfix}')
+        
+        def progress(frame_index: int, saved_frame_count: int) -> None:
+            pbar.update(1)
+            pbar.set_postfix({
+                'saved': saved_frame_count,
+                'current_time': f"{(frame_index + interval)/fps:.1f}s" if fps > 0 else "N/A"
+            })
+            if checkpoint is not None:
+                checkpoint(frame_index, saved_frame_count)
+        
+        decoder = self._open_decoder(video_path, cap, strategy, stats)
+        pool = self._buffer_pool(decoder)
+        roi = decoder.scale_roi(roi)
+        detector = SceneChangeDetector(scene)
+        
+        def select(frame_index: int, frame: np.ndarray) -> Tuple[bool, Optional[float]]:
+            return detector.update(prepare_comparison_frame(frame, compare_width, roi))
+        
+        def prime(frame_index: int, frame: np.ndarray) -> Tuple[bool, Optional[float]]:
+            detector.prime(prepare_comparison_frame(frame, compare_width, roi))
+            return False, None
+        
+        start, first_number = self._resume_position(resume, interval)
+        start_time = time.perf_counter()
+        try:
+            if resume is not None:
+                # Resumed runs start from the last analyzed sample as if it was saved
+                pbar.update(start // interval)
+                sampler = self._resumed_samples(decoder, interval, resume, start, prime)
+            else:
+                sampler = decoder.samples(interval)
+            for frame in self._stage_frames(sampler, fps, stats, prefix, select, progress,
+                                            first_number=first_number, on_saved=on_saved, save=save,
+                                            pool=pool, keep_images=keep_images):
+                stats.frames_saved += 1
+                yield frame
+        finally:
+            pbar.close()
+            decoder.close()
+            cap.release()
+            stats.elapsed = time.perf_counter() - start_time
+            self._record_metrics(stats)
 
 class IntervalFrameExtractor(FrameExtractor):
     """Extract frames at regular intervals"""
     
     def extract(self, video_path: str, interval: int = 30, 
-                prefix: str = "frame") -> List[str]:
-        cap = cv2.VideoCapture(video_path)
-        frame_index = 0
-        saved_frame_count = 0
-        saved_paths = []
+                prefix: str = "frame", decode_strategy: str = 'auto',
+                dedup_distance: int = 0, dedup_hash: str = 'dhash',
+                resume: Optional[ResumePoint] = None, on_saved: Optional[FrameSavedCallback] = None,
+                checkpoint: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """Save every ``interval``-th frame; ``resume``, ``on_saved`` and
+        ``checkpoint`` work as for difference extraction."""
+        frames = self.iter_frames(video_path, interval=interval, prefix=prefix,
+                                  decode_strategy=decode_strategy, resume=resume,
+                                  on_saved=on_saved, checkpoint=checkpoint, keep_images=False)
+        return self._collect(frames, prefix, resume, dedup_distance, dedup_hash)
+    
+    def iter_frames(self, video_path: str, interval: int = 30,
+                    prefix: str = "frame", decode_strategy: str = 'auto', save: bool = True,
+                    resume: Optional[ResumePoint] = None, on_saved: Optional[FrameSavedCallback] = None,
+                    checkpoint: Optional[Callable[[int, int], None]] = None,
+                    keep_images: bool = True) -> Iterator[ExtractedFrame]:
+        """Yield every ``interval``-th frame as soon as it is saved (or
+        decoded, with ``save`` False); see ``DifferenceFrameExtractor.iter_frames``."""
+        strategy = self._resolve_strategy(video_path, interval, decode_strategy)
+        cap = self._open_capture(video_path)
+        stats = ExtractionStats(strategy=strategy)
+        self.last_stats = stats
         
         # Get video info for progress tracking
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -106,51 +1182,56 @@ class IntervalFrameExtractor(FrameExtractor):
         video_name = Path(video_path).stem
         logger.info(f"{Fore.CYAN}🎬 Starting frame extraction from '{video_name}'")
         logger.info(f"{Fore.BLUE}📊 Video info: {total_frames:,} frames, {duration:.1f}s duration, {fps:.1f} FPS")
-        logger.info(f"{Fore.YELLOW}⚙️  Mode: Interval extraction (every {interval} frames, ~{expected_saves} frames expected)")
+        logger.info(f"{Fore.YELLOW}⚙️  Mode: Interval extraction (every {interval} frames, ~{expected_saves} frames expected, decoding: {strategy})")
         
         pbar = tqdm(total=total_frames, 
                    desc=f"{Fore.GREEN}📹 Processing video", 
                    unit="frames",
+                   disable=not self.show_progress,
                    bar_format='{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}] {postfix}')
         
+        def progress(frame_index: int, saved_frame_count: int) -> None:
+            pbar.update(min(interval, max(total_frames - pbar.n, 0)))
+            pbar.set_postfix({
+                'saved': saved_frame_count,
+                'current_time': f"{(frame_index + interval)/fps:.1f}s" if fps > 0 else "N/A"
+            })
+            if checkpoint is not None:
+                checkpoint(frame_index, saved_frame_count)
+        
+        start, first_number = self._resume_position(resume, interval)
+        decoder = self._open_decoder(video_path, cap, strategy, stats)
+        pool = self._buffer_pool(decoder)
+        start_time = time.perf_counter()
         try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_index % interval == 0:
-                    saved_frame_count += 1
-                    filename = self.output_dir / f"{prefix}_{saved_frame_count}.png"
-                    cv2.imwrite(str(filename), frame)
-                    saved_paths.append(str(filename))
-                
-                frame_index += 1
-                
-                # Update progress
-                pbar.update(1)
-                pbar.set_postfix({
-                    'saved': saved_frame_count,
-                    'current_time': f"{frame_index/fps:.1f}s" if fps > 0 else "N/A"
-                })
-                
+            if start > 0:
+                pbar.update(min(start, total_frames))
+                if isinstance(decoder, OpenCVDecoder):
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            for frame in self._stage_frames(decoder.samples(interval, start), fps, stats, prefix,
+                                            lambda frame_index, frame: (True, None), progress,
+                                            first_number=first_number, on_saved=on_saved, save=save,
+                                            pool=pool, keep_images=keep_images):
+                stats.frames_saved += 1
+                yield frame
         finally:
             pbar.close()
+            decoder.close()
             cap.release()
-            
-        logger.success(f"{Fore.GREEN}✅ Frame extraction complete: {len(saved_paths)} frames saved")
-        return saved_paths
+            stats.elapsed = time.perf_counter() - start_time
+            self._record_metrics(stats)
 
 class FrameExtractorFactory:
     @staticmethod
-    def create(mode: str) -> FrameExtractor:
+    def create(mode: str, **options) -> FrameExtractor:
         extractors = {
             'diff': DifferenceFrameExtractor,
-            'interval': IntervalFrameExtractor
+            'interval': IntervalFrameExtractor,
+            'scene': SceneChangeFrameExtractor
         }
         
         extractor_class = extractors.get(mode)
         if not extractor_class:
             raise ValueError(f"Unknown extraction mode: {mode}")
             
-        return extractor_class()
+        return extractor_class(**options)
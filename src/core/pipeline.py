@@ -0,0 +1,298 @@
+"""Building blocks for running frame extraction as overlapping stages.
+
+Decoding runs on its own thread feeding a bounded queue, analysis runs on the
+calling thread, and selected frames are encoded and saved by a pool of writer
+threads. OpenCV releases the GIL while decoding and encoding, so on multi-core
+machines the stages overlap and throughput approaches the decode rate.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, TypeVar
+
+import cv2
+import numpy as np
+from loguru import logger
+from config.settings import settings
+from src.core.exceptions import FrameExtractionError
+from src.utils.file_handler import FRAME_FORMATS
+from src.utils.metrics import metrics
+
+T = TypeVar('T')
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class FrameEncoding:
+    """Image format of saved frames.
+    
+    ``quality`` (1-100) applies to JPEG and WebP, ``png_compression`` (0-9)
+    to PNG; None keeps OpenCV's fast default. Frames wider than ``max_width``
+    are downscaled, keeping the aspect ratio.
+    """
+    format: str = 'png'
+    quality: int = 90
+    png_compression: Optional[int] = None
+    max_width: Optional[int] = None
+    
+    def __post_init__(self):
+        if self.format not in FRAME_FORMATS:
+            raise ValueError(f"Unknown frame format: {self.format}")
+        if not 1 <= self.quality <= 100:
+            raise ValueError(f"Quality must be between 1 and 100, got {self.quality}")
+        if self.png_compression is not None and not 0 <= self.png_compression <= 9:
+            raise ValueError(f"PNG compression must be between 0 and 9, got {self.png_compression}")
+        if self.max_width is not None and self.max_width < 1:
+            raise ValueError(f"Max width must be positive, got {self.max_width}")
+    
+    @classmethod
+    def create(cls, format: str, quality: int, png_compression: int, max_width: int) -> 'FrameEncoding':
+        """Build from option values where a negative compression or a zero width means the default"""
+        return cls(format, quality, png_compression if png_compression >= 0 else None, max_width or None)
+    
+    @classmethod
+    def from_settings(cls) -> 'FrameEncoding':
+        return cls.create(settings.FRAME_FORMAT, settings.FRAME_QUALITY, settings.PNG_COMPRESSION,
+                          settings.FRAME_MAX_WIDTH)
+    
+    @property
+    def extension(self) -> str:
+        return FRAME_FORMATS[self.format]
+    
+    @property
+    def params(self) -> List[int]:
+        """``cv2.imwrite``/``cv2.imencode`` parameters"""
+        if self.format == 'jpeg':
+            return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        if self.format == 'webp':
+            return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        if self.png_compression is not None:
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+        return []
+    
+    def resize(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        if not self.max_width or width <= self.max_width:
+            return frame
+        size = (self.max_width, max(1, round(height * self.max_width / width)))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+@dataclass
+class StageTimings:
+    """Wall time spent in each pipeline stage and queue occupancy"""
+    decode_time: float = 0.0
+    analyze_time: float = 0.0
+    write_time: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    queue_samples: int = 0
+    max_pending_writes: int = 0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self.queue_depth_total / self.queue_samples if self.queue_samples else 0.0
+
+
+class FrameBufferPool:
+    """Decoded frame buffers recycled between the decoder and the later stages.
+
+    At most ``size`` frames are out at once; ``acquire`` blocks until one is
+    handed back, which also bounds the memory of a run. It returns a buffer
+    to decode into, or None while fewer than ``size`` buffers exist, in which
+    case the decoder allocates the frame and it joins the pool on release.
+    ``release`` returns a frame for reuse, ``detach`` gives up the slot of a
+    frame that is kept elsewhere (e.g. yielded with its image).
+    """
+
+    def __init__(self, size: int):
+        self.size = max(size, 1)
+        self.allocations = 0
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._free: List[np.ndarray] = []
+
+    def acquire(self) -> Optional[np.ndarray]:
+        self._slots.acquire()
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.allocations += 1
+        return None
+
+    def release(self, frame: Optional[np.ndarray]) -> None:
+        """Hand back an acquired slot, with its frame unless the decode produced none"""
+        if frame is not None:
+            with self._lock:
+                self._free.append(frame)
+        self._slots.release()
+
+    def detach(self) -> None:
+        self._slots.release()
+
+
+def timed_decode(samples: Iterator[T], timings: StageTimings) -> Iterator[T]:
+    """Wrap a sample iterator, adding the time spent producing items to decode_time"""
+    decode_seconds = metrics.histogram('frame_decode_seconds')
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(samples)
+        except StopIteration:
+            timings.decode_time += time.perf_counter() - start
+            return
+        elapsed = time.perf_counter() - start
+        timings.decode_time += elapsed
+        decode_seconds.observe(elapsed)
+        yield item
+
+
+def prefetch(samples: Iterator[T], queue_size: int, timings: StageTimings) -> Iterator[T]:
+    """Run ``samples`` on a decoder thread and yield its items from a bounded queue.
+
+    With ``queue_size`` 0 the iterator is consumed inline. Exceptions raised by
+    the decoder are re-raised in the consumer. Closing the generator early
+    stops the decoder thread.
+    """
+    if queue_size <= 0:
+        yield from samples
+        return
+
+    items: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in samples:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+
+    decoder = threading.Thread(target=produce, name='frame-decoder', daemon=True)
+    decoder.start()
+    try:
+        while True:
+            depth = items.qsize()
+            timings.max_queue_depth = max(timings.max_queue_depth, depth)
+            timings.queue_depth_total += depth
+            timings.queue_samples += 1
+
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+        decoder.join()
+
+
+class FrameWriterPool:
+    """Encode and save frames on a pool of writer threads.
+
+    At most ``max_pending`` frames are held in memory waiting to be written;
+    ``submit`` blocks once that many are outstanding. With ``threads`` 0 frames
+    are written inline. ``on_written`` callbacks run once a frame is on disk,
+    on the thread that wrote it. Frames are saved with ``encoding`` (PNG by
+    default).
+    """
+
+    def __init__(self, threads: int, max_pending: int, timings: StageTimings,
+                 encoding: Optional[FrameEncoding] = None):
+        self.timings = timings
+        self.encoding = encoding or FrameEncoding()
+        self._executor = (ThreadPoolExecutor(max_workers=threads, thread_name_prefix='frame-writer')
+                          if threads > 0 else None)
+        self._slots = threading.BoundedSemaphore(max(max_pending, 1))
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._futures: List[Future] = []
+        self._encode_seconds = metrics.histogram('frame_encode_seconds')
+        self._bytes_written = metrics.counter('frame_bytes_written_total')
+
+    def submit(self, path: str, frame: np.ndarray,
+               on_written: Optional[Callable[[], None]] = None) -> Optional[Future]:
+        """Queue a frame; returns its write's future, or None once written inline"""
+        if self._executor is None:
+            self._write(path, frame, on_written)
+            return None
+
+        self._slots.acquire()
+        with self._lock:
+            self._pending += 1
+            self.timings.max_pending_writes = max(self.timings.max_pending_writes, self._pending)
+        future = self._executor.submit(self._write, path, frame, on_written)
+        future.add_done_callback(self._release)
+        self._futures.append(future)
+        return future
+
+    def close(self) -> None:
+        """Wait for all pending writes and re-raise the first failure"""
+        if self._executor is None:
+            return
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _write(self, path: str, frame: np.ndarray, on_written: Optional[Callable[[], None]] = None) -> None:
+        start = time.perf_counter()
+        size = self._store(path, self.encoding.resize(frame))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.timings.write_time += elapsed
+        self._encode_seconds.observe(elapsed)
+        self._bytes_written.inc(size)
+        if on_written is not None:
+            on_written()
+
+    def _store(self, path: str, frame: np.ndarray) -> int:
+        """Save ``frame`` and return its encoded size in bytes"""
+        if not cv2.imwrite(path, frame, self.encoding.params):
+            logger.error(f"Failed to write frame {path}")
+            raise FrameExtractionError(f"Failed to write frame {path}")
+        return os.path.getsize(path)
+
+
+class FrameEncoderPool(FrameWriterPool):
+    """Encode frames in memory and hand them to ``consumer`` instead of saving them.
+
+    ``consumer`` is called with ``(name, encoded bytes)`` on the encoding
+    thread. A consumer that blocks (e.g. a bounded upload queue) holds back
+    further frames.
+    """
+
+    def __init__(self, threads: int, max_pending: int, timings: StageTimings,
+                 consumer: Callable[[str, bytes], None], encoding: Optional[FrameEncoding] = None):
+        super().__init__(threads, max_pending, timings, encoding)
+        self.consumer = consumer
+
+    def _store(self, path: str, frame: np.ndarray) -> int:
+        ok, encoded = cv2.imencode(self.encoding.extension, frame, self.encoding.params)
+        if not ok:
+            logger.error(f"Failed to encode frame {path}")
+            raise FrameExtractionError(f"Failed to encode frame {path}")
+        self.consumer(path, encoded.tobytes())
+        return encoded.size
@@ -0,0 +1,360 @@
+"""Progressive ingest: analyze a video while it is still downloading.
+
+``RangedDownload`` fetches a file with several parallel HTTP byte-range
+requests into a preallocated ``.part`` file next to its final path. Finished
+chunks are recorded in a small state file, so an interrupted download
+continues where it stopped instead of starting over.
+
+``ProgressiveServer`` serves that growing file on localhost with range
+support and holds back every read until its bytes have arrived. Decoders
+open the local URL like any other video; OpenCV and FFmpeg seek with range
+requests, and every read they wait on moves its chunks to the front of the
+download queue, so an index at the end of the file or a seek far ahead is
+fetched first.
+"""
+import http.client
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from loguru import logger
+from config.settings import settings
+from src.core.exceptions import VideoDownloadError
+
+# Bytes read from a response or sent to a client at a time
+_PIECE_SIZE = 256 * 1024
+
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def content_length(url: str, timeout: float = 30.0) -> int:
+    """Size of the resource at ``url``, from a one-byte range request"""
+    request = urllib.request.Request(url, headers={'Range': 'bytes=0-0'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        content_range = response.headers.get('Content-Range')
+        if response.status != 206 or not content_range or '/' not in content_range:
+            raise VideoDownloadError(f"Server does not support byte ranges: {url}")
+        return int(content_range.rsplit('/', 1)[1])
+
+
+class RangedDownload:
+    """Downloads ``url`` to ``path`` over ``connections`` parallel range requests.
+
+    Chunks are fetched in file order unless a reader waits for a later one
+    (see ``read``). Until ``finish`` the data lives in ``<path>.part``; a
+    state file ``<path>.part.json`` lists the finished chunks and is picked
+    up by the next download of the same file.
+    """
+
+    def __init__(self, url: str, path: Path, size: Optional[int] = None,
+                 connections: Optional[int] = None, chunk_size: Optional[int] = None,
+                 max_retries: int = 5, timeout: float = 30.0):
+        self.url = url
+        self.path = Path(path)
+        self.part_path = self.path.with_name(self.path.name + '.part')
+        self.state_path = self.path.with_name(self.path.name + '.part.json')
+        self.size = content_length(url, timeout) if size is None else size
+        self.connections = max(1, connections or settings.DOWNLOAD_CONNECTIONS)
+        self.chunk_size = max(1, chunk_size or settings.DOWNLOAD_CHUNK_SIZE)
+        self.chunks = max(1, -(-self.size // self.chunk_size))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.error: Optional[Exception] = None
+        self.finished = False
+        self.bytes_downloaded = 0
+
+        self._cond = threading.Condition()
+        self._done: Set[int] = set()
+        self._active: Set[int] = set()
+        self._filled: Dict[int, int] = {}
+        self._wanted: deque = deque()
+        self._cursor = 0
+        self._stop = threading.Event()
+        self._threads = []
+        self._restore()
+
+    @property
+    def reused_chunks(self) -> int:
+        """Chunks finished by an earlier, interrupted download"""
+        return self._reused
+
+    @property
+    def complete(self) -> bool:
+        return len(self._done) == self.chunks
+
+    def _restore(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        done = set()
+        if self.part_path.exists() and self.state_path.exists():
+            try:
+                state = json.loads(self.state_path.read_text(encoding="utf-8"))
+                if state['size'] == self.size and state['chunk_size'] == self.chunk_size:
+                    done = {chunk for chunk in state['done'] if 0 <= chunk < self.chunks}
+            except (ValueError, KeyError, TypeError):
+                done = set()
+        if not done:
+            with open(self.part_path, 'wb') as part:
+                part.truncate(self.size)
+        self._done = done
+        self._reused = len(done)
+
+    def _save_state(self) -> None:
+        """Record the finished chunks (caller holds the lock)"""
+        temp = self.state_path.with_name(self.state_path.name + '.tmp')
+        temp.write_text(json.dumps({'size': self.size, 'chunk_size': self.chunk_size,
+                                    'done': sorted(self._done)}), encoding="utf-8")
+        os.replace(temp, self.state_path)
+
+    def chunk_range(self, chunk: int) -> Tuple[int, int]:
+        """[start, end) byte offsets of a chunk"""
+        start = chunk * self.chunk_size
+        return start, min(start + self.chunk_size, self.size)
+
+    def start(self) -> 'RangedDownload':
+        """Start the download threads; returns at once"""
+        if self.complete or self._threads:
+            return self
+        for number in range(min(self.connections, self.chunks - len(self._done))):
+            thread = threading.Thread(target=self._work, name=f'download-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _claim(self) -> Optional[int]:
+        """Next chunk to fetch: those readers wait for first, then in file order"""
+        with self._cond:
+            while self._wanted:
+                chunk = self._wanted.popleft()
+                if chunk not in self._done and chunk not in self._active:
+                    self._active.add(chunk)
+                    return chunk
+            while self._cursor < self.chunks and (self._cursor in self._done or self._cursor in self._active):
+                self._cursor += 1
+            if self._cursor == self.chunks:
+                return None
+            self._active.add(self._cursor)
+            return self._cursor
+
+    def _work(self) -> None:
+        with open(self.part_path, 'r+b', buffering=0) as part:
+            while not self._stop.is_set() and self.error is None:
+                chunk = self._claim()
+                if chunk is None:
+                    return
+                try:
+                    fetched = self._fetch(chunk, part)
+                except Exception as e:
+                    with self._cond:
+                        self._active.discard(chunk)
+                        if self.error is None and not self._stop.is_set():
+                            logger.error(f"Failed to download bytes {self.chunk_range(chunk)} of {self.path.name}: {e}")
+                            self.error = e
+                        self._cond.notify_all()
+                    return
+                with self._cond:
+                    self._active.discard(chunk)
+                    if not fetched:
+                        return
+                    self._done.add(chunk)
+                    self._filled.pop(chunk, None)
+                    self._save_state()
+                    self._cond.notify_all()
+
+    def _fetch(self, chunk: int, part) -> bool:
+        """Download one chunk, continuing a broken response where it stopped; False once stopped"""
+        start, end = self.chunk_range(chunk)
+        filled = 0
+        attempt = 0
+        while start + filled < end:
+            request = urllib.request.Request(self.url, headers={'Range': f'bytes={start + filled}-{end - 1}'})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    if response.status != 206:
+                        raise VideoDownloadError(f"Server ignored the byte range (HTTP {response.status})")
+                    while start + filled < end:
+                        if self._stop.is_set():
+                            return False
+                        data = response.read(min(_PIECE_SIZE, end - start - filled))
+                        if not data:
+                            raise ConnectionError("Connection closed before the end of the range")
+                        part.seek(start + filled)
+                        part.write(data)
+                        filled += len(data)
+                        with self._cond:
+                            self._filled[chunk] = filled
+                            self.bytes_downloaded += len(data)
+                            self._cond.notify_all()
+            except VideoDownloadError:
+                raise
+            except (OSError, http.client.HTTPException):
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                time.sleep(min(0.5 * 2 ** attempt, 10.0))
+        return True
+
+    def _missing(self, start: int, end: int) -> list:
+        """Chunks still lacking bytes of [start, end) (caller holds the lock)"""
+        missing = []
+        for chunk in range(start // self.chunk_size, (end - 1) // self.chunk_size + 1):
+            if chunk in self._done:
+                continue
+            chunk_start = chunk * self.chunk_size
+            if chunk_start + self._filled.get(chunk, 0) < min(end, chunk_start + self.chunk_size):
+                missing.append(chunk)
+        return missing
+
+    def wait_for(self, start: int, end: int) -> None:
+        """Block until bytes [start, end) have arrived, fetching their chunks next"""
+        end = min(end, self.size)
+        if start >= end:
+            return
+        with self._cond:
+            missing = self._missing(start, end)
+            if missing:
+                # The chunks after the range are likely read next
+                ahead = range(missing[-1] + 1, min(self.chunks, missing[-1] + self.connections))
+                self._wanted.extendleft(reversed(missing + [chunk for chunk in ahead]))
+            while missing:
+                if self.error is not None:
+                    raise VideoDownloadError(f"Download of {self.path.name} failed: {self.error}")
+                if self._stop.is_set():
+                    raise VideoDownloadError(f"Download of {self.path.name} was stopped")
+                self._cond.wait(1.0)
+                missing = self._missing(start, end)
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Read up to ``length`` bytes at ``offset``, waiting for them to arrive"""
+        end = min(offset + length, self.size)
+        self.wait_for(offset, end)
+        with open(self.path if self.finished else self.part_path, 'rb') as data:
+            data.seek(offset)
+            return data.read(end - offset)
+
+    def wait(self) -> None:
+        """Block until every chunk has arrived"""
+        self.start()
+        with self._cond:
+            while not self.complete:
+                if self.error is not None:
+                    raise VideoDownloadError(f"Download of {self.path.name} failed: {self.error}")
+                if self._stop.is_set():
+                    raise VideoDownloadError(f"Download of {self.path.name} was stopped")
+                self._cond.wait(1.0)
+
+    def finish(self) -> Path:
+        """Wait for the download and move it to ``path``"""
+        self.wait()
+        if not self.finished:
+            for thread in self._threads:
+                thread.join()
+            os.replace(self.part_path, self.path)
+            self.state_path.unlink(missing_ok=True)
+            self.finished = True
+        return self.path
+
+    def close(self) -> None:
+        """Stop downloading; finished chunks stay on disk for the next attempt"""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class _RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves the one file of a ``ProgressiveServer``"""
+    protocol_version = 'HTTP/1.1'
+    download: RangedDownload = None
+    name = ''
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def do_GET(self):
+        self._respond(body=True)
+
+    def _respond(self, body: bool) -> None:
+        if self.path.lstrip('/') != self.name:
+            self.send_error(404)
+            return
+        size = self.download.size
+        start, end = 0, size
+        header = self.headers.get('Range')
+        match = _RANGE.match(header.strip()) if header else None
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)) + 1, size) if match.group(2) else size
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size or start >= end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+        if not body:
+            return
+
+        position = start
+        try:
+            while position < end:
+                data = self.download.read(position, min(_PIECE_SIZE, end - position))
+                self.wfile.write(data)
+                position += len(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Decoders drop connections when they seek
+            pass
+        except VideoDownloadError as e:
+            logger.error(str(e))
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ProgressiveServer:
+    """Serves a ``RangedDownload`` on localhost while it is in progress"""
+
+    def __init__(self, download: RangedDownload, name: Optional[str] = None):
+        self.download = download
+        self.name = name or download.path.name
+        handler = type('RangeRequestHandler', (_RangeRequestHandler,), {'download': download, 'name': self.name})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{self.name}"
+
+    def start(self) -> 'ProgressiveServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='progressive-server',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
@@ -0,0 +1,17 @@
+"""Resume positions shared by the extractors and the run journal.
+
+Kept free of OpenCV and NumPy so that reading a journal does not load the
+extraction stack.
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class ResumePoint:
+    """Where an interrupted extraction continues.
+    
+    ``frame_index`` is the last sample that was analyzed and ``frames_saved``
+    the number of frames saved up to and including it.
+    """
+    frame_index: int
+    frames_saved: int
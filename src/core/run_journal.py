@@ -0,0 +1,191 @@
+"""Append-only journal of a conversion run, used to resume it after a failure.
+
+Every completed unit of work is appended as one JSON line as soon as it is
+done: frames once their PNG is on disk, Drive file IDs once uploaded and
+slide object IDs once their batchUpdate succeeded. Replaying the journal
+gives the exact point where an interrupted run stopped.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from loguru import logger
+from config.settings import settings
+from src.core.resume import ResumePoint
+from src.utils.file_handler import clean_filename
+
+# Frames at the end of the journal whose PNG is fully decoded before resuming
+VERIFY_TAIL = 16
+
+
+@dataclass
+class FrameRecord:
+    number: int
+    frame_index: int
+    path: str
+    file_id: Optional[str] = None
+    slide_id: Optional[str] = None
+
+
+@dataclass
+class RunState:
+    """Everything a journal says about a run"""
+    params: dict = field(default_factory=dict)
+    frames: Dict[str, FrameRecord] = field(default_factory=dict)
+    checkpoints: List[ResumePoint] = field(default_factory=list)
+    extracted: Optional[List[str]] = None
+    uploaded: bool = False
+    completed: bool = False
+
+    def saved_frames(self) -> List[FrameRecord]:
+        """Extracted frames 1..n that were recorded and are intact on disk"""
+        by_number = {f.number: f for f in self.frames.values() if f.frame_index >= 0}
+        frames = []
+        number = 1
+        while number in by_number and os.path.exists(by_number[number].path):
+            frames.append(by_number[number])
+            number += 1
+        # Frames written just before a crash may be truncated
+        import cv2
+        for position in range(max(0, len(frames) - VERIFY_TAIL), len(frames)):
+            if cv2.imread(frames[position].path, cv2.IMREAD_REDUCED_GRAYSCALE_8) is None:
+                return frames[:position]
+        return frames
+
+    def resume_point(self) -> Optional[ResumePoint]:
+        """Latest position from which extraction can continue exactly"""
+        frames = self.saved_frames()
+        if not frames:
+            return None
+        point = ResumePoint(frames[-1].frame_index, len(frames))
+        # Checkpoints count frames when they were queued; use the latest one
+        # whose frames all made it to disk
+        for checkpoint in self.checkpoints:
+            if checkpoint.frames_saved <= len(frames) and checkpoint.frame_index > point.frame_index:
+                point = checkpoint
+        return point
+
+    def frame_paths(self) -> List[str]:
+        return self.extracted if self.extracted is not None else [f.path for f in self.saved_frames()]
+
+    def file_ids(self) -> Dict[str, str]:
+        return {f.path: f.file_id for f in self.frames.values() if f.file_id}
+
+    def slide_ids(self) -> Dict[str, str]:
+        return {f.path: f.slide_id for f in self.frames.values() if f.slide_id}
+
+
+class RunJournal:
+    """JSON-lines journal of one run, written as work completes"""
+
+    def __init__(self, path: Union[str, Path], checkpoint_interval: float = 1.0):
+        self.path = Path(path)
+        self.checkpoint_interval = checkpoint_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_checkpoint = 0.0
+
+    @classmethod
+    def for_prefix(cls, prefix: str) -> 'RunJournal':
+        """The journal of the run producing frames named ``prefix``"""
+        return cls(settings.RUNS_DIR / f"{clean_filename(prefix)}.jsonl")
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def start(self, params: dict) -> None:
+        """Begin a new run, discarding any previous journal"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({'event': 'start', 'params': params})
+
+    def reopen(self) -> RunState:
+        """Load the journal of an interrupted run and keep appending to it"""
+        state = self.load()
+        self.close()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._append({'event': 'resume'})
+        return state
+
+    def load(self) -> RunState:
+        """Replay the journal"""
+        state = RunState()
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by the crash
+                    logger.warning(f"Ignoring incomplete journal line in {self.path}")
+                    continue
+                event = record['event']
+                if event == 'start':
+                    state = RunState(params=record['params'])
+                elif event == 'frame':
+                    state.frames[record['path']] = FrameRecord(record['number'], record['frame_index'],
+                                                               record['path'])
+                elif event == 'checkpoint':
+                    state.checkpoints.append(ResumePoint(record['frame_index'], record['frames_saved']))
+                elif event == 'extracted':
+                    state.extracted = record['paths']
+                    for number, path in enumerate(record['paths'], 1):
+                        # Frames that were not extracted by this run, e.g. found on disk
+                        state.frames.setdefault(path, FrameRecord(number, -1, path))
+                elif event == 'upload':
+                    state.frames.setdefault(record['path'], FrameRecord(0, -1, record['path'])).file_id = \
+                        record['file_id']
+                elif event == 'uploaded':
+                    state.uploaded = True
+                elif event == 'slide':
+                    state.frames.setdefault(record['path'], FrameRecord(0, -1, record['path'])).slide_id = \
+                        record['slide_id']
+                elif event == 'completed':
+                    state.completed = True
+        return state
+
+    def record_frame(self, number: int, frame_index: int, path: str) -> None:
+        self._append({'event': 'frame', 'number': number, 'frame_index': frame_index, 'path': path})
+
+    def record_checkpoint(self, frame_index: int, frames_saved: int) -> None:
+        """Remember the analysis position, at most once per ``checkpoint_interval``"""
+        now = time.monotonic()
+        if now - self._last_checkpoint < self.checkpoint_interval:
+            return
+        self._last_checkpoint = now
+        self._append({'event': 'checkpoint', 'frame_index': frame_index, 'frames_saved': frames_saved})
+
+    def record_extracted(self, paths: Sequence[str]) -> None:
+        self._append({'event': 'extracted', 'paths': list(paths)})
+
+    def record_upload(self, path: str, file_id: str) -> None:
+        self._append({'event': 'upload', 'path': path, 'file_id': file_id})
+
+    def record_uploaded(self) -> None:
+        self._append({'event': 'uploaded'})
+
+    def record_slides(self, paths: Sequence[str], slide_ids: Sequence[Optional[str]]) -> None:
+        for path, slide_id in zip(paths, slide_ids):
+            if slide_id is not None:
+                self._append({'event': 'slide', 'path': path, 'slide_id': slide_id})
+
+    def record_completed(self) -> None:
+        self._append({'event': 'completed'})
+
+    def _append(self, record: dict) -> None:
+        if self._file is None:
+            return
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
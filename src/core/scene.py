@@ -0,0 +1,180 @@
+"""Scene-change detection for slide videos.
+
+Every sample is reduced once to a small grayscale signature: an intensity
+histogram, a Canny edge map and the image itself. Three cheap metrics compare
+two signatures:
+
+* histogram distance (Bhattacharyya) catches background and color changes
+  and ignores pixel noise,
+* edge change, the share of edges that appear or disappear, catches new
+  text on a slide even when it covers few pixels,
+* block-wise SSIM (optional) catches low-contrast changes confined to one
+  part of the frame, e.g. the next bullet of a slide build.
+
+Each metric is divided by its threshold; the largest ratio is the change
+score and a score above 1 means the picture changed. ``SceneChangeDetector``
+saves a frame only once the picture has settled on something new: a sample
+must differ from the last saved frame (score > 1) and the picture must have
+stayed still (histogram and edge score against the previous sample below
+``settle_ratio``) for ``stable_samples`` consecutive samples. Transitions, animations and camera
+noise therefore do not produce frames.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+HISTOGRAM_BINS = 64
+
+# Comparison width the default thresholds are calibrated for
+SCENE_COMPARE_WIDTH = 320
+
+# Share of the image that counts as "some edges" when normalizing edge change,
+# so a few noise pixels on a blank slide do not count as a complete change
+MIN_EDGE_SHARE = 0.005
+
+_SSIM_C1 = (0.01 * 255) ** 2
+_SSIM_C2 = (0.03 * 255) ** 2
+_EDGE_KERNEL = np.ones((3, 3), np.uint8)
+
+
+@dataclass(frozen=True)
+class SceneChangeSettings:
+    """Thresholds of the scene-change metrics.
+
+    ``ssim_threshold`` 0 disables block SSIM. ``ssim_blocks`` is the grid
+    (columns, rows) the SSIM map is averaged over.
+    """
+    histogram_threshold: float = 0.1
+    edge_threshold: float = 0.05
+    ssim_threshold: float = 0.0
+    ssim_blocks: Tuple[int, int] = (4, 4)
+    stable_samples: int = 1
+    settle_ratio: float = 0.5
+
+    def __post_init__(self):
+        if self.histogram_threshold <= 0 or self.edge_threshold <= 0 or self.ssim_threshold < 0:
+            raise ValueError("Scene-change thresholds must be positive (SSIM threshold 0 disables it)")
+        if self.stable_samples < 0:
+            raise ValueError(f"Stable samples must not be negative, got {self.stable_samples}")
+        if not 0 < self.settle_ratio <= 1:
+            raise ValueError(f"Settle ratio must be in (0, 1], got {self.settle_ratio}")
+
+
+@dataclass
+class FrameSignature:
+    """What the metrics need of one grayscale comparison frame"""
+    gray: np.ndarray
+    histogram: np.ndarray
+    edges: np.ndarray
+    edge_count: int
+
+    @classmethod
+    def of(cls, gray: np.ndarray) -> 'FrameSignature':
+        histogram = cv2.calcHist([gray], [0], None, [HISTOGRAM_BINS], [0, 256])
+        histogram /= max(gray.size, 1)
+        edges = cv2.Canny(gray, 50, 150)
+        return cls(gray, histogram, edges, cv2.countNonZero(edges))
+
+
+def histogram_distance(a: FrameSignature, b: FrameSignature) -> float:
+    """Bhattacharyya distance of the intensity histograms, 0 (same) to 1"""
+    return float(cv2.compareHist(a.histogram, b.histogram, cv2.HISTCMP_BHATTACHARYYA))
+
+
+def edge_change(a: FrameSignature, b: FrameSignature) -> float:
+    """Share of edge pixels without a counterpart within one pixel in the other frame"""
+    if a.edges.shape != b.edges.shape:
+        raise ValueError("Frames of different size")
+    lost = cv2.countNonZero(cv2.bitwise_and(a.edges, cv2.bitwise_not(cv2.dilate(b.edges, _EDGE_KERNEL))))
+    gained = cv2.countNonZero(cv2.bitwise_and(b.edges, cv2.bitwise_not(cv2.dilate(a.edges, _EDGE_KERNEL))))
+    total = max(a.edge_count + b.edge_count, MIN_EDGE_SHARE * a.edges.size, 1)
+    return min((lost + gained) / total, 1.0)
+
+
+def block_ssim(a: np.ndarray, b: np.ndarray, blocks: Tuple[int, int] = (4, 4)) -> np.ndarray:
+    """Mean SSIM of each cell of a ``blocks`` (columns, rows) grid, shape (rows, columns).
+
+    The SSIM map uses the usual 11x11 Gaussian window (sigma 1.5), computed
+    with separable blurs on float32 images.
+    """
+    x = a.astype(np.float32)
+    y = b.astype(np.float32)
+
+    def blur(image: np.ndarray) -> np.ndarray:
+        return cv2.GaussianBlur(image, (11, 11), 1.5)
+
+    mu_x, mu_y = blur(x), blur(y)
+    mu_xx, mu_yy, mu_xy = mu_x * mu_x, mu_y * mu_y, mu_x * mu_y
+    sigma_xx = blur(x * x) - mu_xx
+    sigma_yy = blur(y * y) - mu_yy
+    sigma_xy = blur(x * y) - mu_xy
+    ssim_map = ((2 * mu_xy + _SSIM_C1) * (2 * sigma_xy + _SSIM_C2)
+                / ((mu_xx + mu_yy + _SSIM_C1) * (sigma_xx + sigma_yy + _SSIM_C2)))
+
+    columns, rows = blocks
+    height, width = ssim_map.shape
+    rows, columns = min(rows, height), min(columns, width)
+    cell_height, cell_width = height // rows, width // columns
+    cells = ssim_map[:rows * cell_height, :columns * cell_width]
+    return cells.reshape(rows, cell_height, columns, cell_width).mean(axis=(1, 3))
+
+
+class SceneChangeDetector:
+    """Decides, sample by sample, when a new picture has settled.
+
+    Feed every comparison frame to ``update`` in order; it returns whether to
+    save that sample and its change score against the last saved frame
+    (None before the first save).
+    """
+
+    def __init__(self, settings: Optional[SceneChangeSettings] = None):
+        self.settings = settings or SceneChangeSettings()
+        self._previous: Optional[FrameSignature] = None
+        self._saved: Optional[FrameSignature] = None
+        self._stable = 0
+
+    def change_score(self, a: FrameSignature, b: FrameSignature, ssim: bool = True) -> float:
+        """Largest metric/threshold ratio; above 1 means the picture changed"""
+        settings = self.settings
+        score = max(histogram_distance(a, b) / settings.histogram_threshold,
+                    edge_change(a, b) / settings.edge_threshold)
+        if ssim and settings.ssim_threshold and score <= 1:
+            # Only needed when the cheap metrics see no change
+            drop = 1.0 - float(block_ssim(a.gray, b.gray, settings.ssim_blocks).min())
+            score = max(score, drop / settings.ssim_threshold)
+        return score
+
+    def prime(self, gray: np.ndarray) -> None:
+        """Start from ``gray`` as the last saved and previous frame, e.g. when resuming"""
+        self._saved = self._previous = FrameSignature.of(gray)
+        self._stable = 0
+
+    def update(self, gray: np.ndarray) -> Tuple[bool, Optional[float]]:
+        signature = FrameSignature.of(gray)
+        previous, self._previous = self._previous, signature
+
+        if self._saved is None:
+            score = None
+        else:
+            score = self.change_score(self._saved, signature)
+            if score <= 1:
+                # Still (or again) the saved picture
+                self._stable = 0
+                return False, score
+
+        # Hysteresis: a new picture counts as settled once it moves less than
+        # settle_ratio of a change for stable_samples samples in a row. SSIM
+        # reacts to noise in flat areas, so stillness is judged without it.
+        if (previous is not None
+                and self.change_score(previous, signature, ssim=False) < self.settings.settle_ratio):
+            self._stable += 1
+        else:
+            self._stable = 0
+        if self._stable < self.settings.stable_samples:
+            return False, score
+
+        self._saved = signature
+        self._stable = 0
+        return True, score
@@ -0,0 +1,295 @@
+"""Persistent per-video timeline of difference-mode signatures.
+
+A difference-mode run reduces every sample to its comparison frame (the
+grayscale thumbnail ``prepare_comparison_frame`` returns) and scores it
+against the previous sample. The timeline keeps those scores, and the
+thumbnails when they are small enough, as NumPy files that are
+memory-mapped when read. A later run with another threshold selects its
+frames from the scores without decoding the video, and a run sampling a
+multiple of the cached interval re-scores the stored thumbnails. Only the
+selected frames are decoded again.
+
+Timelines are keyed by the SHA-256 of the video and the settings that
+shape the thumbnails: comparison width, region and decoder. The hash of a
+file is computed once and remembered by its path, size and modification
+time.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from loguru import logger
+from config.settings import settings
+
+TIMELINE_VERSION = 1
+
+HASH_CHUNK_SIZE = 1 << 20
+
+# Blocks of thumbnails compared at once when re-scoring a memory-mapped timeline
+RESCORE_BLOCK = 1024
+
+# Serializes updates of the digest index between the threads of a process
+_index_lock = threading.Lock()
+
+
+def difference_scores(thumbnails: np.ndarray) -> np.ndarray:
+    """Difference-mode score of every thumbnail to the one before it (NaN for the first)"""
+    scores = np.full(len(thumbnails), np.nan)
+    for block_start in range(1, len(thumbnails), RESCORE_BLOCK):
+        block = np.asarray(thumbnails[block_start - 1:block_start + RESCORE_BLOCK])
+        for offset in range(1, len(block)):
+            # The same computation as ``frame_difference``, so scores match a decoding run exactly
+            scores[block_start + offset - 1] = cv2.absdiff(block[offset - 1], block[offset]).mean()
+    return scores
+
+
+@dataclass
+class SignatureTimeline:
+    """Frame index, score and (optionally) comparison thumbnail of every sample of a video.
+
+    ``scores[i]`` is the difference of sample ``i`` to sample ``i - 1``
+    (NaN for the first), exactly as a difference run computed it.
+    """
+    frame_indices: np.ndarray
+    scores: np.ndarray
+    thumbnails: Optional[np.ndarray]
+    interval: int
+    fps: float
+    total_frames: int
+
+    def __len__(self) -> int:
+        return len(self.frame_indices)
+
+    def can_serve(self, interval: int) -> bool:
+        """Whether sampling every ``interval`` frames can be answered from this timeline"""
+        return interval == self.interval or (interval % self.interval == 0 and self.thumbnails is not None)
+
+    def rescored(self, interval: int) -> 'SignatureTimeline':
+        """The timeline of sampling every ``interval`` frames, a multiple of this one's"""
+        if interval == self.interval:
+            return self
+        if not self.can_serve(interval):
+            raise ValueError(f"A timeline sampled every {self.interval} frames "
+                             f"{'' if self.thumbnails is not None else 'without thumbnails '}"
+                             f"cannot be re-sampled every {interval} frames")
+        step = interval // self.interval
+        thumbnails = self.thumbnails[::step]
+        return SignatureTimeline(self.frame_indices[::step], difference_scores(thumbnails), thumbnails,
+                                 interval, self.fps, self.total_frames)
+
+    def select(self, threshold: float) -> np.ndarray:
+        """Positions of the samples a difference run with ``threshold`` saves"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(([0], np.flatnonzero(self.scores[1:] > threshold) + 1))
+
+    def sweep(self, thresholds: Iterable[float]) -> Dict[float, int]:
+        """Number of frames saved at each threshold"""
+        return {threshold: len(self.select(threshold)) for threshold in thresholds}
+
+
+def _params_id(params: dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class TimelineCache:
+    """Signature timelines under ``directory``/<video hash>/<settings hash>-<interval>/"""
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None,
+                 thumbnail_max_width: Optional[int] = None):
+        """
+        Thumbnails wider than ``thumbnail_max_width`` (see
+        ``TIMELINE_THUMBNAIL_MAX_WIDTH``) are not stored; such timelines
+        only serve their own interval.
+        """
+        self.directory = Path(directory or settings.TIMELINE_CACHE_DIR)
+        self.thumbnail_max_width = (settings.TIMELINE_THUMBNAIL_MAX_WIDTH if thumbnail_max_width is None
+                                    else thumbnail_max_width)
+
+    @property
+    def _digest_index(self) -> Path:
+        return self.directory / "digests.json"
+
+    def video_digest(self, video_path: Union[str, Path]) -> str:
+        """SHA-256 of the video, hashed again only when the file changed"""
+        path = Path(video_path).resolve()
+        stat = path.stat()
+        try:
+            index = json.loads(self._digest_index.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            index = {}
+        known = index.get(str(path))
+        if known is not None and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(block)
+        self._remember_digest(path, [stat.st_size, stat.st_mtime_ns, digest.hexdigest()])
+        return digest.hexdigest()
+
+    def _remember_digest(self, path: Path, known: list) -> None:
+        """Add a digest to the index; a digest that cannot be saved is only hashed again next time"""
+        with _index_lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                try:
+                    index = json.loads(self._digest_index.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    index = {}
+                index[str(path)] = known
+                fd, temporary = tempfile.mkstemp(suffix=".tmp", prefix=".digests-", dir=self.directory)
+                try:
+                    with os.fdopen(fd, 'w', encoding="utf-8") as f:
+                        json.dump(index, f)
+                    os.replace(temporary, self._digest_index)
+                except BaseException:
+                    os.unlink(temporary)
+                    raise
+            except OSError as e:
+                logger.warning(f"Could not remember the digest of {path}: {e}")
+
+    def _entries(self, digest: str, params: dict) -> List[Tuple[int, Path]]:
+        """(interval, directory) of the stored timelines of a video and settings"""
+        video_dir = self.directory / digest
+        entries = []
+        for entry in video_dir.glob(f"{_params_id(params)}-*"):
+            interval = entry.name.rsplit('-', 1)[1]
+            if interval.isdigit() and (entry / "timeline.json").exists():
+                entries.append((int(interval), entry))
+        return entries
+
+    def load(self, video_path: Union[str, Path], params: dict, interval: int) -> Optional[SignatureTimeline]:
+        """Timeline sampling every ``interval`` frames, from the closest stored one that can serve it"""
+        digest = self.video_digest(video_path)
+        candidates = [(base, entry) for base, entry in self._entries(digest, params) if interval % base == 0]
+        for base, entry in sorted(candidates, reverse=True):
+            try:
+                timeline = self._read(entry)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable timeline {entry}: {e}")
+                continue
+            if timeline.can_serve(interval):
+                return timeline.rescored(interval)
+        return None
+
+    @staticmethod
+    def _read(entry: Path) -> SignatureTimeline:
+        meta = json.loads((entry / "timeline.json").read_text(encoding="utf-8"))
+        if meta['version'] != TIMELINE_VERSION:
+            raise ValueError(f"unsupported version {meta['version']}")
+        thumbnails = None
+        if meta['thumbnails']:
+            thumbnails = np.load(entry / "thumbnails.npy", mmap_mode='r')
+        return SignatureTimeline(np.load(entry / "frames.npy", mmap_mode='r'),
+                                 np.load(entry / "scores.npy", mmap_mode='r'), thumbnails,
+                                 meta['interval'], meta['fps'], meta['total_frames'])
+
+    def recorder(self, video_path: Union[str, Path], params: dict, interval: int, fps: float,
+                 total_frames: int) -> 'TimelineRecorder':
+        return TimelineRecorder(self, video_path, params, interval, fps, total_frames)
+
+    def _store(self, digest: str, params: dict, interval: int, staging: Path, meta: dict) -> Path:
+        entry = self.directory / digest / f"{_params_id(params)}-{interval}"
+        (staging / "timeline.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+        return entry
+
+
+class TimelineRecorder:
+    """Collects the signatures of one difference run and stores them once it analyzed the whole video.
+
+    Thumbnails are spooled to a file as they arrive, so a long video is
+    never held in memory. ``discard`` drops an unfinished recording.
+    """
+
+    def __init__(self, cache: TimelineCache, video_path: Union[str, Path], params: dict, interval: int,
+                 fps: float, total_frames: int):
+        self.cache = cache
+        self.video_path = Path(video_path)
+        self.digest = cache.video_digest(video_path)
+        self.params = params
+        self.interval = interval
+        self.fps = fps
+        self.total_frames = total_frames
+        self.frame_indices: List[int] = []
+        self.scores: List[float] = []
+        self.shape: Optional[Tuple[int, int]] = None
+        (cache.directory / self.digest).mkdir(parents=True, exist_ok=True)
+        self._staging = Path(tempfile.mkdtemp(prefix=".recording-", dir=cache.directory / self.digest))
+        self._spool: Optional[BinaryIO] = open(self._staging / "thumbnails.raw", 'wb')
+        self.path: Optional[Path] = None
+
+    def add(self, frame_index: int, thumbnail: np.ndarray, score: Optional[float]) -> None:
+        self.frame_indices.append(frame_index)
+        self.scores.append(np.nan if score is None else score)
+        if self._spool is None:
+            return
+        if self.shape is None:
+            self.shape = thumbnail.shape
+        if thumbnail.shape[1] > self.cache.thumbnail_max_width or thumbnail.shape != self.shape:
+            self._drop_thumbnails()
+            return
+        self._spool.write(np.ascontiguousarray(thumbnail).tobytes())
+
+    def _drop_thumbnails(self) -> None:
+        self._spool.close()
+        self._spool = None
+        os.remove(self._staging / "thumbnails.raw")
+
+    def finish(self) -> Optional[Path]:
+        """Store the timeline; it replaces a stored one of the same video, settings and interval.
+
+        Returns None, discarding the recording, if it cannot be moved into
+        place (e.g. another job stores the same timeline at the same time).
+        """
+        staging = self._staging
+        np.save(staging / "frames.npy", np.asarray(self.frame_indices, dtype=np.int64))
+        np.save(staging / "scores.npy", np.asarray(self.scores, dtype=np.float64))
+        has_thumbnails = self._spool is not None and bool(self.frame_indices)
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+            raw = staging / "thumbnails.raw"
+            if has_thumbnails:
+                shape = (len(self.frame_indices), *self.shape)
+                spooled = np.memmap(raw, dtype=np.uint8, mode='r', shape=shape)
+                stored = np.lib.format.open_memmap(staging / "thumbnails.npy", mode='w+', dtype=np.uint8,
+                                                   shape=shape)
+                for start in range(0, len(stored), RESCORE_BLOCK):
+                    stored[start:start + RESCORE_BLOCK] = spooled[start:start + RESCORE_BLOCK]
+                stored.flush()
+                del spooled, stored
+            os.remove(raw)
+        meta = {'version': TIMELINE_VERSION, 'video': str(self.video_path), 'sha256': self.digest,
+                'params': self.params, 'interval': self.interval, 'fps': self.fps,
+                'total_frames': self.total_frames, 'samples': len(self.frame_indices),
+                'thumbnails': has_thumbnails, 'created': time.time()}
+        try:
+            self.path = self.cache._store(self.digest, self.params, self.interval, staging, meta)
+        except OSError as e:
+            logger.warning(f"Could not store the timeline of {self.video_path}: {e}")
+            self.discard()
+            return None
+        self._staging = None
+        logger.debug(f"Stored timeline of {len(self.frame_indices)} samples in {self.path}")
+        return self.path
+
+    def discard(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._staging is not None:
+            shutil.rmtree(self._staging, ignore_errors=True)
+            self._staging = None
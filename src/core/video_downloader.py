@@ -1,32 +1,117 @@
-import os
-from pytube import YouTube
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from pytube import YouTube, extract
 from loguru import logger
 from config.settings import settings
+from src.core.exceptions import VideoDownloadError
+from src.core.progressive import ProgressiveServer, RangedDownload
+
+
+@dataclass
+class ProgressiveVideo:
+    """A video opened for analysis while it downloads.
+
+    ``source`` is what the extractor opens: the local URL of the growing
+    file, or ``path`` itself when the video was already downloaded.
+    ``finish`` completes the download and moves it to ``path``; ``close``
+    stops it, keeping the chunks that arrived for the next attempt.
+    """
+    path: Path
+    source: str
+    download: Optional[RangedDownload] = None
+    server: Optional[ProgressiveServer] = None
+
+    def finish(self) -> Path:
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        if self.download is not None:
+            self.download.finish()
+        return self.path
+
+    def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        if self.download is not None and not self.download.finished:
+            self.download.close()
+
 
 class VideoDownloader:
-    def __init__(self, download_dir=None):
-        self.download_dir = download_dir or settings.VIDEO_DIR
+    def __init__(self, download_dir=None, connections: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        """
+        Videos are stored as ``<video ID>.mp4`` in ``download_dir`` and
+        fetched with ``connections`` parallel range requests of
+        ``chunk_size`` bytes (see ``DOWNLOAD_CONNECTIONS``).
+        """
+        self.download_dir = Path(download_dir or settings.VIDEO_DIR)
         self.download_dir.mkdir(parents=True, exist_ok=True)
-    
-    def download_from_youtube(self, url: str) -> str:
-        """Download video from YouTube URL"""
+        self.connections = connections
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def video_id(url: str) -> str:
+        """YouTube video ID of a watch, share or embed URL"""
+        try:
+            return extract.video_id(url)
+        except Exception as e:
+            raise VideoDownloadError(f"Not a YouTube video URL: {url}") from e
+
+    def video_path(self, url: str) -> Path:
+        return self.download_dir / f"{self.video_id(url)}.mp4"
+
+    def open_download(self, url: str) -> RangedDownload:
+        """Resolve the progressive MP4 stream of ``url`` and prepare its ranged download.
+
+        Chunks left by an interrupted download of the same video are kept.
+        """
         try:
             yt = YouTube(url)
             stream = yt.streams.filter(
-                file_extension='mp4', 
+                file_extension='mp4',
                 progressive=True
             ).first()
-            
+
             if not stream:
                 raise ValueError("No suitable stream found")
-            
-            filepath = stream.download(
-                output_path=str(self.download_dir),
-                filename=f"{yt.title}.mp4"
-            )
-            logger.info(f"Downloaded video to {filepath}")
-            return filepath
-            
+
+            return RangedDownload(stream.url, self.video_path(url), stream.filesize,
+                                  self.connections, self.chunk_size)
+
         except Exception as e:
             logger.error(f"Failed to download video: {e}")
             raise
+
+    def download_from_youtube(self, url: str) -> str:
+        """Download video from YouTube URL, reusing an earlier download of the same video"""
+        path = self.video_path(url)
+        if path.exists():
+            logger.info(f"Using already downloaded video {path}")
+            return str(path)
+
+        download = self.open_download(url)
+        if download.reused_chunks:
+            logger.info(f"Continuing interrupted download ({download.reused_chunks}/{download.chunks} chunks done)")
+        try:
+            filepath = download.start().finish()
+        finally:
+            download.close()
+        logger.info(f"Downloaded video to {filepath}")
+        return str(filepath)
+
+    def open_progressive(self, url: str) -> ProgressiveVideo:
+        """Start downloading ``url`` and serve it for analysis as it arrives"""
+        path = self.video_path(url)
+        if path.exists():
+            logger.info(f"Using already downloaded video {path}")
+            return ProgressiveVideo(path, str(path))
+
+        download = self.open_download(url)
+        if download.reused_chunks:
+            logger.info(f"Continuing interrupted download ({download.reused_chunks}/{download.chunks} chunks done)")
+        server = ProgressiveServer(download).start()
+        download.start()
+        logger.info(f"Analyzing {path.name} while it downloads ({download.connections} connections)")
+        return ProgressiveVideo(path, server.url, download, server)
@@ -1,111 +1,411 @@
 import click
+import hashlib
 from pathlib import Path
 from loguru import logger
 from colorama import Fore, Style, init
 from config.settings import settings
-from src.core.video_downloader import VideoDownloader
-from src.core.frame_extractor import FrameExtractorFactory
-from src.services.google_drive import GoogleDriveService
-from src.services.google_slides import GoogleSlidesService
-from src.utils.file_handler import find_images_in_directory
 from src.utils.logger import setup_logger
-from tqdm import tqdm
+from src.utils.metrics import METRIC_FORMATS, metrics
+
+# OpenCV, the Google API clients and pytube take most of the start-up time, so they are
+# imported by the steps that use them: --help and short runs never load what they skip.
 
 # Initialize colorama for cross-platform colored output
 init(autoreset=True)
 
+def parse_roi(ctx, param, value):
+    """Parse an 'x,y,width,height' region of interest"""
+    if not value:
+        return None
+    try:
+        x, y, width, height = (int(part) for part in value.split(','))
+    except ValueError:
+        raise click.BadParameter("expected four integers: x,y,width,height")
+    if width <= 0 or height <= 0:
+        raise click.BadParameter("width and height must be positive")
+    return x, y, width, height
+
 @click.command()
 @click.option('--url', help='YouTube video URL')
 @click.option('--file', type=click.Path(exists=True), help='Local video file')
-@click.option('--mode', type=click.Choice(['diff', 'interval']), default='diff')
+@click.option('--progressive/--no-progressive', default=settings.PROGRESSIVE_DOWNLOAD,
+              help='Extract frames from a YouTube video while it downloads')
+@click.option('--download-connections', type=click.IntRange(min=1), default=settings.DOWNLOAD_CONNECTIONS,
+              help='Parallel range requests downloading a YouTube video')
+@click.option('--mode', type=click.Choice(['diff', 'interval', 'scene']), default='diff')
 @click.option('--threshold', type=float, default=settings.DEFAULT_THRESHOLD)
 @click.option('--interval', type=int, default=settings.DEFAULT_INTERVAL)
+@click.option('--decode-strategy', type=click.Choice(['auto', 'seek', 'grab']),
+              default=settings.DEFAULT_DECODE_STRATEGY,
+              help='Seek to each sample or grab sequentially (auto picks from keyframe spacing)')
+@click.option('--decoder', type=click.Choice(['opencv', 'ffmpeg']), default=settings.DECODER_BACKEND,
+              help='Decode with OpenCV or an ffmpeg subprocess')
+@click.option('--keyframes-only/--all-frames', default=settings.DECODE_KEYFRAMES_ONLY,
+              help='Sample keyframes only, at most one per interval (ffmpeg decoder)')
+@click.option('--decode-threads', type=click.IntRange(min=0), default=settings.DECODER_THREADS,
+              help='Decoder threads (ffmpeg decoder, 0 = FFmpeg chooses)')
+@click.option('--decode-width', type=click.IntRange(min=0), default=settings.DECODE_WIDTH,
+              help='Decode frames scaled to this width (ffmpeg decoder, 0 = video resolution)')
+@click.option('--compare-width', type=int, default=settings.DEFAULT_COMPARE_WIDTH,
+              help='Width of the thumbnail used for difference scoring (0 = full resolution)')
+@click.option('--roi', callback=parse_roi, help='Region compared in diff and scene mode as x,y,width,height')
+@click.option('--adaptive-stride', type=click.IntRange(min=0), default=settings.DEFAULT_ADAPTIVE_STRIDE,
+              help='Skip ahead this many frames and search back for changes (diff mode, 0 = off)')
+@click.option('--timeline-cache/--no-timeline-cache', default=settings.TIMELINE_CACHE_ENABLED,
+              help='Reuse the cached difference scores of the video instead of decoding it again (diff mode)')
+@click.option('--scene-histogram', type=float, default=settings.SCENE_HISTOGRAM_THRESHOLD,
+              help='Histogram distance counting as a slide change (scene mode)')
+@click.option('--scene-edges', type=float, default=settings.SCENE_EDGE_THRESHOLD,
+              help='Share of changed edges counting as a slide change (scene mode)')
+@click.option('--scene-ssim', type=float, default=settings.SCENE_SSIM_THRESHOLD,
+              help='Block SSIM drop counting as a slide change (scene mode, 0 = off)')
+@click.option('--stable-samples', type=click.IntRange(min=0), default=settings.SCENE_STABLE_SAMPLES,
+              help='Samples a new slide must stay still before it is saved (scene mode)')
+@click.option('--dedup-distance', type=int, default=settings.DEDUP_DISTANCE,
+              help='Drop frames within this Hamming distance of an earlier frame (0 = off)')
+@click.option('--dedup-hash', type=click.Choice(['dhash', 'phash']), default=settings.DEDUP_HASH,
+              help='Perceptual hash used for near-duplicate suppression')
+@click.option('--frame-format', type=click.Choice(['png', 'jpeg', 'webp']), default=settings.FRAME_FORMAT,
+              help='Image format of saved frames')
+@click.option('--quality', type=click.IntRange(1, 100), default=settings.FRAME_QUALITY,
+              help='JPEG/WebP quality')
+@click.option('--png-compression', type=click.IntRange(-1, 9), default=settings.PNG_COMPRESSION,
+              help="PNG compression level (-1 = OpenCV's fast default)")
+@click.option('--max-width', type=click.IntRange(min=0), default=settings.FRAME_MAX_WIDTH,
+              help='Downscale saved frames wider than this (0 = video resolution)')
+@click.option('--writer-threads', type=int, default=settings.WRITER_THREADS,
+              help='Threads encoding and saving frames (0 = write on the analysis thread)')
+@click.option('--queue-size', type=int, default=settings.DECODE_QUEUE_SIZE,
+              help='Decoded frames buffered ahead of analysis (0 = decode on the analysis thread)')
+@click.option('--workers', type=int, default=settings.EXTRACTION_WORKERS,
+              help='Worker processes analyzing chunks of the video in parallel (diff mode)')
+@click.option('--reuse-buffers/--no-reuse-buffers', default=settings.FRAME_BUFFER_REUSE,
+              help='Decode into a bounded set of recycled frame buffers')
+@click.option('--score-batch', type=click.IntRange(min=1), default=settings.SCORE_BATCH_SIZE,
+              help='Samples scored together in one vectorized pass (diff mode)')
 @click.option('--prefix', default='frame', help='Frame filename prefix')
 @click.option('--create-frames', is_flag=True, help='Extract frames from video')
 @click.option('--upload-frames', is_flag=True, help='Upload frames to Drive')
 @click.option('--add-slides', is_flag=True, help='Add to Slides presentation')
 @click.option('--presentation-id', help='Override default presentation ID')
-def main(url, file, mode, threshold, interval, prefix, create_frames, 
-         upload_frames, add_slides, presentation_id):
+@click.option('--sync-slides/--append-slides', default=settings.SLIDES_SYNC,
+              help='Make the presentation match the frames, changing only what differs, instead of appending')
+@click.option('--upload-concurrency', type=int, default=settings.DRIVE_UPLOAD_CONCURRENCY,
+              help='Drive uploads in flight at once')
+@click.option('--upload-cache/--no-upload-cache', default=settings.UPLOAD_CACHE_ENABLED,
+              help='Skip frames whose content was already uploaded to the folder')
+@click.option('--stream', is_flag=True,
+              help='Upload frames from memory while extracting instead of saving frame files')
+@click.option('--stream-in-flight', type=int, default=settings.STREAM_MAX_IN_FLIGHT,
+              help='Frames held in memory waiting for upload in --stream mode')
+@click.option('--resume', is_flag=True,
+              help='Continue the interrupted run for --prefix where it stopped, with its original settings')
+@click.option('--metrics-file', type=click.Path(dir_okay=False), default=settings.METRICS_FILE or None,
+              help='Record stage timings, API latency and retries and write them here at the end of the run')
+@click.option('--metrics-format', type=click.Choice(METRIC_FORMATS), default=settings.METRICS_FORMAT,
+              help='Format of --metrics-file: JSON or Prometheus text')
+def main(url, file, progressive, download_connections, mode, threshold, interval, decode_strategy, decoder, keyframes_only, decode_threads,
+         decode_width, compare_width, roi, adaptive_stride, timeline_cache,
+         scene_histogram, scene_edges, scene_ssim, stable_samples, dedup_distance, dedup_hash,
+         frame_format, quality, png_compression, max_width, writer_threads, queue_size, workers,
+         reuse_buffers, score_batch, prefix, create_frames, upload_frames, add_slides, presentation_id, sync_slides, upload_concurrency,
+         upload_cache, stream, stream_in_flight, resume, metrics_file, metrics_format):
     """Convert video to Google Slides presentation"""
     
     # Setup logger
     setup_logger()
+    if metrics_file:
+        metrics.enable()
     
     logger.info(f"{Fore.CYAN}Video-to-Slides Converter Starting...")
     logger.info(f"{Fore.CYAN}{'=' * 50}")
     
-    # Determine video source
-    if url:
-        logger.info(f"{Fore.YELLOW}Downloading video from YouTube: {url}")
-        downloader = VideoDownloader()
-        video_path = downloader.download_from_youtube(url)
-        logger.success(f"{Fore.GREEN}Video downloaded successfully")
-    elif file:
-        video_path = file
-        logger.info(f"{Fore.BLUE}Using local video file: {file}")
+    from src.core.run_journal import RunJournal
+    journal = RunJournal.for_prefix(prefix)
+    state = None
+    ingest = None
+    if resume:
+        if not journal.exists():
+            logger.error(f"{Fore.RED}Error: No run journal found for prefix '{prefix}' ({journal.path})")
+            return
+        state = journal.reopen()
+        if state.completed:
+            logger.success(f"{Fore.GREEN}Run '{prefix}' already completed, nothing to resume")
+            journal.close()
+            return
+        run = state.params
+        logger.info(f"{Fore.YELLOW}⏩ Resuming run '{prefix}' from {journal.path}")
+        video_path = run['video_path']
+        if run.get('url') and not Path(video_path).exists() and run['create_frames'] and state.extracted is None:
+            logger.info(f"{Fore.YELLOW}Downloading video from YouTube again: {run['url']}")
+            from src.core.video_downloader import VideoDownloader
+            downloader = VideoDownloader(connections=download_connections)
+            if run.get('progressive'):
+                ingest = downloader.open_progressive(run['url'])
+            else:
+                video_path = downloader.download_from_youtube(run['url'])
     else:
-        logger.error(f"{Fore.RED}Error: Please provide either --url or --file")
-        return
+        # Determine video source
+        if url:
+            from src.core.video_downloader import VideoDownloader
+            downloader = VideoDownloader(connections=download_connections)
+            if progressive and create_frames:
+                logger.info(f"{Fore.YELLOW}Streaming video from YouTube: {url}")
+                ingest = downloader.open_progressive(url)
+                video_path = str(ingest.path)
+            else:
+                logger.info(f"{Fore.YELLOW}Downloading video from YouTube: {url}")
+                video_path = downloader.download_from_youtube(url)
+                logger.success(f"{Fore.GREEN}Video downloaded successfully")
+        elif file:
+            video_path = file
+            logger.info(f"{Fore.BLUE}Using local video file: {file}")
+        else:
+            logger.error(f"{Fore.RED}Error: Please provide either --url or --file")
+            return
+        if stream and not (create_frames and (upload_frames or add_slides)):
+            logger.error(f"{Fore.RED}Error: --stream needs --create-frames and --upload-frames or --add-slides")
+            return
+        if stream and dedup_distance:
+            logger.error(f"{Fore.RED}Error: --dedup-distance needs saved frames and cannot be used with --stream")
+            return
+        if create_frames:
+            from src.core.decoder import DecoderSettings
+            try:
+                DecoderSettings.create(decoder, keyframes_only, decode_threads, decode_width)
+            except ValueError as e:
+                logger.error(f"{Fore.RED}Error: {e}")
+                return
+        if mode == 'diff' and adaptive_stride and decoder != 'opencv':
+            logger.error(f"{Fore.RED}Error: --adaptive-stride needs the opencv decoder")
+            return
+        
+        extract_kwargs = {'prefix': prefix, 'interval': interval, 'decode_strategy': decode_strategy,
+                          'dedup_distance': dedup_distance, 'dedup_hash': dedup_hash}
+        if mode == 'diff':
+            extract_kwargs['threshold'] = threshold
+            extract_kwargs['adaptive_stride'] = adaptive_stride
+        if mode == 'scene':
+            extract_kwargs.update(histogram_threshold=scene_histogram, edge_threshold=scene_edges,
+                                  ssim_threshold=scene_ssim, stable_samples=stable_samples)
+        if mode in ('diff', 'scene'):
+            extract_kwargs['compare_width'] = compare_width or None
+            extract_kwargs['roi'] = list(roi) if roi else None
+        run = {
+            'video_path': video_path,
+            'url': url,
+            'progressive': ingest is not None,
+            'mode': mode,
+            'extract': extract_kwargs,
+            'encoding': {'format': frame_format, 'quality': quality, 'png_compression': png_compression,
+                         'max_width': max_width},
+            'decoder': {'backend': decoder, 'keyframes_only': keyframes_only, 'threads': decode_threads,
+                        'width': decode_width},
+            'create_frames': create_frames,
+            'upload_frames': upload_frames,
+            'add_slides': add_slides,
+            'stream': stream,
+            'folder_id': settings.UPLOAD_FOLDER_ID,
+            'presentation_id': presentation_id or settings.PRESENTATION_ID,
+            'sync_slides': sync_slides,
+        }
+        journal.start(run)
+    
+    mode = run['mode']
+    extract_kwargs = dict(run['extract'])
+    if extract_kwargs.get('roi'):
+        extract_kwargs['roi'] = tuple(extract_kwargs['roi'])
+    create_frames, upload_frames, add_slides = run['create_frames'], run['upload_frames'], run['add_slides']
+    stream = run.get('stream', False)
+    source = ingest.source if ingest is not None else video_path
+    target_id = run['presentation_id']
     
     logger.info(f"{Fore.MAGENTA}Configuration:")
     logger.info(f"{Fore.MAGENTA}   • Mode: {mode}")
-    logger.info(f"{Fore.MAGENTA}   • Threshold: {threshold}" + (" (diff mode)" if mode == 'diff' else ""))
-    logger.info(f"{Fore.MAGENTA}   • Interval: {interval} frames")
+    if mode == 'diff':
+        logger.info(f"{Fore.MAGENTA}   • Threshold: {extract_kwargs['threshold']} (diff mode)")
+        if extract_kwargs.get('adaptive_stride'):
+            logger.info(f"{Fore.MAGENTA}   • Adaptive sampling: stride {extract_kwargs['adaptive_stride']} frames")
+    if mode == 'scene':
+        logger.info(f"{Fore.MAGENTA}   • Scene change: histogram {extract_kwargs['histogram_threshold']}, "
+                    f"edges {extract_kwargs['edge_threshold']}, SSIM {extract_kwargs['ssim_threshold'] or 'off'}, "
+                    f"stable for {extract_kwargs['stable_samples']} samples")
+    logger.info(f"{Fore.MAGENTA}   • Interval: {extract_kwargs['interval']} frames")
+    logger.info(f"{Fore.MAGENTA}   • Decode strategy: {extract_kwargs['decode_strategy']}")
+    if run.get('decoder', {}).get('backend', 'opencv') != 'opencv':
+        decoding = run['decoder']
+        logger.info(f"{Fore.MAGENTA}   • Decoder: {decoding['backend']}"
+                    + (", keyframes only" if decoding['keyframes_only'] else "")
+                    + (f", {decoding['threads']} threads" if decoding['threads'] else "")
+                    + (f", {decoding['width']}px wide" if decoding['width'] else ""))
+    if mode in ('diff', 'scene'):
+        width, region = extract_kwargs['compare_width'], extract_kwargs['roi']
+        logger.info(f"{Fore.MAGENTA}   • Compare: {f'{width}px wide' if width else 'full resolution'}"
+                    + (f", region {region}" if region else ""))
+    if extract_kwargs['dedup_distance']:
+        logger.info(f"{Fore.MAGENTA}   • Near-duplicates: {extract_kwargs['dedup_hash']}, "
+                    f"distance <= {extract_kwargs['dedup_distance']}")
+    if 'encoding' in run:
+        encoding = run['encoding']
+        logger.info(f"{Fore.MAGENTA}   • Frames: {encoding['format']}"
+                    + (f", quality {encoding['quality']}" if encoding['format'] != 'png' else "")
+                    + (f", max width {encoding['max_width']}px" if encoding['max_width'] else ""))
     logger.info(f"{Fore.MAGENTA}   • Prefix: '{prefix}'")
-    logger.info(f"{Fore.MAGENTA}   • Steps: {'✓' if create_frames else '✗'} Extract frames, {'✓' if upload_frames else '✗'} Upload, {'✓' if add_slides else '✗'} Create slides")
+    logger.info(f"{Fore.MAGENTA}   • Steps: {'✓' if create_frames else '✗'} Extract frames, {'✓' if upload_frames else '✗'} Upload, {'✓' if add_slides else '✗'} Create slides"
+                + (" (streamed from memory)" if stream else ""))
     logger.info(f"{Fore.CYAN}{'=' * 50}")
     
-    # Extract frames
-    if create_frames:
-        logger.info("")
-        logger.info(f"{Fore.GREEN}🔧 STEP 1/3: Frame Extraction")
-        logger.info(f"{Fore.GREEN}{'-' * 30}")
-        extractor = FrameExtractorFactory.create(mode)
-        kwargs = {'prefix': prefix, 'interval': interval}
-        if mode == 'diff':
-            kwargs['threshold'] = threshold
-            
-        frame_paths = extractor.extract(video_path, **kwargs)
-    
-    # Upload and create slides
-    if upload_frames or add_slides:
-        # Find existing frames if not just created
-        if not create_frames:
-            logger.info("")
-            logger.info(f"{Fore.YELLOW}Finding existing frames...")
-            frame_paths = find_images_in_directory(
-                settings.FRAMES_DIR, 
-                f"{prefix}_*.png"
-            )
-            frame_paths = [str(p) for p in frame_paths]
-            logger.info(f"{Fore.YELLOW}Found {len(frame_paths)} existing frames with prefix '{prefix}'")
+    try:
+        # Extract frames
+        from src.services.upload_cache import UploadCache
         
-        if not frame_paths:
-            logger.error(f"{Fore.RED}Error: No frames found to upload")
-            return
+        frame_paths = None
+        urls = None
+        content_hashes = None
+        if state is not None and state.extracted is not None:
+            frame_paths = state.extracted
+            logger.info(f"{Fore.YELLOW}Frames already extracted: {len(frame_paths)}")
+            if stream:
+                from src.services.google_drive import GoogleDriveService
+                file_ids = state.file_ids()
+                urls = [GoogleDriveService.file_url(file_ids[name]) for name in frame_paths]
+        elif stream or create_frames:
+            # OpenCV and the extraction pipeline are only loaded by runs that extract
+            from src.core.decoder import DecoderSettings
+            from src.core.frame_extractor import FrameExtractorFactory
+            from src.core.pipeline import FrameEncoding
+            
+            options = {'writer_threads': writer_threads, 'queue_size': queue_size, 'reuse_buffers': reuse_buffers,
+                       'encoding': FrameEncoding.create(**run['encoding']) if 'encoding' in run else None,
+                       'decoder': DecoderSettings.create(**run['decoder']) if 'decoder' in run else None}
+            if mode == 'diff':
+                options['workers'] = workers
+                options['score_batch'] = score_batch
+                if timeline_cache:
+                    from src.core.timeline import TimelineCache
+                    options['timeline_cache'] = TimelineCache()
+            if stream:
+                logger.info("")
+                logger.info(f"{Fore.GREEN}🔧 STEP 1-2/3: Frame Extraction streamed to Google Drive")
+                logger.info(f"{Fore.GREEN}{'-' * 30}")
+                from src.services.google_drive import GoogleDriveService
+                drive_service = GoogleDriveService(upload_cache=UploadCache() if upload_cache else None)
+                upload_stream = drive_service.open_upload_stream(
+                    run['folder_id'], concurrency=upload_concurrency, max_in_flight=stream_in_flight,
+                    existing=state.file_ids() if state is not None else None,
+                    on_uploaded=journal.record_upload)
+                extractor = FrameExtractorFactory.create(mode, frame_consumer=upload_stream.submit, **options)
+                with metrics.histogram('run_step_seconds', step='extract_upload').time():
+                    frame_paths = extractor.extract(source, **extract_kwargs)
+                    url_by_name = upload_stream.close()
+                urls = [url_by_name[name] for name in frame_paths]
+                content_hashes = upload_stream.content_hashes
+                recorded = state.file_ids() if state is not None else {}
+                for name, file_id in upload_stream.file_ids.items():
+                    if name not in recorded:
+                        journal.record_upload(name, file_id)
+                journal.record_extracted(frame_paths)
+                journal.record_uploaded()
+            else:
+                logger.info("")
+                logger.info(f"{Fore.GREEN}🔧 STEP 1/3: Frame Extraction")
+                logger.info(f"{Fore.GREEN}{'-' * 30}")
+                extractor = FrameExtractorFactory.create(mode, **options)
+                with metrics.histogram('run_step_seconds', step='extract').time():
+                    frame_paths = extractor.extract(source, **extract_kwargs,
+                                                    resume=state.resume_point() if state is not None else None,
+                                                    on_saved=journal.record_frame,
+                                                    checkpoint=journal.record_checkpoint)
+                journal.record_extracted(frame_paths)
+        if ingest is not None:
+            logger.info(f"{Fore.YELLOW}Finishing the video download...")
+            logger.success(f"{Fore.GREEN}Video downloaded to {ingest.finish()}")
         
-        # Upload to Drive
+        # Upload and create slides
         if upload_frames or add_slides:
-            logger.info("")
-            logger.info(f"{Fore.BLUE}STEP 2/3: Google Drive Upload")
-            logger.info(f"{Fore.BLUE}{'-' * 30}")
-            drive_service = GoogleDriveService()
-            urls = drive_service.upload_images(frame_paths, settings.UPLOAD_FOLDER_ID)
-        
-        # Add to Slides
-        if add_slides:
-            logger.info("")
-            logger.info(f"{Fore.MAGENTA}STEP 3/3: Google Slides Creation")
-            logger.info(f"{Fore.MAGENTA}{'-' * 30}")
-            slides_service = GoogleSlidesService()
-            target_id = presentation_id or settings.PRESENTATION_ID
+            from src.services.google_drive import GoogleDriveService
+            
+            # Find existing frames if not just created
+            if frame_paths is None:
+                logger.info("")
+                logger.info(f"{Fore.YELLOW}Finding existing frames...")
+                from src.utils.file_handler import FRAME_FORMATS, find_frames
+                extension = FRAME_FORMATS[run['encoding']['format']] if 'encoding' in run else None
+                frame_paths = [str(p) for p in find_frames(settings.FRAMES_DIR, prefix, extension)]
+                logger.info(f"{Fore.YELLOW}Found {len(frame_paths)} existing frames with prefix '{prefix}'")
+                journal.record_extracted(frame_paths)
             
-            logger.info(f"{Fore.CYAN}Converting {len(urls)} shareable links to direct links...")
-            direct_urls = [drive_service.get_direct_link(url) for url in urls]
-            logger.success(f"{Fore.GREEN}Links converted successfully")
+            if not frame_paths:
+                logger.error(f"{Fore.RED}Error: No frames found to upload")
+                return
             
-            slides_service.batch_add_slides(target_id, direct_urls)
+            # Upload to Drive
+            if urls is None:
+                logger.info("")
+                logger.info(f"{Fore.BLUE}STEP 2/3: Google Drive Upload")
+                logger.info(f"{Fore.BLUE}{'-' * 30}")
+                drive_service = GoogleDriveService(upload_cache=UploadCache() if upload_cache else None)
+                existing = state.file_ids() if state is not None else {}
+                if state is not None and existing:
+                    logger.info(f"{Fore.YELLOW}{len(existing)} frames already uploaded by the interrupted run")
+                with metrics.histogram('run_step_seconds', step='upload').time():
+                    urls = drive_service.upload_images(frame_paths, run['folder_id'],
+                                                       concurrency=upload_concurrency,
+                                                       existing=existing,
+                                                       on_uploaded=journal.record_upload)
+                journal.record_uploaded()
+            
+            # Add to Slides
+            if add_slides:
+                logger.info("")
+                logger.info(f"{Fore.MAGENTA}STEP 3/3: Google Slides Creation")
+                logger.info(f"{Fore.MAGENTA}{'-' * 30}")
+                from src.services.google_slides import GoogleSlidesService
+                slides_service = GoogleSlidesService()
+                
+                logger.info(f"{Fore.CYAN}Converting {len(urls)} shareable links to direct links...")
+                direct_urls = [GoogleDriveService.get_direct_link(url) for url in urls]
+                logger.success(f"{Fore.GREEN}Links converted successfully")
+                
+                if run.get('sync_slides'):
+                    if content_hashes is None and not stream:
+                        from src.services.upload_cache import file_digest
+                        content_hashes = {path: file_digest(path) for path in frame_paths}
+                    # Streamed frames of a resumed run are not on disk and are keyed by their Drive file
+                    keys = [content_hashes[path] if content_hashes is not None
+                            else hashlib.sha256(url.encode()).hexdigest()
+                            for path, url in zip(frame_paths, urls)]
+                    with metrics.histogram('run_step_seconds', step='slides').time():
+                        synced = slides_service.sync_slides(target_id, list(zip(keys, direct_urls)))
+                    journal.record_slides(frame_paths, synced.slide_ids)
+                    if not synced.complete:
+                        logger.warning(f"{Fore.YELLOW}Run incomplete: rerun with --resume --prefix {prefix} "
+                                       f"to finish the sync")
+                        return
+                else:
+                    done = state.slide_ids() if state is not None else {}
+                    pending = [(path, url) for path, url in zip(frame_paths, direct_urls) if path not in done]
+                    if done:
+                        logger.info(f"{Fore.YELLOW}{len(done)} slides already created by the interrupted run")
+                    pending_paths = [path for path, _ in pending]
+                    with metrics.histogram('run_step_seconds', step='slides').time():
+                        created = slides_service.batch_add_slides(
+                            target_id, [url for _, url in pending],
+                            on_created=lambda start, slide_ids: journal.record_slides(
+                                pending_paths[start:start + len(slide_ids)], slide_ids)
+                        )
+                    if len(created) < len(pending):
+                        logger.warning(f"{Fore.YELLOW}Run incomplete: rerun with --resume --prefix {prefix} "
+                                       f"to add the missing slides")
+                        return
+        
+        journal.record_completed()
+    finally:
+        if ingest is not None:
+            ingest.close()
+        journal.close()
+        if metrics_file:
+            logger.info(f"{Fore.BLUE}⏱️  Metrics written to {metrics.dump(metrics_file, metrics_format)}")
     
     logger.info(f"{Fore.CYAN}{'=' * 50}")
     logger.success(f"{Fore.GREEN}🎉 PROCESS COMPLETE!")
@@ -0,0 +1,612 @@
+"""Long-running service that converts videos submitted as jobs.
+
+    python -m src.service --inbox data/inbox --port 8765 --workers 2
+
+A job is a JSON object naming a video and the steps to run on it::
+
+    {"file": "lecture.mp4", "mode": "diff", "options": {"threshold": 20, "interval": 15},
+     "upload": true, "slides": true, "presentation_id": "..."}
+
+Jobs arrive as ``*.json`` files dropped into the inbox directory (write them
+under another name and rename them, so a half-written file is never read)
+or as ``POST /jobs`` requests to a local HTTP endpoint. A pool of worker
+threads runs them concurrently from a bounded queue. Credentials, the
+Google API clients, logging and the imported libraries are set up once,
+so a short job pays none of the start-up cost of ``src.main``.
+
+Once the queue is full, ``POST /jobs`` answers 503 and inbox files stay
+where they are until a worker frees up. ``GET /status`` (and
+``status.json`` in the inbox) reports the queue depth and the jobs by
+state, ``GET /jobs/<id>`` one job and ``GET /metrics`` the metrics in the
+Prometheus text format.
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+import click
+from loguru import logger
+from colorama import Fore, init
+from config.settings import settings
+from src.core.exceptions import ServiceBusyError
+from src.utils.file_handler import clean_filename
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+# The extractors and Google clients are imported once the service starts, so --help
+# returns without loading them
+if TYPE_CHECKING:
+    from src.services.google_drive import GoogleDriveService
+    from src.services.google_slides import GoogleSlidesService
+
+# Initialize colorama for cross-platform colored output
+init(autoreset=True)
+
+JOB_MODES = ('diff', 'interval', 'scene')
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+
+# States a job ends in; cancelled jobs never started because the service stopped
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """What a job converts and which steps it runs.
+
+    ``options`` are passed to the extractor's ``extract`` (``threshold``,
+    ``interval``, ``compare_width``...). ``slides`` implies uploading the
+    frames; ``sync_slides`` makes the presentation match the frames instead
+    of appending to it. Unset ids and ``sync_slides`` come from the settings.
+    """
+    file: Optional[str] = None
+    url: Optional[str] = None
+    mode: str = 'diff'
+    options: Dict[str, object] = field(default_factory=dict)
+    prefix: Optional[str] = None
+    upload: bool = False
+    slides: bool = False
+    folder_id: Optional[str] = None
+    presentation_id: Optional[str] = None
+    sync_slides: Optional[bool] = None
+
+    def __post_init__(self):
+        if (self.file is None) == (self.url is None):
+            raise ValueError("A job needs exactly one of 'file' and 'url'")
+        if self.mode not in JOB_MODES:
+            raise ValueError(f"Unknown extraction mode: {self.mode}")
+        if not isinstance(self.options, dict):
+            raise ValueError("'options' must be an object")
+        for name in ('upload', 'slides', 'sync_slides'):
+            value = getattr(self, name)
+            if not isinstance(value, bool) and not (name == 'sync_slides' and value is None):
+                raise ValueError(f"'{name}' must be true or false")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'JobSpec':
+        if not isinstance(data, dict):
+            raise ValueError("A job must be a JSON object")
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+
+@dataclass
+class Job:
+    """A submitted job and its progress"""
+    id: str
+    spec: JobSpec
+    source: str
+    status: str = 'queued'
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    frames: int = 0
+    slides: int = 0
+    error: Optional[str] = None
+
+    @property
+    def prefix(self) -> str:
+        return clean_filename(self.spec.prefix or '') or f"job_{self.id}"
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data['spec'] = {name: value for name, value in data['spec'].items() if value not in (None, {}, False)}
+        data['prefix'] = self.prefix
+        return data
+
+
+class JobService:
+    """Runs jobs on ``workers`` threads fed by a queue of at most ``queue_size`` jobs.
+
+    ``submit`` raises ``ServiceBusyError`` once the queue is full. Google
+    clients are built once and kept for the life of the service: the Drive
+    client is shared (it leases a connection per request) and every worker
+    has its own Slides client. ``drive_factory`` and ``slides_factory``
+    replace the service account clients, e.g. in tests. Frames are saved
+    under ``output_dir``/<job prefix>/. ``on_change`` is called with a job
+    whenever it changes state.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 output_dir: Optional[Path] = None,
+                 drive_factory: Optional[Callable[[], 'GoogleDriveService']] = None,
+                 slides_factory: Optional[Callable[[], 'GoogleSlidesService']] = None,
+                 on_change: Optional[Callable[[Job], None]] = None, history: Optional[int] = None):
+        self.workers = max(1, workers or settings.SERVICE_WORKERS)
+        self.queue_size = max(1, queue_size or settings.SERVICE_QUEUE_SIZE)
+        self.output_dir = Path(output_dir or settings.FRAMES_DIR)
+        self.history = history or settings.SERVICE_JOB_HISTORY
+        self.on_change = on_change
+        self._drive_factory = drive_factory or self._default_drive
+        self._slides_factory = slides_factory or self._default_slides
+        self._drive: Optional['GoogleDriveService'] = None
+        self._local = threading.local()
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._lock = threading.Lock()
+        self._client_lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._totals = {state: 0 for state in FINISHED_STATES}
+        self._busy = 0
+        self._download_locks: Dict[str, threading.Lock] = {}
+        self._threads: List[threading.Thread] = []
+        self._accepting = True
+        self._started_at = time.time()
+
+    @staticmethod
+    def _default_drive() -> 'GoogleDriveService':
+        from src.services.google_drive import GoogleDriveService
+        from src.services.upload_cache import UploadCache
+        return GoogleDriveService(upload_cache=UploadCache() if settings.UPLOAD_CACHE_ENABLED else None)
+
+    @staticmethod
+    def _default_slides() -> 'GoogleSlidesService':
+        from src.services.google_slides import GoogleSlidesService
+        return GoogleSlidesService()
+
+    def start(self) -> 'JobService':
+        # Import the pipeline before the first job arrives
+        import src.core.frame_extractor  # noqa: F401
+        for number in range(1, self.workers + 1):
+            thread = threading.Thread(target=self._work, name=f'service-worker-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"{Fore.CYAN}🛠️  Job service: {self.workers} workers, queue of {self.queue_size}")
+        return self
+
+    def warm_up(self) -> bool:
+        """Build the shared Google clients now instead of in the first job; False if that failed"""
+        try:
+            self.drive
+        except Exception as e:
+            logger.warning(f"{Fore.YELLOW}Google clients not available, jobs that upload will fail: {e}")
+            return False
+        return True
+
+    @property
+    def drive(self) -> 'GoogleDriveService':
+        with self._client_lock:
+            if self._drive is None:
+                self._drive = self._drive_factory()
+            return self._drive
+
+    def _slides(self) -> 'GoogleSlidesService':
+        """Slides client of the calling worker; the client is not thread-safe"""
+        slides = getattr(self._local, 'slides', None)
+        if slides is None:
+            slides = self._local.slides = self._slides_factory()
+        return slides
+
+    def has_capacity(self) -> bool:
+        return self._accepting and not self._queue.full()
+
+    def submit(self, spec: JobSpec, source: str = 'http') -> Job:
+        """Queue a job; raises ``ServiceBusyError`` when the queue is full"""
+        if not self._accepting:
+            raise ServiceBusyError("The service is shutting down")
+        job = Job(uuid.uuid4().hex[:12], spec, source)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise ServiceBusyError(f"Job queue is full ({self.queue_size} jobs waiting)")
+            self._jobs[job.id] = job
+        metrics.counter('service_jobs_total', status='queued').inc()
+        logger.info(f"{Fore.BLUE}📥 Job {job.id} queued from {source}: {spec.file or spec.url}")
+        self._changed(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def status(self) -> dict:
+        with self._lock:
+            states = {state: 0 for state in ('queued', 'running')}
+            for job in self._jobs.values():
+                if job.status in states:
+                    states[job.status] += 1
+            return {'workers': self.workers, 'busy': self._busy, 'queue_depth': self._queue.qsize(),
+                    'queue_size': self.queue_size, 'accepting': self._accepting,
+                    'jobs': dict(states, **self._totals), 'uptime': round(time.time() - self._started_at, 1)}
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting jobs and stop the workers, after the queued jobs with ``wait``.
+
+        Without ``wait`` the queued jobs are cancelled; only the running ones finish.
+        """
+        self._accepting = False
+        if not wait:
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._finish(job, 'cancelled', "The service stopped before the job started")
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            with self._lock:
+                self._busy += 1
+                job.status = 'running'
+                job.started_at = time.time()
+            metrics.histogram('service_queue_wait_seconds').observe(job.started_at - job.submitted_at)
+            self._changed(job)
+            try:
+                self._run(job)
+            except Exception as e:
+                logger.error(f"{Fore.RED}❌ Job {job.id} failed: {e}")
+                self._finish(job, 'failed', str(e) or type(e).__name__)
+            else:
+                logger.success(f"{Fore.GREEN}✅ Job {job.id} done: {job.frames} frames"
+                               + (f", {job.slides} slides" if job.spec.slides else "")
+                               + f" in {job.finished_at - job.started_at:.1f}s")
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+            self._totals[status] += 1
+            finished = [other for other in self._jobs.values() if other.status in FINISHED_STATES]
+            for old in finished[:max(0, len(finished) - self.history)]:
+                del self._jobs[old.id]
+        metrics.counter('service_jobs_total', status=status).inc()
+        if job.started_at is not None:
+            metrics.histogram('service_job_seconds').observe(job.finished_at - job.started_at)
+        self._changed(job)
+
+    def _changed(self, job: Job) -> None:
+        if self.on_change is not None:
+            try:
+                self.on_change(job)
+            except Exception as e:
+                logger.warning(f"Job status update failed: {e}")
+
+    def _video(self, spec: JobSpec) -> str:
+        if spec.file is not None:
+            if not os.path.isfile(spec.file):
+                raise FileNotFoundError(f"Video not found: {spec.file}")
+            return spec.file
+        from src.core.video_downloader import VideoDownloader
+        downloader = VideoDownloader()
+        video_id = downloader.video_id(spec.url)
+        # Jobs for the same video share one download instead of racing for its file
+        with self._lock:
+            lock = self._download_locks.setdefault(video_id, threading.Lock())
+        with lock:
+            return downloader.download_from_youtube(spec.url)
+
+    def _run(self, job: Job) -> None:
+        """Extract, upload and add to slides as one run of ``src.main`` would"""
+        from src.core.frame_extractor import FrameExtractorFactory
+        spec = job.spec
+        video_path = self._video(spec)
+
+        options = {'output_dir': self.output_dir / job.prefix, 'show_progress': False}
+        if spec.mode == 'diff' and settings.TIMELINE_CACHE_ENABLED:
+            from src.core.timeline import TimelineCache
+            options['timeline_cache'] = TimelineCache()
+        extract_kwargs = dict(spec.options)
+        if extract_kwargs.get('roi'):
+            extract_kwargs['roi'] = tuple(extract_kwargs['roi'])
+        extractor = FrameExtractorFactory.create(spec.mode, **options)
+        with metrics.histogram('run_step_seconds', step='extract').time():
+            frame_paths = extractor.extract(video_path, prefix=job.prefix, **extract_kwargs)
+        job.frames = len(frame_paths)
+
+        if (spec.upload or spec.slides) and frame_paths:
+            from src.services.google_drive import GoogleDriveService
+            with metrics.histogram('run_step_seconds', step='upload').time():
+                urls = self.drive.upload_images(frame_paths, spec.folder_id or settings.UPLOAD_FOLDER_ID)
+            if spec.slides:
+                presentation_id = spec.presentation_id or settings.PRESENTATION_ID
+                direct_urls = [GoogleDriveService.get_direct_link(url) for url in urls]
+                with metrics.histogram('run_step_seconds', step='slides').time():
+                    sync = settings.SLIDES_SYNC if spec.sync_slides is None else spec.sync_slides
+                    job.slides = self._add_slides(presentation_id, frame_paths, direct_urls, sync)
+        self._finish(job, 'done')
+
+    def _add_slides(self, presentation_id: str, frame_paths: List[str], direct_urls: List[str],
+                    sync: bool) -> int:
+        """Put the frames into the presentation and return the number of slides that show them"""
+        from src.core.exceptions import GoogleAPIError
+        slides = self._slides()
+        if sync:
+            from src.services.upload_cache import file_digest
+            keys = [file_digest(path) for path in frame_paths]
+            synced = slides.sync_slides(presentation_id, list(zip(keys, direct_urls)))
+            if not synced.complete:
+                raise GoogleAPIError("Slides sync incomplete; submit the job again to finish it")
+            return len(synced.slide_ids)
+        created = slides.batch_add_slides(presentation_id, direct_urls)
+        if len(created) < len(direct_urls):
+            raise GoogleAPIError(f"{len(direct_urls) - len(created)} of {len(direct_urls)} slides could not be added")
+        return len(created)
+
+
+class InboxWatcher:
+    """Feeds ``*.json`` job files from ``directory`` to a ``JobService``.
+
+    A file is claimed by moving it to ``processing/`` and ends up in
+    ``done/`` or ``failed/`` next to a ``<name>.result.json`` with the job's
+    outcome. Files are only claimed while the service has room, so the
+    inbox holds the backlog. Jobs cancelled by a stopping service go back
+    to the inbox, and files left in ``processing/`` by a service that died
+    are put back on start. ``status.json`` tracks the service.
+    """
+
+    def __init__(self, service: JobService, directory: Optional[Path] = None,
+                 poll_interval: Optional[float] = None):
+        self.service = service
+        self.directory = Path(directory or settings.SERVICE_INBOX_DIR)
+        self.poll_interval = settings.SERVICE_POLL_INTERVAL if poll_interval is None else poll_interval
+        for name in ('processing', 'done', 'failed'):
+            (self.directory / name).mkdir(parents=True, exist_ok=True)
+        self._files: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'InboxWatcher':
+        for leftover in sorted((self.directory / 'processing').glob('*.json')):
+            logger.warning(f"{Fore.YELLOW}Requeuing {leftover.name}, left unfinished by an earlier run")
+            os.replace(leftover, self.directory / leftover.name)
+        self.write_status()
+        self._thread = threading.Thread(target=self._watch, name='service-inbox', daemon=True)
+        self._thread.start()
+        logger.info(f"{Fore.CYAN}📂 Watching {self.directory} for jobs")
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Inbox poll failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def poll(self) -> int:
+        """Claim as many waiting job files as the service has room for, oldest first"""
+        waiting = sorted(self.directory.glob('*.json'), key=lambda path: (path.stat().st_mtime, path.name))
+        claimed = 0
+        for path in waiting:
+            if path.name == 'status.json':
+                continue
+            if not self.service.has_capacity():
+                break
+            processing = self.directory / 'processing' / path.name
+            try:
+                os.replace(path, processing)
+            except FileNotFoundError:
+                # Claimed by another service watching the same inbox
+                continue
+            try:
+                spec = JobSpec.from_dict(json.loads(processing.read_text(encoding='utf-8')))
+            except (ValueError, TypeError) as e:
+                logger.error(f"{Fore.RED}Rejected job file {path.name}: {e}")
+                self._file_result(processing, 'failed', {'status': 'failed', 'error': f"Invalid job: {e}"})
+                continue
+            with self._lock:
+                try:
+                    job = self.service.submit(spec, source=f"inbox:{path.name}")
+                except ServiceBusyError:
+                    os.replace(processing, path)
+                    break
+                self._files[job.id] = processing
+            claimed += 1
+        return claimed
+
+    def job_changed(self, job: Job) -> None:
+        """``JobService.on_change`` hook: file finished jobs and refresh ``status.json``"""
+        if job.status in FINISHED_STATES:
+            with self._lock:
+                processing = self._files.pop(job.id, None)
+            if processing is not None and job.status == 'cancelled':
+                logger.info(f"{Fore.YELLOW}Returning {processing.name} to the inbox")
+                os.replace(processing, self.directory / processing.name)
+            elif processing is not None:
+                self._file_result(processing, job.status, job.to_dict())
+        self.write_status()
+
+    def _file_result(self, processing: Path, status: str, result: dict) -> None:
+        target = self.directory / status / processing.name
+        os.replace(processing, target)
+        _write_json(target.with_name(f"{target.stem}.result.json"), result)
+
+    def write_status(self) -> None:
+        with self._status_lock:
+            _write_json(self.directory / 'status.json', dict(self.service.status(), updated=time.time()))
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """Replace ``path`` atomically, so readers never see a partial file"""
+    temporary = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    temporary.write_text(json.dumps(data, indent=2), encoding='utf-8')
+    os.replace(temporary, path)
+
+
+class _JobRequestHandler(BaseHTTPRequestHandler):
+    """JSON API of a ``JobServer``"""
+    service: JobService = None
+
+    def do_GET(self):
+        path = self.path.rstrip('/')
+        if path == '/status':
+            self._send(200, self.service.status())
+        elif path == '/jobs':
+            self._send(200, {'jobs': [job.to_dict() for job in self.service.jobs()]})
+        elif path.startswith('/jobs/'):
+            job = self.service.get(path[len('/jobs/'):])
+            if job is None:
+                self._send(404, {'error': 'Unknown job'})
+            else:
+                self._send(200, job.to_dict())
+        elif path == '/metrics':
+            body = metrics.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            self._send(404, {'error': 'Not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            spec = JobSpec.from_dict(json.loads(self.rfile.read(length) or b'null'))
+        except (ValueError, TypeError) as e:
+            self._send(400, {'error': f"Invalid job: {e}"})
+            return
+        try:
+            job = self.service.submit(spec)
+        except ServiceBusyError as e:
+            self._send(503, {'error': str(e), 'status': self.service.status()}, {'Retry-After': '5'})
+            return
+        self._send(202, job.to_dict(), {'Location': f"/jobs/{job.id}"})
+
+    def _send(self, status: int, data: dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class JobServer:
+    """Serves the job API of a ``JobService`` on ``host``:``port`` (0 picks a free port)"""
+
+    def __init__(self, service: JobService, host: Optional[str] = None, port: Optional[int] = None):
+        handler = type('JobRequestHandler', (_JobRequestHandler,), {'service': service})
+        self._server = ThreadingHTTPServer((host or settings.SERVICE_HOST,
+                                            settings.SERVICE_PORT if port is None else port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'JobServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='service-http', daemon=True)
+        self._thread.start()
+        logger.info(f"{Fore.CYAN}🌐 Accepting jobs at {self.url}/jobs")
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+@click.command()
+@click.option('--inbox', type=click.Path(file_okay=False, path_type=Path), default=settings.SERVICE_INBOX_DIR,
+              help='Directory watched for *.json job files')
+@click.option('--no-inbox', is_flag=True, help='Accept jobs over HTTP only')
+@click.option('--host', default=settings.SERVICE_HOST, help='Address of the job API')
+@click.option('--port', type=click.IntRange(min=-1), default=settings.SERVICE_PORT,
+              help='Port of the job API (-1 = no HTTP endpoint, 0 = any free port)')
+@click.option('--workers', type=click.IntRange(min=1), default=settings.SERVICE_WORKERS,
+              help='Jobs processed concurrently')
+@click.option('--queue-size', type=click.IntRange(min=1), default=settings.SERVICE_QUEUE_SIZE,
+              help='Jobs waiting for a worker before new ones are refused')
+@click.option('--poll-interval', type=float, default=settings.SERVICE_POLL_INTERVAL,
+              help='Seconds between inbox scans')
+@click.option('--output-dir', type=click.Path(file_okay=False, path_type=Path), default=settings.FRAMES_DIR,
+              help='Root directory; each job saves its frames in a subdirectory')
+def main(inbox, no_inbox, host, port, workers, queue_size, poll_interval, output_dir):
+    """Process video-to-slides jobs from an inbox directory or a local HTTP endpoint"""
+    setup_logger()
+    if no_inbox and port < 0:
+        raise click.UsageError("Nothing to take jobs from: drop --no-inbox or give a --port")
+    metrics.enable()
+
+    service = JobService(workers, queue_size, output_dir)
+    watcher = None if no_inbox else InboxWatcher(service, inbox, poll_interval)
+    if watcher is not None:
+        service.on_change = watcher.job_changed
+    service.warm_up()
+    service.start()
+    server = JobServer(service, host, port).start() if port >= 0 else None
+    if watcher is not None:
+        watcher.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info(f"{Fore.YELLOW}Stopping: finishing the running jobs...")
+    finally:
+        if server is not None:
+            server.close()
+        if watcher is not None:
+            watcher.close()
+        # Jobs still queued are cancelled; those from the inbox go back to it for the next start
+        service.close(wait=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,30 @@
+import threading
 from google.oauth2 import service_account
 from config.settings import settings
 from src.core.exceptions import AuthenticationError
 
 class AuthManager:
-    @staticmethod
-    def get_credentials():
-        """Get Google API credentials"""
-        try:
-            return service_account.Credentials.from_service_account_file(
-                settings.SERVICE_ACCOUNT_FILE,
-                scopes=settings.GOOGLE_SCOPES
-            )
-        except Exception as e:
-            raise AuthenticationError(f"Failed to load credentials: {e}")
+    _credentials = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_credentials(cls):
+        """Get Google API credentials.
+
+        The service account file is read once per process and the
+        credentials are shared by every client; they refresh their access
+        token themselves when it expires.
+        """
+        key = (settings.SERVICE_ACCOUNT_FILE, tuple(settings.GOOGLE_SCOPES))
+        with cls._lock:
+            credentials = cls._credentials.get(key)
+            if credentials is None:
+                try:
+                    credentials = service_account.Credentials.from_service_account_file(
+                        settings.SERVICE_ACCOUNT_FILE,
+                        scopes=settings.GOOGLE_SCOPES
+                    )
+                except Exception as e:
+                    raise AuthenticationError(f"Failed to load credentials: {e}")
+                cls._credentials[key] = credentials
+        return credentials
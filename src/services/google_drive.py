@@ -1,66 +1,331 @@
-from typing import List
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 from pathlib import Path
+import hashlib
+import io
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from tqdm import tqdm
 from loguru import logger
 from colorama import Fore, Style
+from config.settings import settings
 from .auth_manager import AuthManager
+from .rate_limiter import RateLimiter, get_rate_limiter, is_retryable
+from .upload_cache import CachedUpload, UploadCache, file_digest
 from src.core.exceptions import GoogleAPIError
+from src.utils.file_handler import image_mimetype
+from src.utils.metrics import metrics
+
+# Drive accepts at most 100 calls in one batch request
+MAX_BATCH_SIZE = 100
 
 class GoogleDriveService:
-    def __init__(self):
-        self.creds = AuthManager.get_credentials()
-        self.service = build('drive', 'v3', credentials=self.creds)
-    
-    def upload_images(self, image_files: List[str], folder_id: str) -> List[str]:
-        """Upload images to Google Drive and return URLs"""
-        file_urls = []
-        
-        logger.info(f"{Fore.CYAN}☁️  Starting upload to Google Drive ({len(image_files)} files)")
+    def __init__(self, http_factory: Optional[Callable[[], httplib2.Http]] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 upload_cache: Optional[UploadCache] = None):
+        """
+        ``http_factory`` returns a fresh (already authorized) http object per
+        call; it replaces the service account credentials, e.g. in tests.
+        Calls are throttled and retried by the shared 'drive' rate limiter
+        unless ``rate_limiter`` is given. With an ``upload_cache`` frames
+        already in the target folder are not uploaded again.
+        """
+        self._http_factory = http_factory
+        self.limiter = rate_limiter or get_rate_limiter('drive')
+        self.upload_cache = upload_cache
+        self._lock = threading.Lock()
+        if http_factory is None:
+            self.creds = AuthManager.get_credentials()
+            self.service = build('drive', 'v3', credentials=self.creds)
+        else:
+            self.creds = None
+            self.service = build('drive', 'v3', http=http_factory())
+        self._idle_services = [self.service]
+
+    @contextmanager
+    def _leased_service(self):
+        """A Drive service for the calling thread's next request.
+
+        googleapiclient service objects and their httplib2 connections are not
+        thread-safe, so every request in flight uses its own. Services are
+        returned for reuse once the request is done, so the connections stay
+        warm across upload workers, runs and the jobs of a long-lived service.
+        """
+        with self._lock:
+            service = self._idle_services.pop() if self._idle_services else None
+        if service is None:
+            if self._http_factory is not None:
+                http = self._http_factory()
+            else:
+                http = AuthorizedHttp(self.creds, http=httplib2.Http())
+            service = build('drive', 'v3', http=http)
+        try:
+            yield service
+        finally:
+            with self._lock:
+                self._idle_services.append(service)
+
+    def _upload_one(self, image_file: str, folder_id: str) -> str:
+        media = MediaFileUpload(image_file, mimetype=image_mimetype(image_file))
+        return self._upload_media(Path(image_file).name, media, folder_id)
+
+    def _upload_media(self, name: str, media, folder_id: str) -> str:
+        file_metadata = {
+            'name': name,
+            'parents': [folder_id],
+            'mimeType': media.mimetype()
+        }
+
+        with self._leased_service() as service:
+            # A 5xx may come after Drive stored the file; retrying it would upload a duplicate
+            file = self.limiter.execute(service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id'
+            ), idempotent=False)
+        metrics.counter('drive_uploads_total').inc()
+        metrics.counter('drive_upload_bytes_total').inc(media.size())
+        return file['id']
+
+    def _batch_calls(self, file_ids: List[str], make_call, action: str) -> Tuple[Dict[str, dict], Set[str]]:
+        """Run ``make_call(service, file_id)`` for every file, up to MAX_BATCH_SIZE per batch request.
         
-        pbar = tqdm(image_files, 
-                   desc=f"{Fore.BLUE}📤 Uploading to Drive", 
+        Calls inside a batch fail individually; those rejected for quota or
+        server errors are retried in a later batch after a backoff. Returns
+        the responses by file ID and the files Drive does not know (404).
+        """
+        responses: Dict[str, dict] = {}
+        missing: Set[str] = set()
+        remaining = list(file_ids)
+        attempt = 0
+        while remaining:
+            failures = {}
+
+            def on_response(request_id, response, exception):
+                if exception is None:
+                    responses[request_id] = response
+                elif isinstance(exception, HttpError) and exception.resp.status == 404:
+                    missing.add(request_id)
+                else:
+                    failures[request_id] = exception
+                    self.limiter.record_failure(exception)
+
+            for start in range(0, len(remaining), MAX_BATCH_SIZE):
+                chunk = remaining[start:start + MAX_BATCH_SIZE]
+                with self._leased_service() as service:
+                    batch = service.new_batch_http_request(callback=on_response)
+                    for file_id in chunk:
+                        batch.add(make_call(service, file_id), request_id=file_id)
+                    self.limiter.execute(batch, cost=len(chunk))
+
+            retryable = [file_id for file_id, error in failures.items() if is_retryable(error)]
+            fatal = {file_id: error for file_id, error in failures.items() if not is_retryable(error)}
+            if fatal or (retryable and attempt >= self.limiter.max_retries):
+                failed = fatal or failures
+                file_id, error = next(iter(failed.items()))
+                logger.error(f"Failed to {action} {len(failed)} files, e.g. {file_id}: {error}")
+                raise GoogleAPIError(f"Could not {action} {len(failed)} files: {error}")
+
+            if retryable:
+                self.limiter.record_retry()
+                self.limiter.wait(self.limiter.backoff_delay(attempt, failures[retryable[0]]))
+                attempt += 1
+            remaining = retryable
+        return responses, missing
+
+    def _share_publicly(self, file_ids: List[str]) -> Set[str]:
+        """Make files publicly readable; returns the files that no longer exist"""
+        _, missing = self._batch_calls(
+            file_ids,
+            lambda service, file_id: service.permissions().create(
+                fileId=file_id,
+                body={'type': 'anyone', 'role': 'reader'}
+            ),
+            'share'
+        )
+        return missing
+
+    def _missing_files(self, file_ids: List[str]) -> Set[str]:
+        """Files among ``file_ids`` that were deleted from Drive or moved to the trash"""
+        if not file_ids:
+            return set()
+        files, missing = self._batch_calls(
+            file_ids,
+            lambda service, file_id: service.files().get(fileId=file_id, fields='id, trashed'),
+            'look up'
+        )
+        return missing | {file_id for file_id, file in files.items() if file.get('trashed')}
+
+    def _forget(self, file_ids: Iterable[str]) -> None:
+        """Drop files that are gone from Drive from the upload cache, so they are uploaded again"""
+        if self.upload_cache is not None:
+            self.upload_cache.forget(file_ids)
+
+    def _cached_uploads(self, hashes: List[str], folder_id: str) -> Dict[str, CachedUpload]:
+        """Upload cache entries for ``hashes`` whose Drive file still exists.
+
+        Shared entries are not sent to Drive again, so their files are looked
+        up first; unshared ones are checked when they are shared.
+        """
+        if self.upload_cache is None:
+            return {}
+        cached = self.upload_cache.lookup(hashes, folder_id)
+        gone = self._missing_files([entry.file_id for entry in cached.values() if entry.shared])
+        if gone:
+            logger.warning(f"{Fore.YELLOW}{len(gone)} cached uploads are no longer in Drive, uploading them again")
+            self._forget(gone)
+        return {content_hash: entry for content_hash, entry in cached.items() if entry.file_id not in gone}
+
+    def upload_images(self, image_files: List[str], folder_id: str,
+                      concurrency: Optional[int] = None,
+                      existing: Optional[Dict[str, str]] = None,
+                      on_uploaded: Optional[Callable[[str, str], None]] = None) -> List[str]:
+        """Upload images to Google Drive and return URLs in the order given.
+
+        Up to ``concurrency`` uploads are in flight at once. Files are made
+        public with batched permission requests while the remaining uploads
+        are still running. Files with identical content are uploaded once,
+        and with an upload cache, content already uploaded to ``folder_id``
+        by an earlier run reuses the existing Drive file.
+
+        ``existing`` maps paths to Drive file IDs uploaded earlier (e.g. by
+        an interrupted run); they are shared again but not re-uploaded.
+        ``on_uploaded`` is called with ``(path, file_id)`` after each upload.
+        Earlier uploads that were deleted from Drive are uploaded again.
+        """
+        concurrency = max(1, concurrency or settings.DRIVE_UPLOAD_CONCURRENCY)
+        hashes = [file_digest(image_file) for image_file in image_files]
+        file_ids: Dict[str, str] = {}
+        unshared: List[str] = []
+
+        for content_hash, entry in self._cached_uploads(hashes, folder_id).items():
+            file_ids[content_hash] = entry.file_id
+            if not entry.shared:
+                unshared.append(entry.file_id)
+        for image_file, content_hash in zip(image_files, hashes):
+            if existing and image_file in existing and content_hash not in file_ids:
+                file_ids[content_hash] = existing[image_file]
+                unshared.append(existing[image_file])
+
+        uploaded = 0
+        # Earlier uploads that turn out to be gone when they are shared get one more pass
+        for attempt in range(2):
+            # First file of every content hash that still has to be uploaded
+            to_upload: Dict[str, int] = {}
+            for index, content_hash in enumerate(hashes):
+                if content_hash not in file_ids:
+                    to_upload.setdefault(content_hash, index)
+
+            if attempt == 0:
+                reused = len(image_files) - len(to_upload)
+                logger.info(f"{Fore.CYAN}☁️  Starting upload to Google Drive ({len(to_upload)} files, "
+                            f"{concurrency} in flight" + (f", {reused} already uploaded" if reused else "") + ")")
+            missing = self._upload_and_share(image_files, to_upload, file_ids, unshared, folder_id,
+                                             concurrency, on_uploaded)
+            uploaded += len(to_upload)
+            if not missing:
+                break
+            if attempt > 0:
+                raise GoogleAPIError(f"{len(missing)} uploaded files disappeared from Drive before they were shared")
+            logger.warning(f"{Fore.YELLOW}{len(missing)} earlier uploads are no longer in Drive, uploading them again")
+            file_ids = {content_hash: file_id for content_hash, file_id in file_ids.items() if file_id not in missing}
+            unshared = []
+
+        reused = len(image_files) - uploaded
+        metrics.counter('drive_uploads_reused_total').inc(reused)
+        file_urls = [self.file_url(file_ids[h]) for h in hashes]
+        logger.success(f"{Fore.GREEN}✅ Upload complete: {len(file_urls)} files available in Google Drive "
+                       f"({uploaded} uploaded, {reused} reused)")
+        logger.info(f"{Fore.BLUE}⏱️  Drive API: {self.limiter.stats.retries} retries, "
+                    f"{self.limiter.stats.throttled_time:.1f}s throttled")
+        return file_urls
+
+    def _upload_and_share(self, image_files: List[str], to_upload: Dict[str, int], file_ids: Dict[str, str],
+                          unshared: List[str], folder_id: str, concurrency: int,
+                          on_uploaded: Optional[Callable[[str, str], None]]) -> Set[str]:
+        """Upload the first file of every hash in ``to_upload`` and share it along with ``unshared``.
+
+        New file IDs are added to ``file_ids``. Returns the IDs that could
+        not be shared because Drive no longer has them.
+        """
+        missing: Set[str] = set()
+        pbar = tqdm(total=len(to_upload),
+                   desc=f"{Fore.BLUE}📤 Uploading to Drive",
                    unit="files",
                    bar_format='{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}] {postfix}')
-        
-        for i, image_file in enumerate(pbar, 1):
-            try:
-                file_metadata = {
-                    'name': Path(image_file).name,
-                    'parents': [folder_id],
-                    'mimeType': 'image/png'
-                }
-                
-                media = MediaFileUpload(image_file, mimetype='image/png')
-                file = self.service.files().create(
-                    body=file_metadata,
-                    media_body=media,
-                    fields='id'
-                ).execute()
-                
-                # Make file publicly accessible
-                self.service.permissions().create(
-                    fileId=file['id'],
-                    body={'type': 'anyone', 'role': 'reader'}
-                ).execute()
-                
-                file_urls.append(f"https://drive.google.com/file/d/{file['id']}/view")
-                
-                # Update progress with current file info
-                pbar.set_postfix({
-                    'current': Path(image_file).name,
-                    'uploaded': i
-                })
-                
-            except Exception as e:
-                pbar.write(f"{Fore.RED}❌ Failed to upload {Path(image_file).name}: {e}")
-                logger.error(f"Failed to upload {image_file}: {e}")
-                raise GoogleAPIError(f"Upload failed: {e}")
-        
-        logger.success(f"{Fore.GREEN}✅ Upload complete: {len(file_urls)} files uploaded to Google Drive")
-        return file_urls
-    
+
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='drive-upload')
+        try:
+            pending = {
+                executor.submit(self._upload_one, image_files[index], folder_id): content_hash
+                for content_hash, index in to_upload.items()
+            }
+            uploaded = 0
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    content_hash = pending.pop(future)
+                    image_file = image_files[to_upload[content_hash]]
+                    try:
+                        file_id = future.result()
+                    except Exception as e:
+                        pbar.write(f"{Fore.RED}❌ Failed to upload {Path(image_file).name}: {e}")
+                        logger.error(f"Failed to upload {image_file}: {e}")
+                        raise GoogleAPIError(f"Upload failed: {e}")
+
+                    file_ids[content_hash] = file_id
+                    if self.upload_cache is not None:
+                        self.upload_cache.record(content_hash, folder_id, file_id, Path(image_file).name)
+                    if on_uploaded is not None:
+                        on_uploaded(image_file, file_id)
+                    unshared.append(file_id)
+                    uploaded += 1
+                    pbar.update(1)
+                    pbar.set_postfix({
+                        'current': Path(image_file).name,
+                        'uploaded': uploaded
+                    })
+
+                if len(unshared) >= MAX_BATCH_SIZE:
+                    missing |= self._share(unshared)
+                    unshared.clear()
+
+            # Make the remaining files publicly accessible
+            missing |= self._share(unshared)
+            unshared.clear()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            pbar.close()
+        return missing
+
+    def _share(self, file_ids: List[str]) -> Set[str]:
+        """Share files publicly and remember that in the upload cache; returns the files that are gone"""
+        if not file_ids:
+            return set()
+        missing = self._share_publicly(file_ids)
+        if missing:
+            self._forget(missing)
+        if self.upload_cache is not None:
+            self.upload_cache.mark_shared([file_id for file_id in file_ids if file_id not in missing])
+        return missing
+
+    def open_upload_stream(self, folder_id: str, concurrency: Optional[int] = None,
+                           max_in_flight: Optional[int] = None,
+                           existing: Optional[Dict[str, str]] = None,
+                           on_uploaded: Optional[Callable[[str, str], None]] = None) -> 'DriveUploadStream':
+        """Start uploading in-memory frames to ``folder_id`` as they are produced"""
+        return DriveUploadStream(self, folder_id, concurrency, max_in_flight, existing, on_uploaded)
+
+    @staticmethod
+    def file_url(file_id: str) -> str:
+        """Shareable link of a Drive file"""
+        return f"https://drive.google.com/file/d/{file_id}/view"
+
     @staticmethod
     def get_direct_link(shareable_link: str) -> str:
         """Convert shareable link to direct link"""
@@ -69,3 +334,134 @@ class GoogleDriveService:
             return f"https://drive.google.com/uc?export=view&id={file_id}"
         except IndexError:
             raise ValueError(f"Invalid shareable link format: {shareable_link}")
+
+
+class DriveUploadStream:
+    """Uploads encoded frames from memory while they are still being produced.
+
+    ``submit`` is called with ``(name, bytes)`` by the producer (e.g. as the
+    frame consumer of an extractor) and returns once the frame is queued. At
+    most ``max_in_flight`` frames are held in memory; further calls block
+    until an upload finishes, which holds back the producer. ``close`` waits
+    for the remaining uploads, shares every file and returns the URLs by name.
+    Frames with identical content are uploaded once, and frames in
+    ``existing`` or the upload cache are only uploaded again if their Drive
+    file was deleted.
+    """
+
+    def __init__(self, drive: GoogleDriveService, folder_id: str, concurrency: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, existing: Optional[Dict[str, str]] = None,
+                 on_uploaded: Optional[Callable[[str, str], None]] = None):
+        self.drive = drive
+        self.folder_id = folder_id
+        self.existing = existing or {}
+        self.on_uploaded = on_uploaded
+        concurrency = max(1, concurrency or settings.DRIVE_UPLOAD_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='drive-stream')
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight or settings.STREAM_MAX_IN_FLIGHT))
+        self._lock = threading.Lock()
+        self._hash_of: Dict[str, str] = {}
+        self._file_ids: Dict[str, str] = {}
+        self._submitted = set()
+        self._unshared: List[str] = []
+        self._futures = []
+        self._error: Optional[Exception] = None
+        self.uploaded = 0
+        self.reused = 0
+
+    def submit(self, name: str, data: bytes) -> None:
+        if self._error is not None:
+            raise GoogleAPIError(f"Upload failed: {self._error}")
+        name = Path(name).name
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._hash_of[name] = content_hash
+            if content_hash in self._submitted:
+                self.reused += 1
+                return
+            self._submitted.add(content_hash)
+        known_id, shared = self.existing.get(name), False
+        cache = self.drive.upload_cache
+        if known_id is None and cache is not None:
+            entry = cache.lookup([content_hash], self.folder_id).get(content_hash)
+            if entry is not None:
+                known_id, shared = entry.file_id, entry.shared
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._upload, name, data, content_hash, known_id, shared)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._futures.append(future)
+
+    def _upload(self, name: str, data: bytes, content_hash: str, known_id: Optional[str] = None,
+                shared: bool = False) -> str:
+        """Upload a frame, or reuse ``known_id`` (from ``existing`` or the cache) if Drive still has it"""
+        try:
+            if known_id is not None and self.drive._missing_files([known_id]):
+                logger.warning(f"{Fore.YELLOW}{name} is no longer in Drive, uploading it again")
+                self.drive._forget([known_id])
+                known_id = None
+            if known_id is None:
+                media = MediaIoBaseUpload(io.BytesIO(data), mimetype=image_mimetype(name))
+                file_id = self.drive._upload_media(name, media, self.folder_id)
+        except Exception as e:
+            logger.error(f"Failed to upload {name}: {e}")
+            self._error = e
+            raise
+        finally:
+            self._slots.release()
+
+        if known_id is not None:
+            with self._lock:
+                self._file_ids[content_hash] = known_id
+                if not shared:
+                    self._unshared.append(known_id)
+                self.reused += 1
+            return known_id
+        with self._lock:
+            self._file_ids[content_hash] = file_id
+            self._unshared.append(file_id)
+            self.uploaded += 1
+        if self.drive.upload_cache is not None:
+            self.drive.upload_cache.record(content_hash, self.folder_id, file_id, name)
+        if self.on_uploaded is not None:
+            self.on_uploaded(name, file_id)
+        return file_id
+
+    @property
+    def file_ids(self) -> Dict[str, str]:
+        """Drive file ID of every frame submitted so far, by name"""
+        with self._lock:
+            return {name: self._file_ids[content_hash] for name, content_hash in self._hash_of.items()
+                    if content_hash in self._file_ids}
+
+    @property
+    def content_hashes(self) -> Dict[str, str]:
+        """SHA-256 of every frame submitted so far, by name"""
+        with self._lock:
+            return dict(self._hash_of)
+
+    def close(self) -> Dict[str, str]:
+        """Wait for all uploads, share the files and return the URL of every frame by name"""
+        try:
+            for future in self._futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    raise GoogleAPIError(f"Upload failed: {e}")
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+        missing = self.drive._share(self._unshared)
+        if missing:
+            raise GoogleAPIError(f"{len(missing)} uploaded files disappeared from Drive before they were shared")
+        metrics.counter('drive_uploads_reused_total').inc(self.reused)
+        urls = {name: GoogleDriveService.file_url(file_id) for name, file_id in self.file_ids.items()}
+        logger.success(f"{Fore.GREEN}✅ Upload complete: {len(urls)} frames streamed to Google Drive "
+                       f"({self.uploaded} uploaded, {self.reused} reused)")
+        logger.info(f"{Fore.BLUE}⏱️  Drive API: {self.drive.limiter.stats.retries} retries, "
+                    f"{self.drive.limiter.stats.throttled_time:.1f}s throttled")
+        return urls
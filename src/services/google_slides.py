@@ -1,96 +1,315 @@
-from typing import List
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import re
 import time
+import uuid
+import httplib2
 from googleapiclient.discovery import build
 from loguru import logger
 from tqdm import tqdm
 from colorama import Fore, Style
+from config.settings import settings
 from .auth_manager import AuthManager
+from .rate_limiter import RateLimiter, get_rate_limiter
 from src.core.exceptions import GoogleAPIError
+from src.utils.metrics import metrics
+
+# Full-bleed image on a 16:9 slide
+SLIDE_WIDTH_EMU = 10 * 914400
+SLIDE_HEIGHT_EMU = 5.625 * 914400
+
+# The only parts of a presentation a sync reads
+SYNC_FIELDS = 'slides(objectId,pageElements(objectId,image(sourceUrl)))'
+
+# Slides created by this tool: random IDs from ``new_object_id`` or content keys from ``frame_object_ids``
+MANAGED_SLIDE_ID = re.compile(r'v2s_[0-9a-f]{32}(_\d+)?')
+
+
+@dataclass
+class SlideSyncResult:
+    """Outcome of ``sync_slides``.
+
+    ``slide_ids`` holds the slide of every frame in order (None where its
+    creation failed); ``complete`` is False if a batchUpdate failed and the
+    sync has to be run again.
+    """
+    slide_ids: List[Optional[str]] = field(default_factory=list)
+    created: int = 0
+    replaced: int = 0
+    moved: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    requests: int = 0
+    complete: bool = True
+
 
 class GoogleSlidesService:
-    def __init__(self):
-        self.creds = AuthManager.get_credentials()
-        self.service = build('slides', 'v1', credentials=self.creds)
-        
-    def add_slide_with_image(self, presentation_id: str, image_url: str):
-        """Add a slide with an image to the presentation"""
-        try:
-            # Create new slide
-            body = {'requests': [{'createSlide': {}}]}
-            response = self.service.presentations().batchUpdate(
-                presentationId=presentation_id,
-                body=body
-            ).execute()
-            
-            slide_id = response.get('replies')[0].get('createSlide').get('objectId')
-            
-            # Add image to slide
-            slide_width_emus = 10 * 914400
-            slide_height_emus = 5.625 * 914400
-            
-            body = {
-                'requests': [{
-                    'createImage': {
-                        'url': image_url,
-                        'elementProperties': {
-                            'pageObjectId': slide_id,
-                            'size': {
-                                'height': {'magnitude': slide_height_emus, 'unit': 'EMU'},
-                                'width': {'magnitude': slide_width_emus, 'unit': 'EMU'},
-                            },
-                            'transform': {
-                                'scaleX': 1,
-                                'scaleY': 1,
-                                'translateX': 0,
-                                'translateY': 0,
-                                'unit': 'EMU'
-                            }
-                        }
-                    }
-                }]
+    def __init__(self, http_factory: Optional[Callable[[], httplib2.Http]] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.limiter = rate_limiter or get_rate_limiter('slides')
+        if http_factory is None:
+            self.creds = AuthManager.get_credentials()
+            self.service = build('slides', 'v1', credentials=self.creds)
+        else:
+            self.creds = None
+            self.service = build('slides', 'v1', http=http_factory())
+
+    @staticmethod
+    def new_object_id() -> str:
+        """Client-assigned object ID, valid for slides and page elements"""
+        return f"v2s_{uuid.uuid4().hex}"
+
+    @staticmethod
+    def frame_object_ids(content_hash: str, occurrence: int = 0) -> Tuple[str, str]:
+        """Slide and image object IDs of a frame, derived from its content hash.
+
+        ``occurrence`` counts earlier frames with the same content, so a
+        slide shown twice gets two slides.
+        """
+        slide_id = f"v2s_{content_hash[:32]}" + (f"_{occurrence}" if occurrence else "")
+        return slide_id, f"{slide_id}_i"
+
+    @staticmethod
+    def image_slide_requests(slide_id: str, image_url: str, image_id: Optional[str] = None,
+                             insertion_index: Optional[int] = None) -> List[dict]:
+        """createSlide + createImage requests for one full-slide image"""
+        create_slide = {'objectId': slide_id}
+        if insertion_index is not None:
+            create_slide['insertionIndex'] = insertion_index
+
+        create_image = {
+            'url': image_url,
+            'elementProperties': {
+                'pageObjectId': slide_id,
+                'size': {
+                    'height': {'magnitude': SLIDE_HEIGHT_EMU, 'unit': 'EMU'},
+                    'width': {'magnitude': SLIDE_WIDTH_EMU, 'unit': 'EMU'},
+                },
+                'transform': {
+                    'scaleX': 1,
+                    'scaleY': 1,
+                    'translateX': 0,
+                    'translateY': 0,
+                    'unit': 'EMU'
+                }
             }
-            
-            self.service.presentations().batchUpdate(
+        }
+        if image_id is not None:
+            create_image['objectId'] = image_id
+
+        return [{'createSlide': create_slide}, {'createImage': create_image}]
+
+    def add_slide_with_image(self, presentation_id: str, image_url: str) -> str:
+        """Add a slide with an image to the presentation and return the slide ID"""
+        slide_id = self.new_object_id()
+        try:
+            self.limiter.execute(self.service.presentations().batchUpdate(
                 presentationId=presentation_id,
-                body=body
-            ).execute()
-            
+                body={'requests': self.image_slide_requests(slide_id, image_url)}
+            ))
+            metrics.counter('slides_created_total').inc()
+            return slide_id
+
         except Exception as e:
             logger.error(f"Failed to add slide: {e}")
             raise GoogleAPIError(f"Failed to add slide: {e}")
-        
-    def batch_add_slides(self, presentation_id: str, image_urls: List[str], 
-                        delay: float = 1.0):
-        """Add multiple slides with images"""
+
+    def batch_add_slides(self, presentation_id: str, image_urls: List[str],
+                        delay: float = 0.0, chunk_size: Optional[int] = None,
+                        on_created: Optional[Callable[[int, List[str]], None]] = None) -> List[str]:
+        """Add multiple slides with images and return the IDs of the created slides.
+
+        Object IDs are assigned on the client, so the createSlide and
+        createImage requests of ``chunk_size`` slides go out in one
+        batchUpdate call. Calls are paced by the shared 'slides' rate limiter
+        and retried on quota and server errors; a chunk that still fails adds
+        no slides (batchUpdate is atomic) and is logged and skipped.
+        ``delay`` adds an extra pause between chunks. ``on_created`` is called
+        with the position of the chunk in ``image_urls`` and its slide IDs
+        after every successful call.
+        """
+        chunk_size = max(1, chunk_size or settings.SLIDES_BATCH_SIZE)
+        created = []
+        failed = 0
+
         logger.info(f"{Fore.MAGENTA}📊 Starting to create presentation slides ({len(image_urls)} slides)")
-        
-        pbar = tqdm(image_urls, 
-                   desc=f"{Fore.MAGENTA}🎯 Creating slides", 
+
+        pbar = tqdm(total=len(image_urls),
+                   desc=f"{Fore.MAGENTA}🎯 Creating slides",
                    unit="slides",
                    bar_format='{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}] {postfix}')
-        
-        for i, url in enumerate(pbar, 1):
-            try:
-                self.add_slide_with_image(presentation_id, url)
-                time.sleep(delay)  # Rate limiting
-                
+
+        try:
+            for start in range(0, len(image_urls), chunk_size):
+                chunk = image_urls[start:start + chunk_size]
+                slide_ids = [self.new_object_id() for _ in chunk]
+                requests = []
+                for slide_id, url in zip(slide_ids, chunk):
+                    requests.extend(self.image_slide_requests(slide_id, url))
+
+                try:
+                    self.limiter.execute(self.service.presentations().batchUpdate(
+                        presentationId=presentation_id,
+                        body={'requests': requests}
+                    ))
+                    created.extend(slide_ids)
+                    if on_created is not None:
+                        on_created(start, slide_ids)
+                except Exception as e:
+                    failed += len(chunk)
+                    pbar.write(f"{Fore.RED}❌ Failed to add slides {start + 1}-{start + len(chunk)}: {e}")
+                    logger.error(f"Failed to add slides {start + 1}-{start + len(chunk)}: {e}")
+
                 # Update progress
+                pbar.update(len(chunk))
                 pbar.set_postfix({
-                    'slide': i,
+                    'slide': start + len(chunk),
                     'status': 'created'
                 })
-                
+
+                if delay and start + chunk_size < len(image_urls):
+                    metrics.counter('slides_delay_seconds_total').inc(delay)
+                    time.sleep(delay)
+        finally:
+            pbar.close()
+
+        metrics.counter('slides_created_total').inc(len(created))
+        metrics.counter('slides_failed_total').inc(failed)
+        if failed:
+            logger.warning(f"{Fore.YELLOW}⚠️  {failed} slides could not be added")
+        logger.success(f"{Fore.GREEN}✅ Presentation complete: {len(created)} slides added to Google Slides")
+        logger.info(f"{Fore.BLUE}⏱️  Slides API: {self.limiter.stats.retries} retries, "
+                    f"{self.limiter.stats.throttled_time:.1f}s throttled")
+        return created
+
+    def sync_slides(self, presentation_id: str, frames: Sequence[Tuple[str, str]],
+                    chunk_size: Optional[int] = None) -> SlideSyncResult:
+        """Make the presentation show ``frames``, (content hash, image URL) pairs, in order.
+
+        The presentation is read once with a field mask. Its slides are
+        matched to frames by object IDs derived from the content hashes
+        (``frame_object_ids``): matching slides are kept, moved into frame
+        order or get their image replaced when it has another URL, missing
+        ones are created and slides of earlier runs that match no frame are
+        deleted. Slides not created by this tool keep their place. The
+        requests go out in batchUpdate calls of ``chunk_size`` slide
+        changes; if one fails the sync stops there and running it again
+        finishes the job.
+        """
+        chunk_size = max(1, chunk_size or settings.SLIDES_BATCH_SIZE)
+        try:
+            presentation = self.limiter.execute(self.service.presentations().get(
+                presentationId=presentation_id, fields=SYNC_FIELDS))
+        except Exception as e:
+            logger.error(f"Failed to read presentation: {e}")
+            raise GoogleAPIError(f"Failed to read presentation: {e}")
+
+        operations, result = self._plan_sync(presentation.get('slides', []), frames)
+        logger.info(f"{Fore.MAGENTA}📊 Syncing {len(frames)} slides: {result.created} to create, "
+                    f"{result.replaced} to replace, {result.moved} to move, {result.deleted} to delete, "
+                    f"{result.unchanged} unchanged")
+
+        calls = 0
+        for start in range(0, len(operations), chunk_size):
+            chunk = operations[start:start + chunk_size]
+            requests = [request for _, operation in chunk for request in operation]
+            try:
+                self.limiter.execute(self.service.presentations().batchUpdate(
+                    presentationId=presentation_id,
+                    body={'requests': requests}
+                ))
+                result.requests += len(requests)
+                calls += 1
             except Exception as e:
-                pbar.write(f"{Fore.RED}❌ Failed to add slide {i}: {e}")
-                logger.error(f"Failed to add slide {i+1}: {e}")
-        
-        logger.success(f"{Fore.GREEN}✅ Presentation complete: {len(image_urls)} slides added to Google Slides")
+                # Later chunks were planned on top of this one
+                logger.error(f"Failed to sync slides, changes {start + 1}-{len(operations)} not applied: {e}")
+                failed = {slide_id for slide_id, operation in operations[start:]
+                          if 'createSlide' in operation[0]}
+                result.slide_ids = [None if slide_id in failed else slide_id for slide_id in result.slide_ids]
+                result.complete = False
+                break
+
+        created = result.created - sum(1 for slide_id in result.slide_ids if slide_id is None)
+        metrics.counter('slides_created_total').inc(created)
+        metrics.counter('slides_failed_total').inc(result.created - created)
+        if result.complete:
+            logger.success(f"{Fore.GREEN}✅ Presentation in sync: {len(frames)} slides "
+                           f"({result.requests} requests in {calls} batchUpdate calls)")
+        else:
+            logger.warning(f"{Fore.YELLOW}⚠️  Presentation only partly synced, run the sync again")
+        return result
+
+    def _plan_sync(self, slides: List[dict],
+                   frames: Sequence[Tuple[str, str]]) -> Tuple[List[Tuple[str, List[dict]]], SlideSyncResult]:
+        """(slide ID, requests) of every slide change, applied to a local copy of the slide order"""
+        deck = [slide['objectId'] for slide in slides]
+        images: Dict[str, Dict[str, Optional[str]]] = {
+            slide['objectId']: {element['objectId']: element.get('image', {}).get('sourceUrl')
+                                for element in slide.get('pageElements', [])}
+            for slide in slides
+        }
+        wanted = []
+        occurrences: Dict[str, int] = {}
+        for content_hash, url in frames:
+            occurrence = occurrences.get(content_hash, 0)
+            occurrences[content_hash] = occurrence + 1
+            wanted.append((*self.frame_object_ids(content_hash, occurrence), url))
+
+        result = SlideSyncResult(slide_ids=[slide_id for slide_id, _, _ in wanted])
+        operations: List[Tuple[str, List[dict]]] = []
+        keep = {slide_id for slide_id, _, _ in wanted}
+        for slide_id in list(deck):
+            if MANAGED_SLIDE_ID.fullmatch(slide_id) and slide_id not in keep:
+                operations.append((slide_id, [{'deleteObject': {'objectId': slide_id}}]))
+                deck.remove(slide_id)
+                result.deleted += 1
+
+        # Managed slides not placed yet all lie after ``previous``, so moves only go backwards
+        pending = keep & set(deck)
+        managed = [index for index, slide_id in enumerate(deck) if slide_id in pending]
+        previous = (managed[0] if managed else len(deck)) - 1
+        for slide_id, image_id, url in wanted:
+            target = previous + 1
+            if slide_id not in pending:
+                operations.append((slide_id, self.image_slide_requests(slide_id, url, image_id, target)))
+                deck.insert(target, slide_id)
+                result.created += 1
+                previous = target
+                continue
+
+            pending.discard(slide_id)
+            position = deck.index(slide_id)
+            changed = False
+            if any(other in pending for other in deck[target:position]):
+                operations.append((slide_id, [{'updateSlidesPosition': {'slideObjectIds': [slide_id],
+                                                                        'insertionIndex': target}}]))
+                deck.insert(target, deck.pop(position))
+                position = target
+                result.moved += 1
+                changed = True
+            previous = position
+
+            elements = images[slide_id]
+            if image_id not in elements:
+                # Whatever took the image's place (e.g. an image replaced by hand) would stay under the new one
+                stale = [{'deleteObject': {'objectId': element_id}} for element_id in elements]
+                operations.append((slide_id, stale + [self.image_slide_requests(slide_id, url, image_id)[1]]))
+                result.replaced += 1
+                changed = True
+            elif elements[image_id] != url:
+                operations.append((slide_id, [{'replaceImage': {'imageObjectId': image_id, 'url': url,
+                                                                'imageReplaceMethod': 'CENTER_INSIDE'}}]))
+                result.replaced += 1
+                changed = True
+            if not changed:
+                result.unchanged += 1
+        return operations, result
 
     def create_presentation(self, title: str) -> str:
         """Create a new presentation and return its ID"""
         try:
             body = {'title': title}
-            presentation = self.service.presentations().create(body=body).execute()
+            presentation = self.limiter.execute(self.service.presentations().create(body=body))
             return presentation.get('presentationId')
         except Exception as e:
             logger.error(f"Failed to create presentation: {e}")
@@ -0,0 +1,192 @@
+"""Client-side rate limiting and retries shared by the Google services.
+
+Every API call goes through a per-API ``RateLimiter``: a token bucket keeps
+the request rate at the configured quota, 429 and 5xx responses are retried
+with exponential backoff and jitter (or after the server's Retry-After; calls
+that create something only after a 429 or a transport error), and
+the bucket rate is halved on every 429 and recovers gradually on success, so
+throughput settles just under the real quota ceiling.
+"""
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+from loguru import logger
+from config.settings import settings
+from src.utils.metrics import metrics
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class RateLimiterStats:
+    requests: int = 0
+    retries: int = 0
+    throttled_time: float = 0.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` and return how long the caller must wait before using them"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by a Retry-After header (seconds or HTTP date), if any"""
+    resp = getattr(error, 'resp', None)
+    value = resp.get('retry-after') if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_retryable(error: Exception, idempotent: bool = True) -> bool:
+    """Whether a failed call is worth retrying (quota, server or transport errors).
+
+    A 5xx can arrive after the server already applied a call, so calls that
+    are not ``idempotent`` (e.g. creating a file) are only retried after a
+    429 or a transport error.
+    """
+    if isinstance(error, HttpError):
+        if not idempotent:
+            return error.resp.status == 429
+        return error.resp.status in RETRYABLE_STATUSES
+    return isinstance(error, (socket.timeout, ConnectionError, httplib2.HttpLib2Error))
+
+
+class RateLimiter:
+    """Token-bucket throttling with adaptive rate and retry/backoff"""
+
+    def __init__(self, name: str, requests_per_second: float, burst: Optional[float] = None,
+                 max_retries: Optional[int] = None, backoff_base: Optional[float] = None,
+                 backoff_max: Optional[float] = None, min_rate: Optional[float] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_rate = requests_per_second
+        self.min_rate = min_rate or requests_per_second / 16
+        self.max_retries = settings.API_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = settings.API_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = settings.API_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.bucket = TokenBucket(requests_per_second, burst or max(1.0, requests_per_second), clock)
+        self.stats = RateLimiterStats()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def acquire(self, cost: float = 1.0) -> None:
+        """Block until ``cost`` requests may be sent"""
+        self.wait(self.bucket.reserve(cost))
+
+    def wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.stats.throttled_time += seconds
+        metrics.counter('api_throttled_seconds_total', api=self.name).inc(seconds)
+        self._sleep(seconds)
+
+    def backoff_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Retry-After if the server sent one, else exponential backoff with full jitter"""
+        requested = retry_after_seconds(error) if error is not None else None
+        if requested is not None:
+            return min(requested, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def record_success(self) -> None:
+        """Additive increase: creep back towards the configured rate"""
+        with self._lock:
+            self.stats.requests += 1
+            if self.bucket.rate < self.max_rate:
+                self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate / 20)
+
+    def record_failure(self, error: Exception) -> None:
+        """Multiplicative decrease on quota errors"""
+        with self._lock:
+            self.stats.requests += 1
+            if isinstance(error, HttpError) and error.resp.status == 429:
+                self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.stats.retries += 1
+        metrics.counter('api_retries_total', api=self.name).inc()
+
+    def execute(self, request, cost: float = 1.0, idempotent: bool = True):
+        """Execute a googleapiclient request, throttled and retried (see ``is_retryable``)"""
+        latency = metrics.histogram('api_request_seconds', api=self.name)
+        attempt = 0
+        while True:
+            self.acquire(cost)
+            start = time.perf_counter()
+            try:
+                result = request.execute()
+            except Exception as e:
+                latency.observe(time.perf_counter() - start)
+                metrics.counter('api_requests_total', api=self.name, outcome='error').inc()
+                self.record_failure(e)
+                if not is_retryable(e, idempotent) or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                attempt += 1
+                self.record_retry()
+                logger.debug(f"{self.name} API: retry {attempt}/{self.max_retries} in {delay:.1f}s after {e}")
+                self.wait(delay)
+                continue
+            latency.observe(time.perf_counter() - start)
+            metrics.counter('api_requests_total', api=self.name, outcome='ok').inc()
+            self.record_success()
+            return result
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api: str) -> RateLimiter:
+    """Process-wide limiter for an API ('drive' or 'slides'), configured from settings"""
+    with _limiters_lock:
+        limiter = _limiters.get(api)
+        if limiter is None:
+            rates = {
+                'drive': settings.DRIVE_REQUESTS_PER_SECOND,
+                'slides': settings.SLIDES_REQUESTS_PER_SECOND,
+            }
+            limiter = RateLimiter(api, rates[api])
+            _limiters[api] = limiter
+        return limiter
@@ -0,0 +1,99 @@
+"""Persistent index of frames already uploaded to Google Drive.
+
+Frames are keyed by a SHA-256 of their content and the target folder, so a
+re-run only uploads new or changed frames, and identical frames (title
+cards, intro slides) are stored in Drive once, whatever video they came
+from. The index is a small SQLite database in ``DATA_DIR``.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from config.settings import settings
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    """SHA-256 of a file's content as a hex string"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedUpload:
+    file_id: str
+    shared: bool
+
+
+class UploadCache:
+    """Content hash -> Drive file ID (and whether it is shared), per folder"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path or settings.UPLOAD_CACHE_FILE)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " content_hash TEXT NOT NULL,"
+                " folder_id TEXT NOT NULL,"
+                " file_id TEXT NOT NULL,"
+                " shared INTEGER NOT NULL DEFAULT 0,"
+                " name TEXT,"
+                " uploaded_at REAL NOT NULL,"
+                " PRIMARY KEY (content_hash, folder_id))"
+            )
+
+    def lookup(self, content_hashes: Iterable[str], folder_id: str) -> Dict[str, CachedUpload]:
+        """Cached uploads among ``content_hashes`` in ``folder_id``"""
+        hashes = list(set(content_hashes))
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT content_hash, file_id, shared FROM uploads"
+                    f" WHERE folder_id = ? AND content_hash IN ({','.join('?' * len(chunk))})",
+                    [folder_id, *chunk]
+                )
+                for content_hash, file_id, shared in rows:
+                    found[content_hash] = CachedUpload(file_id, bool(shared))
+        return found
+
+    def record(self, content_hash: str, folder_id: str, file_id: str, name: Optional[str] = None) -> None:
+        """Remember a freshly uploaded (not yet shared) file"""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO uploads (content_hash, folder_id, file_id, shared, name, uploaded_at)"
+                " VALUES (?, ?, ?, 0, ?, ?)",
+                (content_hash, folder_id, file_id, name, time.time())
+            )
+
+    def mark_shared(self, file_ids: Iterable[str]) -> None:
+        with self._lock, self._db:
+            self._db.executemany("UPDATE uploads SET shared = 1 WHERE file_id = ?",
+                                 [(file_id,) for file_id in file_ids])
+
+    def forget(self, file_ids: Iterable[str]) -> None:
+        """Drop entries, e.g. for files deleted from Drive"""
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM uploads WHERE file_id = ?",
+                                 [(file_id,) for file_id in file_ids])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
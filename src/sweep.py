@@ -0,0 +1,91 @@
+"""Preview how many frames difference mode saves at a range of thresholds.
+
+The video is decoded once to record its signature timeline (or not at
+all when the timeline cache already has it); every threshold is then
+evaluated on the cached scores.
+
+    python -m src.sweep --file lecture.mp4 --thresholds 5,10,15,20,30 --interval 30
+"""
+import time
+from typing import List, Optional, Sequence
+
+import click
+from loguru import logger
+from colorama import Fore, init
+from config.settings import settings
+from src.main import parse_roi
+from src.utils.logger import setup_logger
+
+# Initialize colorama for cross-platform colored output
+init(autoreset=True)
+
+
+def parse_thresholds(ctx, param, value) -> List[float]:
+    """Parse comma-separated thresholds"""
+    try:
+        thresholds = sorted({float(part) for part in value.split(',') if part.strip()})
+    except ValueError:
+        raise click.BadParameter("expected comma-separated numbers")
+    if not thresholds:
+        raise click.BadParameter("expected at least one threshold")
+    return thresholds
+
+
+def format_timestamp(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02d}:{seconds:04.1f}" if hours else f"{minutes}:{seconds:04.1f}"
+
+
+def format_sweep(rows: Sequence[tuple], timestamps: bool = False) -> str:
+    """Render (threshold, frames, change timestamps) rows as a plain-text table"""
+    headers = ("Threshold", "Frames") + (("Changes at",) if timestamps else ())
+    cells = [(f"{threshold:g}", str(frames)) + ((" ".join(changes),) if timestamps else ())
+             for threshold, frames, changes in rows]
+    widths = [max(len(row[i]) for row in [headers, *cells]) for i in range(len(headers))]
+
+    def line(row):
+        return "  ".join(cell.rjust(width) if i < 2 else cell for i, (cell, width) in enumerate(zip(row, widths)))
+
+    return "\n".join([line(headers), line(["-" * width for width in widths]), *[line(row) for row in cells]])
+
+
+@click.command()
+@click.option('--file', 'video_path', type=click.Path(exists=True, dir_okay=False), required=True,
+              help='Local video file')
+@click.option('--thresholds', callback=parse_thresholds, default='5,10,15,20,30,40,50',
+              help='Comma-separated thresholds to evaluate')
+@click.option('--interval', type=click.IntRange(min=1), default=settings.DEFAULT_INTERVAL)
+@click.option('--decode-strategy', type=click.Choice(['auto', 'seek', 'grab']),
+              default=settings.DEFAULT_DECODE_STRATEGY)
+@click.option('--compare-width', type=int, default=settings.DEFAULT_COMPARE_WIDTH,
+              help='Width of the thumbnail used for difference scoring (0 = full resolution)')
+@click.option('--roi', callback=parse_roi, help='Region compared as x,y,width,height')
+@click.option('--timestamps', is_flag=True, help='List the time of every saved frame')
+def main(video_path, thresholds, interval, decode_strategy, compare_width, roi, timestamps):
+    """Count the frames difference mode would save at each threshold"""
+    setup_logger()
+    from src.core.frame_extractor import DifferenceFrameExtractor
+    from src.core.timeline import TimelineCache
+
+    extractor = DifferenceFrameExtractor(timeline_cache=TimelineCache(), writer_threads=0, workers=1)
+    timeline = extractor.timeline(video_path, interval, decode_strategy, compare_width or None, roi)
+
+    start = time.perf_counter()
+    rows = []
+    for threshold in thresholds:
+        positions = timeline.select(threshold)
+        changes = [format_timestamp(index / timeline.fps if timeline.fps > 0 else None)
+                   for index in timeline.frame_indices[positions]]
+        rows.append((threshold, len(positions), changes))
+    elapsed = time.perf_counter() - start
+
+    logger.info(f"{Fore.CYAN}📈 {len(timeline):,} samples every {interval} frames, "
+                f"{len(thresholds)} thresholds evaluated in {elapsed * 1000:.1f} ms")
+    click.echo(format_sweep(rows, timestamps))
+
+
+if __name__ == '__main__':
+    main()
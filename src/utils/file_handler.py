@@ -1,16 +1,35 @@
+import glob
 import os
 import re
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from loguru import logger
 
-def find_images_in_directory(directory: Path, pattern: str = "*.png") -> List[Path]:
-    """Find all images matching pattern in directory"""
+IMAGE_MIMETYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+}
+
+# Output formats and the file extension frames are saved with
+FRAME_FORMATS = {'png': '.png', 'jpeg': '.jpg', 'webp': '.webp'}
+
+def image_mimetype(filename: str) -> str:
+    """MIME type of an image file from its extension"""
+    suffix = Path(filename).suffix.lower()
+    if suffix not in IMAGE_MIMETYPES:
+        raise ValueError(f"Unsupported image type: {filename}")
+    return IMAGE_MIMETYPES[suffix]
+
+def find_images_in_directory(directory: Path, pattern: str = "*") -> List[Path]:
+    """Find all images (PNG, JPEG, WebP) matching pattern in directory"""
     if not directory.exists():
         logger.warning(f"Directory {directory} does not exist")
         return []
     
-    images = list(directory.glob(pattern))
+    images = [p for p in directory.glob(pattern)
+              if p.is_file() and p.suffix.lower() in IMAGE_MIMETYPES]
     
     # Sort by numeric suffix if present
     def get_number(filepath):
@@ -19,6 +38,29 @@ def find_images_in_directory(directory: Path, pattern: str = "*.png") -> List[Pa
     
     return sorted(images, key=get_number)
 
+def find_frames(directory: Path, prefix: str, extension: Optional[str] = None) -> List[Path]:
+    """Find the frames saved with ``prefix`` (``<prefix>_<n>.<ext>``) in frame order.
+
+    Frames of other prefixes that merely start with ``prefix``
+    (``lecture_2_1.png`` for ``lecture``) are not matched. With
+    ``extension`` (e.g. ``.jpg``) only frames saved in that format are
+    returned, so frames left over from a run in another format are skipped.
+    """
+    name = re.compile(rf'{re.escape(prefix)}_\d+')
+    return [p for p in find_images_in_directory(directory, f"{glob.escape(prefix)}_[0-9]*")
+            if name.fullmatch(p.stem) and (extension is None or p.suffix.lower() == extension)]
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v')
+
+def find_videos_in_directory(directory: Path) -> List[Path]:
+    """Find all video files in directory, sorted by name"""
+    if not directory.exists():
+        logger.warning(f"Directory {directory} does not exist")
+        return []
+    
+    return sorted(p for p in directory.iterdir()
+                  if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+
 def ensure_directory_exists(directory: Path) -> None:
     """Ensure directory exists, create if necessary"""
     directory.mkdir(parents=True, exist_ok=True)
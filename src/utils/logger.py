@@ -1,4 +1,5 @@
 import sys
+from typing import List
 from loguru import logger
 from colorama import init
 from config.settings import settings
@@ -6,31 +7,38 @@ from config.settings import settings
 # Initialize colorama
 init(autoreset=True)
 
+# Sinks added by setup_logger, so repeated calls do not add them again
+_handler_ids: List[int] = []
+
 def setup_logger():
-    """Configure logger for the application"""
+    """Configure logger for the application.
+
+    Called explicitly by the command line entry points; importing this module
+    leaves loguru's default handler alone. Only the first call adds the
+    console and file sinks, later calls return the configured logger.
+    """
+    if _handler_ids:
+        return logger
     logger.remove()  # Remove default handler
-    
+
     # Console logging with colorama support
-    logger.add(
+    _handler_ids.append(logger.add(
         sys.stderr,
         format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | {message}",
         level=settings.LOG_LEVEL if hasattr(settings, 'LOG_LEVEL') else "INFO",
         colorize=True,
         enqueue=True,  # Make it thread-safe
         catch=True     # Catch exceptions
-    )
-    
+    ))
+
     # File logging (without colors)
-    logger.add(
+    _handler_ids.append(logger.add(
         "logs/video-to-slides.log",
         rotation="10 MB",
         retention="7 days",
         level="DEBUG",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         enqueue=True
-    )
-    
-    return logger
+    ))
 
-# Set up logger when module is imported
-setup_logger()
+    return logger
@@ -0,0 +1,237 @@
+"""Process-wide counters and histograms describing where a run spends its time.
+
+Metrics are off by default. While disabled, ``counter`` and ``histogram``
+return a shared no-op object, so instrumented code pays one method call per
+event and nothing is stored. Once ``enable``d, every metric name and label
+set gets its own thread-safe series, and ``dump`` writes them all as JSON or
+in the Prometheus text exposition format.
+
+Hot loops look a metric up once and keep it::
+
+    decode_seconds = metrics.histogram('frame_decode_seconds')
+    for ...:
+        decode_seconds.observe(elapsed)
+"""
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+METRIC_FORMATS = ('json', 'prometheus')
+
+# Histogram buckets in seconds: per-frame stages take milliseconds, API calls up to many seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Every metric the application records and its help text
+METRICS = {
+    'frame_decode_seconds': ('histogram', "Time to decode one sampled frame"),
+    'frame_analyze_seconds': ('histogram', "Time to score one sample (difference or scene-change analysis)"),
+    'frame_encode_seconds': ('histogram', "Time to encode and save or hand over one selected frame"),
+    'frame_bytes_written_total': ('counter', "Bytes of encoded frames written or handed to a frame consumer"),
+    'frames_covered_total': ('counter', "Video frames decoded or skipped over"),
+    'frames_sampled_total': ('counter', "Sampled frames decoded and analyzed"),
+    'frames_saved_total': ('counter', "Frames selected and saved"),
+    'frames_deduplicated_total': ('counter', "Saved frames removed as near-duplicates"),
+    'extraction_stage_seconds_total': ('counter', "Wall time spent in each extraction pipeline stage"),
+    'api_request_seconds': ('histogram', "Latency of one Google API call (including failed attempts)"),
+    'api_requests_total': ('counter', "Google API calls sent, by outcome"),
+    'api_retries_total': ('counter', "Google API calls retried after a quota, server or transport error"),
+    'api_throttled_seconds_total': ('counter', "Time spent waiting for the rate limiter or a retry backoff"),
+    'drive_uploads_total': ('counter', "Frames uploaded to Drive"),
+    'drive_upload_bytes_total': ('counter', "Bytes uploaded to Drive"),
+    'drive_uploads_reused_total': ('counter', "Frames not uploaded because their content was already in Drive"),
+    'slides_created_total': ('counter', "Slides added to a presentation"),
+    'slides_failed_total': ('counter', "Slides that could not be added"),
+    'slides_delay_seconds_total': ('counter', "Extra pause between Slides batchUpdate calls"),
+    'run_step_seconds': ('histogram', "Wall time of each step of a run"),
+    'service_jobs_total': ('counter', "Service jobs queued, done and failed"),
+    'service_job_seconds': ('histogram', "Time a service job spends running"),
+    'service_queue_wait_seconds': ('histogram', "Time a service job waits in the queue for a worker"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonic total"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Count, sum, extremes and cumulative bucket counts of observed values"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the wall time of the ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def cumulative_counts(self) -> List[int]:
+        """Observations at or below every bucket bound, then the total"""
+        counts, total = [], 0
+        for count in self.bucket_counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class _NullMetric:
+    """Stands in for every metric while metrics are disabled"""
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        yield
+
+
+NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry:
+    """Metric series by name and labels"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._series: Dict[Tuple[str, Labels], object] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop every recorded series"""
+        with self._lock:
+            self._series.clear()
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        if not self.enabled:
+            return NULL_METRIC
+        return self._get(name, 'counter', labels, Counter)
+
+    def histogram(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: str) -> Histogram:
+        if not self.enabled:
+            return NULL_METRIC
+        return self._get(name, 'histogram', labels, lambda: Histogram(buckets))
+
+    def _get(self, name: str, kind: str, labels: Dict[str, str], factory):
+        if METRICS.get(name, (kind,))[0] != kind:
+            raise ValueError(f"Metric {name} is a {METRICS[name][0]}, not a {kind}")
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, factory())
+        return series
+
+    def _sorted_series(self) -> List[Tuple[str, Labels, object]]:
+        with self._lock:
+            items = list(self._series.items())
+        return [(name, labels, series) for (name, labels), series in sorted(items, key=lambda item: item[0])]
+
+    def snapshot(self) -> dict:
+        """All series as plain data, grouped by metric"""
+        data: Dict[str, dict] = {}
+        for name, labels, series in self._sorted_series():
+            kind, help_text = METRICS.get(name, ('counter' if isinstance(series, Counter) else 'histogram', ''))
+            metric = data.setdefault(name, {'type': kind, 'help': help_text, 'series': []})
+            entry = {'labels': dict(labels)}
+            if isinstance(series, Counter):
+                entry['value'] = series.value
+            else:
+                entry.update(count=series.count, sum=series.sum, min=series.min, max=series.max,
+                             mean=series.sum / series.count if series.count else None,
+                             buckets={_format_bound(bound): count for bound, count in
+                                      zip(series.buckets + (float('inf'),), series.cumulative_counts())})
+            metric['series'].append(entry)
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps({'metrics': self.snapshot()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, metric in self.snapshot().items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for entry in metric['series']:
+                labels = entry['labels']
+                if metric['type'] == 'counter':
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(entry['value'])}")
+                    continue
+                for bound, count in entry['buckets'].items():
+                    lines.append(f"{name}_bucket{_format_labels(dict(labels, le=bound))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(entry['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def dump(self, path, format: str = 'json') -> Path:
+        """Write every series to ``path`` as 'json' or 'prometheus' text"""
+        if format not in METRIC_FORMATS:
+            raise ValueError(f"Unknown metrics format: {format}")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_json() if format == 'json' else self.to_prometheus(), encoding="utf-8")
+        return path
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else f"{bound:g}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+metrics = MetricsRegistry()
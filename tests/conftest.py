@@ -44,6 +44,79 @@ def sample_video(temp_dir):
     out.release()
     return video_path
 
+@pytest.fixture
+def slides_video(temp_dir):
+    """Create a 120-frame video of eight numbered slides with changes at known frames"""
+    video_path = temp_dir / "slides_video.mp4"
+    change_points = [0, 13, 24, 37, 50, 71, 88, 103]
+    
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(str(video_path), fourcc, 10.0, (320, 240))
+    
+    slide = 0
+    for i in range(120):
+        if slide + 1 < len(change_points) and i >= change_points[slide + 1]:
+            slide += 1
+        frame = np.full((240, 320, 3), 40 + 25 * slide, dtype=np.uint8)
+        cv2.putText(frame, f"Slide {slide}", (40, 130), cv2.FONT_HERSHEY_SIMPLEX, 1.5,
+                    (255, 255, 255), 3)
+        out.write(frame)
+    
+    out.release()
+    return video_path
+
+@pytest.fixture
+def inset_video(temp_dir):
+    """Create a video whose slide area is static while a corner inset flickers"""
+    video_path = temp_dir / "inset_video.mp4"
+    
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(str(video_path), fourcc, 1.0, (640, 480))
+    
+    for i in range(20):
+        frame = np.full((480, 640, 3), 200, dtype=np.uint8)
+        # 160x120 "webcam" inset in the bottom-right corner
+        frame[360:, 480:] = 0 if i % 2 else 255
+        out.write(frame)
+    
+    out.release()
+    return video_path
+
+@pytest.fixture
+def frame_files(temp_dir):
+    """Twelve small PNG frames named like extractor output"""
+    paths = []
+    for i in range(1, 13):
+        path = temp_dir / f"frame_{i}.png"
+        frame = np.full((48, 64, 3), i * 20, dtype=np.uint8)
+        cv2.imwrite(str(path), frame)
+        paths.append(str(path))
+    return paths
+
+@pytest.fixture(autouse=True)
+def fast_rate_limiters(monkeypatch):
+    """Fresh, effectively unthrottled shared API limiters for every test"""
+    from config.settings import settings
+    from src.services import rate_limiter
+    monkeypatch.setattr(settings, 'DRIVE_REQUESTS_PER_SECOND', 10000.0)
+    monkeypatch.setattr(settings, 'SLIDES_REQUESTS_PER_SECOND', 10000.0)
+    monkeypatch.setattr(settings, 'API_BACKOFF_MAX', 0.01)
+    monkeypatch.setattr(rate_limiter, '_limiters', {})
+
+@pytest.fixture
+def drive_backend():
+    """Local fake of the Drive API"""
+    from tests.google_fakes import FakeDriveBackend
+    return FakeDriveBackend()
+
+@pytest.fixture
+def slides_backend():
+    """Local fake of the Slides API with an empty presentation 'deck'"""
+    from tests.google_fakes import FakeSlidesBackend
+    backend = FakeSlidesBackend()
+    backend.add_presentation("deck")
+    return backend
+
 @pytest.fixture
 def mock_credentials(monkeypatch):
     """Mock Google credentials"""
@@ -0,0 +1,272 @@
+"""Local fakes of the Google HTTP APIs.
+
+The real discovery-based clients are built against these objects instead of
+the network (``build(..., http=backend.http())``), so requests go through the
+same serialization, multipart upload and batch code as in production.
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from email.parser import Parser
+from typing import Dict, List, Tuple
+
+import httplib2
+
+
+def _response(status: int = 200, body=None, headers: Dict[str, str] = None) -> Tuple[httplib2.Response, bytes]:
+    info = {'status': str(status), 'content-type': 'application/json'}
+    info.update(headers or {})
+    content = body if isinstance(body, bytes) else json.dumps(body or {}).encode('utf-8')
+    return httplib2.Response(info), content
+
+
+class FakeHttp:
+    """An ``httplib2.Http`` look-alike routing requests to a fake backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=None,
+                connection_type=None):
+        return self.backend.handle(uri, method, body, headers or {})
+
+
+class FakeGoogleBackend:
+    """Shared state and bookkeeping for the fakes.
+
+    ``latency`` simulates the network round trip of every request and
+    ``in_flight``/``max_in_flight`` track how many requests overlap.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests: List[Tuple[str, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures: List[list] = []
+        self._lock = threading.Lock()
+
+    def http(self) -> FakeHttp:
+        return FakeHttp(self)
+
+    def fail_next(self, count: int, status: int = 429, pattern: str = '', retry_after: str = None):
+        """Answer the next ``count`` requests (or batch parts) matching ``pattern`` with ``status``"""
+        self._failures.append([re.compile(pattern), count, status, retry_after])
+
+    def _injected_failure(self, method, uri):
+        with self._lock:
+            for failure in self._failures:
+                pattern, count, status, retry_after = failure
+                if count > 0 and pattern.search(f"{method} {uri}"):
+                    failure[1] -= 1
+                    headers = {'retry-after': retry_after} if retry_after is not None else {}
+                    return status, {'error': {'code': status, 'message': 'Injected failure'}}, headers
+        return None
+
+    def handle(self, uri, method, body, headers):
+        with self._lock:
+            self.requests.append((method, uri))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            failure = self._injected_failure(method, uri)
+            if failure is not None:
+                return _response(*failure)
+            return self.route(uri, method, body, headers)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def route(self, uri, method, body, headers):
+        raise NotImplementedError
+
+    def count(self, pattern: str) -> int:
+        """Number of requests whose 'METHOD uri' matches ``pattern``"""
+        return sum(1 for method, uri in self.requests if re.search(pattern, f"{method} {uri}"))
+
+    def _batch(self, body, headers, handle_part):
+        """Answer a multipart/mixed batch request part by part"""
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        message = Parser().parsestr(f"content-type: {headers['content-type']}\r\n\r\n{body}")
+        boundary = "batch_response_boundary"
+        parts = []
+        for part in message.get_payload():
+            request_line = part.get_payload().split('\n', 1)[0]
+            method, path, _ = request_line.split(' ', 2)
+            failure = self._injected_failure(method, path)
+            status, reply = failure[:2] if failure is not None else handle_part(method, path)
+            parts.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\n"
+                f"Content-Type: application/json\r\n\r\n"
+                f"{json.dumps(reply)}\r\n"
+            )
+        content = "".join(parts) + f"--{boundary}--\r\n"
+        return _response(200, content.encode('utf-8'),
+                         {'content-type': f'multipart/mixed; boundary={boundary}'})
+
+
+class FakeDriveBackend(FakeGoogleBackend):
+    """Drive v3: multipart file uploads, file lookups, permissions and batch requests.
+
+    Delete a file from ``files`` (or set its ``trashed``) to simulate a user
+    removing it in Drive.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_names=()):
+        super().__init__(latency)
+        self.files: Dict[str, dict] = {}
+        self.permissions: Dict[str, List[dict]] = {}
+        self.fail_names = set(fail_names)
+        self._ids = itertools.count(1)
+
+    def route(self, uri, method, body, headers):
+        if '/batch/drive/v3' in uri:
+            return self._batch(body, headers, self._file_part)
+        if method == 'POST' and '/upload/drive/v3/files' in uri:
+            return self._upload(body)
+        if '/drive/v3/files/' in uri:
+            return _response(*self._file_part(method, uri))
+        return _response(404, {'error': {'code': 404, 'message': f'Unknown route {method} {uri}'}})
+
+    def _upload(self, body):
+        if isinstance(body, bytes):
+            body = body.decode('latin-1')
+        metadata = json.loads(re.search(r'\{.*?\}(?=\s*\r?\n--)', body, re.S).group(0))
+        if metadata.get('name') in self.fail_names:
+            return _response(400, {'error': {'code': 400, 'message': 'Rejected upload'}})
+        with self._lock:
+            file_id = f"file{next(self._ids)}"
+            self.files[file_id] = {'id': file_id, **metadata, 'size': len(body)}
+        return _response(200, {'id': file_id})
+
+    def _file_part(self, method, path):
+        """Answer a permissions.create or files.get call, 404 for files that do not exist"""
+        match = re.search(r'/files/([^/?]+)(/permissions)?', path)
+        if match is None or match.group(1) not in self.files:
+            return 404, {'error': {'code': 404, 'message': 'File not found'}}
+        file_id = match.group(1)
+        if method == 'POST' and match.group(2):
+            with self._lock:
+                self.permissions.setdefault(file_id, []).append({'type': 'anyone', 'role': 'reader'})
+            return 200, {'id': 'anyoneWithLink'}
+        if method == 'GET' and not match.group(2):
+            return 200, {'id': file_id, 'trashed': self.files[file_id].get('trashed', False)}
+        return 404, {'error': {'code': 404}}
+
+
+class FakeSlidesBackend(FakeGoogleBackend):
+    """Slides v1: presentations.create/get and batchUpdate on in-memory decks.
+
+    Requests in one batchUpdate are applied atomically, like the real API:
+    if any of them is invalid the whole call fails with 400 and nothing changes.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.presentations: Dict[str, dict] = {}
+        self._ids = itertools.count(1)
+
+    def add_presentation(self, presentation_id: str = "deck") -> dict:
+        presentation = {'presentationId': presentation_id, 'slides': []}
+        self.presentations[presentation_id] = presentation
+        return presentation
+
+    def route(self, uri, method, body, headers):
+        match = re.search(r'/v1/presentations/([^/:?]+):batchUpdate', uri)
+        if method == 'POST' and match:
+            return self._batch_update(match.group(1), json.loads(body))
+        match = re.search(r'/v1/presentations/([^/:?]+)', uri)
+        if method == 'GET' and match:
+            presentation = self.presentations.get(match.group(1))
+            if presentation is None:
+                return _response(404, {'error': {'code': 404, 'message': 'Not found'}})
+            return _response(200, json.loads(json.dumps(presentation)))
+        if method == 'POST' and re.search(r'/v1/presentations(\?|$)', uri):
+            presentation = self.add_presentation(f"deck{next(self._ids)}")
+            presentation['title'] = json.loads(body).get('title')
+            return _response(200, presentation)
+        return _response(404, {'error': {'code': 404, 'message': f'Unknown route {method} {uri}'}})
+
+    def _batch_update(self, presentation_id, body):
+        with self._lock:
+            presentation = self.presentations.get(presentation_id)
+            if presentation is None:
+                return _response(404, {'error': {'code': 404, 'message': 'Not found'}})
+            slides = json.loads(json.dumps(presentation['slides']))
+            try:
+                replies = [self._apply(slides, request) for request in body['requests']]
+            except ValueError as e:
+                return _response(400, {'error': {'code': 400, 'message': str(e)}})
+            presentation['slides'] = slides
+        return _response(200, {'presentationId': presentation_id, 'replies': replies})
+
+    def _object_ids(self, slides):
+        ids = set()
+        for slide in slides:
+            ids.add(slide['objectId'])
+            ids.update(element['objectId'] for element in slide.get('pageElements', []))
+        return ids
+
+    def _new_object_id(self, slides, object_id):
+        if object_id is None:
+            return f"gen{next(self._ids)}"
+        if not re.fullmatch(r'[a-zA-Z0-9_][a-zA-Z0-9_\-:]{4,49}', object_id):
+            raise ValueError(f"Invalid objectId {object_id}")
+        if object_id in self._object_ids(slides):
+            raise ValueError(f"Duplicate objectId {object_id}")
+        return object_id
+
+    def _find_slide(self, slides, object_id):
+        for slide in slides:
+            if slide['objectId'] == object_id:
+                return slide
+        raise ValueError(f"Unknown page {object_id}")
+
+    def _find_element(self, slides, object_id):
+        for slide in slides:
+            for element in slide.get('pageElements', []):
+                if element['objectId'] == object_id:
+                    return slide, element
+        raise ValueError(f"Unknown element {object_id}")
+
+    def _apply(self, slides, request):
+        (kind, params), = request.items()
+        if kind == 'createSlide':
+            object_id = self._new_object_id(slides, params.get('objectId'))
+            slide = {'objectId': object_id, 'pageElements': []}
+            slides.insert(params.get('insertionIndex', len(slides)), slide)
+            return {'createSlide': {'objectId': object_id}}
+        if kind == 'createImage':
+            object_id = self._new_object_id(slides, params.get('objectId'))
+            page = self._find_slide(slides, params['elementProperties']['pageObjectId'])
+            page['pageElements'].append({'objectId': object_id,
+                                         'image': {'sourceUrl': params['url'], 'contentUrl': params['url']}})
+            return {'createImage': {'objectId': object_id}}
+        if kind == 'replaceImage':
+            _, element = self._find_element(slides, params['imageObjectId'])
+            element['image'] = {'sourceUrl': params['url'], 'contentUrl': params['url']}
+            return {}
+        if kind == 'deleteObject':
+            for slide in list(slides):
+                if slide['objectId'] == params['objectId']:
+                    slides.remove(slide)
+                    return {}
+            slide, element = self._find_element(slides, params['objectId'])
+            slide['pageElements'].remove(element)
+            return {}
+        if kind == 'updateSlidesPosition':
+            moving = [self._find_slide(slides, object_id) for object_id in params['slideObjectIds']]
+            for slide in moving:
+                slides.remove(slide)
+            index = params['insertionIndex']
+            slides[index:index] = moving
+            return {}
+        raise ValueError(f"Unsupported request {kind}")
@@ -0,0 +1,89 @@
+"""Local HTTP origin standing in for a video CDN.
+
+Serves one file with byte-range support from a thread on localhost, slowed
+down to ``bytes_per_second`` per connection, and records the ranges it was
+asked for. ``fail_after`` makes every request after that many bytes were
+sent fail, simulating a dropped download.
+"""
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+_RANGE = re.compile(r'bytes=(\d+)-(\d*)$')
+
+
+class VideoOrigin:
+    def __init__(self, path: Path, bytes_per_second: Optional[float] = None, fail_after: Optional[int] = None):
+        self.data = Path(path).read_bytes()
+        self.bytes_per_second = bytes_per_second
+        self.fail_after = fail_after
+        self.ranges: List[Tuple[int, int]] = []
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                origin._serve(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/videoplayback"
+
+    def __enter__(self) -> 'VideoOrigin':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _serve(self, handler: BaseHTTPRequestHandler) -> None:
+        size = len(self.data)
+        match = _RANGE.match(handler.headers.get('Range', ''))
+        if match is None:
+            handler.send_response(200)
+            start, end = 0, size
+        else:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) + 1, size) if match.group(2) else size
+            handler.send_response(206)
+            handler.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        handler.send_header('Content-Length', str(end - start))
+        handler.end_headers()
+        with self._lock:
+            self.ranges.append((start, end))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            position = start
+            while position < end:
+                piece = self.data[position:min(position + 16384, end)]
+                with self._lock:
+                    if self.fail_after is not None and self.bytes_sent >= self.fail_after:
+                        handler.close_connection = True
+                        return
+                    self.bytes_sent += len(piece)
+                handler.wfile.write(piece)
+                position += len(piece)
+                if self.bytes_per_second:
+                    time.sleep(len(piece) / self.bytes_per_second)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._lock:
+                self.in_flight -= 1
@@ -0,0 +1,97 @@
+import pytest
+import shutil
+from pathlib import Path
+from click.testing import CliRunner
+from src import batch
+from src.batch import (
+    BatchResult,
+    collect_videos,
+    format_summary,
+    plan_jobs,
+    run_batch,
+    split_budget
+)
+
+@pytest.fixture
+def video_dir(temp_dir, sample_video, slides_video):
+    """Directory holding two videos and a non-video file"""
+    videos = temp_dir / "videos"
+    videos.mkdir()
+    shutil.copy(sample_video, videos / "lecture_a.mp4")
+    shutil.copy(slides_video, videos / "lecture_b.mp4")
+    (videos / "notes.txt").write_text("not a video")
+    return videos
+
+class TestCollectVideos:
+    def test_directory(self, video_dir):
+        videos = collect_videos([str(video_dir)])
+        assert [v.name for v in videos] == ["lecture_a.mp4", "lecture_b.mp4"]
+    
+    def test_glob(self, video_dir):
+        videos = collect_videos([str(video_dir / "*_b.mp4")])
+        assert [v.name for v in videos] == ["lecture_b.mp4"]
+    
+    def test_manifest_resolves_relative_paths(self, video_dir, temp_dir):
+        manifest = temp_dir / "nightly.txt"
+        manifest.write_text("# tonight\nvideos/lecture_b.mp4\n\nvideos/lecture_a.mp4\n")
+        
+        videos = collect_videos([str(manifest)])
+        assert [v.name for v in videos] == ["lecture_b.mp4", "lecture_a.mp4"]
+    
+    def test_duplicates_are_dropped(self, video_dir):
+        videos = collect_videos([str(video_dir), str(video_dir / "lecture_a.mp4")])
+        assert len(videos) == 2
+
+class TestPlanJobs:
+    def test_each_video_gets_own_namespace(self, temp_dir):
+        jobs = plan_jobs([Path("a/talk.mp4"), Path("b/talk.mp4"), Path("c/intro.mp4")], temp_dir)
+        
+        assert [job.prefix for job in jobs] == ["talk", "talk_2", "intro"]
+        assert len({job.output_dir for job in jobs}) == 3
+    
+    def test_split_budget(self):
+        assert split_budget(cpu_budget=8, jobs=2) == 4
+        assert split_budget(cpu_budget=2, jobs=4) == 1
+
+class TestRunBatch:
+    def test_runs_videos_concurrently(self, video_dir, temp_dir):
+        jobs = plan_jobs(collect_videos([str(video_dir)]), temp_dir / "frames")
+        results = run_batch(jobs, 'diff', {'threshold': 5.0, 'interval': 1}, max_jobs=2, cpu_budget=2)
+        
+        assert [r.video_path.name for r in results] == ["lecture_a.mp4", "lecture_b.mp4"]
+        assert all(r.error is None for r in results)
+        assert [r.frames_saved for r in results] == [3, 8]
+        assert sorted(p.name for p in (temp_dir / "frames" / "lecture_b").iterdir())[0] == "lecture_b_1.png"
+    
+    def test_failures_are_reported_per_video(self, temp_dir):
+        missing = temp_dir / "missing.mp4"
+        jobs = plan_jobs([missing], temp_dir / "frames")
+        results = run_batch(jobs, 'interval', {'interval': 10}, max_jobs=1, cpu_budget=1)
+        
+        assert results[0].frames_saved == 0
+        assert "Cannot open video" in results[0].error
+
+class TestBatchCommand:
+    def test_failed_video_sets_exit_status(self, video_dir, temp_dir, monkeypatch):
+        monkeypatch.setattr('src.batch.setup_logger', lambda: None)
+        (video_dir / "broken.mp4").write_text("not a video either")
+        result = CliRunner().invoke(batch.main, [str(video_dir), '--mode', 'interval', '--interval', '30',
+                                                 '--jobs', '1', '--cpu-budget', '1',
+                                                 '--output-dir', str(temp_dir / "frames")])
+        
+        assert result.exit_code == 1
+        assert "failed" in result.output
+        assert (temp_dir / "frames" / "lecture_b").is_dir()
+
+class TestSummary:
+    def test_table_lists_every_video(self, temp_dir):
+        results = [
+            BatchResult(video_path=Path("a.mp4"), output_dir=temp_dir, frames_saved=12,
+                        frames_analyzed=600, wall_time=2.0),
+            BatchResult(video_path=Path("b.mp4"), output_dir=temp_dir, error="boom"),
+        ]
+        table = format_summary(results).splitlines()
+        
+        assert table[0].split() == ["Video", "Wall", "time", "Analyzed/s", "Saved", "Status"]
+        assert table[2].split() == ["a.mp4", "2.0s", "300.0", "12", "ok"]
+        assert table[3].split()[-1] == "failed"
@@ -0,0 +1,87 @@
+import json
+import pytest
+import cv2
+from benchmarks.run import run_suite, score_detections
+from benchmarks.startup import ENTRY_POINTS, EXTRACTION_MODULES, RUN_PROBES, measure_import, measure_run, slowest_imports
+from benchmarks.synthetic import cached_slides_video, make_slides_video, parse_size
+
+class TestScoreDetections:
+    def test_perfect_detections(self):
+        accuracy = score_detections([0, 30, 60], [0, 32, 60], tolerance=5)
+
+        assert (accuracy.matched, accuracy.precision, accuracy.recall) == (3, 1.0, 1.0)
+        assert accuracy.latency == pytest.approx(2 / 3, abs=0.01)
+
+    def test_late_and_extra_detections(self):
+        accuracy = score_detections([0, 30, 60], [0, 10, 45, 61], tolerance=5)
+
+        assert accuracy.matched == 2
+        assert accuracy.precision == 0.5
+        assert accuracy.recall == pytest.approx(0.6667)
+
+    def test_detection_matches_one_change(self):
+        assert score_detections([0, 2], [3], tolerance=5).matched == 1
+
+    def test_nothing_detected(self):
+        accuracy = score_detections([0, 30], [], tolerance=5)
+        assert (accuracy.precision, accuracy.recall, accuracy.f1, accuracy.latency) == (0.0, 0.0, 0.0, None)
+
+class TestSyntheticVideo:
+    def test_change_points_and_length(self, temp_dir):
+        video = make_slides_video(temp_dir / "slides.mp4", 160, 90, seconds=4, fps=10,
+                                  min_slide_seconds=1, max_slide_seconds=2)
+        cap = cv2.VideoCapture(str(video.path))
+        try:
+            assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == video.frames == 40
+            assert int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == 160
+        finally:
+            cap.release()
+
+        assert video.change_points[0] == 0
+        assert all(10 <= b - a <= 20 for a, b in zip(video.change_points, video.change_points[1:]))
+
+    def test_videos_are_cached(self, temp_dir):
+        first = cached_slides_video(temp_dir, 160, 90, seconds=2, fps=10)
+        modified = first.path.stat().st_mtime_ns
+        second = cached_slides_video(temp_dir, 160, 90, seconds=2, fps=10)
+
+        assert second == first
+        assert second.path.stat().st_mtime_ns == modified
+
+    def test_parse_size(self):
+        assert parse_size("1280x720") == (1280, 720)
+
+class TestRunSuite:
+    def test_report_covers_cases_and_stages(self, temp_dir):
+        video = make_slides_video(temp_dir / "slides.mp4", 320, 180, seconds=12, fps=10)
+        report = run_suite([video], modes=('diff', 'interval'), strategies=('seek', 'grab'), interval=5,
+                           upload_frames=4, api_latency=0.0, isolate=False)
+
+        assert [(case['mode'], case['strategy']) for case in report['extraction']] == [
+            ('diff', 'seek'), ('diff', 'grab'), ('interval', 'seek'), ('interval', 'grab')]
+        diff = report['extraction'][0]
+        assert diff['accuracy']['recall'] == 1.0
+        assert diff['accuracy']['precision'] == 1.0
+        assert diff['video_fps'] > 0 and diff['stages']['decode'] > 0
+        assert [stage['stage'] for stage in report['api']] == ['drive_upload', 'drive_stream', 'slides_batch']
+        assert report['api'][0]['items'] == 4
+        json.dumps(report)
+
+class TestStartup:
+    @pytest.mark.parametrize("module", ENTRY_POINTS)
+    def test_entry_points_import_no_heavy_modules(self, module):
+        result = measure_import(module, repeat=1)
+
+        assert result['heavy_modules_loaded'] == []
+        assert result['import']['median_ms'] > 0
+
+    @pytest.mark.parametrize("name", RUN_PROBES['src.main'])
+    def test_runs_without_extraction_do_not_load_opencv(self, name):
+        result = measure_run('src.main', name, RUN_PROBES['src.main'][name])
+
+        assert 'googleapiclient' in result['heavy_modules_loaded']
+        assert not set(EXTRACTION_MODULES) & set(result['heavy_modules_loaded'])
+
+    def test_slowest_imports_include_the_entry_point(self):
+        packages = [entry['package'] for entry in slowest_imports('src.main')]
+        assert 'src' in packages
@@ -0,0 +1,163 @@
+import shutil
+import subprocess
+import pytest
+import cv2
+from src.core.decoder import (
+    DecoderSettings,
+    FFmpegDecoder,
+    OpenCVDecoder,
+    ffmpeg_command,
+    ffmpeg_version,
+    scaled_size
+)
+from src.core.exceptions import FrameExtractionError
+from src.core.frame_extractor import (
+    DifferenceFrameExtractor,
+    ExtractionStats,
+    IntervalFrameExtractor,
+    ResumePoint,
+    probe_keyframes
+)
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg is not installed")
+
+class TestDecoderSettings:
+    @pytest.mark.parametrize("options", [
+        {'backend': 'gstreamer'}, {'backend': 'ffmpeg', 'threads': -1}, {'backend': 'ffmpeg', 'width': 0},
+        {'keyframes_only': True}, {'threads': 4}, {'width': 640}
+    ])
+    def test_invalid_settings_raise_error(self, options):
+        with pytest.raises(ValueError):
+            DecoderSettings(**options)
+
+    def test_create_treats_zero_width_as_video_resolution(self):
+        assert DecoderSettings.create('ffmpeg', width=0).width is None
+        decoder = DecoderSettings.create('ffmpeg', True, 4, 640)
+        assert (decoder.keyframes_only, decoder.threads, decoder.width) == (True, 4, 640)
+
+class TestFFmpegCommand:
+    def test_selects_samples_on_the_frame_number(self):
+        command = ffmpeg_command("in.mp4", (640, 480), interval=5, start=10, stop=100)
+
+        assert command[command.index('-vf') + 1] == "select='gte(n,10)*lt(n,100)*not(mod(n-10,5))'"
+        assert command[-7:] == ['-fps_mode', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+
+    @pytest.mark.parametrize("version, option", [
+        ((4, 4), '-vsync'), ((5, 0), '-vsync'), ((5, 1), '-fps_mode'), ((7, 0), '-fps_mode'), (None, '-fps_mode')
+    ])
+    def test_frame_rate_mode_follows_the_ffmpeg_version(self, version, option):
+        command = ffmpeg_command("in.mp4", (640, 480), version=version)
+
+        assert command[-7:-5] == [option, 'passthrough']
+
+    @pytest.mark.parametrize("banner, version", [
+        ("ffmpeg version 4.4.2-0ubuntu0.22.04.1 Copyright (c) 2000-2021", (4, 4)),
+        ("ffmpeg version n5.1.3 Copyright (c) 2000-2022", (5, 1)),
+        ("ffmpeg version N-113432-g1234abcd Copyright (c) 2000-2024", None),
+    ])
+    def test_version_is_read_from_the_banner(self, monkeypatch, banner, version):
+        monkeypatch.setattr('src.core.decoder.subprocess.run',
+                            lambda command, **kwargs: subprocess.CompletedProcess(command, 0, banner, ''))
+        ffmpeg_version.cache_clear()
+        try:
+            assert ffmpeg_version('ffmpeg') == version
+        finally:
+            ffmpeg_version.cache_clear()
+
+    def test_every_frame_needs_no_filter(self):
+        assert '-vf' not in ffmpeg_command("in.mp4", (640, 480))
+
+    def test_keyframes_threads_and_scaling(self):
+        command = ffmpeg_command("in.mp4", (320, 240), interval=5, keyframes_only=True, threads=4, scale=True)
+
+        assert command.index('-skip_frame') < command.index('-i')
+        assert command[command.index('-skip_frame') + 1] == 'nokey'
+        assert command[command.index('-threads') + 1] == '4'
+        assert command[command.index('-vf') + 1] == 'scale=320:240:flags=area'
+
+    def test_scaled_size_keeps_aspect_ratio(self):
+        assert scaled_size(1920, 1080, 640) == (640, 360)
+        assert scaled_size(320, 240, 640) == (320, 240)
+        assert scaled_size(320, 240, None) == (320, 240)
+
+class TestOpenCVDecoder:
+    @pytest.mark.parametrize("strategy", ['seek', 'grab'])
+    def test_samples_every_interval(self, sample_video, strategy):
+        cap = cv2.VideoCapture(str(sample_video))
+        stats = ExtractionStats()
+        try:
+            indices = [index for index, frame in OpenCVDecoder(cap, strategy, 30, stats).samples(7)]
+        finally:
+            cap.release()
+
+        assert indices == [0, 7, 14, 21, 28]
+        assert stats.frames_sampled == 5
+
+class TestFFmpegDecoder:
+    def test_missing_binary_raises_error(self, sample_video):
+        decoder = DecoderSettings('ffmpeg', ffmpeg_binary='no-such-ffmpeg-binary')
+        with pytest.raises(FrameExtractionError):
+            FFmpegDecoder(str(sample_video), (640, 480), ExtractionStats(), decoder)
+
+    def test_extractor_reports_missing_binary(self, sample_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False,
+                                             decoder=DecoderSettings('ffmpeg', ffmpeg_binary='no-such-ffmpeg-binary'))
+        with pytest.raises(FrameExtractionError):
+            extractor.extract(str(sample_video), threshold=50.0, interval=1)
+
+    def test_adaptive_sampling_needs_opencv(self, sample_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False, decoder=DecoderSettings('ffmpeg'))
+        with pytest.raises(ValueError):
+            extractor.extract(str(sample_video), interval=1, adaptive_stride=10)
+
+@requires_ffmpeg
+class TestFFmpegBackend:
+    def test_difference_mode_matches_opencv(self, slides_video, temp_dir):
+        opencv = DifferenceFrameExtractor(temp_dir / "opencv", show_progress=False)
+        ffmpeg = DifferenceFrameExtractor(temp_dir / "ffmpeg", show_progress=False,
+                                          decoder=DecoderSettings('ffmpeg', threads=2))
+
+        expected = [r.frame_index for r in opencv.iter_frames(str(slides_video), threshold=5.0, interval=1)]
+        records = list(ffmpeg.iter_frames(str(slides_video), threshold=5.0, interval=1))
+
+        assert [r.frame_index for r in records] == expected
+        assert ffmpeg.last_stats.strategy == 'ffmpeg'
+        assert ffmpeg.last_stats.frames_sampled == 120
+
+    def test_interval_mode_samples_from_the_pipe(self, sample_video, temp_dir):
+        extractor = IntervalFrameExtractor(temp_dir, show_progress=False, decoder=DecoderSettings('ffmpeg'))
+        records = list(extractor.iter_frames(str(sample_video), interval=7, save=False))
+
+        assert [r.frame_index for r in records] == [0, 7, 14, 21, 28]
+        assert records[0].image.shape == (480, 640, 3)
+
+    def test_decode_width_scales_frames(self, sample_video, temp_dir):
+        extractor = IntervalFrameExtractor(temp_dir, show_progress=False,
+                                           decoder=DecoderSettings('ffmpeg', width=320))
+        frames = extractor.extract(str(sample_video), interval=10)
+
+        assert [cv2.imread(path).shape for path in frames] == [(240, 320, 3)] * 3
+
+    def test_keyframes_only_samples_keyframes(self, slides_video, temp_dir):
+        extractor = IntervalFrameExtractor(temp_dir, show_progress=False,
+                                           decoder=DecoderSettings('ffmpeg', keyframes_only=True))
+        records = list(extractor.iter_frames(str(slides_video), interval=1, save=False))
+
+        assert [r.frame_index for r in records] == probe_keyframes(str(slides_video))
+        assert extractor.last_stats.strategy == 'ffmpeg keyframes'
+
+    def test_resume_continues_after_last_sample(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False, decoder=DecoderSettings('ffmpeg'))
+        full = extractor.extract(str(slides_video), threshold=5.0, interval=1)
+        resumed = extractor.extract(str(slides_video), threshold=5.0, interval=1,
+                                    resume=ResumePoint(frame_index=40, frames_saved=4))
+
+        assert resumed == full
+
+    def test_region_is_scaled_with_the_frame(self, inset_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False,
+                                             decoder=DecoderSettings('ffmpeg', width=320))
+        frames = extractor.extract(str(inset_video), threshold=5.0, interval=1, roi=(0, 0, 480, 480))
+
+        # Unscaled, the region would cover the flickering inset of the 320px frames
+        assert len(frames) == 1
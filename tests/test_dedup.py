@@ -0,0 +1,112 @@
+import pytest
+import cv2
+import numpy as np
+from src.core.dedup import (HammingIndex, dhash, find_near_duplicates, hamming_distances, phash,
+                            popcount64, deduplicate_frames)
+from src.core.frame_extractor import FrameExtractorFactory
+
+def slide(seed, size=(240, 320)):
+    """Blocky random pattern standing in for a slide"""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 256, (size[0] // 40, size[1] // 40, 3), dtype=np.uint8)
+    return cv2.resize(blocks, (size[1], size[0]), interpolation=cv2.INTER_NEAREST)
+
+def brute_force(hashes, max_distance):
+    kept, duplicate_of = [], []
+    for i, value in enumerate(hashes):
+        distances = [bin(int(value) ^ int(hashes[k])).count('1') for k in kept]
+        if distances and min(distances) <= max_distance:
+            duplicate_of.append(kept[int(np.argmin(distances))])
+        else:
+            duplicate_of.append(-1)
+            kept.append(i)
+    return duplicate_of
+
+@pytest.fixture
+def returning_video(temp_dir):
+    """Slides A, B, C, then back to A and B"""
+    path = temp_dir / "returning.mp4"
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 1.0, (320, 240))
+    for seed in (1, 2, 3, 1, 2):
+        for _ in range(6):
+            out.write(slide(seed))
+    out.release()
+    return str(path)
+
+class TestHashes:
+    @pytest.mark.parametrize("hash_function", [dhash, phash])
+    def test_robust_to_noise_and_scale(self, hash_function):
+        image = slide(1)
+        noisy = np.clip(image.astype(np.int16) + np.random.default_rng(0).integers(-8, 9, image.shape),
+                        0, 255).astype(np.uint8)
+        smaller = cv2.resize(image, (160, 120), interpolation=cv2.INTER_AREA)
+        
+        assert hamming_distances([hash_function(image)], [hash_function(noisy)])[0, 0] <= 8
+        assert hamming_distances([hash_function(image)], [hash_function(smaller)])[0, 0] <= 4
+        assert hamming_distances([hash_function(image)], [hash_function(slide(2))])[0, 0] > 16
+    
+    def test_popcount(self):
+        values = np.random.default_rng(0).integers(0, 2 ** 63, 1000, dtype=np.int64).astype(np.uint64)
+        values[0] = np.uint64(2 ** 64 - 1)
+        
+        assert popcount64(values).tolist() == [bin(int(v)).count('1') for v in values]
+
+class TestNearDuplicates:
+    @pytest.mark.parametrize("max_distance", [0, 3, 6, 10])
+    def test_matches_brute_force(self, max_distance):
+        rng = np.random.default_rng(max_distance)
+        base = rng.integers(0, 2 ** 63, 60, dtype=np.int64).astype(np.uint64)
+        noise = np.bitwise_or.reduce(np.uint64(1) << rng.integers(0, 64, (400, 8)).astype(np.uint64), axis=1)
+        noise &= rng.integers(0, 2 ** 63, 400, dtype=np.int64).astype(np.uint64)
+        hashes = base[rng.integers(0, 60, 400)] ^ noise
+        
+        found = find_near_duplicates(hashes, max_distance)
+        expected = brute_force(hashes, max_distance)
+        assert [d >= 0 for d in found] == [d >= 0 for d in expected]
+    
+    def test_first_occurrence_is_kept(self):
+        hashes = [0b1111, 0xFF00, 0b0111, 0xFF01, 0]
+        
+        assert find_near_duplicates(hashes, 1).tolist() == [-1, -1, 0, 1, -1]
+    
+    def test_index_reports_distance(self):
+        index = HammingIndex(4)
+        index.add(0xF0, 7)
+        
+        assert index.nearest(0xF3) == (7, 2)
+        assert index.nearest(0xFFFF) == (-1, -1)
+    
+    def test_deduplicate_frame_files(self, temp_dir):
+        paths = []
+        for number, seed in enumerate((1, 2, 1, 3, 2), 1):
+            paths.append(str(temp_dir / f"frame_{number}.png"))
+            cv2.imwrite(paths[-1], slide(seed))
+        
+        kept, removed = deduplicate_frames(paths, 4)
+        
+        assert kept == [paths[0], paths[1], paths[3]]
+        assert removed == [(paths[2], paths[0]), (paths[4], paths[1])]
+
+class TestExtractorDedup:
+    def test_returning_slides_are_dropped(self, returning_video, temp_dir):
+        extractor = FrameExtractorFactory.create('diff', output_dir=temp_dir / "frames", show_progress=False)
+        
+        assert len(extractor.extract(returning_video, threshold=10, interval=3)) == 5
+        frames = extractor.extract(returning_video, threshold=10, interval=3, dedup_distance=6)
+        
+        assert [p.split('/')[-1] for p in frames] == ["frame_1.png", "frame_2.png", "frame_3.png"]
+        assert extractor.last_stats.frames_deduplicated == 2
+        assert sorted(p.name for p in (temp_dir / "frames").glob("*.png")) == \
+            ["frame_1.png", "frame_2.png", "frame_3.png"]
+    
+    def test_interval_mode_with_phash(self, returning_video, temp_dir):
+        extractor = FrameExtractorFactory.create('interval', output_dir=temp_dir / "frames", show_progress=False)
+        frames = extractor.extract(returning_video, interval=3, dedup_distance=6, dedup_hash='phash')
+        
+        assert len(frames) == 3
+    
+    def test_unknown_hash_raises_error(self, returning_video, temp_dir):
+        extractor = FrameExtractorFactory.create('interval', output_dir=temp_dir / "frames", show_progress=False)
+        
+        with pytest.raises(ValueError):
+            extractor.extract(returning_video, interval=3, dedup_distance=6, dedup_hash='ahash')
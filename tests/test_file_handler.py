@@ -0,0 +1,45 @@
+import pytest
+from src.utils.file_handler import find_frames, find_images_in_directory, image_mimetype
+
+class TestFindImages:
+    def test_finds_every_frame_format_in_numeric_order(self, temp_dir):
+        for name in ("frame_10.webp", "frame_2.jpg", "frame_1.png", "frame_3.jpeg", "notes_1.txt"):
+            (temp_dir / name).write_bytes(b"")
+        
+        images = find_images_in_directory(temp_dir, "frame_*")
+        
+        assert [p.name for p in images] == ["frame_1.png", "frame_2.jpg", "frame_3.jpeg", "frame_10.webp"]
+    
+    def test_missing_directory_returns_empty_list(self, temp_dir):
+        assert find_images_in_directory(temp_dir / "missing") == []
+
+class TestFindFrames:
+    def test_only_numbered_frames_of_the_prefix(self, temp_dir):
+        for name in ("lecture_2.png", "lecture_1.jpg", "lecture_2_1.png", "lecture_x.png",
+                     "lecture_notes_1.png", "lecture_3.txt"):
+            (temp_dir / name).write_bytes(b"")
+        
+        assert [p.name for p in find_frames(temp_dir, "lecture")] == ["lecture_1.jpg", "lecture_2.png"]
+    
+    def test_prefix_is_matched_literally(self, temp_dir):
+        for name in ("talk[1]_1.png", "talk1_1.png"):
+            (temp_dir / name).write_bytes(b"")
+        
+        assert [p.name for p in find_frames(temp_dir, "talk[1]")] == ["talk[1]_1.png"]
+    
+    def test_filters_on_the_run_extension(self, temp_dir):
+        for name in ("talk_1.png", "talk_2.png", "talk_1.jpg"):
+            (temp_dir / name).write_bytes(b"")
+        
+        assert [p.name for p in find_frames(temp_dir, "talk", ".png")] == ["talk_1.png", "talk_2.png"]
+        assert [p.name for p in find_frames(temp_dir, "talk", ".jpg")] == ["talk_1.jpg"]
+
+class TestImageMimetype:
+    def test_known_extensions(self):
+        assert image_mimetype("a.PNG") == "image/png"
+        assert image_mimetype("a.jpg") == image_mimetype("a.jpeg") == "image/jpeg"
+        assert image_mimetype("a.webp") == "image/webp"
+    
+    def test_unknown_extension_raises_error(self):
+        with pytest.raises(ValueError):
+            image_mimetype("a.gif")
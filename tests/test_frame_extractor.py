@@ -1,10 +1,22 @@
 import pytest
+import threading
+import cv2
 from pathlib import Path
 from src.core.frame_extractor import (
     DifferenceFrameExtractor, 
+    DifferenceScorer,
     IntervalFrameExtractor,
-    FrameExtractorFactory
+    FrameExtractorFactory,
+    ResumePoint,
+    VideoChunk,
+    choose_decode_strategy,
+    plan_chunks,
+    prepare_comparison_frame,
+    probe_keyframe_interval
 )
+import numpy as np
+from src.core.exceptions import FrameExtractionError
+from src.core.pipeline import FrameEncoding
 
 class TestDifferenceFrameExtractor:
     def test_extract_frames_detects_changes(self, sample_video, temp_dir):
@@ -42,6 +54,282 @@ class TestDifferenceFrameExtractor:
         )
         
         assert len(frames_low) > len(frames_high)
+    
+    @pytest.mark.parametrize("interval", [1, 4, 7])
+    def test_seek_and_grab_select_same_frames(self, sample_video, temp_dir, interval):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir)
+        seek_frames = extractor.extract(str(sample_video), threshold=50.0, interval=interval,
+                                        prefix="seek", decode_strategy='seek')
+        grab_frames = extractor.extract(str(sample_video), threshold=50.0, interval=interval,
+                                        prefix="grab", decode_strategy='grab')
+        
+        assert len(seek_frames) == len(grab_frames)
+    
+    def test_reports_throughput(self, sample_video, temp_dir):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir)
+        frames = extractor.extract(str(sample_video), threshold=50.0, interval=3,
+                                   decode_strategy='grab')
+        
+        stats = extractor.last_stats
+        assert stats.strategy == 'grab'
+        assert stats.frames_sampled == 10
+        assert stats.frames_covered == 30
+        assert stats.frames_saved == len(frames)
+        assert stats.video_fps > 0
+    
+    def test_missing_video_raises_error(self, temp_dir):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir)
+        with pytest.raises(FrameExtractionError):
+            extractor.extract(str(temp_dir / "missing.mp4"), decode_strategy='grab')
+    
+    def test_invalid_decode_strategy_raises_error(self, sample_video, temp_dir):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir)
+        with pytest.raises(ValueError):
+            extractor.extract(str(sample_video), decode_strategy='rewind')
+
+    def test_compare_width_keeps_full_resolution_output(self, sample_video, temp_dir):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir)
+        frames = extractor.extract(str(sample_video), threshold=50.0, interval=1,
+                                   compare_width=160)
+        
+        assert len(frames) == 3
+        assert cv2.imread(frames[0]).shape == (480, 640, 3)
+    
+    def test_roi_ignores_changes_outside_region(self, inset_video, temp_dir):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir)
+        
+        full_frames = extractor.extract(str(inset_video), threshold=10.0, interval=1,
+                                        prefix="full")
+        roi_frames = extractor.extract(str(inset_video), threshold=10.0, interval=1,
+                                       prefix="roi", roi=(0, 0, 480, 480))
+        
+        assert len(full_frames) == 20
+        assert len(roi_frames) == 1
+
+    @pytest.mark.parametrize("writer_threads,queue_size", [(0, 0), (0, 4), (3, 4)])
+    def test_pipeline_settings_do_not_change_output(self, sample_video, temp_dir,
+                                                    writer_threads, queue_size):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir, writer_threads=writer_threads,
+                                             queue_size=queue_size)
+        frames = extractor.extract(str(sample_video), threshold=50.0, interval=1)
+        
+        assert [Path(p).name for p in frames] == ["frame_1.png", "frame_2.png", "frame_3.png"]
+        assert all(Path(p).exists() for p in frames)
+        timings = extractor.last_stats.timings
+        assert timings.max_queue_depth <= queue_size
+
+    def test_frame_consumer_receives_frames_instead_of_files(self, sample_video, temp_dir):
+        saved = DifferenceFrameExtractor(temp_dir / "files", show_progress=False).extract(
+            str(sample_video), threshold=0.1, interval=1, prefix="frame")
+        received = {}
+        extractor = DifferenceFrameExtractor(temp_dir / "memory", show_progress=False,
+                                             frame_consumer=received.__setitem__)
+        names = extractor.extract(str(sample_video), threshold=0.1, interval=1, prefix="frame")
+        
+        assert names == [Path(path).name for path in saved]
+        assert sorted(received) == sorted(names)
+        assert received[names[0]] == Path(saved[0]).read_bytes()
+        assert not (temp_dir / "memory").exists()
+    
+    def test_saves_frames_with_configured_encoding(self, sample_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False,
+                                             encoding=FrameEncoding('jpeg', quality=70, max_width=32))
+        frames = extractor.extract(str(sample_video), threshold=50.0, interval=1, prefix="test")
+        
+        assert frames and all(frame.endswith('.jpg') for frame in frames)
+        assert cv2.imread(frames[0]).shape[1] == 32
+    
+    def test_frame_consumer_rejects_dedup(self, sample_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False, frame_consumer=lambda n, d: None)
+        with pytest.raises(ValueError):
+            extractor.extract(str(sample_video), threshold=0.1, dedup_distance=4)
+
+class TestParallelExtraction:
+    @pytest.mark.parametrize("interval,strategy", [(1, 'grab'), (4, 'grab'), (5, 'seek')])
+    def test_matches_sequential_output(self, slides_video, temp_dir, interval, strategy):
+        sequential_dir = temp_dir / "sequential"
+        parallel_dir = temp_dir / "parallel"
+        
+        sequential = DifferenceFrameExtractor(output_dir=sequential_dir, workers=1).extract(
+            str(slides_video), threshold=5.0, interval=interval, decode_strategy=strategy)
+        parallel = DifferenceFrameExtractor(output_dir=parallel_dir, workers=3).extract(
+            str(slides_video), threshold=5.0, interval=interval, decode_strategy=strategy)
+        
+        assert len(sequential) == 8
+        assert [Path(p).name for p in parallel] == [Path(p).name for p in sequential]
+        for seq_path, par_path in zip(sequential, parallel):
+            assert np.array_equal(cv2.imread(seq_path), cv2.imread(par_path))
+        assert sorted(p.name for p in parallel_dir.iterdir()) == sorted(Path(p).name for p in parallel)
+    
+    def test_plan_chunks_covers_every_sample_once(self):
+        keyframes = list(range(0, 1000, 12))
+        chunks = plan_chunks(total_frames=1000, interval=7, workers=4, keyframes=keyframes)
+        
+        owned = []
+        for chunk in chunks:
+            stop = chunk.stop if chunk.stop is not None else 1000
+            owned.extend(range(chunk.start, stop, 7))
+            if chunk.reference is not None:
+                assert chunk.reference == chunk.start - 7
+                assert chunk.seek_from in keyframes and chunk.seek_from <= chunk.reference
+        
+        assert len(chunks) == 4
+        assert owned == list(range(0, 1000, 7))
+    
+    def test_plan_chunks_without_keyframes_seeks_to_reference(self):
+        chunks = plan_chunks(total_frames=100, interval=10, workers=2, keyframes=[])
+        assert chunks[1] == VideoChunk(index=1, start=50, stop=None, reference=40, seek_from=40)
+
+class TestAdaptiveSampling:
+    def test_locates_changes_with_few_samples(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False)
+        records = list(extractor.iter_frames(str(slides_video), threshold=5.0, interval=1,
+                                             adaptive_stride=20))
+        
+        assert [r.frame_index for r in records] == [0, 13, 24, 37, 50, 71, 88, 103]
+        assert extractor.last_stats.frames_sampled < 60
+    
+    def test_more_accurate_than_same_fixed_interval(self, slides_video, temp_dir):
+        fixed = DifferenceFrameExtractor(temp_dir / "fixed", show_progress=False)
+        fixed_frames = list(fixed.iter_frames(str(slides_video), threshold=5.0, interval=20))
+        
+        assert len(fixed_frames) < 8
+        assert fixed.last_stats.frames_sampled == 6
+    
+    def test_finds_several_changes_within_one_stride(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False)
+        frames = extractor.extract(str(slides_video), threshold=5.0, interval=1, adaptive_stride=60)
+        
+        assert len(frames) == 8
+    
+    def test_refines_on_interval_grid(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False)
+        records = list(extractor.iter_frames(str(slides_video), threshold=5.0, interval=5,
+                                             adaptive_stride=30))
+        
+        assert [r.frame_index for r in records] == [0, 15, 25, 40, 50, 75, 90, 105]
+    
+    def test_resume_continues_after_last_change(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False)
+        full = extractor.extract(str(slides_video), threshold=5.0, interval=1, adaptive_stride=20)
+        resumed = extractor.extract(str(slides_video), threshold=5.0, interval=1, adaptive_stride=20,
+                                    resume=ResumePoint(frame_index=37, frames_saved=4))
+        
+        assert resumed == full
+
+class TestIterFrames:
+    def test_yields_records_as_frames_are_saved(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False, writer_threads=2)
+        records = []
+        for record in extractor.iter_frames(str(slides_video), threshold=5.0, interval=1, prefix="slide"):
+            assert Path(record.path).exists()
+            records.append(record)
+        
+        assert [r.frame_index for r in records] == [0, 13, 24, 37, 50, 71, 88, 103]
+        assert [r.number for r in records] == list(range(1, 9))
+        assert records[1].timestamp == pytest.approx(1.3)
+        assert records[0].score is None and all(r.score > 5.0 for r in records[1:])
+        assert records[0].image.shape == (240, 320, 3)
+    
+    def test_extract_returns_iterated_paths(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir / "a", show_progress=False)
+        paths = [r.path for r in extractor.iter_frames(str(slides_video), threshold=5.0, interval=1)]
+        
+        assert extractor.extract(str(slides_video), threshold=5.0, interval=1) == paths
+    
+    def test_stopping_early_skips_rest_of_video(self, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False)
+        frames = extractor.iter_frames(str(slides_video), threshold=5.0, interval=1)
+        assert next(frames).frame_index == 0
+        assert next(frames).frame_index == 13
+        frames.close()
+        
+        assert extractor.last_stats.frames_sampled < 60
+        assert not any(t.name == 'frame-decoder' for t in threading.enumerate())
+    
+    def test_without_saving_writes_nothing(self, sample_video, temp_dir):
+        extractor = IntervalFrameExtractor(temp_dir / "frames", show_progress=False)
+        records = list(extractor.iter_frames(str(sample_video), interval=10, save=False))
+        
+        assert [r.frame_index for r in records] == [0, 10, 20]
+        assert all(r.path is None and r.image is not None for r in records)
+        assert not list((temp_dir / "frames").iterdir())
+
+class TestBufferReuse:
+    @staticmethod
+    def records(extractor, video, **kwargs):
+        return [(r.frame_index, r.score, r.image) for r in extractor.iter_frames(str(video), save=False, **kwargs)]
+    
+    @pytest.mark.parametrize("score_batch,queue_size", [(1, 0), (1, 4), (4, 0), (7, 4)])
+    def test_results_match_fresh_buffers(self, slides_video, temp_dir, score_batch, queue_size):
+        fresh = DifferenceFrameExtractor(temp_dir, show_progress=False, reuse_buffers=False, score_batch=1)
+        pooled = DifferenceFrameExtractor(temp_dir, show_progress=False, reuse_buffers=True,
+                                          score_batch=score_batch, queue_size=queue_size)
+        expected = self.records(fresh, slides_video, threshold=5.0, interval=1, compare_width=80)
+        actual = self.records(pooled, slides_video, threshold=5.0, interval=1, compare_width=80)
+        
+        assert [(index, score) for index, score, _ in actual] == [(index, score) for index, score, _ in expected]
+        # Yielded images keep their pixels after the decoder moved on
+        assert all(np.array_equal(a, b) for (_, _, a), (_, _, b) in zip(actual, expected))
+        assert pooled.last_stats.frames_allocated < pooled.last_stats.frames_sampled
+    
+    @pytest.mark.parametrize("mode", ['diff', 'interval'])
+    def test_extract_recycles_saved_frames(self, slides_video, temp_dir, mode):
+        options = dict(threshold=5.0, interval=1) if mode == 'diff' else dict(interval=3)
+        fresh = FrameExtractorFactory.create(mode, output_dir=temp_dir / "fresh", reuse_buffers=False)
+        pooled = FrameExtractorFactory.create(mode, output_dir=temp_dir / "pooled", reuse_buffers=True,
+                                              writer_threads=2, queue_size=2)
+        expected = fresh.extract(str(slides_video), **options)
+        saved = pooled.extract(str(slides_video), **options)
+        
+        assert [Path(p).name for p in saved] == [Path(p).name for p in expected]
+        assert all(np.array_equal(cv2.imread(a), cv2.imread(b)) for a, b in zip(saved, expected))
+        # Decode queue, frame in flight, analyzed sample and pending writes
+        assert pooled.last_stats.frames_allocated <= 2 + 1 + 1 + 2
+    
+    def test_batched_scores_equal_single_scores(self):
+        rng = np.random.default_rng(1)
+        frames = [(i, rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)) for i in range(11)]
+        single = DifferenceScorer(20.0, compare_width=32)
+        batched = DifferenceScorer(20.0, compare_width=32, batch_size=4)
+        
+        expected = [single(index, frame) for index, frame in frames]
+        # Batches of varying size, including single samples in between
+        actual = (batched.select_batch(frames[:4]) + [batched(*frames[4])] + batched.select_batch(frames[5:7])
+                  + [batched(*frames[7])] + batched.select_batch(frames[8:11]))
+        
+        assert actual == expected
+        assert expected[0] == (True, None)
+    
+    def test_score_batch_must_be_positive(self, temp_dir):
+        with pytest.raises(ValueError):
+            DifferenceFrameExtractor(temp_dir, score_batch=0)
+
+class TestComparisonFrame:
+    def test_downscales_to_compare_width(self):
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        gray = prepare_comparison_frame(frame, compare_width=320)
+        assert gray.shape == (180, 320)
+    
+    def test_crops_region_before_scaling(self):
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        gray = prepare_comparison_frame(frame, compare_width=160, roi=(0, 0, 1440, 1080))
+        assert gray.shape == (120, 160)
+    
+    def test_roi_outside_frame_raises_error(self):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        with pytest.raises(ValueError):
+            prepare_comparison_frame(frame, roi=(700, 0, 100, 100))
+
+class TestDecodeStrategy:
+    def test_probe_keyframe_interval(self, sample_video):
+        gop_size = probe_keyframe_interval(str(sample_video))
+        assert gop_size is not None and gop_size >= 1
+    
+    def test_choose_decode_strategy(self):
+        assert choose_decode_strategy(interval=300, gop_size=12) == 'seek'
+        assert choose_decode_strategy(interval=5, gop_size=250) == 'grab'
+        assert choose_decode_strategy(interval=300, gop_size=None) == 'grab'
 
 class TestIntervalFrameExtractor:
     def test_extract_at_intervals(self, sample_video, temp_dir):
@@ -58,6 +346,13 @@ class TestIntervalFrameExtractor:
         # Check file naming
         for i, frame_path in enumerate(frames, 1):
             assert f"interval_{i}.png" in frame_path
+    
+    @pytest.mark.parametrize("strategy", ['seek', 'grab'])
+    def test_decode_strategies_save_same_count(self, sample_video, temp_dir, strategy):
+        extractor = IntervalFrameExtractor(output_dir=temp_dir)
+        frames = extractor.extract(str(sample_video), interval=10, decode_strategy=strategy)
+        
+        assert len(frames) == 3
 
 class TestFrameExtractorFactory:
     def test_create_diff_extractor(self):
@@ -68,6 +363,12 @@ class TestFrameExtractorFactory:
         extractor = FrameExtractorFactory.create('interval')
         assert isinstance(extractor, IntervalFrameExtractor)
     
+    def test_create_passes_pipeline_options(self, temp_dir):
+        extractor = FrameExtractorFactory.create('interval', output_dir=temp_dir,
+                                                 writer_threads=0, queue_size=0)
+        assert extractor.writer_threads == 0
+        assert extractor.queue_size == 0
+    
     def test_invalid_mode_raises_error(self):
         with pytest.raises(ValueError):
             FrameExtractorFactory.create('invalid_mode')
@@ -0,0 +1,232 @@
+import pytest
+from pathlib import Path
+import cv2
+import numpy as np
+from src.core.exceptions import GoogleAPIError
+from src.services.google_drive import GoogleDriveService
+from src.services.upload_cache import UploadCache, file_digest
+from tests.google_fakes import FakeDriveBackend
+
+class TestUploadImages:
+    def test_returns_urls_in_frame_order(self, drive_backend, frame_files):
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        urls = drive.upload_images(frame_files, "folder", concurrency=4)
+        
+        names = [drive_backend.files[url.split('/d/')[1].split('/')[0]]['name'] for url in urls]
+        assert names == [f"frame_{i}.png" for i in range(1, 13)]
+    
+    def test_every_file_is_shared_through_batch_requests(self, drive_backend, frame_files):
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        drive.upload_images(frame_files, "folder", concurrency=4)
+        
+        assert set(drive_backend.permissions) == set(drive_backend.files)
+        assert drive_backend.count(r"/upload/drive/v3/files") == 12
+        assert drive_backend.count(r"/batch/drive/v3") == 1
+        assert drive_backend.count(r"/permissions") == 0
+    
+    def test_uploads_overlap(self, frame_files):
+        backend = FakeDriveBackend(latency=0.05)
+        drive = GoogleDriveService(http_factory=backend.http)
+        drive.upload_images(frame_files, "folder", concurrency=6)
+        
+        assert 1 < backend.max_in_flight <= 6
+    
+    def test_serial_when_concurrency_is_one(self, frame_files):
+        backend = FakeDriveBackend(latency=0.01)
+        drive = GoogleDriveService(http_factory=backend.http)
+        drive.upload_images(frame_files, "folder", concurrency=1)
+        
+        assert backend.max_in_flight == 1
+    
+    def test_failed_upload_raises_error(self, frame_files):
+        backend = FakeDriveBackend(fail_names={"frame_5.png"})
+        drive = GoogleDriveService(http_factory=backend.http)
+        
+        with pytest.raises(GoogleAPIError):
+            drive.upload_images(frame_files, "folder", concurrency=3)
+    
+    def test_mimetype_follows_image_format(self, drive_backend, temp_dir):
+        frame = np.full((16, 16, 3), 99, dtype=np.uint8)
+        paths = []
+        for extension in ('.png', '.jpg', '.webp'):
+            cv2.imwrite(str(temp_dir / f"frame{extension}"), frame)
+            paths.append(str(temp_dir / f"frame{extension}"))
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        drive.upload_images(paths, "folder")
+        
+        assert sorted(f['mimeType'] for f in drive_backend.files.values()) == \
+            ['image/jpeg', 'image/png', 'image/webp']
+
+class TestUploadStream:
+    @staticmethod
+    def _frames(frame_files):
+        return [(Path(path).name, Path(path).read_bytes()) for path in frame_files]
+    
+    def test_returns_urls_by_name(self, drive_backend, frame_files):
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        stream = drive.open_upload_stream("folder", concurrency=4)
+        for name, data in self._frames(frame_files):
+            stream.submit(name, data)
+        urls = stream.close()
+        
+        assert sorted(urls) == sorted(Path(path).name for path in frame_files)
+        for name, url in urls.items():
+            assert drive_backend.files[url.split('/d/')[1].split('/')[0]]['name'] == name
+        assert set(drive_backend.permissions) == set(drive_backend.files)
+    
+    def test_in_flight_frames_are_bounded(self, frame_files):
+        backend = FakeDriveBackend(latency=0.03)
+        drive = GoogleDriveService(http_factory=backend.http)
+        stream = drive.open_upload_stream("folder", concurrency=6, max_in_flight=2)
+        for name, data in self._frames(frame_files):
+            stream.submit(name, data)
+        stream.close()
+        
+        assert len(backend.files) == 12
+        assert 1 < backend.max_in_flight <= 2
+    
+    def test_identical_frames_upload_once(self, drive_backend):
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        stream = drive.open_upload_stream("folder")
+        stream.submit("frame_1.png", b"same")
+        stream.submit("frame_2.png", b"same")
+        urls = stream.close()
+        
+        assert len(drive_backend.files) == 1
+        assert urls["frame_1.png"] == urls["frame_2.png"]
+    
+    def test_existing_frames_are_not_uploaded(self, drive_backend, frame_files):
+        drive_backend.files["earlier"] = {'id': "earlier", 'name': "frame_1.png"}
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        uploaded = []
+        stream = drive.open_upload_stream("folder", existing={"frame_1.png": "earlier"},
+                                          on_uploaded=lambda name, file_id: uploaded.append(name))
+        for name, data in self._frames(frame_files):
+            stream.submit(name, data)
+        urls = stream.close()
+        
+        assert urls["frame_1.png"] == GoogleDriveService.file_url("earlier")
+        assert len(drive_backend.files) == 12
+        assert sorted(uploaded) == sorted(Path(path).name for path in frame_files[1:])
+    
+    def test_failed_upload_raises_error(self, frame_files):
+        backend = FakeDriveBackend(fail_names={"frame_5.png"})
+        drive = GoogleDriveService(http_factory=backend.http)
+        stream = drive.open_upload_stream("folder", concurrency=3)
+        
+        with pytest.raises(GoogleAPIError):
+            for name, data in self._frames(frame_files):
+                stream.submit(name, data)
+            stream.close()
+
+class TestDirectLink:
+    def test_converts_shareable_link(self):
+        link = GoogleDriveService.get_direct_link("https://drive.google.com/file/d/abc123/view")
+        assert link == "https://drive.google.com/uc?export=view&id=abc123"
+    
+    def test_invalid_link_raises_error(self):
+        with pytest.raises(ValueError):
+            GoogleDriveService.get_direct_link("https://example.com/nothing")
+
+class TestUploadCache:
+    @pytest.fixture
+    def cache(self, temp_dir):
+        cache = UploadCache(temp_dir / "cache" / "uploads.sqlite3")
+        yield cache
+        cache.close()
+    
+    def test_rerun_skips_uploaded_frames(self, drive_backend, frame_files, cache):
+        first = GoogleDriveService(http_factory=drive_backend.http, upload_cache=cache).upload_images(
+            frame_files, "folder", concurrency=4)
+        second = GoogleDriveService(http_factory=drive_backend.http, upload_cache=cache).upload_images(
+            frame_files, "folder", concurrency=4)
+        
+        assert second == first
+        assert drive_backend.count(r"/upload/drive/v3/files") == 12
+        # One batch shares the first run's files, one checks they still exist on the second run
+        assert drive_backend.count(r"/batch/drive/v3") == 2
+        assert all(len(permissions) == 1 for permissions in drive_backend.permissions.values())
+    
+    def test_changed_frame_is_uploaded_again(self, drive_backend, frame_files, cache):
+        drive = GoogleDriveService(http_factory=drive_backend.http, upload_cache=cache)
+        first = drive.upload_images(frame_files, "folder")
+        cv2.imwrite(frame_files[3], np.full((48, 64, 3), 7, dtype=np.uint8))
+        second = drive.upload_images(frame_files, "folder")
+        
+        assert drive_backend.count(r"/upload/drive/v3/files") == 13
+        assert [a == b for a, b in zip(first, second)].count(False) == 1
+        assert second[3] != first[3]
+    
+    def test_identical_frames_upload_once(self, drive_backend, temp_dir, cache):
+        paths = []
+        for name in ("intro_a.png", "intro_b.png", "talk_1.png"):
+            paths.append(str(temp_dir / name))
+            cv2.imwrite(paths[-1], np.full((48, 64, 3), 200 if name.startswith("intro") else 50, dtype=np.uint8))
+        
+        urls = GoogleDriveService(http_factory=drive_backend.http, upload_cache=cache).upload_images(paths, "folder")
+        
+        assert urls[0] == urls[1] != urls[2]
+        assert len(drive_backend.files) == 2
+    
+    def test_cache_is_per_folder(self, drive_backend, frame_files, cache):
+        drive = GoogleDriveService(http_factory=drive_backend.http, upload_cache=cache)
+        drive.upload_images(frame_files, "folder")
+        drive.upload_images(frame_files, "other")
+        
+        assert drive_backend.count(r"/upload/drive/v3/files") == 24
+    
+    def test_unshared_entries_are_shared_on_next_run(self, drive_backend, frame_files, cache):
+        backend = FakeDriveBackend()
+        backend.fail_next(1, status=403, pattern=r'/permissions')
+        with pytest.raises(GoogleAPIError):
+            GoogleDriveService(http_factory=backend.http, upload_cache=cache).upload_images(frame_files, "folder")
+        
+        GoogleDriveService(http_factory=backend.http, upload_cache=cache).upload_images(frame_files, "folder")
+        
+        assert backend.count(r"/upload/drive/v3/files") == 12
+        assert set(backend.permissions) == set(backend.files)
+        assert all(entry.shared for entry in cache.lookup([file_digest(f) for f in frame_files], "folder").values())
+    
+    def test_deleted_files_are_uploaded_again(self, drive_backend, frame_files, cache):
+        drive = GoogleDriveService(http_factory=drive_backend.http, upload_cache=cache)
+        first = drive.upload_images(frame_files, "folder")
+        deleted = first[2].split('/d/')[1].split('/')[0]
+        trashed = first[5].split('/d/')[1].split('/')[0]
+        del drive_backend.files[deleted]
+        drive_backend.files[trashed]['trashed'] = True
+        
+        second = drive.upload_images(frame_files, "folder")
+        
+        assert drive_backend.count(r"/upload/drive/v3/files") == 14
+        assert [a == b for a, b in zip(first, second)].count(False) == 2
+        assert second[2] != first[2] and second[5] != first[5]
+        entries = cache.lookup([file_digest(frame_files[2])], "folder").values()
+        assert [entry.file_id for entry in entries] == [second[2].split('/d/')[1].split('/')[0]]
+    
+    def test_unshared_file_deleted_before_sharing_is_uploaded_again(self, drive_backend, frame_files, cache):
+        backend = FakeDriveBackend()
+        backend.fail_next(1, status=403, pattern=r'/permissions')
+        with pytest.raises(GoogleAPIError):
+            GoogleDriveService(http_factory=backend.http, upload_cache=cache).upload_images(frame_files, "folder")
+        del backend.files["file1"]
+        
+        urls = GoogleDriveService(http_factory=backend.http, upload_cache=cache).upload_images(frame_files, "folder")
+        
+        assert backend.count(r"/upload/drive/v3/files") == 13
+        assert GoogleDriveService.file_url("file1") not in urls
+        assert set(backend.files) <= set(backend.permissions)
+    
+    def test_stream_uploads_deleted_cached_frames_again(self, drive_backend, frame_files, cache):
+        drive = GoogleDriveService(http_factory=drive_backend.http, upload_cache=cache)
+        first = drive.upload_images(frame_files, "folder")
+        deleted = first[0].split('/d/')[1].split('/')[0]
+        del drive_backend.files[deleted]
+        
+        stream = drive.open_upload_stream("folder")
+        for path in frame_files:
+            stream.submit(Path(path).name, Path(path).read_bytes())
+        urls = stream.close()
+        
+        assert drive_backend.count(r"/upload/drive/v3/files") == 13
+        assert urls["frame_1.png"] != first[0]
+        assert stream.uploaded == 1 and stream.reused == 11
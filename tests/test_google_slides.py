@@ -0,0 +1,171 @@
+import hashlib
+import pytest
+from src.core.exceptions import GoogleAPIError
+from src.services.google_slides import GoogleSlidesService
+
+def image_urls(count):
+    return [f"https://drive.google.com/uc?export=view&id=file{i}" for i in range(1, count + 1)]
+
+class TestBatchAddSlides:
+    def test_packs_slides_into_few_batch_updates(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        created = slides.batch_add_slides("deck", image_urls(120), chunk_size=50)
+        
+        assert len(created) == 120
+        assert slides_backend.count(r":batchUpdate") == 3
+    
+    def test_slides_keep_frame_order(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        urls = image_urls(7)
+        created = slides.batch_add_slides("deck", urls, chunk_size=3)
+        
+        deck = slides_backend.presentations["deck"]["slides"]
+        assert [slide["objectId"] for slide in deck] == created
+        assert [slide["pageElements"][0]["image"]["sourceUrl"] for slide in deck] == urls
+    
+    def test_failed_chunk_is_skipped(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        created = slides.batch_add_slides("missing-deck", image_urls(4), chunk_size=2)
+        
+        assert created == []
+
+class TestSingleSlide:
+    def test_add_slide_with_image_uses_one_call(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        slide_id = slides.add_slide_with_image("deck", image_urls(1)[0])
+        
+        assert slides_backend.presentations["deck"]["slides"][0]["objectId"] == slide_id
+        assert slides_backend.count(r":batchUpdate") == 1
+    
+    def test_add_slide_failure_raises_error(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        with pytest.raises(GoogleAPIError):
+            slides.add_slide_with_image("missing-deck", image_urls(1)[0])
+    
+    def test_create_presentation(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        presentation_id = slides.create_presentation("Lecture 1")
+        
+        assert slides_backend.presentations[presentation_id]["title"] == "Lecture 1"
+
+def frame_hash(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+def deck_images(backend, presentation_id="deck"):
+    return [[element["image"]["sourceUrl"] for element in slide["pageElements"]]
+            for slide in backend.presentations[presentation_id]["slides"]]
+
+class TestSyncSlides:
+    def test_first_sync_creates_all_slides(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        urls = image_urls(5)
+        result = slides.sync_slides("deck", [(frame_hash(i), url) for i, url in enumerate(urls)], chunk_size=2)
+        
+        assert result.created == 5 and result.complete
+        assert deck_images(slides_backend) == [[url] for url in urls]
+        assert result.slide_ids == [slide["objectId"] for slide in slides_backend.presentations["deck"]["slides"]]
+        assert slides_backend.count(r"GET .*/presentations/deck\?.*fields=") == 1
+        assert slides_backend.count(r":batchUpdate") == 3
+    
+    def test_unchanged_deck_needs_no_update(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        frames = [(frame_hash(i), url) for i, url in enumerate(image_urls(4))]
+        slides.sync_slides("deck", frames)
+        result = slides.sync_slides("deck", frames)
+        
+        assert result.unchanged == 4 and result.requests == 0
+        assert slides_backend.count(r":batchUpdate") == 1
+    
+    def test_large_deck_with_few_changes_takes_one_update(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        urls = image_urls(300)
+        frames = [(frame_hash(i), url) for i, url in enumerate(urls)]
+        slides.sync_slides("deck", frames)
+        calls = slides_backend.count(r":batchUpdate")
+        
+        # Frames 10 and 20 changed, 30 was dropped, one was inserted and 40 is stored at a new URL
+        changed = list(frames)
+        changed[10] = (frame_hash(1000), "https://example.com/new10")
+        changed[20] = (frame_hash(1001), "https://example.com/new20")
+        changed[40] = (frame_hash(40), "https://example.com/moved40")
+        del changed[30]
+        changed.insert(100, (frame_hash(1002), "https://example.com/inserted"))
+        result = slides.sync_slides("deck", changed)
+        
+        assert (result.created, result.deleted, result.replaced, result.moved) == (3, 3, 1, 0)
+        assert result.unchanged == 296
+        assert slides_backend.count(r":batchUpdate") == calls + 1
+        assert deck_images(slides_backend) == [[url] for _, url in changed]
+    
+    def test_reordered_frames_are_moved(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        frames = [(frame_hash(i), url) for i, url in enumerate(image_urls(5))]
+        slides.sync_slides("deck", frames)
+        reordered = [frames[3], frames[0], frames[1], frames[2], frames[4]]
+        result = slides.sync_slides("deck", reordered)
+        
+        assert result.moved == 1 and result.created == 0
+        assert deck_images(slides_backend) == [[url] for _, url in reordered]
+    
+    def test_missing_image_replaces_the_elements_in_its_place(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        frames = [(frame_hash(i), url) for i, url in enumerate(image_urls(3))]
+        slides.sync_slides("deck", frames)
+        slide = slides_backend.presentations["deck"]["slides"][1]
+        slide["pageElements"][0]["objectId"] = "replaced_by_hand"
+        slide["pageElements"].append({"objectId": "pasted", "image": {"sourceUrl": "https://example.com/other"}})
+        result = slides.sync_slides("deck", frames)
+        
+        assert result.replaced == 1 and result.unchanged == 2
+        assert deck_images(slides_backend) == [[url] for _, url in frames]
+    
+    def test_slides_made_by_hand_are_kept(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        appended = slides.batch_add_slides("deck", image_urls(2))
+        slides_backend.presentations["deck"]["slides"].insert(0, {"objectId": "title", "pageElements": []})
+        frames = [(frame_hash(i), url) for i, url in enumerate(image_urls(3))]
+        result = slides.sync_slides("deck", frames)
+        
+        deck = [slide["objectId"] for slide in slides_backend.presentations["deck"]["slides"]]
+        assert result.deleted == 2
+        assert not set(appended) & set(deck)
+        assert deck == ["title"] + result.slide_ids
+    
+    def test_repeated_frames_get_their_own_slides(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        urls = image_urls(2)
+        result = slides.sync_slides("deck", [(frame_hash(1), urls[0]), (frame_hash(2), urls[1]),
+                                             (frame_hash(1), urls[0])])
+        
+        assert len(set(result.slide_ids)) == 3
+        assert deck_images(slides_backend) == [[urls[0]], [urls[1]], [urls[0]]]
+    
+    def test_failed_chunk_stops_the_sync(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        frames = [(frame_hash(i), url) for i, url in enumerate(image_urls(6))]
+        original = slides_backend.route
+        calls = []
+        
+        def second_update_fails(uri, method, body, headers):
+            if ":batchUpdate" in uri:
+                calls.append(uri)
+                if len(calls) == 2:
+                    uri = uri.replace("/deck:", "/missing:")
+            return original(uri, method, body, headers)
+        
+        slides_backend.route = second_update_fails
+        result = slides.sync_slides("deck", frames, chunk_size=2)
+        
+        assert not result.complete
+        assert result.slide_ids[:2] == [s["objectId"] for s in slides_backend.presentations["deck"]["slides"]]
+        assert result.slide_ids[2:] == [None] * 4
+        
+        slides_backend.route = original
+        finished = slides.sync_slides("deck", frames, chunk_size=2)
+        assert finished.complete and finished.created == 4
+        assert deck_images(slides_backend) == [[url] for _, url in frames]
+    
+    def test_missing_presentation_raises_error(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        with pytest.raises(GoogleAPIError):
+            slides.sync_slides("missing-deck", [(frame_hash(1), image_urls(1)[0])])
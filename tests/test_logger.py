@@ -0,0 +1,27 @@
+import sys
+import pytest
+from loguru import logger
+from src.utils import logger as logger_module
+
+@pytest.fixture
+def fresh_logger(monkeypatch, temp_dir):
+    """setup_logger as on a first call, writing its log file below temp_dir"""
+    monkeypatch.chdir(temp_dir)
+    monkeypatch.setattr(logger_module, '_handler_ids', [])
+    yield
+    for handler_id in logger_module._handler_ids:
+        logger.remove(handler_id)
+    logger.add(sys.stderr)
+
+class TestSetupLogger:
+    def test_repeated_calls_add_sinks_once(self, fresh_logger, temp_dir):
+        logger_module.setup_logger()
+        handlers = list(logger_module._handler_ids)
+        logger_module.setup_logger()
+
+        assert len(handlers) == 2
+        assert logger_module._handler_ids == handlers
+        logger.info("logged once")
+        logger.complete()
+        log = (temp_dir / "logs" / "video-to-slides.log").read_text()
+        assert log.count("logged once") == 1
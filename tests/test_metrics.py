@@ -0,0 +1,127 @@
+import json
+import pytest
+import httplib2
+from googleapiclient.errors import HttpError
+from src.core.frame_extractor import DifferenceFrameExtractor
+from src.services.google_drive import GoogleDriveService
+from src.services.google_slides import GoogleSlidesService
+from src.services.rate_limiter import RateLimiter
+from src.utils.metrics import NULL_METRIC, MetricsRegistry, metrics
+
+@pytest.fixture
+def recorded_metrics():
+    """The process-wide registry, enabled and empty for one test"""
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+def series(registry, name, **labels):
+    for entry in registry.snapshot()[name]['series']:
+        if entry['labels'] == labels:
+            return entry
+    raise KeyError(labels)
+
+class TestMetricsRegistry:
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry()
+        registry.counter('frames_saved_total').inc()
+        with registry.histogram('run_step_seconds', step='extract').time():
+            pass
+
+        assert registry.counter('frames_saved_total') is NULL_METRIC
+        assert registry.snapshot() == {}
+
+    def test_counters_by_labels(self):
+        registry = MetricsRegistry(enabled=True)
+        registry.counter('api_requests_total', api='drive', outcome='ok').inc()
+        registry.counter('api_requests_total', outcome='ok', api='drive').inc(2)
+        registry.counter('api_requests_total', api='slides', outcome='ok').inc()
+
+        assert series(registry, 'api_requests_total', api='drive', outcome='ok')['value'] == 3
+        assert series(registry, 'api_requests_total', api='slides', outcome='ok')['value'] == 1
+
+    def test_histogram_summary_and_buckets(self):
+        registry = MetricsRegistry(enabled=True)
+        histogram = registry.histogram('frame_decode_seconds', buckets=(0.01, 0.1))
+        for value in (0.005, 0.01, 0.05, 2.0):
+            histogram.observe(value)
+
+        entry = series(registry, 'frame_decode_seconds')
+        assert (entry['count'], entry['min'], entry['max']) == (4, 0.005, 2.0)
+        assert entry['sum'] == pytest.approx(2.065)
+        assert entry['buckets'] == {'0.01': 2, '0.1': 3, '+Inf': 4}
+
+    def test_kind_mismatch_raises_error(self):
+        with pytest.raises(ValueError):
+            MetricsRegistry(enabled=True).counter('frame_decode_seconds')
+
+    def test_prometheus_text(self):
+        registry = MetricsRegistry(enabled=True)
+        registry.counter('api_retries_total', api='drive').inc(2)
+        registry.histogram('api_request_seconds', buckets=(0.1,), api='drive').observe(0.05)
+
+        lines = registry.to_prometheus().splitlines()
+        assert "# TYPE api_retries_total counter" in lines
+        assert 'api_retries_total{api="drive"} 2' in lines
+        assert "# TYPE api_request_seconds histogram" in lines
+        assert 'api_request_seconds_bucket{api="drive",le="0.1"} 1' in lines
+        assert 'api_request_seconds_bucket{api="drive",le="+Inf"} 1' in lines
+        assert 'api_request_seconds_count{api="drive"} 1' in lines
+
+    @pytest.mark.parametrize("format", ['json', 'prometheus'])
+    def test_dump_writes_file(self, temp_dir, format):
+        registry = MetricsRegistry(enabled=True)
+        registry.counter('frames_saved_total').inc(3)
+        path = registry.dump(temp_dir / "out" / "metrics.txt", format)
+
+        text = path.read_text()
+        if format == 'json':
+            assert json.loads(text)['metrics']['frames_saved_total']['series'][0]['value'] == 3
+        else:
+            assert "frames_saved_total 3" in text.splitlines()
+
+class TestInstrumentation:
+    def test_extraction_records_stage_metrics(self, recorded_metrics, slides_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir, show_progress=False)
+        frames = extractor.extract(str(slides_video), threshold=5.0, interval=1)
+
+        assert series(recorded_metrics, 'frame_decode_seconds')['count'] == 120
+        assert series(recorded_metrics, 'frame_analyze_seconds')['count'] == 120
+        assert series(recorded_metrics, 'frame_encode_seconds')['count'] == len(frames)
+        written = sum((temp_dir / f"frame_{i}.png").stat().st_size for i in range(1, len(frames) + 1))
+        assert series(recorded_metrics, 'frame_bytes_written_total')['value'] == written
+        assert series(recorded_metrics, 'frames_sampled_total')['value'] == 120
+        assert series(recorded_metrics, 'extraction_stage_seconds_total', stage='decode')['value'] > 0
+
+    def test_api_latency_and_retries(self, recorded_metrics):
+        class FlakyRequest:
+            calls = 0
+
+            def execute(self):
+                self.calls += 1
+                if self.calls == 1:
+                    raise HttpError(httplib2.Response({'status': '503'}), b'{}')
+                return {}
+
+        RateLimiter('drive', 1000, backoff_max=0.001).execute(FlakyRequest())
+
+        assert series(recorded_metrics, 'api_request_seconds', api='drive')['count'] == 2
+        assert series(recorded_metrics, 'api_requests_total', api='drive', outcome='error')['value'] == 1
+        assert series(recorded_metrics, 'api_requests_total', api='drive', outcome='ok')['value'] == 1
+        assert series(recorded_metrics, 'api_retries_total', api='drive')['value'] == 1
+
+    def test_services_count_uploads_and_slides(self, recorded_metrics, drive_backend, slides_backend,
+                                               frame_files):
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        urls = drive.upload_images(frame_files + frame_files[:2], "folder", concurrency=4)
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        slides.batch_add_slides("deck", urls, chunk_size=5)
+
+        assert series(recorded_metrics, 'drive_uploads_total')['value'] == 12
+        assert series(recorded_metrics, 'drive_uploads_reused_total')['value'] == 2
+        uploaded = sum(len(open(path, 'rb').read()) for path in frame_files)
+        assert series(recorded_metrics, 'drive_upload_bytes_total')['value'] == uploaded
+        assert series(recorded_metrics, 'slides_created_total')['value'] == 14
+        assert series(recorded_metrics, 'api_request_seconds', api='slides')['count'] == 3
@@ -0,0 +1,153 @@
+import pytest
+import threading
+import numpy as np
+from src.core.exceptions import FrameExtractionError
+import cv2
+from src.core.pipeline import (
+    FrameBufferPool, FrameEncoderPool, FrameEncoding, FrameWriterPool, StageTimings, prefetch, timed_decode
+)
+
+class TestPrefetch:
+    def test_yields_items_in_order(self):
+        timings = StageTimings()
+        items = list(prefetch(iter(range(50)), queue_size=4, timings=timings))
+        
+        assert items == list(range(50))
+        assert timings.max_queue_depth <= 4
+    
+    def test_reraises_decoder_errors(self):
+        def failing():
+            yield 1
+            raise RuntimeError("decoder broke")
+        
+        with pytest.raises(RuntimeError, match="decoder broke"):
+            list(prefetch(failing(), queue_size=2, timings=StageTimings()))
+    
+    def test_closing_early_stops_decoder_thread(self):
+        def endless():
+            i = 0
+            while True:
+                yield i
+                i += 1
+        
+        samples = prefetch(endless(), queue_size=2, timings=StageTimings())
+        assert next(samples) == 0
+        samples.close()
+        
+        assert not any(t.name == 'frame-decoder' for t in threading.enumerate())
+    
+    def test_timed_decode_accumulates_time(self):
+        timings = StageTimings()
+        assert list(timed_decode(iter([1, 2, 3]), timings)) == [1, 2, 3]
+        assert timings.decode_time >= 0.0
+
+class TestFrameBufferPool:
+    def test_released_buffers_are_reused(self):
+        pool = FrameBufferPool(2)
+        assert pool.acquire() is None
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        pool.release(frame)
+        
+        assert pool.acquire() is frame
+        assert pool.acquire() is None
+        assert pool.allocations == 2
+    
+    def test_acquire_waits_for_a_free_slot(self):
+        pool = FrameBufferPool(1)
+        pool.acquire()
+        acquired = threading.Event()
+        waiter = threading.Thread(target=lambda: (pool.acquire(), acquired.set()))
+        waiter.start()
+        
+        assert not acquired.wait(0.1)
+        pool.detach()
+        assert acquired.wait(1.0)
+        waiter.join()
+
+class TestFrameWriterPool:
+    def test_writes_all_frames(self, temp_dir):
+        timings = StageTimings()
+        pool = FrameWriterPool(threads=3, max_pending=2, timings=timings)
+        frame = np.zeros((16, 16, 3), dtype=np.uint8)
+        
+        for i in range(10):
+            pool.submit(str(temp_dir / f"frame_{i}.png"), frame)
+        pool.close()
+        
+        assert len(list(temp_dir.glob("*.png"))) == 10
+        assert timings.max_pending_writes <= 2
+    
+    def test_failed_write_raises_error(self, temp_dir):
+        pool = FrameWriterPool(threads=1, max_pending=1, timings=StageTimings())
+        pool.submit(str(temp_dir / "missing" / "frame.png"), np.zeros((4, 4, 3), dtype=np.uint8))
+        
+        with pytest.raises(FrameExtractionError):
+            pool.close()
+
+class TestFrameEncoding:
+    @pytest.mark.parametrize("format,extension", [('png', '.png'), ('jpeg', '.jpg'), ('webp', '.webp')])
+    def test_writes_requested_format(self, temp_dir, format, extension):
+        pool = FrameWriterPool(threads=0, max_pending=1, timings=StageTimings(),
+                               encoding=FrameEncoding(format, quality=80))
+        path = temp_dir / f"frame{pool.encoding.extension}"
+        pool.submit(str(path), np.full((32, 48, 3), 128, dtype=np.uint8))
+        
+        assert pool.encoding.extension == extension
+        assert cv2.imread(str(path)).shape == (32, 48, 3)
+    
+    def test_lower_quality_gives_smaller_files(self):
+        frame = np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+        sizes = [len(cv2.imencode('.jpg', frame, FrameEncoding('jpeg', quality).params)[1])
+                 for quality in (95, 40)]
+        
+        assert sizes[1] < sizes[0]
+    
+    def test_downscales_to_max_width(self, temp_dir):
+        pool = FrameWriterPool(threads=1, max_pending=1, timings=StageTimings(),
+                               encoding=FrameEncoding(max_width=60))
+        pool.submit(str(temp_dir / "wide.png"), np.zeros((90, 120, 3), dtype=np.uint8))
+        pool.submit(str(temp_dir / "narrow.png"), np.zeros((30, 40, 3), dtype=np.uint8))
+        pool.close()
+        
+        assert cv2.imread(str(temp_dir / "wide.png")).shape == (45, 60, 3)
+        assert cv2.imread(str(temp_dir / "narrow.png")).shape == (30, 40, 3)
+    
+    @pytest.mark.parametrize("options", [
+        {'format': 'gif'}, {'quality': 0}, {'png_compression': 10}, {'max_width': -1}
+    ])
+    def test_invalid_options_raise_error(self, options):
+        with pytest.raises(ValueError):
+            FrameEncoding(**options)
+    
+    def test_create_maps_defaults_to_none(self):
+        encoding = FrameEncoding.create('png', 90, -1, 0)
+        assert encoding.png_compression is None and encoding.max_width is None
+        assert encoding.params == []
+
+class TestFrameEncoderPool:
+    def test_hands_encoded_frames_to_consumer(self, temp_dir):
+        received = {}
+        lock = threading.Lock()
+        
+        def consume(name, data):
+            with lock:
+                received[name] = data
+        
+        pool = FrameEncoderPool(threads=2, max_pending=2, timings=StageTimings(), consumer=consume)
+        for i in range(5):
+            pool.submit(f"frame_{i}.png", np.full((8, 8, 3), i * 40, dtype=np.uint8))
+        pool.close()
+        
+        assert sorted(received) == [f"frame_{i}.png" for i in range(5)]
+        assert all(data.startswith(b"\x89PNG") for data in received.values())
+        assert not list(temp_dir.iterdir())
+    
+    def test_consumer_errors_are_reraised(self):
+        def consume(name, data):
+            raise RuntimeError("upload broke")
+        
+        pool = FrameEncoderPool(threads=1, max_pending=1, timings=StageTimings(), consumer=consume)
+        pool.submit("frame.png", np.zeros((4, 4, 3), dtype=np.uint8))
+        
+        with pytest.raises(RuntimeError, match="upload broke"):
+            pool.close()
@@ -0,0 +1,182 @@
+import pytest
+import cv2
+import numpy as np
+from src.core.exceptions import VideoDownloadError
+from src.core.frame_extractor import DifferenceFrameExtractor
+from src.core.progressive import ProgressiveServer, RangedDownload, content_length
+from src.core.video_downloader import VideoDownloader
+from tests.http_fakes import VideoOrigin
+
+CHUNK = 64 * 1024
+
+@pytest.fixture
+def noisy_video(temp_dir):
+    """A 2 MB video (random frames compress badly), written with its index at the end"""
+    path = temp_dir / "noisy.mp4"
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 10.0, (320, 240))
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        out.write(rng.integers(0, 255, (240, 320, 3), dtype=np.uint8))
+    out.release()
+    return path
+
+class TestRangedDownload:
+    def test_parallel_ranges_reassemble_the_file(self, noisy_video, temp_dir):
+        with VideoOrigin(noisy_video, bytes_per_second=4e6) as origin:
+            download = RangedDownload(origin.url, temp_dir / "out" / "video.mp4", connections=4, chunk_size=CHUNK)
+            path = download.start().finish()
+
+        assert path.read_bytes() == noisy_video.read_bytes()
+        assert origin.max_in_flight > 1
+        assert not download.part_path.exists() and not download.state_path.exists()
+
+    def test_content_length_from_range_request(self, noisy_video):
+        with VideoOrigin(noisy_video) as origin:
+            assert content_length(origin.url) == noisy_video.stat().st_size
+
+    def test_interrupted_download_continues(self, noisy_video, temp_dir):
+        target = temp_dir / "out" / "video.mp4"
+        with VideoOrigin(noisy_video, fail_after=5 * CHUNK) as origin:
+            download = RangedDownload(origin.url, target, connections=1, chunk_size=CHUNK, max_retries=0)
+            with pytest.raises(VideoDownloadError):
+                download.start().finish()
+            download.close()
+
+        with VideoOrigin(noisy_video) as origin:
+            resumed = RangedDownload(origin.url, target, noisy_video.stat().st_size, connections=2, chunk_size=CHUNK)
+            resumed.start().finish()
+
+        assert resumed.reused_chunks == 5
+        assert min(start for start, end in origin.ranges) == 5 * CHUNK
+        assert target.read_bytes() == noisy_video.read_bytes()
+
+    def test_waiting_reader_moves_its_chunks_first(self, noisy_video, temp_dir):
+        size = noisy_video.stat().st_size
+        with VideoOrigin(noisy_video, bytes_per_second=2e6) as origin:
+            download = RangedDownload(origin.url, temp_dir / "video.mp4", connections=1, chunk_size=CHUNK)
+            download.start()
+            tail = download.read(size - 100, 100)
+            fetched_first = list(origin.ranges[:3])
+            download.close()
+
+        assert tail == noisy_video.read_bytes()[-100:]
+        assert any(start >= size - CHUNK for start, end in fetched_first)
+
+class TestProgressiveServer:
+    def test_decoding_starts_before_the_download_ends(self, noisy_video, temp_dir):
+        with VideoOrigin(noisy_video, bytes_per_second=1e6) as origin:
+            download = RangedDownload(origin.url, temp_dir / "video.mp4", connections=2, chunk_size=CHUNK)
+            server = ProgressiveServer(download).start()
+            download.start()
+            try:
+                cap = cv2.VideoCapture(server.url)
+                ok, frame = cap.read()
+                complete_at_first_frame = download.complete
+                frames = 1
+                while cap.read()[0]:
+                    frames += 1
+                cap.release()
+            finally:
+                server.close()
+            download.finish()
+
+        assert ok and frame.shape == (240, 320, 3)
+        assert not complete_at_first_frame
+        assert frames == 100
+
+    def test_extraction_matches_the_downloaded_file(self, slides_video, temp_dir):
+        expected = DifferenceFrameExtractor(temp_dir / "local", show_progress=False)
+        expected_indices = [r.frame_index for r in expected.iter_frames(str(slides_video), threshold=5.0,
+                                                                          interval=1, save=False)]
+        with VideoOrigin(slides_video, bytes_per_second=1e6) as origin:
+            download = RangedDownload(origin.url, temp_dir / "video.mp4", connections=3, chunk_size=16 * 1024)
+            server = ProgressiveServer(download).start()
+            download.start()
+            try:
+                extractor = DifferenceFrameExtractor(temp_dir / "progressive", show_progress=False)
+                records = list(extractor.iter_frames(server.url, threshold=5.0, interval=1, save=False))
+            finally:
+                server.close()
+                download.close()
+
+        assert [r.frame_index for r in records] == expected_indices
+
+    def test_parallel_extraction_does_not_probe_a_growing_file(self, slides_video, temp_dir, monkeypatch):
+        expected = DifferenceFrameExtractor(temp_dir / "local", show_progress=False)
+        expected_indices = [r.frame_index for r in expected.iter_frames(str(slides_video), threshold=5.0,
+                                                                          interval=1, save=False)]
+        monkeypatch.setattr('src.core.frame_extractor.probe_keyframes',
+                            lambda video_path: pytest.fail("probed the whole stream"))
+        with VideoOrigin(slides_video, bytes_per_second=1e6) as origin:
+            download = RangedDownload(origin.url, temp_dir / "video.mp4", connections=3, chunk_size=16 * 1024)
+            server = ProgressiveServer(download).start()
+            download.start()
+            try:
+                extractor = DifferenceFrameExtractor(temp_dir / "progressive", show_progress=False, workers=2)
+                records = list(extractor.iter_frames(server.url, threshold=5.0, interval=1))
+            finally:
+                server.close()
+                download.close()
+
+        assert [r.frame_index for r in records] == expected_indices
+
+    def test_range_responses(self, noisy_video, temp_dir):
+        import urllib.request
+        with VideoOrigin(noisy_video) as origin:
+            download = RangedDownload(origin.url, temp_dir / "video.mp4", chunk_size=CHUNK)
+            server = ProgressiveServer(download).start()
+            download.start()
+            try:
+                request = urllib.request.Request(server.url, headers={'Range': 'bytes=100-199'})
+                with urllib.request.urlopen(request) as response:
+                    assert response.status == 206
+                    assert response.headers['Content-Range'] == f"bytes 100-199/{download.size}"
+                    assert response.read() == noisy_video.read_bytes()[100:200]
+            finally:
+                server.close()
+                download.close()
+
+class TestVideoDownloader:
+    URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+    def test_reuses_download_by_video_id(self, temp_dir, monkeypatch):
+        (temp_dir / "dQw4w9WgXcQ.mp4").write_bytes(b"video")
+        monkeypatch.setattr('src.core.video_downloader.YouTube', lambda url: pytest.fail("fetched again"))
+        downloader = VideoDownloader(temp_dir)
+
+        assert downloader.download_from_youtube(self.URL) == str(temp_dir / "dQw4w9WgXcQ.mp4")
+        ingest = downloader.open_progressive("https://youtu.be/dQw4w9WgXcQ")
+        assert ingest.source == str(temp_dir / "dQw4w9WgXcQ.mp4")
+
+    def test_progressive_ingest_of_stream(self, noisy_video, temp_dir, monkeypatch):
+        with VideoOrigin(noisy_video, bytes_per_second=2e6) as origin:
+            class Stream:
+                url = origin.url
+                filesize = noisy_video.stat().st_size
+
+            class FakeYouTube:
+                def __init__(self, url):
+                    self.streams = self
+
+                def filter(self, **options):
+                    return self
+
+                def first(self):
+                    return Stream()
+
+            monkeypatch.setattr('src.core.video_downloader.YouTube', FakeYouTube)
+            ingest = VideoDownloader(temp_dir, connections=2, chunk_size=CHUNK).open_progressive(self.URL)
+            try:
+                cap = cv2.VideoCapture(ingest.source)
+                assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 100
+                cap.release()
+                path = ingest.finish()
+            finally:
+                ingest.close()
+
+        assert path == temp_dir / "dQw4w9WgXcQ.mp4"
+        assert path.read_bytes() == noisy_video.read_bytes()
+
+    def test_rejects_non_youtube_url(self, temp_dir):
+        with pytest.raises(VideoDownloadError):
+            VideoDownloader(temp_dir).video_path("https://example.com/video.mp4")
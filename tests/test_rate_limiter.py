@@ -0,0 +1,174 @@
+import pytest
+import httplib2
+from googleapiclient.errors import HttpError
+from src.core.exceptions import GoogleAPIError
+from src.services.google_drive import GoogleDriveService
+from src.services.google_slides import GoogleSlidesService
+from src.services.rate_limiter import RateLimiter, TokenBucket, is_retryable, retry_after_seconds
+from tests.google_fakes import FakeDriveBackend
+
+class FakeClock:
+    """Monotonic clock advanced by the limiter's own sleeps"""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def http_error(status, retry_after=None):
+    headers = {'status': str(status)}
+    if retry_after is not None:
+        headers['retry-after'] = retry_after
+    return HttpError(httplib2.Response(headers), b'{}')
+
+class FlakyRequest:
+    """Request that raises the given errors before succeeding"""
+    
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+    
+    def execute(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'ok': True}
+
+def limiter(clock, **kwargs):
+    options = dict(requests_per_second=10, max_retries=3, backoff_base=1.0, backoff_max=30.0,
+                   sleep=clock.sleep, clock=clock)
+    options.update(kwargs)
+    return RateLimiter('test', **options)
+
+class TestTokenBucket:
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+        
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(0.5)
+    
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+        bucket.reserve(2)
+        clock.now += 1.0
+        
+        assert bucket.reserve(2) == 0.0
+
+class TestRateLimiter:
+    def test_paces_requests_at_configured_rate(self):
+        clock = FakeClock()
+        rl = limiter(clock, requests_per_second=5, burst=1)
+        for _ in range(11):
+            rl.execute(FlakyRequest())
+        
+        assert clock.now == pytest.approx(2.0)
+        assert rl.stats.throttled_time == pytest.approx(2.0)
+    
+    def test_retries_server_errors(self):
+        clock = FakeClock()
+        rl = limiter(clock)
+        request = FlakyRequest(http_error(503), http_error(500))
+        
+        assert rl.execute(request) == {'ok': True}
+        assert request.calls == 3
+        assert rl.stats.retries == 2
+    
+    def test_honors_retry_after(self):
+        clock = FakeClock()
+        rl = limiter(clock)
+        rl.execute(FlakyRequest(http_error(429, retry_after='7')))
+        
+        assert 7.0 in clock.sleeps
+    
+    def test_backs_off_on_quota_errors(self):
+        clock = FakeClock()
+        rl = limiter(clock, requests_per_second=8)
+        rl.execute(FlakyRequest(http_error(429), http_error(429)))
+        
+        assert rl.rate < 8
+        for _ in range(40):
+            rl.execute(FlakyRequest())
+        assert rl.rate == 8
+    
+    def test_gives_up_after_max_retries(self):
+        clock = FakeClock()
+        rl = limiter(clock, max_retries=2)
+        request = FlakyRequest(*[http_error(503)] * 5)
+        
+        with pytest.raises(HttpError):
+            rl.execute(request)
+        assert request.calls == 3
+    
+    def test_client_errors_are_not_retried(self):
+        clock = FakeClock()
+        rl = limiter(clock)
+        request = FlakyRequest(http_error(404))
+        
+        with pytest.raises(HttpError):
+            rl.execute(request)
+        assert request.calls == 1
+    
+    def test_non_idempotent_calls_retry_only_throttling_and_transport_errors(self):
+        clock = FakeClock()
+        rl = limiter(clock)
+        retried = FlakyRequest(http_error(429), ConnectionResetError())
+        failed = FlakyRequest(http_error(503))
+        
+        assert rl.execute(retried, idempotent=False) == {'ok': True}
+        with pytest.raises(HttpError):
+            rl.execute(failed, idempotent=False)
+        assert (retried.calls, failed.calls) == (3, 1)
+    
+    def test_error_classification(self):
+        assert is_retryable(http_error(429))
+        assert is_retryable(ConnectionResetError())
+        assert not is_retryable(http_error(403))
+        assert is_retryable(http_error(429), idempotent=False)
+        assert not is_retryable(http_error(500), idempotent=False)
+        assert retry_after_seconds(http_error(429, retry_after='2.5')) == 2.5
+        assert retry_after_seconds(http_error(429)) is None
+
+class TestServicesRetry:
+    def test_drive_upload_survives_throttling(self, frame_files):
+        clock = FakeClock()
+        backend = FakeDriveBackend()
+        backend.fail_next(3, status=429, pattern=r'/upload/drive/v3/files', retry_after='1')
+        backend.fail_next(2, status=503, pattern=r'/permissions')
+        drive = GoogleDriveService(http_factory=backend.http, rate_limiter=limiter(clock))
+        
+        urls = drive.upload_images(frame_files, "folder", concurrency=3)
+        
+        assert len(urls) == 12
+        assert len(backend.files) == 12
+        assert set(backend.permissions) == set(backend.files)
+        assert drive.limiter.stats.retries == 4
+    
+    def test_slides_retry_throttled_batch_update(self, slides_backend):
+        clock = FakeClock()
+        slides_backend.fail_next(2, status=429, pattern=r':batchUpdate')
+        slides = GoogleSlidesService(http_factory=slides_backend.http, rate_limiter=limiter(clock))
+        
+        created = slides.batch_add_slides("deck", [f"https://example.com/{i}.png" for i in range(10)],
+                                          chunk_size=5)
+        
+        assert len(created) == 10
+        assert slides.limiter.stats.retries == 2
+    
+    def test_drive_upload_is_not_resent_after_server_error(self, frame_files):
+        clock = FakeClock()
+        backend = FakeDriveBackend()
+        backend.fail_next(1, status=503, pattern=r'/upload/drive/v3/files')
+        drive = GoogleDriveService(http_factory=backend.http, rate_limiter=limiter(clock))
+        
+        with pytest.raises(GoogleAPIError):
+            drive.upload_images(frame_files[:1], "folder", concurrency=1)
+        assert backend.count(r'/upload/drive/v3/files') == 1
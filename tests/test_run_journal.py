@@ -0,0 +1,133 @@
+import json
+import pytest
+import cv2
+import numpy as np
+from pathlib import Path
+from src.core.frame_extractor import DifferenceFrameExtractor, IntervalFrameExtractor, ResumePoint
+from src.core.run_journal import RunJournal
+from src.services.google_drive import GoogleDriveService
+from src.services.google_slides import GoogleSlidesService
+
+def interrupted_journal(journal, keep_frames, keep_checkpoints=False):
+    """Cut a finished journal back to its first ``keep_frames`` frames and delete the later files"""
+    lines = journal.path.read_text().splitlines()
+    kept = []
+    for line in lines:
+        record = json.loads(line)
+        if record['event'] == 'frame' and record['number'] > keep_frames:
+            Path(record['path']).unlink()
+            continue
+        if record['event'] == 'checkpoint' and (not keep_checkpoints or record['frames_saved'] > keep_frames):
+            continue
+        if record['event'] == 'extracted':
+            break
+        kept.append(line)
+    journal.path.write_text("\n".join(kept) + "\n")
+
+class TestRunJournal:
+    def test_replays_recorded_work(self, temp_dir):
+        journal = RunJournal(temp_dir / "runs" / "talk.jsonl")
+        journal.start({'video_path': 'talk.mp4'})
+        journal.record_frame(1, 0, "talk_1.png")
+        journal.record_frame(2, 30, "talk_2.png")
+        journal.record_extracted(["talk_1.png", "talk_2.png"])
+        journal.record_upload("talk_1.png", "file1")
+        journal.record_slides(["talk_1.png"], ["slide1"])
+        journal.close()
+        
+        state = journal.load()
+        
+        assert state.params == {'video_path': 'talk.mp4'}
+        assert state.extracted == ["talk_1.png", "talk_2.png"]
+        assert state.file_ids() == {"talk_1.png": "file1"}
+        assert state.slide_ids() == {"talk_1.png": "slide1"}
+        assert not state.uploaded and not state.completed
+    
+    def test_ignores_line_cut_short(self, temp_dir):
+        journal = RunJournal(temp_dir / "talk.jsonl")
+        journal.start({})
+        journal.record_upload("talk_1.png", "file1")
+        journal.close()
+        with open(journal.path, 'a') as f:
+            f.write('{"event": "upload", "path": "talk_2.p')
+        
+        assert journal.load().file_ids() == {"talk_1.png": "file1"}
+    
+    def test_resume_point_skips_missing_and_truncated_frames(self, temp_dir):
+        journal = RunJournal(temp_dir / "talk.jsonl")
+        journal.start({})
+        for number in range(1, 5):
+            path = temp_dir / f"talk_{number}.png"
+            cv2.imwrite(str(path), np.full((32, 32, 3), number * 40, dtype=np.uint8))
+            journal.record_frame(number, number * 10, str(path))
+        journal.close()
+        # Frame 3 was cut short by the crash
+        (temp_dir / "talk_3.png").write_bytes((temp_dir / "talk_3.png").read_bytes()[:20])
+        
+        assert journal.load().resume_point() == ResumePoint(20, 2)
+    
+    def test_checkpoint_moves_resume_point_past_last_frame(self, temp_dir):
+        journal = RunJournal(temp_dir / "talk.jsonl", checkpoint_interval=0)
+        journal.start({})
+        path = temp_dir / "talk_1.png"
+        cv2.imwrite(str(path), np.zeros((8, 8, 3), dtype=np.uint8))
+        journal.record_frame(1, 0, str(path))
+        journal.record_checkpoint(90, 1)
+        journal.record_checkpoint(120, 2)
+        journal.close()
+        
+        assert journal.load().resume_point() == ResumePoint(90, 1)
+
+class TestResumedExtraction:
+    @pytest.mark.parametrize("keep_frames,keep_checkpoints", [(3, False), (3, True), (0, False)])
+    def test_diff_resume_matches_uninterrupted_run(self, slides_video, temp_dir, keep_frames, keep_checkpoints):
+        reference = DifferenceFrameExtractor(output_dir=temp_dir / "reference", show_progress=False).extract(
+            str(slides_video), threshold=5.0, interval=3)
+        
+        journal = RunJournal(temp_dir / "run.jsonl", checkpoint_interval=0)
+        journal.start({})
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir / "resumed", show_progress=False)
+        extractor.extract(str(slides_video), threshold=5.0, interval=3,
+                          on_saved=journal.record_frame, checkpoint=journal.record_checkpoint)
+        journal.close()
+        interrupted_journal(journal, keep_frames, keep_checkpoints)
+        
+        resumed = extractor.extract(str(slides_video), threshold=5.0, interval=3,
+                                    resume=journal.load().resume_point())
+        
+        assert [Path(p).name for p in resumed] == [Path(p).name for p in reference]
+        for expected, actual in zip(reference, resumed):
+            assert np.array_equal(cv2.imread(expected), cv2.imread(actual))
+    
+    def test_interval_resume(self, sample_video, temp_dir):
+        journal = RunJournal(temp_dir / "run.jsonl")
+        journal.start({})
+        extractor = IntervalFrameExtractor(output_dir=temp_dir, show_progress=False)
+        assert len(extractor.extract(str(sample_video), interval=4, on_saved=journal.record_frame)) == 8
+        journal.close()
+        interrupted_journal(journal, 5)
+        
+        resumed = extractor.extract(str(sample_video), interval=4, resume=journal.load().resume_point())
+        
+        assert [Path(p).name for p in resumed] == [f"frame_{n}.png" for n in range(1, 9)]
+
+class TestResumedUploads:
+    def test_recorded_uploads_are_not_repeated(self, drive_backend, frame_files):
+        drive = GoogleDriveService(http_factory=drive_backend.http)
+        recorded = {}
+        first = drive.upload_images(frame_files[:5], "folder", on_uploaded=recorded.__setitem__)
+        
+        urls = drive.upload_images(frame_files, "folder", existing=recorded)
+        
+        assert urls[:5] == first
+        assert drive_backend.count(r"/upload/drive/v3/files") == 12
+        assert set(drive_backend.permissions) == set(drive_backend.files)
+    
+    def test_created_slides_are_reported_per_call(self, slides_backend):
+        slides = GoogleSlidesService(http_factory=slides_backend.http)
+        calls = []
+        created = slides.batch_add_slides("deck", [f"https://example.com/{i}.png" for i in range(7)],
+                                          chunk_size=3, on_created=lambda start, ids: calls.append((start, ids)))
+        
+        assert [start for start, _ in calls] == [0, 3, 6]
+        assert [slide_id for _, ids in calls for slide_id in ids] == created
@@ -0,0 +1,161 @@
+import pytest
+import cv2
+import numpy as np
+from src.core.frame_extractor import (
+    DifferenceFrameExtractor,
+    FrameExtractorFactory,
+    ResumePoint,
+    SceneChangeFrameExtractor
+)
+from src.core.scene import (
+    FrameSignature,
+    SceneChangeDetector,
+    SceneChangeSettings,
+    block_ssim,
+    edge_change,
+    histogram_distance
+)
+
+def _slide(bullets: int, background: int = 235, text: int = 30, faint_bullet: bool = False) -> np.ndarray:
+    frame = np.full((180, 320), background, dtype=np.uint8)
+    cv2.putText(frame, "Slide title", (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.9, text, 2)
+    for i in range(bullets):
+        cv2.putText(frame, f"- bullet {i} of the slide", (30, 70 + 25 * i), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5, text, 1)
+    if faint_bullet:
+        cv2.putText(frame, "- faint build step", (30, 70 + 25 * bullets), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5, background - 16, 1)
+    return frame
+
+def _noisy(frame: np.ndarray, seed: int) -> np.ndarray:
+    noise = np.random.default_rng(seed).normal(0, 1.5, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+@pytest.fixture
+def transition_video(temp_dir):
+    """Four noisy slides joined by 6-frame crossfades; slide 2 adds a bullet to slide 1.
+
+    Slides settle at frames 0, 26, 52 and 78.
+    """
+    video_path = temp_dir / "transitions.mp4"
+    slides = [_slide(2), _slide(3), _slide(1, background=60, text=220), _slide(4)]
+    out = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*'mp4v'), 10.0, (320, 180))
+    index = 0
+    for number, slide in enumerate(slides):
+        if number:
+            for step in range(1, 7):
+                blend = cv2.addWeighted(slides[number - 1], 1 - step / 7, slide, step / 7, 0)
+                out.write(cv2.cvtColor(_noisy(blend, index), cv2.COLOR_GRAY2BGR))
+                index += 1
+        for _ in range(20):
+            out.write(cv2.cvtColor(_noisy(slide, index), cv2.COLOR_GRAY2BGR))
+            index += 1
+    out.release()
+    return video_path
+
+class TestMetrics:
+    def test_noise_does_not_register(self):
+        a, b = FrameSignature.of(_noisy(_slide(3), 1)), FrameSignature.of(_noisy(_slide(3), 2))
+
+        assert histogram_distance(a, b) < 0.05
+        assert edge_change(a, b) < 0.025
+        assert 1 - block_ssim(a.gray, b.gray).min() < 0.1
+
+    def test_new_bullet_changes_edges(self):
+        a, b = FrameSignature.of(_noisy(_slide(3), 1)), FrameSignature.of(_noisy(_slide(4), 2))
+        assert edge_change(a, b) > 0.05
+
+    def test_background_change_moves_histogram(self):
+        a = FrameSignature.of(_slide(3))
+        b = FrameSignature.of(_slide(3, background=60, text=220))
+        assert histogram_distance(a, b) > 0.5
+
+    def test_faint_build_is_caught_by_block_ssim(self):
+        a = FrameSignature.of(_noisy(_slide(3), 1))
+        b = FrameSignature.of(_noisy(_slide(3, faint_bullet=True), 2))
+
+        assert edge_change(a, b) < 0.05
+        assert 1 - block_ssim(a.gray, b.gray).min() > 0.1
+
+    def test_block_ssim_grid_shape(self):
+        image = _slide(2)
+        cells = block_ssim(image, image, blocks=(4, 3))
+
+        assert cells.shape == (3, 4)
+        assert np.allclose(cells, 1.0)
+
+class TestSceneChangeDetector:
+    def test_saves_once_picture_settles(self):
+        detector = SceneChangeDetector(SceneChangeSettings(stable_samples=2))
+        frames = [_slide(2)] * 4 + [_slide(5, background=60, text=220)] * 4
+
+        saves = [detector.update(frame)[0] for frame in frames]
+
+        assert saves == [False, False, True, False, False, False, True, False]
+
+    def test_skips_transitions(self):
+        detector = SceneChangeDetector(SceneChangeSettings(stable_samples=1))
+        old, new = _slide(2), _slide(1, background=60, text=220)
+        fade = [cv2.addWeighted(old, 1 - t / 5, new, t / 5, 0) for t in range(1, 5)]
+
+        saves = [detector.update(frame)[0] for frame in [old, old] + fade + [new, new]]
+
+        assert saves == [False, True, False, False, False, False, False, True]
+
+    def test_zero_stable_samples_saves_at_the_change(self):
+        detector = SceneChangeDetector(SceneChangeSettings(stable_samples=0))
+        saves = [detector.update(frame)[0] for frame in [_slide(2), _slide(2), _slide(3)]]
+        assert saves == [True, False, True]
+
+    def test_returning_to_saved_picture_cancels_pending_change(self):
+        detector = SceneChangeDetector(SceneChangeSettings(stable_samples=2))
+        frames = [_slide(2)] * 3 + [_slide(4)] + [_slide(2)] * 3
+
+        assert sum(detector.update(frame)[0] for frame in frames) == 1
+
+    def test_ssim_is_optional(self):
+        frames = [_noisy(_slide(3), 1), _noisy(_slide(3), 2),
+                  _noisy(_slide(3, faint_bullet=True), 3), _noisy(_slide(3, faint_bullet=True), 4)]
+        without = SceneChangeDetector(SceneChangeSettings())
+        with_ssim = SceneChangeDetector(SceneChangeSettings(ssim_threshold=0.1))
+
+        assert sum(without.update(frame)[0] for frame in frames) == 1
+        assert sum(with_ssim.update(frame)[0] for frame in frames) == 2
+
+    @pytest.mark.parametrize("options", [
+        {'histogram_threshold': 0}, {'ssim_threshold': -1}, {'stable_samples': -1}, {'settle_ratio': 2}
+    ])
+    def test_invalid_settings_raise_error(self, options):
+        with pytest.raises(ValueError):
+            SceneChangeSettings(**options)
+
+class TestSceneChangeFrameExtractor:
+    def test_one_frame_per_settled_slide(self, transition_video, temp_dir):
+        extractor = SceneChangeFrameExtractor(temp_dir / "scene", show_progress=False)
+        records = list(extractor.iter_frames(str(transition_video), interval=2, stable_samples=1))
+
+        assert len(records) == 4
+        assert [r.frame_index for r in records] == [2, 28, 54, 80]
+        assert all(r.score > 1 for r in records[1:])
+        assert extractor.last_stats.video_fps > 10  # faster than real time
+    
+    def test_resume_continues_after_last_sample(self, transition_video, temp_dir):
+        extractor = SceneChangeFrameExtractor(temp_dir, show_progress=False)
+        full = extractor.extract(str(transition_video), interval=2, prefix="full")
+        saved = []
+        resumed = extractor.extract(str(transition_video), interval=2, prefix="full",
+                                    resume=ResumePoint(frame_index=40, frames_saved=2),
+                                    on_saved=lambda number, frame_index, path: saved.append(frame_index))
+        
+        assert resumed == full
+        assert saved == [54, 80]
+
+    def test_difference_mode_fires_during_transitions(self, transition_video, temp_dir):
+        extractor = DifferenceFrameExtractor(temp_dir / "diff", show_progress=False)
+        frames = extractor.extract(str(transition_video), threshold=5.0, interval=2)
+
+        assert len(frames) > 4
+
+    def test_factory_creates_scene_extractor(self):
+        assert isinstance(FrameExtractorFactory.create('scene', show_progress=False),
+                          SceneChangeFrameExtractor)
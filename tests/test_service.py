@@ -0,0 +1,188 @@
+import json
+import time
+import urllib.error
+import urllib.request
+import pytest
+from src.core.exceptions import ServiceBusyError
+from src.service import InboxWatcher, JobServer, JobService, JobSpec
+from src.services.google_drive import GoogleDriveService
+from src.services.google_slides import GoogleSlidesService
+
+
+@pytest.fixture(autouse=True)
+def no_timeline_cache(monkeypatch):
+    monkeypatch.setattr('src.service.settings.TIMELINE_CACHE_ENABLED', False)
+
+
+@pytest.fixture
+def service(temp_dir, drive_backend, slides_backend):
+    service = JobService(workers=2, queue_size=4, output_dir=temp_dir / "frames",
+                         drive_factory=lambda: GoogleDriveService(http_factory=drive_backend.http),
+                         slides_factory=lambda: GoogleSlidesService(http_factory=slides_backend.http))
+    yield service
+    service.close()
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def request(url, data=None):
+    body = None if data is None else json.dumps(data).encode()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, body)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestJobSpec:
+    def test_needs_exactly_one_source(self):
+        with pytest.raises(ValueError):
+            JobSpec.from_dict({})
+        with pytest.raises(ValueError):
+            JobSpec.from_dict({"file": "a.mp4", "url": "https://youtu.be/x"})
+
+    def test_rejects_unknown_fields_and_modes(self):
+        with pytest.raises(ValueError):
+            JobSpec.from_dict({"file": "a.mp4", "treshold": 5})
+        with pytest.raises(ValueError):
+            JobSpec.from_dict({"file": "a.mp4", "mode": "fast"})
+        with pytest.raises(ValueError):
+            JobSpec.from_dict({"file": "a.mp4", "slides": "yes"})
+
+
+class TestJobService:
+    def test_extracts_frames(self, service, slides_video):
+        service.start()
+        job = service.submit(JobSpec(file=str(slides_video), options={"threshold": 5.0, "interval": 1}))
+        wait_for(lambda: job.status in ('done', 'failed'))
+
+        assert job.status == 'done', job.error
+        assert job.frames == 8
+        assert len(list((service.output_dir / job.prefix).glob("*.png"))) == 8
+        assert service.status()['jobs']['done'] == 1
+
+    def test_uploads_and_adds_slides_with_warm_clients(self, service, slides_video, drive_backend, slides_backend):
+        service.start()
+        jobs = [service.submit(JobSpec(file=str(slides_video), prefix=f"talk_{i}", upload=True, slides=True,
+                                       presentation_id="deck", folder_id="folder",
+                                       options={"threshold": 5.0, "interval": 1}))
+                for i in range(2)]
+        wait_for(lambda: all(job.status in ('done', 'failed') for job in jobs))
+
+        assert [job.status for job in jobs] == ['done', 'done'], [job.error for job in jobs]
+        assert [job.slides for job in jobs] == [8, 8]
+        assert len(slides_backend.presentations["deck"]["slides"]) == 16
+        assert len(drive_backend.files) == 16
+
+    def test_missing_video_fails_the_job(self, service, temp_dir):
+        service.start()
+        job = service.submit(JobSpec(file=str(temp_dir / "missing.mp4")))
+        wait_for(lambda: job.status in ('done', 'failed'))
+
+        assert job.status == 'failed'
+        assert "missing.mp4" in job.error
+
+    def test_full_queue_refuses_jobs(self, service, slides_video):
+        spec = JobSpec(file=str(slides_video))
+        for _ in range(4):
+            service.submit(spec)
+
+        with pytest.raises(ServiceBusyError):
+            service.submit(spec)
+        assert service.status()['queue_depth'] == 4
+        assert not service.has_capacity()
+
+
+class TestJobServer:
+    def test_jobs_are_submitted_and_queried(self, service, slides_video):
+        server = JobServer(service, '127.0.0.1', 0).start()
+        try:
+            status, created = request(f"{server.url}/jobs", {"file": str(slides_video), "mode": "diff",
+                                                             "options": {"threshold": 5.0, "interval": 1}})
+            assert status == 202
+            assert request(f"{server.url}/status")[1]['queue_depth'] == 1
+
+            service.start()
+            wait_for(lambda: request(f"{server.url}/jobs/{created['id']}")[1]['status'] == 'done')
+            assert request(f"{server.url}/jobs/{created['id']}")[1]['frames'] == 8
+            assert request(f"{server.url}/jobs/unknown")[0] == 404
+        finally:
+            server.close()
+
+    def test_invalid_and_excess_jobs_are_refused(self, temp_dir, slides_video):
+        service = JobService(workers=1, queue_size=1, output_dir=temp_dir)
+        server = JobServer(service, '127.0.0.1', 0).start()
+        try:
+            assert request(f"{server.url}/jobs", {"mode": "diff"})[0] == 400
+            assert request(f"{server.url}/jobs", {"file": str(slides_video)})[0] == 202
+
+            status, body = request(f"{server.url}/jobs", {"file": str(slides_video)})
+            assert status == 503
+            assert body['status']['queue_depth'] == 1
+        finally:
+            server.close()
+
+
+class TestInboxWatcher:
+    def test_job_files_are_processed_and_filed(self, service, slides_video, temp_dir):
+        inbox = temp_dir / "inbox"
+        watcher = InboxWatcher(service, inbox, poll_interval=0.02)
+        service.on_change = watcher.job_changed
+        (inbox / "talk.json").write_text(json.dumps({"file": str(slides_video),
+                                                     "options": {"threshold": 5.0, "interval": 1}}))
+        (inbox / "broken.json").write_text("{not json")
+        service.start()
+        watcher.start()
+        try:
+            wait_for(lambda: (inbox / "done" / "talk.result.json").exists())
+        finally:
+            watcher.close()
+
+        assert json.loads((inbox / "done" / "talk.result.json").read_text())['frames'] == 8
+        assert (inbox / "failed" / "broken.json").exists()
+        assert "Invalid job" in json.loads((inbox / "failed" / "broken.result.json").read_text())['error']
+        assert json.loads((inbox / "status.json").read_text())['jobs']['done'] == 1
+
+    def test_files_wait_in_the_inbox_while_the_queue_is_full(self, temp_dir, slides_video):
+        service = JobService(workers=1, queue_size=1, output_dir=temp_dir)
+        inbox = temp_dir / "inbox"
+        watcher = InboxWatcher(service, inbox)
+        for name in ("a.json", "b.json"):
+            (inbox / name).write_text(json.dumps({"file": str(slides_video)}))
+
+        assert watcher.poll() == 1
+        assert (inbox / "b.json").exists()
+        assert len(list((inbox / "processing").glob("*.json"))) == 1
+
+    def test_queued_files_return_to_the_inbox_when_the_service_stops(self, temp_dir, slides_video):
+        service = JobService(workers=1, queue_size=4, output_dir=temp_dir)
+        inbox = temp_dir / "inbox"
+        watcher = InboxWatcher(service, inbox)
+        service.on_change = watcher.job_changed
+        for name in ("a.json", "b.json"):
+            (inbox / name).write_text(json.dumps({"file": str(slides_video)}))
+        assert watcher.poll() == 2
+
+        service.close(wait=False)
+
+        assert sorted(path.name for path in inbox.glob("*.json")) == ["a.json", "b.json", "status.json"]
+        assert list((inbox / "processing").iterdir()) == [] and list((inbox / "failed").iterdir()) == []
+        assert [job.status for job in service.jobs()] == ['cancelled', 'cancelled']
+        assert json.loads((inbox / "status.json").read_text())['jobs']['cancelled'] == 2
+
+    def test_unfinished_files_are_requeued_on_start(self, service, temp_dir):
+        inbox = temp_dir / "inbox"
+        watcher = InboxWatcher(service, inbox, poll_interval=60)
+        (inbox / "processing" / "left.json").write_text("{}")
+        watcher.start()
+        try:
+            wait_for(lambda: (inbox / "failed" / "left.result.json").exists())
+        finally:
+            watcher.close()
+
+        assert not (inbox / "processing" / "left.json").exists()
@@ -0,0 +1,197 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import cv2
+import numpy as np
+from click.testing import CliRunner
+from src.core.frame_extractor import DifferenceFrameExtractor, ExtractionStats
+from src.core.decoder import OpenCVDecoder
+from src.core.timeline import SignatureTimeline, TimelineCache, difference_scores
+from src import sweep
+
+
+@pytest.fixture
+def cache(temp_dir):
+    return TimelineCache(temp_dir / "timelines")
+
+
+def run(video, output_dir, cache=None, **kwargs):
+    extractor = DifferenceFrameExtractor(output_dir=output_dir, show_progress=False, timeline_cache=cache)
+    frames = [(frame.frame_index, frame.score)
+              for frame in extractor.iter_frames(str(video), save=False, **kwargs)]
+    return frames, extractor.last_stats
+
+
+class TestSignatureTimeline:
+    def test_select_matches_difference_semantics(self):
+        timeline = SignatureTimeline(np.array([0, 5, 10, 15]), np.array([np.nan, 3.0, 12.0, 8.0]), None,
+                                     5, 10.0, 20)
+
+        assert timeline.select(10.0).tolist() == [0, 2]
+        assert timeline.select(2.0).tolist() == [0, 1, 2, 3]
+        assert timeline.sweep([2.0, 10.0, 20.0]) == {2.0: 4, 10.0: 2, 20.0: 1}
+
+    def test_rescoring_needs_thumbnails_and_a_multiple(self):
+        thumbnails = np.stack([np.full((4, 4), value, np.uint8) for value in (0, 10, 30, 60)])
+        timeline = SignatureTimeline(np.array([0, 2, 4, 6]), difference_scores(thumbnails), thumbnails,
+                                     2, 10.0, 8)
+
+        coarse = timeline.rescored(4)
+        assert coarse.frame_indices.tolist() == [0, 4]
+        assert coarse.scores[1] == 30.0
+        with pytest.raises(ValueError):
+            timeline.rescored(3)
+        with pytest.raises(ValueError):
+            SignatureTimeline(timeline.frame_indices, timeline.scores, None, 2, 10.0, 8).rescored(4)
+
+
+class TestTimelineCache:
+    def test_threshold_change_decodes_only_selected_frames(self, slides_video, temp_dir, cache):
+        recorded, first = run(slides_video, temp_dir, cache, threshold=5.0, interval=1, compare_width=160)
+        cached, stats = run(slides_video, temp_dir, cache, threshold=5.0, interval=1, compare_width=160)
+        expected, _ = run(slides_video, temp_dir, threshold=40.0, interval=1, compare_width=160)
+        fewer, fewer_stats = run(slides_video, temp_dir, cache, threshold=40.0, interval=1, compare_width=160)
+
+        assert first.strategy != 'timeline' and first.frames_sampled == 120
+        assert cached == recorded
+        assert stats.strategy == 'timeline'
+        assert fewer == expected
+        assert fewer_stats.frames_sampled == len(fewer) < len(recorded)
+
+    def test_cached_frames_are_the_decoded_frames(self, slides_video, temp_dir, cache):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir / "live", show_progress=False)
+        live = extractor.extract(str(slides_video), threshold=5.0, interval=1)
+        run(slides_video, temp_dir, cache, threshold=5.0, interval=1)
+        cached = DifferenceFrameExtractor(output_dir=temp_dir / "cached", show_progress=False,
+                                          timeline_cache=cache)
+        paths = cached.extract(str(slides_video), threshold=5.0, interval=1)
+
+        assert cached.last_stats.strategy == 'timeline'
+        assert [os.path.basename(p) for p in paths] == [os.path.basename(p) for p in live]
+        for a, b in zip(paths, live):
+            assert np.array_equal(cv2.imread(a), cv2.imread(b))
+
+    def test_multiple_of_cached_interval_is_rescored(self, slides_video, temp_dir, cache):
+        run(slides_video, temp_dir, cache, threshold=5.0, interval=2, compare_width=80)
+        expected, _ = run(slides_video, temp_dir, threshold=5.0, interval=6, compare_width=80)
+        cached, stats = run(slides_video, temp_dir, cache, threshold=5.0, interval=6, compare_width=80)
+
+        assert stats.strategy == 'timeline'
+        assert [index for index, _ in cached] == [index for index, _ in expected]
+        assert [score for _, score in cached] == pytest.approx([score for _, score in expected])
+
+    def test_wide_thumbnails_serve_only_their_interval(self, slides_video, temp_dir):
+        cache = TimelineCache(temp_dir / "timelines", thumbnail_max_width=64)
+        run(slides_video, temp_dir, cache, threshold=5.0, interval=2)
+        _, same = run(slides_video, temp_dir, cache, threshold=9.0, interval=2)
+        _, other = run(slides_video, temp_dir, cache, threshold=5.0, interval=4)
+
+        assert same.strategy == 'timeline'
+        assert other.strategy != 'timeline'
+
+    def test_settings_are_part_of_the_key(self, slides_video, temp_dir, cache):
+        run(slides_video, temp_dir, cache, threshold=5.0, interval=1, compare_width=160)
+        _, other_width = run(slides_video, temp_dir, cache, threshold=5.0, interval=1, compare_width=80)
+        _, other_region = run(slides_video, temp_dir, cache, threshold=5.0, interval=1, compare_width=160,
+                              roi=(0, 0, 160, 120))
+
+        assert other_width.strategy != 'timeline'
+        assert other_region.strategy != 'timeline'
+
+    def test_changed_video_is_analyzed_again(self, slides_video, sample_video, temp_dir, cache):
+        video = temp_dir / "lecture.mp4"
+        video.write_bytes(slides_video.read_bytes())
+        run(video, temp_dir, cache, threshold=5.0, interval=1)
+        video.write_bytes(sample_video.read_bytes())
+        os.utime(video, ns=(0, 0))
+
+        _, stats = run(video, temp_dir, cache, threshold=5.0, interval=1)
+        assert stats.strategy != 'timeline'
+
+    def test_interrupted_run_stores_nothing(self, slides_video, temp_dir, cache):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir, show_progress=False, timeline_cache=cache)
+        frames = extractor.iter_frames(str(slides_video), threshold=5.0, interval=1, save=False)
+        next(frames)
+        frames.close()
+
+        _, stats = run(slides_video, temp_dir, cache, threshold=5.0, interval=1)
+        assert stats.strategy != 'timeline'
+        assert list(cache.directory.glob("*/.recording-*")) == []
+
+    def test_timeline_that_cannot_be_stored_does_not_fail_the_run(self, slides_video, temp_dir, cache,
+                                                                  monkeypatch):
+        def conflict(*args):
+            raise OSError(39, "Directory not empty")
+        monkeypatch.setattr(cache, '_store', conflict)
+
+        frames, _ = run(slides_video, temp_dir, cache, threshold=5.0, interval=1)
+        assert [frame_index for frame_index, _ in frames] == [0, 13, 24, 37, 50, 71, 88, 103]
+        assert list(cache.directory.glob("*/.recording-*")) == []
+
+    def test_concurrent_digests_are_all_remembered(self, slides_video, temp_dir, cache):
+        videos = []
+        for i in range(8):
+            videos.append(temp_dir / f"copy_{i}.mp4")
+            videos[-1].write_bytes(slides_video.read_bytes())
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            digests = set(executor.map(cache.video_digest, videos))
+
+        assert len(digests) == 1
+        index = json.loads((cache.directory / "digests.json").read_text())
+        assert set(index) == {str(video.resolve()) for video in videos}
+        assert list(cache.directory.glob("*.tmp")) == []
+
+    def test_digest_that_cannot_be_remembered_is_still_returned(self, slides_video, temp_dir):
+        (temp_dir / "timelines").write_text("not a directory")
+        cache = TimelineCache(temp_dir / "timelines")
+
+        assert len(cache.video_digest(slides_video)) == 64
+
+    def test_timeline_is_memory_mapped(self, slides_video, temp_dir, cache):
+        extractor = DifferenceFrameExtractor(output_dir=temp_dir, show_progress=False, timeline_cache=cache)
+        timeline = extractor.timeline(str(slides_video), interval=1, compare_width=160)
+
+        assert len(timeline) == 120
+        assert isinstance(timeline.scores, np.memmap)
+        assert timeline.thumbnails.shape == (120, 120, 160)
+        assert timeline.select(5.0).tolist() == [0, 13, 24, 37, 50, 71, 88, 103]
+
+
+class TestFramesAt:
+    def test_opencv_decoder_seeks_to_requested_frames(self, slides_video):
+        cap = cv2.VideoCapture(str(slides_video))
+        frames = []
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+
+        cap = cv2.VideoCapture(str(slides_video))
+        stats = ExtractionStats()
+        decoded = list(OpenCVDecoder(cap, 'seek', len(frames), stats).frames_at([3, 4, 50, 119]))
+        cap.release()
+
+        assert [index for index, _ in decoded] == [3, 4, 50, 119]
+        assert all(np.array_equal(frame, frames[index]) for index, frame in decoded)
+        assert stats.frames_sampled == 4
+
+
+class TestSweepCommand:
+    def test_reports_frames_per_threshold(self, slides_video, temp_dir, monkeypatch):
+        monkeypatch.setattr('src.core.timeline.settings.TIMELINE_CACHE_DIR', temp_dir / "timelines")
+        monkeypatch.setattr('src.core.frame_extractor.settings.FRAMES_DIR', temp_dir / "frames")
+        # setup_logger would add a file sink under the working directory for the rest of the session
+        monkeypatch.setattr('src.sweep.setup_logger', lambda: None)
+        result = CliRunner().invoke(sweep.main, ['--file', str(slides_video), '--thresholds', '5,500',
+                                                 '--interval', '1', '--timestamps'])
+
+        assert result.exit_code == 0, result.output
+        lines = result.output.splitlines()
+        header = next(i for i, line in enumerate(lines) if line.lstrip().startswith('Threshold'))
+        rows = lines[header + 2:header + 4]
+        assert rows[0].split()[:2] == ['5', '8']
+        assert '0:01.3' in rows[0]
+        assert rows[1].split()[:2] == ['500', '1']